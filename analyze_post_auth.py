@@ -4,95 +4,129 @@ Análisis de paquetes POST-AUTENTICACIÓN
 Identifica keep-alive, pings y parches anti-desync
 """
 
-import json
 import sys
 from collections import defaultdict
 
-def analyze_post_auth_packets(json_file):
+from src.analysis.store import open_store
+
+def analyze_post_auth_packets(source, session=None):
     """Analiza paquetes después de la autenticación"""
-    
-    with open(json_file, 'r') as f:
-        packets = json.load(f)
-    
-    # Encontrar paquete de autenticación
-    auth_index = None
-    for i, pkt in enumerate(packets):
-        if pkt.get('component') == 1 and pkt.get('command') in [60, 200]:
-            auth_index = i
-            print(f"✅ Autenticación encontrada en paquete #{i}")
-            break
-    
-    if auth_index is None:
+
+    store = open_store(source)
+    sessions = store.sessions()
+    session = session or (sessions[0] if sessions else None)
+
+    # Encontrar paquete de autenticación (consulta indexada)
+    auth = store.auth_packet(session) if session else None
+    if auth is None:
         print("❌ No se encontró paquete de autenticación")
         return
-    
+    auth_index = auth['id']
+    print(f"✅ Autenticación encontrada en paquete #{auth_index} (sesión {session})")
+
     # Analizar paquetes posteriores
     print(f"\n{'='*80}")
     print(f"PAQUETES POST-AUTENTICACIÓN (después del #{auth_index})")
     print(f"{'='*80}\n")
-    
+
     # Estadísticas
     component_stats = defaultdict(int)
     command_stats = defaultdict(lambda: defaultdict(int))
-    
+
     # Analizar primeros 50 paquetes post-auth
-    post_auth = packets[auth_index+1:auth_index+51]
-    
+    post_auth = store.after_auth(session, limit=50)
+
     for i, pkt in enumerate(post_auth, start=1):
-        comp = pkt.get('component', '?')
-        cmd = pkt.get('command', '?')
-        direction = pkt.get('direction', '?')
-        length = pkt.get('length', 0)
-        msg_type = pkt.get('msg_type', 0)
-        
+        comp = pkt['component']
+        cmd = pkt['command']
+        direction = pkt['direction']
+        length = pkt['length']
+        msg_type = pkt['msg_type']
+
         component_stats[comp] += 1
         command_stats[comp][cmd] += 1
-        
+
         # Mostrar paquetes relevantes
         if i <= 20:  # Primeros 20
             msg_type_str = "REQ" if msg_type == 0 else "RESP"
-            print(f"Pkt #{i:2d} | {direction:4s} | Comp: 0x{comp:02X} | "
+            print(f"Pkt #{i:2d} | {direction:7s} | Comp: 0x{comp:02X} | "
                   f"Cmd: 0x{cmd:02X} ({cmd:3d}) | {msg_type_str:4s} | "
                   f"{length:4d} bytes")
-    
+
     # Resumen de componentes
     print(f"\n{'='*80}")
     print("ESTADÍSTICAS DE COMPONENTES")
     print(f"{'='*80}\n")
-    
+
     for comp in sorted(component_stats.keys()):
         count = component_stats[comp]
         print(f"Component 0x{comp:02X}: {count} paquetes")
-        
+
         # Comandos de este componente
         for cmd in sorted(command_stats[comp].keys()):
             cmd_count = command_stats[comp][cmd]
             print(f"  → Command 0x{cmd:02X} ({cmd:3d}): {cmd_count} veces")
-    
-    # Buscar patrones de keep-alive
+
+    # Buscar patrones de keep-alive en toda la sesión post-auth
     print(f"\n{'='*80}")
-    print("PATRONES IDENTIFICADOS")
+    print("PATRONES IDENTIFICADOS (sesión completa)")
     print(f"{'='*80}\n")
-    
+
+    counts = store.command_counts(session, after_id=auth_index)
+
     # Buscar pings (component 0x09, command 0x02 típicamente)
-    pings = [p for p in post_auth if p.get('component') == 9 and p.get('command') == 2]
-    print(f"🔔 Pings (Comp 0x09, Cmd 0x02): {len(pings)} encontrados")
-    
+    pings = sum(n for comp, cmd, n in counts if comp == 0x09 and cmd == 0x02)
+    print(f"🔔 Pings (Comp 0x09, Cmd 0x02): {pings} encontrados")
+
     # Buscar component 0x02 (típicamente game state)
-    game_state = [p for p in post_auth if p.get('component') == 2]
-    print(f"🎮 Game State (Comp 0x02): {len(game_state)} paquetes")
-    
+    game_state = sum(n for comp, cmd, n in counts if comp == 0x02)
+    print(f"🎮 Game State (Comp 0x02): {game_state} paquetes")
+
     # Buscar command 0x14 (parches anti-desync)
-    desync_patches = [p for p in post_auth if p.get('command') == 0x14]
-    print(f"🔧 Potenciales anti-desync (Cmd 0x14): {len(desync_patches)} paquetes")
-    
+    desync_patches = sum(n for comp, cmd, n in counts if cmd == 0x14)
+    patched = len(store.after_auth(session, component=0x02, command=0x14))
+    print(f"🔧 Potenciales anti-desync (Cmd 0x14): {desync_patches} paquetes "
+          f"({patched} son 0x02/0x14)")
+
+    store.close()
     return post_auth
 
+def analyze_post_auth_bulk(source, session=None):
+    """
+    Estadísticas post-auth vectorizadas (NumPy) para capturas de millones
+    de paquetes: todos los headers se decodifican en un solo paso.
+    """
+    from src.analysis.bulk import load_batch, post_auth_summary
+
+    batch = load_batch(source, session)
+    summary = post_auth_summary(batch.decode_headers())
+
+    if summary['auth_index'] is None:
+        print("❌ No se encontró paquete de autenticación")
+        return summary
+
+    print(f"✅ Autenticación encontrada en paquete #{summary['auth_index']}")
+    print(f"   {summary['post_auth']}/{summary['total']} paquetes post-auth\n")
+
+    print(f"{'='*80}")
+    print("FRECUENCIA DE COMANDOS POST-AUTH")
+    print(f"{'='*80}\n")
+    for (comp, cmd), count in summary['commands'].items():
+        print(f"  0x{comp:02X}/0x{cmd:02X}: {count} veces")
+
+    print(f"\n🔔 Pings (Comp 0x09, Cmd 0x02): {summary['pings']} encontrados")
+    print(f"🎮 Game State (Comp 0x02): {summary['game_state']} paquetes")
+    print(f"🔧 Potenciales anti-desync (Cmd 0x14): {summary['cmd_0x14']} paquetes "
+          f"({summary['desync_targets']} son 0x02/0x14)")
+    return summary
+
 if __name__ == '__main__':
-    json_file = 'blaze_packets_analysis.json'
-    
-    if len(sys.argv) > 1:
-        json_file = sys.argv[1]
-    
-    print(f"\n🔬 Analizando post-autenticación en: {json_file}\n")
-    analyze_post_auth_packets(json_file)
+    args = [a for a in sys.argv[1:] if a != '--bulk']
+    source = args[0] if args else 'blaze_packets_analysis.json'
+    session = args[1] if len(args) > 1 else None
+
+    print(f"\n🔬 Analizando post-autenticación en: {source}\n")
+    if '--bulk' in sys.argv:
+        analyze_post_auth_bulk(source, session)
+    else:
+        analyze_post_auth_packets(source, session)
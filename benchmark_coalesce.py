@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark de agrupación de escrituras
+Cuenta las syscalls de envío (send) que hace el proxy por cada 1000 frames
+escritos en los modos latency y throughput, con el juego enviando cada
+request por separado, EA respondiendo una a una y auto-respuestas de
+keep-alive hacia el mismo socket del cliente
+
+Uso: python benchmark_coalesce.py [requests] [ventana]
+"""
+
+import asyncio
+import logging
+import socket
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.network.blaze import BlazeFramer
+from src.network.proxy import ProxyServer
+from src.network.tdf import BlazeResponseBuilder
+
+RESPONSE_SIZE = 12
+
+
+def request(component: int, command: int, msg_id: int) -> bytes:
+    header = bytearray(12)
+    header[3] = component
+    header[5] = command
+    header[10:12] = (msg_id & 0xFFFF).to_bytes(2, 'big')
+    return bytes(header)
+
+
+class SendCounter:
+    """Cuenta socket.send por descriptor mientras está activo"""
+
+    def __init__(self):
+        self.by_fd = Counter()
+        self._original = None
+
+    def __enter__(self):
+        self._original = original = socket.socket.send
+        by_fd = self.by_fd
+
+        def send(sock, data, *args):
+            by_fd[sock.fileno()] += 1
+            return original(sock, data, *args)
+
+        socket.socket.send = send
+        return self
+
+    def __exit__(self, *exc):
+        socket.socket.send = self._original
+
+
+async def run(fast_path: bool, mode: str, window: float, requests: int, burst: int):
+    harness_fds = set()
+
+    async def fake_ea(reader, writer):
+        """Responde cada request con su propia escritura"""
+        harness_fds.add(writer.get_extra_info('socket').fileno())
+        framer = BlazeFramer()
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                for frame in framer.feed(data):
+                    writer.write(BlazeResponseBuilder.build_empty_response(
+                        frame[3], frame[5], (frame[10] << 8) | frame[11]
+                    ))
+                    await asyncio.sleep(0)
+        except ConnectionError:
+            pass
+        writer.close()
+
+    ea_server = await asyncio.start_server(fake_ea, '127.0.0.1', 0)
+    ea_port = ea_server.sockets[0].getsockname()[1]
+    proxy = ProxyServer(port=0, ea_server='127.0.0.1', ea_port=ea_port, fast_path=fast_path,
+                        write_mode=mode, coalesce_window=window)
+    proxy_task = asyncio.create_task(proxy.start())
+    await proxy.listening.wait()
+    proxy_port = proxy.server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection('127.0.0.1', proxy_port)
+    harness_fds.add(writer.get_extra_info('socket').fileno())
+    # Login primero: con la sesión autenticada los keep-alive 0x0B se auto-responden
+    writer.write(request(0x01, 0xC8, 0xFFFF))
+    await reader.readexactly(RESPONSE_SIZE)
+
+    # Mitad requests normales, mitad keep-alive (respuesta de EA + auto-respuesta)
+    keepalives = requests // 2
+    frames_written = requests + (requests - keepalives) + keepalives * 2
+    with SendCounter() as counter:
+        start = time.perf_counter()
+        sent = 0
+        while sent < requests:
+            count = min(burst, requests - sent)
+            expected = 0
+            for i in range(sent, sent + count):
+                if i % 2:
+                    writer.write(request(0x0B, 0x8C, i))
+                    expected += 2
+                else:
+                    writer.write(request(0x04, 0x10, i))
+                    expected += 1
+                await asyncio.sleep(0)
+            await reader.readexactly(expected * RESPONSE_SIZE)
+            sent += count
+        elapsed = time.perf_counter() - start
+
+    writer.close()
+    await writer.wait_closed()
+    while proxy.metrics.sessions:
+        await asyncio.sleep(0.01)
+    await proxy.stop()
+    proxy_task.cancel()
+    await asyncio.gather(proxy_task, return_exceptions=True)
+    ea_server.close()
+
+    sends = sum(n for fd, n in counter.by_fd.items() if fd not in harness_fds)
+    return sends / frames_written * 1000, requests / elapsed
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    window = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0005
+
+    print(f"\n📊 Benchmark de escrituras: {requests} requests en ráfagas de 32, "
+          f"ventana throughput {window * 1e3:.1f} ms\n")
+    print(f"  {'túnel':<10} {'modo':<22} {'send/1000 frames':>17} {'req/s':>12}")
+    for name, fast_path in (('streams', False), ('fast path', True)):
+        for mode, mode_window in (('latency', 0.0), ('throughput', 0.0), ('throughput', window)):
+            if mode == 'latency':
+                label = mode
+            elif mode_window:
+                label = f"{mode} ({mode_window * 1e3:.1f} ms)"
+            else:
+                label = f"{mode} (iteración)"
+            per_thousand, rate = asyncio.run(run(fast_path, mode, mode_window, requests, 32))
+            print(f"  {name:<10} {label:<22} {per_thousand:>17.1f} {rate:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark de los túneles del proxy
+Compara el coste por paquete de la versión streams (StreamReader + drain)
+con el fast path (BufferedProtocol + transport.write)
+
+Uso: python benchmark_tunnels.py [paquetes] [ventana]
+"""
+
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.network.blaze import BlazeFramer
+from src.network.fastpath import install_uvloop
+from src.network.proxy import ProxyServer
+from src.network.tdf import BlazeResponseBuilder
+
+PING = bytes.fromhex('000000090002000000000000')
+RESPONSE_SIZE = 20
+
+
+
+async def fake_ea(reader, writer):
+    """Responde cada ping con una respuesta de 20 bytes"""
+    framer = BlazeFramer()
+    responses = [BlazeResponseBuilder.build_ping_response(i) for i in range(40)]
+    try:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            frames = framer.feed(data)
+            if frames:
+                writer.write(b''.join(responses[((f[10] << 8) | f[11]) % 40] for f in frames))
+    except ConnectionError:
+        pass
+    writer.close()
+
+
+def make_batch(start: int, count: int) -> bytes:
+    batch = bytearray()
+    for i in range(start, start + count):
+        frame = bytearray(PING)
+        frame[10:12] = (i & 0xFFFF).to_bytes(2, 'big')
+        batch += frame
+    return bytes(batch)
+
+
+async def run(fast_path: bool, packets: int, window: int) -> float:
+    ea_server = await asyncio.start_server(fake_ea, '127.0.0.1', 0)
+    ea_port = ea_server.sockets[0].getsockname()[1]
+
+    proxy = ProxyServer(port=0, ea_server='127.0.0.1', ea_port=ea_port, fast_path=fast_path)
+    proxy_task = asyncio.create_task(proxy.start())
+    await proxy.listening.wait()
+    proxy_port = proxy.server.sockets[0].getsockname()[1]
+
+    reader, writer = await asyncio.open_connection('127.0.0.1', proxy_port)
+    start = time.perf_counter()
+    sent = 0
+    while sent < packets:
+        count = min(window, packets - sent)
+        writer.write(make_batch(sent, count))
+        await reader.readexactly(count * RESPONSE_SIZE)
+        sent += count
+    elapsed = time.perf_counter() - start
+
+    writer.close()
+    await writer.wait_closed()
+    while proxy.metrics.sessions:
+        await asyncio.sleep(0.01)
+    await proxy.stop()
+    proxy_task.cancel()
+    ea_server.close()
+    return elapsed
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+    packets = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    window = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+
+    loop_name = 'uvloop' if install_uvloop() else 'asyncio'
+    print(f"\n📊 Benchmark túneles: {packets} pings, ventana {window}, loop {loop_name}\n")
+
+    results = {}
+    for name, fast_path in (('streams', False), ('fast path', True)):
+        elapsed = asyncio.run(run(fast_path, packets, window))
+        results[name] = elapsed
+        # Cada ping atraviesa el proxy dos veces (request + respuesta)
+        per_packet = elapsed / (packets * 2) * 1e6
+        print(f"  {name:<10} {elapsed:6.2f} s   {per_packet:6.2f} µs/paquete   "
+              f"{packets / elapsed:>10,.0f} req/s")
+
+    print(f"\n  Mejora fast path: {results['streams'] / results['fast path']:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,21 @@ def parse_hex_line(line: str) -> bytes:
     hex_values = line.strip().split()
     return bytes(int(h, 16) for h in hex_values if len(h) == 2)
 
+def load_stored_packet(ref: str) -> str:
+    """
+    Carga un paquete del almacén indexado: "<store.db>#<id>".
+    Retorna el paquete completo en formato hex.
+    """
+    from src.analysis.store import PacketStore
+    
+    db_path, packet_id = ref.rsplit('#', 1)
+    with PacketStore(db_path) as store:
+        row = store.get(int(packet_id))
+        if row is None:
+            print(f"❌ Paquete #{packet_id} no encontrado en {db_path}")
+            sys.exit(1)
+        return (row['header'] + row['payload']).hex(' ')
+
 def compare_packets(linux_hex: str, windows_hex: str):
     """Compara dos paquetes en formato hex"""
     
@@ -111,6 +126,8 @@ if __name__ == '__main__':
         print('    "00 46 00 01 00 C8 00 00 00 00 00 02 ..."')
         print("\nO pega cada hex en archivos y usa:")
         print("  python3 compare_packets.py @linux.hex @windows.hex")
+        print("\nO compara paquetes del almacén indexado (ingest_packets.py):")
+        print("  python3 compare_packets.py linux.db#12 windows.db#12")
         sys.exit(1)
     
     linux_hex = sys.argv[1]
@@ -125,5 +142,12 @@ if __name__ == '__main__':
         with open(windows_hex[1:], 'r') as f:
             windows_hex = ' '.join(f.read().split())
     
+    # Leer del almacén si tiene forma <store.db>#<id>
+    if '.db#' in linux_hex:
+        linux_hex = load_stored_packet(linux_hex)
+    
+    if '.db#' in windows_hex:
+        windows_hex = load_stored_packet(windows_hex)
+    
     compare_packets(linux_hex, windows_hex)
     print()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Ingesta de capturas al almacén indexado (SQLite)
+Convierte blaze_packets_analysis.json o capturas pcap/pcapng en una base
+que los analizadores consultan por índice
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+from src.analysis.store import PacketStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingiere paquetes Blaze en un store SQLite")
+    parser.add_argument('db', help="Base de datos destino (.db)")
+    parser.add_argument('inputs', nargs='+', help="Archivos .json (analyze_pcap) o .pcap/.pcapng")
+    parser.add_argument('--session', help="Nombre de sesión (por defecto, nombre del archivo)")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+    
+    if args.session and len(args.inputs) > 1:
+        print("❌ --session solo se puede usar con un único archivo")
+        return 1
+    
+    with PacketStore(args.db) as store:
+        for path in map(Path, args.inputs):
+            if not path.exists():
+                print(f"⚠️  Archivo no encontrado: {path}")
+                continue
+            count = store.ingest_file(path, args.session)
+            print(f"✅ {path.name}: {count} paquetes")
+        
+        print(f"\n📦 {args.db}: {store.count()} paquetes en {len(store.sessions())} sesiones")
+    
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,24 +4,31 @@ Skate 3 RPCS3 Proxy - Main Entry Point
 Linux port of Windows proxy for playing Skate 3 online
 """
 
+import time
+_IMPORT_START = time.perf_counter()
+
 import asyncio
 import logging
+import signal
 import sys
+import threading
 from pathlib import Path
+from typing import List, Optional
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from src.network import RedirectorServer, ProxyServer
+# Dependencias pesadas (requests, cryptography, packaging, módulo de memoria)
+# se importan solo cuando la funcionalidad que las usa se ejecuta
+from src.network import RedirectorServer, ProxyServer, ProxySupervisor, MetricsRegistry, MetricsServer
+from src.network.accounts import CredentialPool
+from src.network.fastpath import install_uvloop
+from src.network.upstream import parse_endpoint
+from src.network.response_cache import parse_command_key
 from src.config import ConfigManager, UpdateManager
+from src.startup import StartupProfiler, StartupGraph
 
-# Memory manipulation (optional - requires permissions)
-try:
-    from src.memory import RPCS3MemoryScanner, RPCS3MemoryPatcher
-    MEMORY_AVAILABLE = True
-except ImportError as e:
-    logger.warning(f"Memory module not available: {e}")
-    MEMORY_AVAILABLE = False
+_IMPORT_END = time.perf_counter()
 
 logger = logging.getLogger(__name__)
 
@@ -29,106 +36,276 @@ logger = logging.getLogger(__name__)
 class Skate3Proxy:
     """Main proxy application"""
     
-    def __init__(self):
+    def __init__(self, profile_startup: bool = False, workers: int = 1, fast_path: bool = False,
+                 passthrough: bool = False):
+        self.profile_startup = profile_startup
+        self.workers = workers
+        self.fast_path = fast_path
+        self.passthrough = passthrough
+        self.profiler = StartupProfiler(origin=_IMPORT_START)
+        self.profiler.record('imports', _IMPORT_START, _IMPORT_END)
+        
         self.config = ConfigManager()
         self.updater = UpdateManager(self.config)
         
         self.redirector = None
         self.proxy = None
+        self.metrics = MetricsRegistry()
+        self.metrics_server = None
+        self.usernames = {}
+        
+        # Estado del arranque (ver start)
+        self.startup: Optional[StartupGraph] = None
+        self.settings = None
+        self.credentials = None
+        self.patches = None
+        self.accounts = None
+        self._serve_tasks: List[asyncio.Task] = []
+        self.memory_progress = 0.0
+        self._memory_cancel = threading.Event()
         
     async def start(self):
-        """Inicia todos los servidores"""
+        """
+        Inicia todos los servidores.
+        
+        El arranque es un grafo de fases: los servidores hacen bind en cuanto
+        hay configuración, y los parches de memoria y la verificación de
+        actualizaciones corren después en segundo plano, de modo que RPCS3
+        puede conectarse mientras todavía se localizan los parches.
+        """
         logger.info("=" * 60)
         logger.info("Skate 3 RPCS3 Proxy - Linux Edition v1.0.3")
         logger.info("=" * 60)
         
-        # Cargar configuración
-        settings = self.config.load_settings()
-        credentials = self.config.load_credentials()
+        graph = StartupGraph(self.profiler)
+        graph.add('config load', self.load_config)
+        graph.add('bind', self.bind_servers, after=['config load'])
+        graph.add('memory patching', self.run_memory_patches, after=['bind'])
+        graph.add('update check (background)', self.background_refresh, after=['bind'])
+        self.startup = graph
+        graph.start()
+        graph.background('memory patching', 'update check (background)')
         
-        if not credentials:
+        try:
+            await graph.wait('bind')
+            self.profiler.mark_listening()
+            
+            if self.profile_startup:
+                # Medir el arranque completo y salir
+                await graph.wait()
+                print("\n" + self.profiler.report())
+                await self.stop()
+                await asyncio.gather(*self._serve_tasks, return_exceptions=True)
+                return
+            
+            # Un fallo en segundo plano no tumba las sesiones activas
+            await asyncio.gather(*self._serve_tasks)
+        except KeyboardInterrupt:
+            logger.info("\n\nDeteniendo servidores...")
+            await self.stop()
+    
+    async def load_config(self):
+        """Fase: settings, credenciales y usernames en caché"""
+        self.settings = self.config.load_settings()
+        self.credentials = self.config.load_credentials()
+        self.patches = self.config.load_patches()
+        
+        # accounts.json (varias cuentas por proxy) tiene prioridad sobre login.json
+        accounts = self.config.load_accounts()
+        if accounts is not None:
+            self.accounts = CredentialPool(accounts.accounts, accounts.by_address,
+                                           accounts.by_psn_name, accounts.default)
+            if self.credentials:
+                logger.info("accounts.json presente: login.json no se usa")
+        elif not self.credentials:
             logger.warning("No se encontraron credenciales configuradas")
             logger.warning("Crea ~/.config/skate3-proxy/login.json con tu info de EA")
             logger.warning('Formato: {"email": "...", "password": "...", "psnName": "..."}')
+            logger.warning("(o accounts.json para varias cuentas en el mismo proxy)")
         
-        # Verificar actualizaciones
-        update_info = self.updater.check_update()
-        if update_info:
-            logger.info(f"Nueva versión disponible: {update_info.get('version')}")
-            if 'changelog' in update_info:
-                logger.info(f"Changelog: {update_info['changelog']}")
-        
-        # Descargar usernames
-        usernames = self.updater.download_usernames()
-        logger.info(f"Usernames cargados: {len(usernames)}")
-        
-        # Memory patching (opcional)
-        if MEMORY_AVAILABLE:
-            try:
-                logger.info("\nIntentando conectar a RPCS3...")
-                scanner = RPCS3MemoryScanner()
-                patcher = RPCS3MemoryPatcher(scanner)
-                
-                # Verificar EBOOT
-                if patcher.verify_eboot():
-                    logger.info("Aplicando parches de memoria...")
-                    applied = patcher.apply_all_game_speed_patches()
-                    logger.info(f"✅ {applied}/4 parches aplicados")
-                else:
-                    logger.warning("⚠️  EBOOT modificado, saltando parches")
-                    
-            except RuntimeError as e:
-                logger.info(f"Memory patching no disponible: {e}")
-                logger.info("(El proxy funcionará sin parches de memoria)")
+        # Usernames desde caché (la red se consulta en segundo plano)
+        self.usernames = self.updater.load_cached_usernames()
+        logger.info(f"Usernames cargados de caché: {len(self.usernames)}")
+    
+    async def bind_servers(self):
+        """Fase: crea los servidores y espera a que ambos estén escuchando"""
+        redirect_backends = [parse_endpoint(b, default_port=9999)
+                             for b in self.settings.redirect_backends] or None
+        self.redirector = RedirectorServer(metrics=self.metrics, backends=redirect_backends,
+                                           routing=self.settings.redirect_routing)
+        upstreams = [parse_endpoint(u) for u in self.settings.upstreams] or None
+        cache_ttls = {parse_command_key(k): ttl for k, ttl in self.settings.cache_ttls.items()} or None
+        if self.workers > 1:
+            # N procesos en el puerto 9999 (SO_REUSEPORT); SIGHUP = reinicio gradual
+            self.proxy = ProxySupervisor(
+                workers=self.workers, credentials=self.credentials, metrics=self.metrics,
+                fast_path=self.fast_path, passthrough=self.passthrough, patches=self.patches,
+                upstream_pool=self.settings.upstream_pool,
+                idle_timeout=self.settings.idle_timeout, read_timeout=self.settings.read_timeout,
+                upstreams=upstreams, reconnect_attempts=self.settings.reconnect_attempts,
+                park_timeout=self.settings.park_timeout,
+                write_mode=self.settings.write_mode, coalesce_window=self.settings.coalesce_window,
+                ping_resync=self.settings.ping_resync,
+                cache_size=self.settings.cache_size, cache_ttls=cache_ttls,
+                accounts=self.accounts
+            )
+            asyncio.get_running_loop().add_signal_handler(
+                signal.SIGHUP, lambda: asyncio.create_task(self.proxy.restart_workers())
+            )
         else:
-            logger.info("Memory patching deshabilitado (módulo no disponible)")
+            self.proxy = ProxyServer(
+                credentials=self.credentials, metrics=self.metrics, fast_path=self.fast_path,
+                passthrough=self.passthrough, patches=self.patches,
+                upstream_pool=self.settings.upstream_pool,
+                idle_timeout=self.settings.idle_timeout, read_timeout=self.settings.read_timeout,
+                upstreams=upstreams, reconnect_attempts=self.settings.reconnect_attempts,
+                park_timeout=self.settings.park_timeout,
+                write_mode=self.settings.write_mode, coalesce_window=self.settings.coalesce_window,
+                ping_resync=self.settings.ping_resync,
+                cache_size=self.settings.cache_size, cache_ttls=cache_ttls,
+                accounts=self.accounts
+            )
         
-        # Crear servidores
-        self.redirector = RedirectorServer()
-        self.proxy = ProxyServer(credentials=credentials)
+        # Endpoint de métricas (Prometheus)
+        if self.settings.metrics_port:
+            self.metrics_server = MetricsServer(self.metrics, port=self.settings.metrics_port)
+            try:
+                await self.metrics_server.start()
+            except OSError as e:
+                # Puerto ocupado (p.ej. node_exporter en 9100): el proxy sigue sin /metrics
+                logger.warning(f"Endpoint /metrics deshabilitado: no se pudo abrir el puerto "
+                               f"{self.settings.metrics_port} ({e}); cambia metricsPort en settings.json")
+                self.metrics_server = None
         
-        # Iniciar ambos servidores
         logger.info("\nIniciando servidores...")
+        self._serve_tasks = [
+            asyncio.create_task(self.redirector.start()),
+            asyncio.create_task(self.proxy.start()),
+        ]
         
+        for server, task in zip((self.redirector, self.proxy), self._serve_tasks):
+            waiter = asyncio.create_task(server.listening.wait())
+            await asyncio.wait({waiter, task}, return_when=asyncio.FIRST_COMPLETED)
+            if not server.listening.is_set():
+                # El servidor terminó sin hacer bind: propagar su error
+                waiter.cancel()
+                await task
+    
+    async def run_memory_patches(self):
+        """
+        Fase: parches de memoria de RPCS3 (opcional, requiere permisos).
+        La búsqueda corre en un executor; stop() la cancela.
+        """
         try:
-            await asyncio.gather(
-                self.redirector.start(),
-                self.proxy.start()
-            )
-        except KeyboardInterrupt:
-            logger.info("\n\nDeteniendo servidores...")
-            await self.stop()
+            from src.memory import RPCS3MemoryScanner, RPCS3MemoryPatcher, ScanCancelled
+        except ImportError as e:
+            logger.info(f"Memory patching deshabilitado (módulo no disponible: {e})")
+            return
+        
+        self.metrics.add_gauge(
+            'skate3_memory_patch_progress',
+            'Fraction of the startup memory scan completed',
+            lambda: self.memory_progress
+        )
+        
+        def progress(fraction: float):
+            # Llamado desde el hilo del executor
+            if int(fraction * 10) > int(self.memory_progress * 10):
+                logger.info(f"Parches de memoria: {fraction:.0%}")
+            self.memory_progress = fraction
+        
+        def scan_and_patch():
+            logger.info("\nIntentando conectar a RPCS3...")
+            scanner = RPCS3MemoryScanner()
+            patcher = RPCS3MemoryPatcher(scanner)
+            return patcher.run_startup_patches(progress, self._memory_cancel)
+        
+        loop = asyncio.get_running_loop()
+        try:
+            applied = await loop.run_in_executor(None, scan_and_patch)
+        except RuntimeError as e:
+            logger.info(f"Memory patching no disponible: {e}")
+            logger.info("(El proxy funcionará sin parches de memoria)")
+            return
+        except ScanCancelled:
+            logger.info("Parches de memoria cancelados")
+            return
+        
+        if applied is None:
+            logger.warning("⚠️  EBOOT modificado, saltando parches")
+        else:
+            logger.info(f"✅ {applied}/4 parches aplicados")
+    
+    async def background_refresh(self):
+        """
+        Fase: verifica actualizaciones y refresca usernames una vez que
+        ambos servidores están escuchando (sin bloquear el loop)
+        """
+        update_info, usernames = await self.updater.refresh()
+        if update_info:
+            logger.info(f"Nueva versión disponible: {update_info.get('version')}")
+            if 'changelog' in update_info:
+                logger.info(f"Changelog: {update_info['changelog']}")
+        if usernames:
+            self.usernames = usernames
+        logger.info(f"Usernames cargados: {len(self.usernames)}")
     
     async def stop(self):
         """Detiene todos los servidores"""
+        # Abortar la búsqueda de memoria en curso (corre en otro hilo)
+        self._memory_cancel.set()
+        if self.startup:
+            self.startup.cancel()
         if self.redirector:
             await self.redirector.stop()
         if self.proxy:
             await self.proxy.stop()
+        if self.metrics_server:
+            await self.metrics_server.stop()
 
 
 def main():
     """Entry point"""
     import os
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Skate 3 RPCS3 Proxy')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='Mide cada fase del arranque, imprime el desglose y sale')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Procesos proxy en el puerto 9999 con SO_REUSEPORT (default: 1)')
+    parser.add_argument('--fast-path', action='store_true',
+                        help='Túneles sobre asyncio.Protocol en lugar de streams')
+    parser.add_argument('--passthrough', action='store_true',
+                        help='Solo inspecciona los frames reescribibles; el resto va por splice')
+    args = parser.parse_args()
+    if args.fast_path and args.passthrough:
+        parser.error('--fast-path y --passthrough son excluyentes')
     
     # Configurar logging - soportar DEBUG via env var
     log_level = logging.DEBUG if os.getenv('DEBUG') == '1' else logging.INFO
     
+    # Crear directorio de logs
+    log_dir = Path.home() / '.config' / 'skate3-proxy'
+    log_dir.mkdir(parents=True, exist_ok=True)
+    
     logging.basicConfig(
         level=log_level,
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         handlers=[
             logging.StreamHandler(),
-            logging.FileHandler(Path.home() / '.config' / 'skate3-proxy' / 'proxy.log')
+            logging.FileHandler(log_dir / 'proxy.log')
         ]
     )
     
-    # Crear directorio de logs
-    log_dir = Path.home() / '.config' / 'skate3-proxy'
-    log_dir.mkdir(parents=True, exist_ok=True)
+    # uvloop si está instalado
+    install_uvloop()
     
     # Iniciar aplicación
-    app = Skate3Proxy()
+    app = Skate3Proxy(
+        profile_startup=args.profile_startup, workers=args.workers, fast_path=args.fast_path,
+        passthrough=args.passthrough
+    )
     
     try:
         asyncio.run(app.start())
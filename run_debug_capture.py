@@ -117,75 +117,43 @@ class DebugProxyServer(ProxyServer):
         super().__init__(*args, **kwargs)
         self.packet_logger = packet_logger or PacketLogger()
     
-    async def tunnel_to_ea(self, reader, writer):
-        """RPCS3 → EA con logging"""
-        try:
-            while True:
-                data = await reader.read(4096)
-                if not data:
-                    break
-                
-                # Log packet FROM client
-                desc = "From RPCS3"
-                
-                # Verificar si es autenticación
-                if (len(data) > 5 and 
-                    data[3] == 0x01 and  # Authentication
-                    data[5] == 0xC8):     # Login
-                    
-                    desc = "AUTH REQUEST (Original from RPCS3)"
-                    self.packet_logger.log_packet("RECV", data, desc)
-                    
-                    logger.info("🔐 Interceptado paquete de autenticación")
-                    
-                    if self.credentials:
-                        data = self.inject_credentials(data)
-                        desc = "AUTH REQUEST (Modified with credentials)"
-                        self.packet_logger.log_packet("SEND", data, desc)
-                        logger.info("✅ Credenciales inyectadas y logged")
-                        self.authenticated = True
-                else:
-                    self.packet_logger.log_packet("SEND", data, desc)
-                
-                writer.write(data)
-                await writer.drain()
-                
-        except Exception as e:
-            logger.error(f"Error en tunnel_to_ea: {e}")
+    def inject_credentials(self, data, account=None):
+        """Login de RPCS3 con logging del original y del modificado"""
+        data = bytes(data)
+        self.packet_logger.log_packet("RECV", data, "AUTH REQUEST (Original from RPCS3)")
+        data = super().inject_credentials(data, account)
+        self.packet_logger.log_packet("SEND", data, "AUTH REQUEST (Modified with credentials)")
+        logger.info("✅ Credenciales inyectadas y logged")
+        return data
     
-    async def tunnel_from_ea(self, reader, writer):
+    def process_client_frame(self, session_id, frame):
+        """RPCS3 → EA con logging (el login ya pasó por inject_credentials)"""
+        data = bytes(frame)
+        self.packet_logger.log_packet("SEND", data, "From RPCS3")
+        return super().process_client_frame(session_id, data)
+    
+    def process_ea_frame(self, session_id, frame):
         """EA → RPCS3 con logging"""
-        try:
-            while True:
-                data = await reader.read(4096)
-                if not data:
-                    break
-                
-                # Log packet FROM EA
-                desc = "From EA Server"
-                
-                # Identificar respuesta de autenticación
-                if len(data) >= 12:
-                    component = data[3]
-                    command = data[5]
-                    error = int.from_bytes(data[6:8], 'big')
-                    
-                    if component == 0x01:  # Authentication
-                        if error == 0:
-                            desc = f"AUTH RESPONSE (SUCCESS) - Cmd: 0x{command:02X}"
-                        else:
-                            desc = f"AUTH RESPONSE (ERROR {error}) - Cmd: 0x{command:02X}"
-                
-                self.packet_logger.log_packet("RECV", data, desc)
-                
-                # Aplicar parches anti-desync
-                data = self.apply_desync_patches(data)
-                
-                writer.write(data)
-                await writer.drain()
-                
-        except Exception as e:
-            logger.error(f"Error en tunnel_from_ea: {e}")
+        data = bytes(frame)
+        
+        # Log packet FROM EA
+        desc = "From EA Server"
+        
+        # Identificar respuesta de autenticación
+        component = data[3]
+        command = data[5]
+        error = int.from_bytes(data[6:8], 'big')
+        
+        if component == 0x01:  # Authentication
+            if error == 0:
+                desc = f"AUTH RESPONSE (SUCCESS) - Cmd: 0x{command:02X}"
+            else:
+                desc = f"AUTH RESPONSE (ERROR {error}) - Cmd: 0x{command:02X}"
+        
+        self.packet_logger.log_packet("RECV", data, desc)
+        
+        # Aplicar parches anti-desync
+        return super().process_ea_frame(session_id, data)
 
 def load_credentials_simple():
     """Carga credenciales sin ConfigManager"""
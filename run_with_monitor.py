@@ -16,6 +16,7 @@ import sys
 from src.memory.scanner import RPCS3MemoryScanner
 from src.network.redirector import RedirectorServer
 from src.network.proxy import ProxyServer, EACredentials
+from src.network.metrics import MetricsRegistry, MetricsServer
 
 # Setup logging
 logging.basicConfig(
@@ -27,9 +28,10 @@ logger = logging.getLogger(__name__)
 class SimpleMemoryMonitor:
     """Monitor simple de memoria sin psutil"""
     
-    def __init__(self):
+    def __init__(self, metrics: MetricsRegistry):
         self.rpcs3_scanner = None
         self.proxy_pid = os.getpid()
+        self.metrics = metrics
         self.stats = {
             'rpcs3': {
                 'pid': None,
@@ -37,8 +39,6 @@ class SimpleMemoryMonitor:
             },
             'proxy': {
                 'pid': self.proxy_pid,
-                'packets_intercepted': 0,
-                'credentials_injected': 0
             }
         }
         
@@ -80,9 +80,15 @@ class SimpleMemoryMonitor:
         
         # Proxy Stats
         print("\n🔧 Proxy:")
+        snap = self.metrics.snapshot()
         print(f"  PID:            {self.stats['proxy']['pid']}")
-        print(f"  Paquetes:       {self.stats['proxy']['packets_intercepted']}")
-        print(f"  Inyecciones:    {self.stats['proxy']['credentials_injected']}")
+        print(f"  Sesiones:       {snap['sessions_active']} activas / {snap['sessions_opened']} totales")
+        print(f"  Paquetes:       {snap['packets_to_ea'] + snap['packets_from_ea']}")
+        print(f"  Bytes → EA:     {snap['bytes_to_ea']}")
+        print(f"  Bytes ← EA:     {snap['bytes_from_ea']}")
+        print(f"  Inyecciones:    {snap['credential_injections']}")
+        print(f"  Auto-resp:      {snap['auto_responses']}")
+        print(f"  Lag del loop:   {snap['loop_lag_last'] * 1000:.1f} ms")
         
         print("\n" + "="*70)
         print("Presiona Ctrl+C para detener")
@@ -95,67 +101,6 @@ class SimpleMemoryMonitor:
             self.print_stats()
             await asyncio.sleep(3)
 
-class MonitoredProxyServer(ProxyServer):
-    """Proxy con contador de paquetes"""
-    
-    def __init__(self, *args, monitor=None, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.monitor = monitor
-    
-    async def tunnel_to_ea(self, reader, writer):
-        """Override para contar paquetes interceptados"""
-        try:
-            while True:
-                data = await reader.read(4096)
-                if not data:
-                    break
-                
-                # Contar paquetes
-                if self.monitor:
-                    self.monitor.stats['proxy']['packets_intercepted'] += 1
-                
-                # Verificar si es paquete de autenticación
-                if (len(data) > 5 and 
-                    data[3] == 0x01 and  # BlazeComponent.Authentication
-                    data[5] == 0xC8):     # AuthenticationCommand.Login
-                    
-                    logger.info("🔐 Interceptado paquete de autenticación")
-                    
-                    if self.credentials:
-                        data = self.inject_credentials(data)
-                        logger.info("✅ Credenciales inyectadas")
-                        if self.monitor:
-                            self.monitor.stats['proxy']['credentials_injected'] += 1
-                        self.authenticated = True
-                    else:
-                        logger.warning("⚠️  Sin credenciales configuradas!")
-                
-                writer.write(data)
-                await writer.drain()
-                
-        except Exception as e:
-            logger.error(f"Error en tunnel_to_ea: {e}")
-    
-    async def tunnel_from_ea(self, reader, writer):
-        """Override para contar paquetes"""
-        try:
-            while True:
-                data = await reader.read(4096)
-                if not data:
-                    break
-                
-                if self.monitor:
-                    self.monitor.stats['proxy']['packets_intercepted'] += 1
-                
-                # Aplicar parches anti-desync
-                data = self.apply_desync_patches(data)
-                
-                writer.write(data)
-                await writer.drain()
-                
-        except Exception as e:
-            logger.error(f"Error en tunnel_from_ea: {e}")
-
 def load_credentials_simple():
     """Carga credenciales sin ConfigManager"""
     import json
@@ -184,8 +129,9 @@ async def main():
     print("="*70)
     print()
     
-    # Inicializar monitor
-    monitor = SimpleMemoryMonitor()
+    # Inicializar monitor (lee del registro de métricas compartido)
+    metrics = MetricsRegistry()
+    monitor = SimpleMemoryMonitor(metrics)
     
     # Intentar conectar a RPCS3
     await monitor.init_rpcs3_scanner()
@@ -201,12 +147,14 @@ async def main():
     logger.info(f"✅ Credenciales cargadas para: {credentials.email}")
     
     # Inicializar servidores
-    redirector = RedirectorServer(port=42100, proxy_port=9999)
-    proxy = MonitoredProxyServer(
+    redirector = RedirectorServer(port=42100, proxy_port=9999, metrics=metrics)
+    proxy = ProxyServer(
         port=9999,
         credentials=credentials,
-        monitor=monitor
+        metrics=metrics
     )
+    metrics_server = MetricsServer(metrics, port=9100)
+    await metrics_server.start()
     
     # Iniciar monitoreo en background
     monitor_task = asyncio.create_task(monitor.monitor_loop())
@@ -214,6 +162,7 @@ async def main():
     logger.info("\n🚀 Iniciando servidores...")
     logger.info("📡 Redirector: puerto 42100")
     logger.info("🔧 Proxy MITM: puerto 9999")
+    logger.info("📈 Métricas: http://127.0.0.1:9100/metrics")
     logger.info("\n⏳ Esperando conexiones de RPCS3...\n")
     
     # Iniciar servidores
@@ -228,6 +177,7 @@ async def main():
         monitor_task.cancel()
         await redirector.stop()
         await proxy.stop()
+        await metrics_server.stop()
         logger.info("✅ Proxy detenido")
 
 if __name__ == '__main__':
@@ -0,0 +1,12 @@
+"""Analysis package - Offline capture and packet analysis tools"""
+
+from .pcap import CapturedFrame, TCPReassembler, iter_blaze_frames
+from .store import PacketStore, open_store
+
+__all__ = [
+    'CapturedFrame',
+    'TCPReassembler',
+    'iter_blaze_frames',
+    'PacketStore',
+    'open_store',
+]
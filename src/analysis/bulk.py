@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Vectorized Blaze header decoding (NumPy)
+Decodifica los headers de millones de frames en un solo paso vectorizado
+"""
+
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+from ..network.blaze import HEADER_SIZE
+from .store import AUTH_COMMANDS
+
+logger = logging.getLogger(__name__)
+
+# NumPy es opcional: solo lo necesita el análisis masivo
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Layout del header Blaze (12 bytes, big-endian)
+HEADER_FIELDS = [
+    ('length', '>u2'),
+    ('flags', 'u1'),
+    ('component', 'u1'),
+    ('command_hi', 'u1'),
+    ('command', 'u1'),
+    ('error', '>u2'),
+    ('msg_type', '>u2'),
+    ('msg_id', '>u2'),
+]
+
+
+def _require_numpy():
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("numpy no está instalado (pip install numpy)")
+
+
+class FrameBatch:
+    """
+    Frames Blaze en un único buffer contiguo + array de offsets.
+    Evita un objeto Python por paquete durante el análisis masivo.
+    """
+
+    def __init__(self, buffer, offsets):
+        _require_numpy()
+        self.buffer = buffer      # np.uint8[total_bytes]
+        self.offsets = offsets    # np.int64[n_frames + 1]
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    def frame(self, index: int) -> bytes:
+        return self.buffer[self.offsets[index]:self.offsets[index + 1]].tobytes()
+
+    @classmethod
+    def from_frames(cls, frames: Iterable[Union[bytes, object]]) -> 'FrameBatch':
+        """
+        Construye el batch desde frames ya enmarcados (bytes o CapturedFrame).
+        Los frames de menos de 12 bytes se descartan.
+        """
+        _require_numpy()
+        buffer = bytearray()
+        offsets = [0]
+        for frame in frames:
+            data = getattr(frame, 'data', frame)
+            if len(data) < HEADER_SIZE:
+                continue
+            buffer += data
+            offsets.append(len(buffer))
+        # frombuffer comparte la memoria del bytearray (sin otra copia)
+        return cls(np.frombuffer(buffer, dtype=np.uint8),
+                   np.asarray(offsets, dtype=np.int64))
+
+    @classmethod
+    def from_stream(cls, data: bytes) -> 'FrameBatch':
+        """
+        Enmarca un stream Blaze contiguo (p.ej. un volcado de una dirección).
+        Solo se recorren los headers; el payload no se copia.
+        """
+        _require_numpy()
+        offsets = [0]
+        total = len(data)
+        offset = 0
+        while total - offset >= HEADER_SIZE:
+            end = offset + HEADER_SIZE + ((data[offset] << 8) | data[offset + 1])
+            if end > total:
+                break
+            offsets.append(end)
+            offset = end
+        return cls(np.frombuffer(data, dtype=np.uint8, count=offset),
+                   np.asarray(offsets, dtype=np.int64))
+
+    def decode_headers(self):
+        """
+        Extrae todos los headers en un array estructurado (una fila por
+        frame) con un gather vectorizado por columna del header: el único
+        temporal es un índice de n enteros, no uno de n×12.
+        """
+        if len(self) == 0:
+            return np.zeros(0, dtype=header_dtype())
+        raw = np.empty((len(self), HEADER_SIZE), dtype=np.uint8)
+        index = self.offsets[:-1].copy()
+        for column in range(HEADER_SIZE):
+            np.take(self.buffer, index, out=raw[:, column])
+            index += 1
+        return raw.view(header_dtype()).reshape(-1)
+
+
+def header_dtype():
+    """dtype estructurado del header Blaze"""
+    _require_numpy()
+    return np.dtype(HEADER_FIELDS)
+
+
+def load_batch(source, session: Optional[str] = None) -> FrameBatch:
+    """
+    Carga un FrameBatch desde un .db (PacketStore), .json o .pcap/.pcapng.
+
+    Un .db puede tener varias sesiones: sin `session` se usa la primera,
+    como analyze_post_auth.py (el login de cada sesión marca su post-auth).
+    """
+    _require_numpy()
+    source = Path(source)
+
+    if source.suffix == '.db':
+        from .store import PacketStore
+
+        with PacketStore(source) as store:
+            if session is None:
+                sessions = store.sessions()
+                if not sessions:
+                    return FrameBatch.from_frames(())
+                session = sessions[0]
+                if len(sessions) > 1:
+                    logger.info(f"{source}: {len(sessions)} sesiones, analizando {session}")
+            rows = store.conn.execute(
+                "SELECT header, payload FROM packets WHERE session = ? ORDER BY id", (session,)
+            )
+            return FrameBatch.from_frames(header + payload for header, payload in rows)
+
+    if source.suffix == '.json':
+        from .store import iter_json_frames
+        return FrameBatch.from_frames(iter_json_frames(source))
+
+    from .pcap import iter_blaze_frames
+    return FrameBatch.from_frames(iter_blaze_frames(source))
+
+
+def command_keys(headers):
+    """Clave (component << 8 | command) por frame"""
+    return (headers['component'].astype(np.uint16) << 8) | headers['command']
+
+
+def command_histogram(headers) -> Dict[Tuple[int, int], int]:
+    """Tabla de frecuencia por (component, command)"""
+    keys, counts = np.unique(command_keys(headers), return_counts=True)
+    order = np.argsort(-counts, kind='stable')
+    return {(int(k) >> 8, int(k) & 0xFF): int(c) for k, c in zip(keys[order], counts[order])}
+
+
+def auth_index(headers) -> Optional[int]:
+    """Índice del primer paquete de login, o None"""
+    is_auth = (headers['component'] == 0x01) & np.isin(headers['command'], AUTH_COMMANDS)
+    hits = np.flatnonzero(is_auth)
+    return int(hits[0]) if len(hits) else None
+
+
+def post_auth_mask(headers):
+    """Máscara booleana de los frames posteriores al login"""
+    index = auth_index(headers)
+    mask = np.zeros(len(headers), dtype=bool)
+    if index is not None:
+        mask[index + 1:] = True
+    return mask
+
+
+def select(headers, component: Optional[int] = None, command: Optional[int] = None,
+           mask=None):
+    """Máscara de frames que cumplen component/command (y `mask` si se da)"""
+    result = np.ones(len(headers), dtype=bool) if mask is None else mask.copy()
+    if component is not None:
+        result &= headers['component'] == component
+    if command is not None:
+        result &= headers['command'] == command
+    return result
+
+
+def post_auth_summary(headers) -> Dict[str, object]:
+    """
+    Estadísticas post-auth de analyze_post_auth.py calculadas con
+    operaciones sobre arrays.
+    """
+    mask = post_auth_mask(headers)
+    post = headers[mask]
+    return {
+        'auth_index': auth_index(headers),
+        'total': int(len(headers)),
+        'post_auth': int(mask.sum()),
+        'commands': command_histogram(post),
+        'pings': int(select(post, 0x09, 0x02).sum()),
+        'game_state': int(select(post, 0x02).sum()),
+        'cmd_0x14': int(select(post, command=0x14).sum()),
+        'desync_targets': int(select(post, 0x02, 0x14).sum()),
+    }
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+Streaming pcap/pcapng reader with TCP reassembly
+Lee capturas en streaming (memoria constante) y produce frames Blaze completos
+"""
+
+import struct
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, Optional, Set, Tuple
+
+from ..network.blaze import BlazeFramer
+
+logger = logging.getLogger(__name__)
+
+# Puertos relevantes: 42100 (redirector), 9999 (proxy), 10010 (EA server)
+DEFAULT_PORTS = (42100, 9999, 10010)
+
+# Magic numbers de los formatos soportados
+PCAP_MAGIC_US = 0xA1B2C3D4
+PCAP_MAGIC_NS = 0xA1B23C4D
+PCAPNG_SHB = 0x0A0D0D0A
+PCAPNG_BYTE_ORDER = 0x1A2B3C4D
+
+# Bloques pcapng
+PCAPNG_IDB = 0x00000001
+PCAPNG_PB = 0x00000002
+PCAPNG_SPB = 0x00000003
+PCAPNG_EPB = 0x00000006
+
+# Link types (LINKTYPE_*)
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_IPV6 = 229
+LINKTYPE_LINUX_SLL2 = 276
+
+TCP_FIN = 0x01
+TCP_SYN = 0x02
+TCP_RST = 0x04
+
+# Máximo de bytes fuera de orden retenidos por stream antes de saltar el hueco
+MAX_OUT_OF_ORDER = 1024 * 1024
+
+FlowKey = Tuple[str, int, str, int]
+
+
+@dataclass
+class TCPSegment:
+    """Segmento TCP extraído de un paquete capturado"""
+    timestamp: float
+    src: str
+    sport: int
+    dst: str
+    dport: int
+    seq: int
+    flags: int
+    payload: bytes
+
+
+@dataclass
+class CapturedFrame:
+    """Frame Blaze completo reensamblado desde la captura"""
+    timestamp: float
+    src: str
+    dst: str
+    data: bytes
+
+    @property
+    def length(self) -> int:
+        return len(self.data)
+
+
+def _read_exact(f: BinaryIO, size: int) -> Optional[bytes]:
+    data = f.read(size)
+    if len(data) < size:
+        return None
+    return data
+
+
+def iter_link_packets(f: BinaryIO) -> Iterator[Tuple[float, int, bytes]]:
+    """
+    Itera paquetes crudos (timestamp, linktype, frame) de un pcap o pcapng.
+    Solo mantiene en memoria el paquete actual.
+    """
+    head = _read_exact(f, 4)
+    if head is None:
+        return
+
+    magic_le = struct.unpack('<I', head)[0]
+    magic_be = struct.unpack('>I', head)[0]
+
+    if magic_le == PCAPNG_SHB:
+        yield from _iter_pcapng(f, head)
+    elif PCAP_MAGIC_US in (magic_le, magic_be) or PCAP_MAGIC_NS in (magic_le, magic_be):
+        yield from _iter_pcap(f, head)
+    else:
+        raise ValueError(f"Formato de captura desconocido (magic {head.hex()})")
+
+
+def _iter_pcap(f: BinaryIO, head: bytes) -> Iterator[Tuple[float, int, bytes]]:
+    """Formato pcap clásico (libpcap)"""
+    endian = '<' if struct.unpack('<I', head)[0] in (PCAP_MAGIC_US, PCAP_MAGIC_NS) else '>'
+    magic = struct.unpack(endian + 'I', head)[0]
+    divisor = 1e9 if magic == PCAP_MAGIC_NS else 1e6
+
+    rest = _read_exact(f, 20)
+    if rest is None:
+        return
+    linktype = struct.unpack(endian + 'I', rest[16:20])[0] & 0x0FFFFFFF
+
+    record = struct.Struct(endian + 'IIII')
+    while True:
+        hdr = _read_exact(f, 16)
+        if hdr is None:
+            return
+        ts_sec, ts_frac, incl_len, _orig_len = record.unpack(hdr)
+        data = _read_exact(f, incl_len)
+        if data is None:
+            logger.warning("Captura truncada: último paquete incompleto")
+            return
+        yield ts_sec + ts_frac / divisor, linktype, data
+
+
+def _iter_pcapng(f: BinaryIO, head: bytes) -> Iterator[Tuple[float, int, bytes]]:
+    """Formato pcapng (bloques SHB/IDB/EPB/SPB)"""
+    endian = '<'
+    interfaces = []  # [(linktype, ts_divisor)]
+    block_type = PCAPNG_SHB
+
+    while True:
+        raw_len = _read_exact(f, 4)
+        if raw_len is None:
+            return
+
+        if block_type == PCAPNG_SHB:
+            # El byte-order magic define el endianness de toda la sección
+            bom = _read_exact(f, 4)
+            if bom is None:
+                return
+            endian = '<' if struct.unpack('<I', bom)[0] == PCAPNG_BYTE_ORDER else '>'
+            total_len = struct.unpack(endian + 'I', raw_len)[0]
+            if _read_exact(f, total_len - 16) is None:
+                return
+            interfaces = []
+        else:
+            total_len = struct.unpack(endian + 'I', raw_len)[0]
+            body = _read_exact(f, total_len - 12)
+            if body is None:
+                return
+
+            if block_type == PCAPNG_IDB:
+                linktype = struct.unpack(endian + 'H', body[0:2])[0]
+                interfaces.append((linktype, _pcapng_ts_divisor(body[8:], endian)))
+
+            elif block_type == PCAPNG_EPB:
+                if_id, ts_high, ts_low, cap_len = struct.unpack(endian + 'IIII', body[0:16])
+                if if_id < len(interfaces):
+                    linktype, divisor = interfaces[if_id]
+                    ts = ((ts_high << 32) | ts_low) / divisor
+                    yield ts, linktype, body[20:20 + cap_len]
+
+            elif block_type == PCAPNG_PB:
+                if_id, _drops, ts_high, ts_low, cap_len = struct.unpack(endian + 'HHIII', body[0:16])
+                if if_id < len(interfaces):
+                    linktype, divisor = interfaces[if_id]
+                    ts = ((ts_high << 32) | ts_low) / divisor
+                    yield ts, linktype, body[20:20 + cap_len]
+
+            elif block_type == PCAPNG_SPB and interfaces:
+                orig_len = struct.unpack(endian + 'I', body[0:4])[0]
+                yield 0.0, interfaces[0][0], body[4:4 + orig_len]
+
+        # Trailer (total length repetido)
+        if _read_exact(f, 4) is None:
+            return
+
+        raw_type = _read_exact(f, 4)
+        if raw_type is None:
+            return
+        # El tipo SHB es palíndromo, se reconoce con cualquier endianness
+        block_type = struct.unpack(endian + 'I', raw_type)[0]
+
+
+def _pcapng_ts_divisor(options: bytes, endian: str) -> float:
+    """Lee la opción if_tsresol (código 9) del IDB; por defecto microsegundos"""
+    offset = 0
+    while offset + 4 <= len(options):
+        code, length = struct.unpack(endian + 'HH', options[offset:offset + 4])
+        if code == 0:
+            break
+        if code == 9 and length >= 1:
+            resol = options[offset + 4]
+            if resol & 0x80:
+                return float(2 ** (resol & 0x7F))
+            return float(10 ** resol)
+        offset += 4 + ((length + 3) & ~3)
+    return 1e6
+
+
+def parse_tcp_segment(timestamp: float, linktype: int, frame: bytes) -> Optional[TCPSegment]:
+    """
+    Decodifica link layer + IPv4/IPv6 + TCP.
+    Retorna None si el paquete no es TCP.
+    """
+    if linktype == LINKTYPE_ETHERNET:
+        if len(frame) < 14:
+            return None
+        ethertype = struct.unpack('>H', frame[12:14])[0]
+        offset = 14
+        # VLAN tags (802.1Q / 802.1ad)
+        while ethertype in (0x8100, 0x88A8) and len(frame) >= offset + 4:
+            ethertype = struct.unpack('>H', frame[offset + 2:offset + 4])[0]
+            offset += 4
+    elif linktype == LINKTYPE_LINUX_SLL:
+        if len(frame) < 16:
+            return None
+        ethertype = struct.unpack('>H', frame[14:16])[0]
+        offset = 16
+    elif linktype == LINKTYPE_LINUX_SLL2:
+        if len(frame) < 20:
+            return None
+        ethertype = struct.unpack('>H', frame[0:2])[0]
+        offset = 20
+    elif linktype == LINKTYPE_NULL:
+        if len(frame) < 4:
+            return None
+        family = struct.unpack('<I', frame[0:4])[0]
+        if family > 0xFFFF:
+            family = struct.unpack('>I', frame[0:4])[0]
+        ethertype = 0x0800 if family == 2 else 0x86DD if family in (10, 24, 28, 30) else 0
+        offset = 4
+    elif linktype in (LINKTYPE_RAW, LINKTYPE_IPV4, LINKTYPE_IPV6, 12, 14):
+        if not frame:
+            return None
+        ethertype = 0x0800 if frame[0] >> 4 == 4 else 0x86DD
+        offset = 0
+    else:
+        return None
+
+    if ethertype == 0x0800:
+        if len(frame) < offset + 20:
+            return None
+        ihl = (frame[offset] & 0x0F) * 4
+        total_len = struct.unpack('>H', frame[offset + 2:offset + 4])[0]
+        frag = struct.unpack('>H', frame[offset + 6:offset + 8])[0]
+        if frame[offset + 9] != 6 or frag & 0x1FFF:
+            return None
+        src = '.'.join(str(b) for b in frame[offset + 12:offset + 16])
+        dst = '.'.join(str(b) for b in frame[offset + 16:offset + 20])
+        # total_len recorta el padding Ethernet
+        end = offset + total_len if total_len else len(frame)
+        offset += ihl
+    elif ethertype == 0x86DD:
+        if len(frame) < offset + 40 or frame[offset + 6] != 6:
+            return None
+        payload_len = struct.unpack('>H', frame[offset + 4:offset + 6])[0]
+        src = _format_ipv6(frame[offset + 8:offset + 24])
+        dst = _format_ipv6(frame[offset + 24:offset + 40])
+        offset += 40
+        end = offset + payload_len
+    else:
+        return None
+
+    if len(frame) < offset + 20:
+        return None
+
+    sport, dport, seq = struct.unpack('>HHI', frame[offset:offset + 8])
+    data_offset = (frame[offset + 12] >> 4) * 4
+    flags = frame[offset + 13]
+
+    return TCPSegment(
+        timestamp=timestamp,
+        src=src,
+        sport=sport,
+        dst=dst,
+        dport=dport,
+        seq=seq,
+        flags=flags,
+        payload=frame[offset + data_offset:end]
+    )
+
+
+def _format_ipv6(raw: bytes) -> str:
+    import ipaddress
+    return str(ipaddress.IPv6Address(raw))
+
+
+class _TCPStream:
+    """Estado de reensamblado de una dirección de una conexión TCP"""
+
+    __slots__ = ('next_seq', 'out_of_order', 'buffered', 'framer', 'finished')
+
+    def __init__(self):
+        self.next_seq: Optional[int] = None
+        self.out_of_order: Dict[int, bytes] = {}
+        self.buffered = 0
+        self.framer = BlazeFramer()
+        # FIN visto: solo faltan retransmisiones que llenen huecos
+        self.finished = False
+
+
+class TCPReassembler:
+    """
+    Reensambla streams TCP por 4-tupla y número de secuencia, y los
+    divide en frames Blaze. Un stream se elimina al ver FIN/RST en cuanto
+    no le quedan segmentos adelantados; a partir de ahí se ignoran sus
+    retransmisiones hasta un nuevo SYN.
+    """
+
+    def __init__(self, max_out_of_order: int = MAX_OUT_OF_ORDER):
+        self.max_out_of_order = max_out_of_order
+        self.streams: Dict[FlowKey, _TCPStream] = {}
+        self.closed: Set[FlowKey] = set()
+        self.gaps = 0
+
+    def feed(self, segment: TCPSegment) -> Iterator[CapturedFrame]:
+        """Procesa un segmento y produce los frames Blaze que completa"""
+        key = (segment.src, segment.sport, segment.dst, segment.dport)
+        stream = self.streams.get(key)
+        seq = segment.seq
+
+        if segment.flags & TCP_SYN:
+            self.closed.discard(key)
+            stream = self.streams[key] = _TCPStream()
+            # El SYN consume un número de secuencia; su payload (TCP Fast Open) va detrás
+            seq = stream.next_seq = (seq + 1) & 0xFFFFFFFF
+
+        if segment.payload:
+            if stream is None:
+                if key in self.closed:
+                    # Retransmisión tardía de una conexión ya cerrada
+                    return
+                # Captura iniciada a mitad de conexión
+                stream = self.streams[key] = _TCPStream()
+            if stream.next_seq is None:
+                stream.next_seq = seq
+            yield from self._frames(segment, stream, self._accept(stream, seq, segment.payload))
+
+        if stream is None:
+            return
+        if segment.flags & TCP_RST:
+            # Tras un RST no habrá retransmisiones: lo retenido se entrega saltando los huecos
+            yield from self._frames(segment, stream, self._flush(stream))
+        elif segment.flags & TCP_FIN:
+            stream.finished = True
+        if (stream.finished and not stream.out_of_order) or segment.flags & TCP_RST:
+            del self.streams[key]
+            self.closed.add(key)
+
+    def flush(self, timestamp: float = 0.0) -> Iterator[CapturedFrame]:
+        """
+        Fin de la captura: entrega los segmentos retenidos de todos los
+        streams saltando los huecos que ya no se van a llenar
+        """
+        for (src, sport, dst, dport), stream in self.streams.items():
+            segment = TCPSegment(timestamp, src, sport, dst, dport, 0, 0, b'')
+            yield from self._frames(segment, stream, self._flush(stream))
+        self.streams.clear()
+
+    @staticmethod
+    def _frames(segment: TCPSegment, stream: _TCPStream, chunks: Iterable[bytes]) -> Iterator[CapturedFrame]:
+        src = f"{segment.src}:{segment.sport}"
+        dst = f"{segment.dst}:{segment.dport}"
+        for chunk in chunks:
+            for frame in stream.framer.feed(chunk):
+                yield CapturedFrame(segment.timestamp, src, dst, bytes(frame))
+
+    def _accept(self, stream: _TCPStream, seq: int, payload: bytes) -> Iterator[bytes]:
+        """Entrega los bytes en orden; retiene los que llegan adelantados"""
+        delta = (seq - stream.next_seq) & 0xFFFFFFFF
+
+        if delta >= 0x80000000:
+            # Retransmisión (total o parcial): recortar lo ya entregado
+            overlap = (stream.next_seq - seq) & 0xFFFFFFFF
+            if overlap >= len(payload):
+                return
+            payload = payload[overlap:]
+            delta = 0
+
+        if delta > 0:
+            if seq not in stream.out_of_order:
+                stream.out_of_order[seq] = payload
+                stream.buffered += len(payload)
+            if stream.buffered <= self.max_out_of_order:
+                return
+            # Hueco que no se va a llenar (paquete perdido en la captura)
+            self._skip_gap(stream)
+        else:
+            yield payload
+            stream.next_seq = (seq + len(payload)) & 0xFFFFFFFF
+
+        yield from self._drain(stream)
+
+    def _flush(self, stream: _TCPStream) -> Iterator[bytes]:
+        """Entrega todo lo retenido, saltando cada hueco"""
+        while stream.out_of_order:
+            self._skip_gap(stream)
+            yield from self._drain(stream)
+
+    def _skip_gap(self, stream: _TCPStream):
+        """Salta hasta el primer segmento retenido y descarta el frame partido"""
+        self.gaps += 1
+        logger.warning("Hueco en stream TCP, resincronizando framer")
+        stream.framer.reset()
+        stream.next_seq = min(stream.out_of_order, key=lambda s: (s - stream.next_seq) & 0xFFFFFFFF)
+
+    @staticmethod
+    def _drain(stream: _TCPStream) -> Iterator[bytes]:
+        """Drena segmentos adelantados que ya son contiguos"""
+        while stream.out_of_order:
+            ready = None
+            for pending_seq in stream.out_of_order:
+                if ((pending_seq - stream.next_seq) & 0xFFFFFFFF) >= 0x80000000 or pending_seq == stream.next_seq:
+                    ready = pending_seq
+                    break
+            if ready is None:
+                return
+            data = stream.out_of_order.pop(ready)
+            stream.buffered -= len(data)
+            overlap = (stream.next_seq - ready) & 0xFFFFFFFF
+            if overlap < len(data):
+                yield data[overlap:]
+                stream.next_seq = (ready + len(data)) & 0xFFFFFFFF
+
+
+def iter_blaze_frames(
+    pcap_file,
+    ports: Iterable[int] = DEFAULT_PORTS
+) -> Iterator[CapturedFrame]:
+    """
+    Generador de frames Blaze desde una captura pcap/pcapng.
+    Lee el archivo en streaming, así que capturas de varios GB se
+    procesan en memoria constante.
+    """
+    port_set = frozenset(ports)
+    reassembler = TCPReassembler()
+    last = 0.0
+
+    with open(Path(pcap_file), 'rb') as f:
+        for timestamp, linktype, frame in iter_link_packets(f):
+            segment = parse_tcp_segment(timestamp, linktype, frame)
+            if segment is None:
+                continue
+            if segment.sport not in port_set and segment.dport not in port_set:
+                continue
+            yield from reassembler.feed(segment)
+            last = timestamp
+        yield from reassembler.flush(last)
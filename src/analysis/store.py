@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Indexed packet store (SQLite)
+Ingesta de capturas a una base indexada para que los analizadores
+consulten por índice en lugar de recorrer el JSON completo
+"""
+
+import json
+import sqlite3
+import struct
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..network.blaze import BlazeFramer, HEADER_SIZE, MessageType
+from .pcap import DEFAULT_PORTS, CapturedFrame, iter_blaze_frames
+
+logger = logging.getLogger(__name__)
+
+# Tipos de mensaje Blaze (bytes 8-9 del header)
+MSG_REQUEST = int(MessageType.REQUEST)
+MSG_RESPONSE = int(MessageType.RESPONSE)
+MSG_NOTIFICATION = int(MessageType.NOTIFICATION)
+MSG_ERROR_REPLY = int(MessageType.ERROR_REPLY)
+
+# Dirección del paquete respecto al juego
+DIRECTION_TO_EA = 'GAME→EA'
+DIRECTION_FROM_EA = 'EA→GAME'
+DIRECTION_LOCAL = 'LOCAL'
+
+# Paquetes de login: 0x01/0xC8 (juego) y 0x01/0x3C (inyectado estilo Windows)
+AUTH_COMMANDS = (0x3C, 0xC8)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS packets (
+    id        INTEGER PRIMARY KEY,
+    session   TEXT    NOT NULL,
+    timestamp REAL,
+    direction TEXT    NOT NULL,
+    src       TEXT,
+    dst       TEXT,
+    length    INTEGER NOT NULL,
+    component INTEGER NOT NULL,
+    command   INTEGER NOT NULL,
+    msg_type  INTEGER NOT NULL,
+    msg_id    INTEGER NOT NULL,
+    error     INTEGER NOT NULL,
+    header    BLOB    NOT NULL,
+    payload   BLOB    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_packets_command
+    ON packets (session, component, command, id);
+CREATE INDEX IF NOT EXISTS idx_packets_msg_id
+    ON packets (session, msg_id, msg_type, id);
+CREATE INDEX IF NOT EXISTS idx_packets_time
+    ON packets (session, timestamp);
+"""
+
+_HEADER = struct.Struct('>HBBBBHHH')
+
+
+def classify_direction(src: str, dst: str, server_ports: Iterable[int] = DEFAULT_PORTS) -> str:
+    """Determina la dirección a partir de los puertos del servidor/proxy"""
+    ports = set(server_ports)
+
+    def port_of(addr: str) -> Optional[int]:
+        try:
+            return int(addr.rsplit(':', 1)[1])
+        except (IndexError, ValueError):
+            return None
+
+    if port_of(dst) in ports or '159.153' in dst:
+        return DIRECTION_TO_EA
+    if port_of(src) in ports or '159.153' in src:
+        return DIRECTION_FROM_EA
+    return DIRECTION_LOCAL
+
+
+def iter_json_frames(json_file) -> Iterator[CapturedFrame]:
+    """
+    Frames de un export de analyze_pcap.py. Las entradas antiguas eran
+    segmentos TCP, no frames: se vuelven a enmarcar por flujo (src, dst)
+    para separar paquetes agrupados.
+    """
+    entries = json.loads(Path(json_file).read_text())
+    framers: Dict[Tuple[str, str], BlazeFramer] = {}
+    for index, entry in enumerate(entries):
+        src = entry.get('src', '?')
+        dst = entry.get('dst', '?')
+        framer = framers.setdefault((src, dst), BlazeFramer())
+        timestamp = entry.get('timestamp', float(index))
+        for frame in framer.feed(bytes.fromhex(entry.get('hex', ''))):
+            yield CapturedFrame(timestamp, src, dst, bytes(frame))
+
+
+class PacketStore:
+    """
+    Almacén de paquetes Blaze indexado por sesión, comando y msg_id.
+    Los headers se decodifican una sola vez durante la ingesta.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Ingesta
+    # ------------------------------------------------------------------
+
+    def ingest_frames(self, session: str, frames: Iterable[CapturedFrame]) -> int:
+        """
+        Inserta frames Blaze de una sesión (reemplaza la sesión si existía).
+
+        Returns:
+            Cantidad de paquetes insertados
+        """
+        def rows():
+            for frame in frames:
+                data = frame.data
+                if len(data) < HEADER_SIZE:
+                    continue
+                length, _, component, _, command, error, msg_type, msg_id = _HEADER.unpack_from(data)
+                yield (
+                    session, frame.timestamp,
+                    classify_direction(frame.src, frame.dst),
+                    frame.src, frame.dst, len(data),
+                    component, command, msg_type, msg_id, error,
+                    bytes(data[:HEADER_SIZE]), bytes(data[HEADER_SIZE:])
+                )
+
+        with self.conn:
+            self.conn.execute("DELETE FROM packets WHERE session = ?", (session,))
+            cursor = self.conn.executemany(
+                "INSERT INTO packets (session, timestamp, direction, src, dst, length, "
+                "component, command, msg_type, msg_id, error, header, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows()
+            )
+        count = cursor.rowcount
+        logger.info(f"Sesión '{session}': {count} paquetes ingeridos")
+        return count
+
+    def ingest_json(self, json_file, session: Optional[str] = None) -> int:
+        """Ingiere un export de analyze_pcap.py (blaze_packets_analysis.json)"""
+        json_file = Path(json_file)
+        return self.ingest_frames(session or json_file.stem, iter_json_frames(json_file))
+
+    def ingest_pcap(self, pcap_file, session: Optional[str] = None) -> int:
+        """Ingiere una captura pcap/pcapng en streaming"""
+        pcap_file = Path(pcap_file)
+        return self.ingest_frames(session or pcap_file.stem, iter_blaze_frames(pcap_file))
+
+    def ingest_file(self, path, session: Optional[str] = None) -> int:
+        """Ingiere según extensión (.json o .pcap/.pcapng)"""
+        path = Path(path)
+        if path.suffix == '.json':
+            return self.ingest_json(path, session)
+        return self.ingest_pcap(path, session)
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def sessions(self) -> List[str]:
+        return [row[0] for row in self.conn.execute(
+            "SELECT DISTINCT session FROM packets ORDER BY session")]
+
+    def count(self, session: Optional[str] = None) -> int:
+        if session is None:
+            return self.conn.execute("SELECT COUNT(*) FROM packets").fetchone()[0]
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM packets WHERE session = ?", (session,)).fetchone()[0]
+
+    def get(self, packet_id: int) -> Optional[sqlite3.Row]:
+        return self.conn.execute("SELECT * FROM packets WHERE id = ?", (packet_id,)).fetchone()
+
+    def iter_packets(self, session: Optional[str] = None) -> Iterator[sqlite3.Row]:
+        """Paquetes en orden de captura"""
+        if session is None:
+            return self.conn.execute("SELECT * FROM packets ORDER BY id")
+        return self.conn.execute(
+            "SELECT * FROM packets WHERE session = ? ORDER BY id", (session,))
+
+    def auth_packet(self, session: str) -> Optional[sqlite3.Row]:
+        """Primer paquete de login (0x01/0x3C o 0x01/0xC8) de la sesión"""
+        return self.conn.execute(
+            "SELECT * FROM packets WHERE session = ? AND component = 1 "
+            "AND command IN (?, ?) ORDER BY id LIMIT 1",
+            (session, *AUTH_COMMANDS)
+        ).fetchone()
+
+    def after_auth(
+        self,
+        session: str,
+        component: Optional[int] = None,
+        command: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> List[sqlite3.Row]:
+        """
+        Paquetes posteriores a la autenticación, opcionalmente filtrados
+        por componente/comando (p.ej. todos los 0x02/0x14 post-auth).
+        """
+        auth = self.auth_packet(session)
+        if auth is None:
+            return []
+
+        sql = "SELECT * FROM packets WHERE session = ? AND id > ?"
+        params: list = [session, auth['id']]
+        if component is not None:
+            sql += " AND component = ?"
+            params.append(component)
+        if command is not None:
+            sql += " AND command = ?"
+            params.append(command)
+        sql += " ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self.conn.execute(sql, params).fetchall()
+
+    def command_counts(
+        self,
+        session: Optional[str] = None,
+        after_id: int = 0
+    ) -> List[Tuple[int, int, int]]:
+        """Frecuencia por (component, command), de mayor a menor"""
+        sql = "SELECT component, command, COUNT(*) AS n FROM packets WHERE id > ?"
+        params: list = [after_id]
+        if session is not None:
+            sql += " AND session = ?"
+            params.append(session)
+        sql += " GROUP BY component, command ORDER BY n DESC, component, command"
+        return [tuple(row) for row in self.conn.execute(sql, params)]
+
+    def request_response_pairs(self, session: str) -> List[sqlite3.Row]:
+        """
+        Empareja cada REQUEST con la primera RESPONSE/ERROR_REPLY posterior
+        con el mismo msg_id (usa idx_packets_msg_id). Las NOTIFICATION no
+        responden a nada: su msg_id no tiene relación con las requests.
+        """
+        return self.conn.execute(
+            """
+            SELECT q.id AS req_id, q.component AS req_component, q.command AS req_command,
+                   q.length AS req_length, q.msg_id AS msg_id, q.timestamp AS req_time,
+                   r.id AS resp_id, r.component AS resp_component, r.command AS resp_command,
+                   r.msg_type AS resp_type, r.error AS error, r.timestamp AS resp_time
+            FROM packets q
+            JOIN packets r ON r.id = (
+                SELECT MIN(id) FROM packets
+                WHERE session = q.session AND msg_id = q.msg_id
+                  AND msg_type IN (?, ?) AND id > q.id
+            )
+            WHERE q.session = ? AND q.msg_type = ?
+            ORDER BY q.id
+            """,
+            (MSG_RESPONSE, MSG_ERROR_REPLY, session, MSG_REQUEST)
+        ).fetchall()
+
+    def unanswered_requests(self, session: str) -> List[sqlite3.Row]:
+        """REQUESTs sin RESPONSE/ERROR_REPLY posterior con el mismo msg_id"""
+        return self.conn.execute(
+            """
+            SELECT * FROM packets q
+            WHERE q.session = ? AND q.msg_type = ?
+              AND NOT EXISTS (
+                SELECT 1 FROM packets
+                WHERE session = q.session AND msg_id = q.msg_id
+                  AND msg_type IN (?, ?) AND id > q.id
+              )
+            ORDER BY q.id
+            """,
+            (session, MSG_REQUEST, MSG_RESPONSE, MSG_ERROR_REPLY)
+        ).fetchall()
+
+
+def open_store(path) -> PacketStore:
+    """
+    Abre un PacketStore. Si `path` es un .json o .pcap(ng), lo ingiere en
+    un .db hermano (solo si no existe o si la fuente es más reciente).
+    """
+    path = Path(path)
+    if path.suffix == '.db':
+        return PacketStore(path)
+
+    db_path = path.with_suffix('.db')
+    stale = not db_path.exists() or db_path.stat().st_mtime < path.stat().st_mtime
+    store = PacketStore(db_path)
+    if stale or store.count(path.stem) == 0:
+        logger.info(f"Ingiriendo {path} → {db_path}")
+        store.ingest_file(path)
+    return store
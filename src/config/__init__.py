@@ -1,11 +1,12 @@
 """Config package - Configuration and update management"""
 
-from .manager import ConfigManager, Settings, Credentials
+from .manager import ConfigManager, Settings, Credentials, AccountsConfig
 from .update import UpdateManager
 
 __all__ = [
     'ConfigManager',
     'Settings',
     'Credentials',
+    'AccountsConfig',
     'UpdateManager',
 ]
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 Configuration Manager
-Handles settings.json, login.json, and AES decryption
+Handles settings.json, login.json, accounts.json, and AES decryption
 Based on ConfigManager from decompiled code
 """
 
@@ -9,11 +9,8 @@ import json
 import base64
 import logging
 from pathlib import Path
-from dataclasses import dataclass, asdict
-from typing import Optional
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives import padding
+from dataclasses import dataclass, asdict, field
+from typing import Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +19,23 @@ logger = logging.getLogger(__name__)
 class Settings:
     """Application settings"""
     auto_minimize: bool = False
+    metrics_port: int = 9100    # 0 = endpoint /metrics deshabilitado
+    upstream_pool: int = 0      # Conexiones precalentadas a EA (0 = deshabilitado)
+    idle_timeout: float = 300.0 # Segundos sin tráfico antes de cerrar una sesión (0 = nunca)
+    read_timeout: float = 0.0   # Segundos máximos con una dirección muda (0 = sin límite)
+    # Endpoints de EA 'host:puerto' por orden de preferencia (vacío = el de siempre)
+    upstreams: List[str] = field(default_factory=list)
+    reconnect_attempts: int = 3 # Reconexiones a EA a mitad de sesión (0 = cerrar la sesión)
+    park_timeout: float = 0.0   # Segundos que sobrevive la sesión de EA sin RPCS3 (0 = no aparcar)
+    write_mode: str = 'latency' # 'latency' (escrituras inmediatas) o 'throughput' (agrupadas)
+    coalesce_window: float = 0.0 # Segundos que throughput junta escrituras (0 = una iteración del loop)
+    ping_resync: float = 60.0   # Cada cuánto un ping va a EA para re-sincronizar su reloj (0 = todos)
+    cache_size: int = 256       # Respuestas de EA en la caché de requests idempotentes (0 = sin caché)
+    # TTL en segundos por comando '0x09/0x01' (vacío = los de response_cache.py)
+    cache_ttls: Dict[str, float] = field(default_factory=dict)
+    # Proxies 'host:puerto' entre los que reparte el redirector (vacío = solo el local)
+    redirect_backends: List[str] = field(default_factory=list)
+    redirect_routing: str = 'round_robin' # 'round_robin', 'least_connections' o 'sticky'
 
 
 @dataclass
@@ -32,6 +46,15 @@ class Credentials:
     psn_name: str
 
 
+@dataclass
+class AccountsConfig:
+    """Pool de cuentas de EA y reglas de enrutado por cliente (accounts.json)"""
+    accounts: Dict[str, Credentials] = field(default_factory=dict)
+    by_address: Dict[str, str] = field(default_factory=dict)     # IP del cliente → cuenta
+    by_psn_name: Dict[str, str] = field(default_factory=dict)    # PSN name del 0xC8 → cuenta
+    default: Optional[str] = None
+
+
 class ConfigManager:
     """
     Gestiona configuración y credenciales del proxy.
@@ -55,6 +78,8 @@ class ConfigManager:
         
         self.settings_file = self.config_dir / 'settings.json'
         self.login_file = self.config_dir / 'login.json'
+        self.accounts_file = self.config_dir / 'accounts.json'
+        self.patches_file = self.config_dir / 'patches.json'
         
         logger.info(f"Config directory: {self.config_dir}")
     
@@ -70,7 +95,21 @@ class ConfigManager:
         try:
             data = json.loads(self.settings_file.read_text())
             settings = Settings(
-                auto_minimize=data.get('autoMinimize', False)
+                auto_minimize=data.get('autoMinimize', False),
+                metrics_port=int(data.get('metricsPort', 9100)),
+                upstream_pool=int(data.get('upstreamPool', 0)),
+                idle_timeout=float(data.get('idleTimeout', 300.0)),
+                read_timeout=float(data.get('readTimeout', 0.0)),
+                upstreams=list(data.get('upstreams', [])),
+                reconnect_attempts=int(data.get('reconnectAttempts', 3)),
+                park_timeout=float(data.get('parkTimeout', 0.0)),
+                write_mode=str(data.get('writeMode', 'latency')),
+                coalesce_window=float(data.get('coalesceWindow', 0.0)),
+                ping_resync=float(data.get('pingResync', 60.0)),
+                cache_size=int(data.get('cacheSize', 256)),
+                cache_ttls={k: float(v) for k, v in data.get('cacheTtls', {}).items()},
+                redirect_backends=list(data.get('redirectBackends', [])),
+                redirect_routing=str(data.get('redirectRouting', 'round_robin'))
             )
             logger.info(f"Settings cargados: auto_minimize={settings.auto_minimize}")
             return settings
@@ -85,7 +124,21 @@ class ConfigManager:
         """
         try:
             data = {
-                'autoMinimize': settings.auto_minimize
+                'autoMinimize': settings.auto_minimize,
+                'metricsPort': settings.metrics_port,
+                'upstreamPool': settings.upstream_pool,
+                'idleTimeout': settings.idle_timeout,
+                'readTimeout': settings.read_timeout,
+                'upstreams': settings.upstreams,
+                'reconnectAttempts': settings.reconnect_attempts,
+                'parkTimeout': settings.park_timeout,
+                'writeMode': settings.write_mode,
+                'coalesceWindow': settings.coalesce_window,
+                'pingResync': settings.ping_resync,
+                'cacheSize': settings.cache_size,
+                'cacheTtls': settings.cache_ttls,
+                'redirectBackends': settings.redirect_backends,
+                'redirectRouting': settings.redirect_routing
             }
             self.settings_file.write_text(json.dumps(data, indent=2))
             logger.info("Settings guardados")
@@ -140,12 +193,80 @@ class ConfigManager:
         except Exception as e:
             logger.error(f"Error guardando credenciales: {e}")
     
+    def load_accounts(self) -> Optional[AccountsConfig]:
+        """
+        Carga el pool de cuentas desde accounts.json:
+        {"accounts": {"nombre": {"email", "password", "psnName"}},
+         "routes": {"address": {"IP": "nombre"}, "psnName": {"PSN": "nombre"}},
+         "default": "nombre"}
+        """
+        if not self.accounts_file.exists():
+            return None
+        
+        try:
+            data = json.loads(self.accounts_file.read_text())
+            
+            accounts = {}
+            for name, entry in data.get('accounts', {}).items():
+                for field_name in ('email', 'password', 'psnName'):
+                    if field_name not in entry:
+                        logger.error(f"accounts.json: a la cuenta {name!r} le falta {field_name}")
+                        return None
+                accounts[name] = Credentials(
+                    email=entry['email'],
+                    password=entry['password'],
+                    psn_name=entry['psnName']
+                )
+            
+            routes = data.get('routes', {})
+            config = AccountsConfig(
+                accounts=accounts,
+                by_address=dict(routes.get('address', {})),
+                by_psn_name=dict(routes.get('psnName', {})),
+                default=data.get('default')
+            )
+            
+            # Toda regla debe apuntar a una cuenta del pool
+            targets = [*config.by_address.values(), *config.by_psn_name.values()]
+            if config.default is not None:
+                targets.append(config.default)
+            missing = sorted(set(targets) - set(accounts))
+            if missing:
+                logger.error(f"accounts.json: reglas hacia cuentas inexistentes: {missing}")
+                return None
+            
+            logger.info(f"Pool de cuentas cargado: {len(accounts)} cuentas, "
+                        f"{len(config.by_address) + len(config.by_psn_name)} reglas")
+            return config
+            
+        except Exception as e:
+            logger.error(f"Error cargando accounts.json: {e}")
+            return None
+    
     def delete_credentials(self):
         """Elimina login.json"""
         if self.login_file.exists():
             self.login_file.unlink()
             logger.info("Credenciales eliminadas")
     
+    def load_patches(self):
+        """
+        Reglas de parche EA → RPCS3 de patches.json, con recarga en caliente
+        (PatchSet.watch). Mientras el archivo no exista o sea inválido se
+        usan las reglas anti-desync por defecto.
+        """
+        from ..network.patches import DESYNC_PATCHES, PatchSet
+        return PatchSet.from_file(self.patches_file, fallback=DESYNC_PATCHES.rules)
+    
+    def _aes_cipher(self, iv: bytes):
+        """
+        Cipher AES-256 CBC. cryptography se importa aquí y no a nivel de
+        módulo: solo hace falta para version.json cifrado.
+        """
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+        from cryptography.hazmat.backends import default_backend
+        return Cipher(algorithms.AES(self.AES_KEY), modes.CBC(iv), backend=default_backend())
+    
     def decrypt_aes(self, ciphertext_b64: str) -> str:
         """
         Descifra texto usando AES-256 CBC
@@ -163,17 +284,14 @@ class ConfigManager:
             iv = base64.b64decode(self.AES_IV_B64)
             
             # Configurar cipher AES-256 CBC
-            cipher = Cipher(
-                algorithms.AES(self.AES_KEY),
-                modes.CBC(iv),
-                backend=default_backend()
-            )
+            cipher = self._aes_cipher(iv)
             
             # Descifrar
             decryptor = cipher.decryptor()
             padded_plaintext = decryptor.update(ciphertext) + decryptor.finalize()
             
             # Remover padding PKCS7
+            from cryptography.hazmat.primitives import padding
             unpadder = padding.PKCS7(128).unpadder()
             plaintext = unpadder.update(padded_plaintext) + unpadder.finalize()
             
@@ -198,13 +316,10 @@ class ConfigManager:
             iv = base64.b64decode(self.AES_IV_B64)
             
             # Configurar cipher AES-256 CBC
-            cipher = Cipher(
-                algorithms.AES(self.AES_KEY),
-                modes.CBC(iv),
-                backend=default_backend()
-            )
+            cipher = self._aes_cipher(iv)
             
             # Aplicar padding PKCS7
+            from cryptography.hazmat.primitives import padding
             padder = padding.PKCS7(128).padder()
             padded_data = padder.update(plaintext.encode('utf-8')) + padder.finalize()
             
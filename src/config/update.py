@@ -5,13 +5,18 @@ Auto-update functionality and username downloading
 Based on Form1.cs update logic
 """
 
+import json
+import time
+import asyncio
 import logging
-import requests
-from typing import Optional, Dict
-from packaging import version
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Tiempo (segundos) durante el que una copia en caché se usa sin revalidar
+DEFAULT_CACHE_TTL = 6 * 3600
+
 
 class UpdateManager:
     """
@@ -26,12 +31,127 @@ class UpdateManager:
     UPDATER_URL = 'https://raw.githubusercontent.com/skate6743/skaterpcs3public/refs/heads/main/updater.exe'
     USERNAMES_URL = 'https://raw.githubusercontent.com/skate6743/skaterpcs3public/refs/heads/main/usernames.json'
     
-    def __init__(self, config_manager=None):
+    def __init__(
+        self,
+        config_manager=None,
+        cache_dir: Optional[Path] = None,
+        cache_ttl: float = DEFAULT_CACHE_TTL,
+        timeout: float = 10
+    ):
         """
         Args:
             config_manager: ConfigManager instance para descifrado AES
+            cache_dir: Directorio de caché. Si es None, usa <config_dir>/cache
+            cache_ttl: Segundos durante los que la caché se considera fresca
+            timeout: Timeout de cada petición HTTP
         """
         self.config_manager = config_manager
+        if cache_dir is None:
+            base = getattr(config_manager, 'config_dir', None) or Path.home() / '.config' / 'skate3-proxy'
+            cache_dir = Path(base) / 'cache'
+        self.cache_dir = Path(cache_dir)
+        self.cache_ttl = cache_ttl
+        self.timeout = timeout
+    
+    # ------------------------------------------------------------------
+    # Caché en disco con revalidación ETag / Last-Modified
+    # ------------------------------------------------------------------
+    
+    def _cache_paths(self, name: str) -> Tuple[Path, Path]:
+        return self.cache_dir / f'{name}.json', self.cache_dir / f'{name}.meta.json'
+    
+    def _read_cache(self, name: str) -> Tuple[Optional[Any], Dict]:
+        body_file, meta_file = self._cache_paths(name)
+        try:
+            body = json.loads(body_file.read_text())
+        except (OSError, ValueError):
+            return None, {}
+        try:
+            meta = json.loads(meta_file.read_text())
+        except (OSError, ValueError):
+            meta = {}
+        return body, meta
+    
+    def _write_cache(self, name: str, body: Optional[Any], meta: Dict):
+        """Guarda cuerpo y metadatos (body=None solo actualiza metadatos)"""
+        body_file, meta_file = self._cache_paths(name)
+        entries = [(meta_file, meta)] if body is None else [(body_file, body), (meta_file, meta)]
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Escritura atómica: un arranque concurrente nunca lee un JSON a medias
+            for path, content in entries:
+                tmp = path.with_suffix('.tmp')
+                tmp.write_text(json.dumps(content))
+                tmp.replace(path)
+        except OSError as e:
+            logger.warning(f"No se pudo escribir caché {name}: {e}")
+    
+    def fetch_json(self, url: str, name: str, force: bool = False) -> Optional[Any]:
+        """
+        Descarga un JSON usando la caché en disco.
+        
+        - Caché fresca (< TTL): se devuelve sin tocar la red
+        - Caché vieja: GET condicional (If-None-Match / If-Modified-Since);
+          un 304 solo renueva la marca de tiempo
+        - Error de red: se devuelve la copia en caché, aunque esté vieja
+        
+        Returns:
+            JSON decodificado, o None si no hay red ni caché
+        """
+        cached, meta = self._read_cache(name)
+        if cached is not None and not force:
+            if time.time() - meta.get('fetched_at', 0) < self.cache_ttl:
+                logger.debug(f"Caché fresca para {name}")
+                return cached
+        
+        headers = {}
+        if cached is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        
+        try:
+            import requests  # Import diferido: solo el refresco en segundo plano lo usa
+            response = requests.get(url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304 and cached is not None:
+                logger.debug(f"{name} sin cambios (304)")
+                meta['fetched_at'] = time.time()
+                self._write_cache(name, None, meta)
+                return cached
+            
+            response.raise_for_status()
+            data = response.json()
+            self._write_cache(name, data, {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'fetched_at': time.time(),
+            })
+            return data
+            
+        except Exception as e:
+            if cached is not None:
+                logger.warning(f"Error descargando {name} ({e}), usando caché")
+                return cached
+            raise
+    
+    def load_cached_usernames(self) -> Dict[str, str]:
+        """Usernames desde la caché en disco, sin red (para arrancar al instante)"""
+        usernames, _ = self._read_cache('usernames')
+        return usernames if isinstance(usernames, dict) else {}
+    
+    async def refresh(self) -> Tuple[Optional[Dict], Dict[str, str]]:
+        """
+        Comprueba actualizaciones y refresca usernames en un executor,
+        sin bloquear el event loop.
+        
+        Returns:
+            (info de actualización o None, usernames)
+        """
+        loop = asyncio.get_running_loop()
+        update_info = await loop.run_in_executor(None, self.check_update)
+        usernames = await loop.run_in_executor(None, self.download_usernames)
+        return update_info, usernames
     
     def check_update(self) -> Optional[Dict]:
         """
@@ -43,14 +163,13 @@ class UpdateManager:
         """
         try:
             logger.info("Verificando actualizaciones...")
-            response = requests.get(self.VERSION_URL, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self.fetch_json(self.VERSION_URL, 'version')
             remote_version = data.get('version', '0.0.0')
             
             logger.info(f"Versión local: {self.VERSION}, remota: {remote_version}")
             
+            from packaging import version
+            
             if version.parse(remote_version) > version.parse(self.VERSION):
                 logger.info("¡Nueva versión disponible!")
                 return data
@@ -72,16 +191,13 @@ class UpdateManager:
         """
         try:
             logger.info("Descargando usernames...")
-            response = requests.get(self.USERNAMES_URL, timeout=10)
-            response.raise_for_status()
-            
-            usernames = response.json()
+            usernames = self.fetch_json(self.USERNAMES_URL, 'usernames')
             logger.info(f"Descargados {len(usernames)} usernames")
             return usernames
             
         except Exception as e:
             logger.error(f"Error descargando usernames: {e}")
-            return {}
+            return self.load_cached_usernames()
     
     def decrypt_field_names(self, version_data: Dict) -> list:
         """
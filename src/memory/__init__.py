@@ -1,11 +1,12 @@
 """Memory package - RPCS3 memory manipulation"""
 
-from .scanner import RPCS3MemoryScanner, MemoryRegion
+from .scanner import RPCS3MemoryScanner, MemoryRegion, ScanCancelled
 from .patcher import RPCS3MemoryPatcher, MemoryPatch
 
 __all__ = [
     'RPCS3MemoryScanner',
     'MemoryRegion',
+    'ScanCancelled',
     'RPCS3MemoryPatcher',
     'MemoryPatch',
 ]
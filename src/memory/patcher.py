@@ -6,13 +6,16 @@ Based on Form1.cs memory patching logic
 """
 
 import logging
-from typing import Dict, List, Optional
+import threading
+from typing import Callable, Dict, List, Optional
 from dataclasses import dataclass
 
 from .scanner import RPCS3MemoryScanner
 
 logger = logging.getLogger(__name__)
 
+GAME_SPEED_PATCHES = ('game_speed_1', 'game_speed_2', 'game_speed_3', 'game_speed_4')
+
 
 @dataclass
 class MemoryPatch:
@@ -33,6 +36,11 @@ class RPCS3MemoryPatcher:
     def __init__(self, scanner: RPCS3MemoryScanner):
         self.scanner = scanner
         self.patches: Dict[str, MemoryPatch] = {}
+        
+        # Progreso/cancelación de la búsqueda en curso (ver run_startup_patches)
+        self.progress: Optional[Callable[[int, int], None]] = None
+        self.cancel: Optional[threading.Event] = None
+        
         self._init_patches()
     
     def _init_patches(self):
@@ -103,7 +111,9 @@ class RPCS3MemoryPatcher:
         patch = self.patches[patch_name]
         
         logger.info(f"Buscando ubicación para patch: {patch.name}")
-        addresses = self.scanner.find_pattern(patch.pattern, max_results=1)
+        addresses = self.scanner.find_pattern(
+            patch.pattern, max_results=1, progress=self.progress, cancel=self.cancel
+        )
         
         if not addresses:
             logger.warning(f"No se encontró ubicación para: {patch.name}")
@@ -175,13 +185,55 @@ class RPCS3MemoryPatcher:
         logger.info("Aplicando parches de velocidad de juego...")
         
         applied = 0
-        for patch_name in ['game_speed_1', 'game_speed_2', 'game_speed_3', 'game_speed_4']:
+        for patch_name in GAME_SPEED_PATCHES:
             if self.apply_patch(patch_name):
                 applied += 1
         
         logger.info(f"Aplicados {applied}/4 parches de velocidad")
         return applied
     
+    def run_startup_patches(
+        self,
+        progress: Optional[Callable[[float], None]] = None,
+        cancel: Optional[threading.Event] = None
+    ) -> Optional[int]:
+        """
+        verify_eboot + parches de velocidad, pensado para correr en un
+        executor mientras los servidores ya aceptan conexiones.
+        
+        Args:
+            progress: Callback con la fracción completada (0.0 - 1.0);
+                      se llama desde el hilo del executor
+            cancel: Evento de cancelación (lanza ScanCancelled)
+            
+        Returns:
+            Parches aplicados, o None si el EBOOT no es stock
+        """
+        steps = ('eboot_check',) + GAME_SPEED_PATCHES
+        self.cancel = cancel
+        
+        def step_progress(step: int):
+            if progress is None:
+                return None
+            return lambda done, total: progress((step + done / max(total, 1)) / len(steps))
+        
+        try:
+            self.progress = step_progress(0)
+            if not self.verify_eboot():
+                return None
+            
+            applied = 0
+            for step, patch_name in enumerate(GAME_SPEED_PATCHES, start=1):
+                self.progress = step_progress(step)
+                if self.apply_patch(patch_name):
+                    applied += 1
+            
+            logger.info(f"Aplicados {applied}/4 parches de velocidad")
+            return applied
+        finally:
+            self.progress = None
+            self.cancel = None
+    
     def get_patch_status(self) -> Dict[str, bool]:
         """
         Obtiene el estado de todos los parches.
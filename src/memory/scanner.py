@@ -7,12 +7,20 @@ Based on Form1.cs memory manipulation code
 
 import logging
 import re
+import threading
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Callable, List, Tuple, Optional
 from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
+# Cada cuántas posiciones de la búsqueda se comprueba la cancelación
+CANCEL_CHECK_INTERVAL = 1 << 20
+
+
+class ScanCancelled(Exception):
+    """La búsqueda se canceló (p.ej. el proxy se está deteniendo)"""
+
 
 @dataclass
 class MemoryRegion:
@@ -177,7 +185,9 @@ class RPCS3MemoryScanner:
         pattern: bytes,
         wildcard: int = -1,
         writable_only: bool = True,
-        max_results: int = 10
+        max_results: int = 10,
+        progress: Optional[Callable[[int, int], None]] = None,
+        cancel: Optional[threading.Event] = None
     ) -> List[int]:
         """
         Busca un patrón de bytes en la memoria del proceso.
@@ -188,18 +198,27 @@ class RPCS3MemoryScanner:
             wildcard: Valor que representa "cualquier byte" (-1 por defecto)
             writable_only: Solo buscar en regiones escribibles
             max_results: Máximo de resultados a retornar
+            progress: Callback (regiones procesadas, total) tras cada región
+            cancel: Evento que, al activarse, aborta la búsqueda
             
         Returns:
             Lista de direcciones donde se encontró el patrón
+            
+        Raises:
+            ScanCancelled: si `cancel` se activa durante la búsqueda
         """
         results = []
         regions = self.get_memory_regions(writable_only=writable_only)
         
         logger.info(f"Buscando patrón de {len(pattern)} bytes en {len(regions)} regiones")
         
-        for region in regions:
+        for index, region in enumerate(regions):
             if len(results) >= max_results:
                 break
+            if cancel is not None and cancel.is_set():
+                raise ScanCancelled()
+            if progress:
+                progress(index, len(regions))
             
             # Leer región completa
             region_size = region.end - region.start
@@ -215,6 +234,8 @@ class RPCS3MemoryScanner:
             
             # Buscar patrón con wildcards
             for i in range(len(data) - len(pattern) + 1):
+                if cancel is not None and i % CANCEL_CHECK_INTERVAL == 0 and cancel.is_set():
+                    raise ScanCancelled()
                 match = True
                 for j, byte in enumerate(pattern):
                     if byte != wildcard and data[i + j] != byte:
@@ -229,6 +250,8 @@ class RPCS3MemoryScanner:
                     if len(results) >= max_results:
                         break
         
+        if progress:
+            progress(len(regions), len(regions))
         logger.info(f"Patrón encontrado en {len(results)} ubicaciones")
         return results
     
@@ -1,17 +1,35 @@
 """Network package - TCP servers and Blaze protocol"""
 
-from .redirector import RedirectorServer
+from .redirector import RedirectorServer, RedirectBackend
 from .proxy import ProxyServer, EACredentials
-from .blaze import BlazePacket, BlazeComponent, AuthenticationCommand
+from .accounts import CredentialPool
+from .blaze import BlazePacket, BlazeComponent, AuthenticationCommand, BlazeFramer, MessageType
+from .latency import LatencyCorrelator, LatencyHistogram
+from .metrics import MetricsRegistry, MetricsServer
+from .patches import PatchRule, FieldRule, PatchSet, DESYNC_PATCHES
+from .workers import ProxySupervisor
 from .tdf import TDFBuilder, BlazeAuthPacket, inject_credentials_into_packet
 
 __all__ = [
     'RedirectorServer',
+    'RedirectBackend',
     'ProxyServer',
     'EACredentials',
+    'CredentialPool',
     'BlazePacket',
     'BlazeComponent',
     'AuthenticationCommand',
+    'BlazeFramer',
+    'MessageType',
+    'LatencyCorrelator',
+    'LatencyHistogram',
+    'MetricsRegistry',
+    'MetricsServer',
+    'PatchRule',
+    'FieldRule',
+    'PatchSet',
+    'DESYNC_PATCHES',
+    'ProxySupervisor',
     'TDFBuilder',
     'BlazeAuthPacket',
     'inject_credentials_into_packet',
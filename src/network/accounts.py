@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Credential Pool
+Varias cuentas de EA en un mismo proxy: cada login de RPCS3 se enruta a
+una cuenta por el PSN name del paquete 0xC8 o por la IP del cliente
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from .metrics import LOGIN_ROUTES
+from .tdf import BlazeAuthPacket
+from .tdf_walk import TDF_STRING, TDF_STRING_1D, TDF_STRING_1F, TDFWalkError, iter_fields, read_varint
+
+logger = logging.getLogger(__name__)
+
+# Regla que eligió la cuenta de un login
+ROUTE_PSN_NAME, ROUTE_ADDRESS, ROUTE_DEFAULT, ROUTE_UNROUTED = LOGIN_ROUTES
+
+
+def read_psn_name(frame) -> Optional[str]:
+    """PSN name (campo PNAM) del login original de RPCS3, o None"""
+    try:
+        for field in iter_fields(frame):
+            if field.path[-1] != 'PNAM':
+                continue
+            if field.type in (TDF_STRING_1D, TDF_STRING_1F):
+                start = field.value_offset + 1
+            elif field.type == TDF_STRING:
+                start = read_varint(frame, field.value_offset)[1]
+            else:
+                return None
+            return bytes(frame[start:field.value_end]).rstrip(b'\x00').decode('utf-8', 'replace')
+    except (TDFWalkError, IndexError):
+        return None
+    return None
+
+
+@dataclass
+class Account:
+    """Cuenta del pool con su paquete de login 0x3C ya construido"""
+    name: str
+    email: str
+    password: str
+    psn_name: str
+    login: bytes = b''
+
+    def __post_init__(self):
+        if not self.login:
+            packet = BlazeAuthPacket(msg_id=0)
+            packet.add_email(self.email)
+            packet.add_password(self.password)
+            packet.add_psn_name(self.psn_name)
+            self.login = packet.build()
+
+    def login_packet(self, msg_id: int) -> bytes:
+        """Login precalculado con el msg_id de la request de RPCS3"""
+        packet = bytearray(self.login)
+        packet[10] = (msg_id >> 8) & 0xFF
+        packet[11] = msg_id & 0xFF
+        return bytes(packet)
+
+
+class CredentialPool:
+    """
+    Cuentas de EA y reglas de enrutado.
+
+    route() resuelve la cuenta de un login con búsquedas en dict: primero
+    el PSN name del 0xC8 original (solo se lee si hay reglas por PSN name),
+    luego la IP del cliente y por último la cuenta por defecto. Sin cuenta,
+    el login va a EA sin tocar.
+    """
+
+    def __init__(
+        self,
+        accounts: Optional[Dict[str, object]] = None,
+        by_address: Optional[Dict[str, str]] = None,
+        by_psn_name: Optional[Dict[str, str]] = None,
+        default: Optional[str] = None
+    ):
+        # accounts: nombre → objeto con email/password/psn_name
+        # (EACredentials o config.Credentials)
+        self.accounts: Dict[str, Account] = {
+            name: Account(name, c.email, c.password, c.psn_name)
+            for name, c in (accounts or {}).items()
+        }
+        if default is None and len(self.accounts) == 1:
+            default = next(iter(self.accounts))
+        self.default = self._account(default, 'default') if default is not None else None
+        self._by_address = {address: self._account(name, address)
+                            for address, name in (by_address or {}).items()}
+        self._by_psn_name = {psn.casefold(): self._account(name, psn)
+                             for psn, name in (by_psn_name or {}).items()}
+
+    @classmethod
+    def from_credentials(cls, credentials) -> 'CredentialPool':
+        """Pool de una sola cuenta (login.json), o vacío"""
+        return cls({'default': credentials} if credentials else None)
+
+    def _account(self, name: str, rule: str) -> Account:
+        account = self.accounts.get(name)
+        if account is None:
+            raise ValueError(f"La regla {rule!r} apunta a una cuenta inexistente: {name!r}")
+        return account
+
+    def __len__(self) -> int:
+        return len(self.accounts)
+
+    @property
+    def routes_by_psn_name(self) -> bool:
+        return bool(self._by_psn_name)
+
+    def route(self, client_host: Optional[str], frame) -> Tuple[Optional[Account], str]:
+        """(cuenta, regla) para el login 0xC8 `frame` de un cliente en `client_host`"""
+        if self._by_psn_name:
+            psn_name = read_psn_name(frame)
+            if psn_name is not None:
+                account = self._by_psn_name.get(psn_name.casefold())
+                if account is not None:
+                    return account, ROUTE_PSN_NAME
+        if client_host is not None:
+            account = self._by_address.get(client_host)
+            if account is not None:
+                return account, ROUTE_ADDRESS
+        if self.default is not None:
+            return self.default, ROUTE_DEFAULT
+        return None, ROUTE_UNROUTED
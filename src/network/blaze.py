@@ -5,12 +5,15 @@ Based on decompiled Blaze component classes
 """
 
 from enum import IntEnum
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import struct
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Tamaño fijo del header Blaze; bytes [0-1] = longitud del payload TDF
+HEADER_SIZE = 12
+
 
 class BlazeComponent(IntEnum):
     """EA Blaze Protocol Components"""
@@ -29,6 +32,14 @@ class AuthenticationCommand(IntEnum):
     Logout = 0x1E
 
 
+class MessageType(IntEnum):
+    """Message type (header bytes 8-9)"""
+    REQUEST = 0x0000
+    RESPONSE = 0x1000
+    NOTIFICATION = 0x2000
+    ERROR_REPLY = 0x3000
+
+
 class BlazePacket:
     """
     EA Blaze Protocol Packet Structure
@@ -109,6 +120,60 @@ class BlazePacket:
                 f"msg_id={self.msg_id})")
 
 
+class BlazeFramer:
+    """
+    Incremental framer: splits a TCP byte stream into complete Blaze frames.
+
+    Cada frame ocupa HEADER_SIZE + length bytes (length = bytes [0-1]).
+    Los frames devueltos son memoryviews sobre los datos recibidos, sin
+    copias salvo para el frame que queda partido entre dos lecturas.
+    """
+
+    __slots__ = ('_pending',)
+
+    def __init__(self):
+        self._pending = b''
+
+    @property
+    def pending(self) -> int:
+        """Bytes de un frame incompleto esperando más datos"""
+        return len(self._pending)
+
+    def reset(self):
+        """Descarta el frame parcial (p.ej. tras un hueco en la captura)"""
+        self._pending = b''
+
+    def take_pending(self) -> bytes:
+        """Devuelve y descarta el frame parcial, para continuarlo en otro framer"""
+        pending, self._pending = self._pending, b''
+        return pending
+
+    def feed(self, data: bytes) -> List[memoryview]:
+        """
+        Añade datos del stream y devuelve los frames completos disponibles.
+        """
+        if self._pending:
+            data = self._pending + bytes(data)
+            self._pending = b''
+
+        view = memoryview(data)
+        total = len(view)
+        frames = []
+        offset = 0
+
+        while total - offset >= HEADER_SIZE:
+            end = offset + HEADER_SIZE + ((view[offset] << 8) | view[offset + 1])
+            if end > total:
+                break
+            frames.append(view[offset:end])
+            offset = end
+
+        if offset < total:
+            self._pending = bytes(view[offset:])
+
+        return frames
+
+
 class TDFBuilder:
     """
     Type-Data-Field builder for Blaze protocol
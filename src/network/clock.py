@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+EA Server Clock Model
+Aprende el offset y la deriva del reloj de EA respecto a time.monotonic a
+partir de las respuestas reales a Util/Ping, para contestar los pings en
+local con un timestamp creíble
+"""
+
+import time
+import logging
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+from .blaze import HEADER_SIZE, BlazeComponent, MessageType
+from .metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+PING_COMMAND = 0x02
+
+# Respuesta de Util/Ping: STIM (tag CF 4A 6D), tipo UINT32, segundos Unix
+STIM_TAG = bytes((0xCF, 0x4A, 0x6D))
+STIM_VALUE = HEADER_SIZE + 4
+
+# Cada cuánto se deja pasar un ping a EA para re-sincronizar (0 = nunca se
+# contesta en local)
+DEFAULT_RESYNC_INTERVAL = 60.0
+# Si la respuesta a la sonda no llega en este tiempo, el siguiente ping es
+# otra sonda
+PROBE_TIMEOUT = 10.0
+
+# Muestras que se conservan y antigüedad máxima: dentro de la ventana la
+# deriva es despreciable frente al segundo de resolución de STIM
+MAX_SAMPLES = 32
+SAMPLE_WINDOW = 600.0
+# Tramo mínimo de historia para estimar la deriva; deriva máxima plausible
+MIN_DRIFT_SPAN = 1800.0
+MAX_HISTORY = 64
+MAX_DRIFT = 1e-3
+
+
+def is_ping(header) -> bool:
+    return header[3] == BlazeComponent.Util and header[5] == PING_COMMAND
+
+
+def is_ping_request(header) -> bool:
+    return is_ping(header) and ((header[8] << 8) | header[9]) == MessageType.REQUEST
+
+
+def read_stim(frame) -> Optional[int]:
+    """Timestamp de una respuesta a Util/Ping, o None si no lo lleva"""
+    if len(frame) < STIM_VALUE + 4 or bytes(frame[HEADER_SIZE:HEADER_SIZE + 3]) != STIM_TAG:
+        return None
+    return int.from_bytes(frame[STIM_VALUE:STIM_VALUE + 4], 'big')
+
+
+class ServerClock:
+    """
+    Reloj de EA estimado como server = local + offset + drift * (local - last_sync).
+
+    Cada respuesta a un ping que pasó por EA acota el offset: el servidor
+    leyó su reloj (segundos enteros) entre el envío y la recepción, así
+    que offset ∈ [stim - t_recv, stim + 1 - t_envío]. La intersección de
+    las muestras recientes deja el offset con un error muy por debajo del
+    segundo. Las muestras antiguas incompatibles con la nueva (deriva
+    acumulada o salto del reloj de EA) se descartan. La deriva es la
+    pendiente del offset a lo largo de al menos MIN_DRIFT_SPAN segundos y
+    solo se usa para extrapolar entre sincronizaciones.
+
+    local_stim() da el timestamp para una respuesta local, o None si toca
+    re-sincronizar: ese ping va a EA y su respuesta alimenta el modelo.
+    """
+
+    def __init__(
+        self,
+        metrics: Optional[MetricsRegistry] = None,
+        resync_interval: float = DEFAULT_RESYNC_INTERVAL,
+        clock=time.monotonic
+    ):
+        self.metrics = metrics
+        self.resync_interval = resync_interval
+        self.clock = clock
+        self.offset: Optional[float] = None
+        self.drift = 0.0
+        self.error = 0.0            # Media anchura del intervalo del offset
+        self.last_sync = 0.0
+        self._probe_at: Optional[float] = None
+        # (t_envío, t_recv, stim) y (t_recv, offset) de cada ajuste
+        self._samples: Deque[Tuple[float, float, int]] = deque(maxlen=MAX_SAMPLES)
+        self._history: Deque[Tuple[float, float]] = deque(maxlen=MAX_HISTORY)
+        if metrics is not None:
+            metrics.add_gauge('skate3_server_clock_error_seconds',
+                              'Uncertainty of the learned EA server clock offset (-1 = not synced)',
+                              lambda: self.error if self.synced else -1)
+            metrics.add_gauge('skate3_server_clock_drift_ppm',
+                              'Learned drift of the EA server clock against local time',
+                              lambda: self.drift * 1e6)
+
+    @property
+    def synced(self) -> bool:
+        return self.offset is not None
+
+    def now(self, local: Optional[float] = None) -> float:
+        """Hora estimada de EA (segundos Unix)"""
+        local = self.clock() if local is None else local
+        return local + self.offset + self.drift * (local - self.last_sync)
+
+    def local_stim(self) -> Optional[int]:
+        """STIM para contestar un ping en local, o None si debe ir a EA"""
+        if self.resync_interval <= 0 or self.offset is None:
+            return None
+        local = self.clock()
+        if local - self.last_sync >= self.resync_interval:
+            if self._probe_at is None or local - self._probe_at >= PROBE_TIMEOUT:
+                self._probe_at = local
+                return None
+        if self.metrics is not None:
+            self.metrics.pings_local += 1
+        return int(self.now(local)) & 0xFFFFFFFF
+
+    def observe(self, stim: int, rtt: float, received: Optional[float] = None):
+        """Respuesta real de EA a un ping enviado `rtt` segundos antes de `received`"""
+        received = self.clock() if received is None else received
+        samples = self._samples
+        samples.append((received - rtt, received, stim))
+        while received - samples[0][1] > SAMPLE_WINDOW:
+            samples.popleft()
+        self._probe_at = None
+        self.last_sync = received
+        if self.metrics is not None:
+            self.metrics.pings_upstream += 1
+
+        while True:
+            lower, upper = self._intersect()
+            if lower <= upper:
+                break
+            # La muestra más antigua ya no encaja con la nueva
+            samples.popleft()
+        if len(samples) == 1 and self.offset is not None and not lower <= self.offset <= upper:
+            logger.info("Clock: el reloj de EA saltó, re-sincronizando")
+            self._history.clear()
+
+        first = self.offset is None
+        self.offset = (lower + upper) / 2
+        self.error = (upper - lower) / 2
+        self._history.append((received, self.offset))
+        self.drift = self._estimate_drift()
+        if first:
+            logger.info(f"Clock: reloj de EA sincronizado (±{self.error * 1e3:.0f} ms)")
+
+    def _intersect(self) -> Tuple[float, float]:
+        lower = float('-inf')
+        upper = float('inf')
+        for sent, received, stim in self._samples:
+            lower = max(lower, stim - received)
+            upper = min(upper, stim + 1 - sent)
+        return lower, upper
+
+    def _estimate_drift(self) -> float:
+        oldest_at, oldest_offset = self._history[0]
+        latest_at, latest_offset = self._history[-1]
+        span = latest_at - oldest_at
+        if span < MIN_DRIFT_SPAN:
+            return 0.0
+        return max(-MAX_DRIFT, min(MAX_DRIFT, (latest_offset - oldest_offset) / span))
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Write Coalescing
+Etapa de salida que junta en una sola escritura al socket los bloques que
+se generan en la misma iteración del loop (respuestas de EA,
+auto-respuestas, respuestas locales), o dentro de una micro-ventana
+"""
+
+import socket
+import asyncio
+import logging
+from typing import List, Optional
+
+from .metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+# latency: cada bloque sale en cuanto se genera (TCP_NODELAY + TCP_QUICKACK)
+# throughput: los bloques se juntan hasta el final de la iteración del loop
+# o de la ventana configurada y salen con una única writelines
+WRITE_MODES = ('latency', 'throughput')
+DEFAULT_WRITE_MODE = 'latency'
+
+# Segundos que el modo throughput espera para juntar escrituras
+# (0 = hasta el final de la iteración actual del loop)
+DEFAULT_COALESCE_WINDOW = 0.0
+
+
+def tune_socket(sock: Optional[socket.socket], mode: str):
+    """
+    Opciones TCP del modo de escritura. En latency se desactiva Nagle y se
+    piden ACKs inmediatos; TCP_QUICKACK no es permanente en Linux (el
+    kernel puede volver a retrasar ACKs), pero cubre el arranque de la
+    sesión, que es donde más pesa. throughput deja los valores de asyncio.
+    """
+    if sock is None or mode != 'latency' or sock.family not in (socket.AF_INET, socket.AF_INET6):
+        return
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if hasattr(socket, 'TCP_QUICKACK'):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+    except OSError as e:
+        logger.debug(f"Coalesce: no se pudieron aplicar opciones TCP: {e}")
+
+
+class CoalescingWriter:
+    """
+    Escritor de un socket compartido por varios productores.
+
+    En modo latency write() va directo al transporte. En throughput los
+    bloques se acumulan y flush() los entrega con una única writelines
+    (una sola syscall si el transporte estaba vacío) al final de la
+    iteración del loop, o pasados `window` segundos. Antes de write_eof()
+    o close() del transporte hay que llamar a flush().
+
+    `target` es un transporte o un StreamWriter (ambos tienen write y
+    writelines).
+    """
+
+    __slots__ = ('target', 'mode', 'window', 'metrics', '_pending', '_handle')
+
+    def __init__(
+        self,
+        target,
+        mode: str = DEFAULT_WRITE_MODE,
+        window: float = DEFAULT_COALESCE_WINDOW,
+        metrics: Optional[MetricsRegistry] = None
+    ):
+        if mode not in WRITE_MODES:
+            raise ValueError(f"Modo de escritura desconocido: {mode}")
+        self.target = target
+        self.mode = mode
+        self.window = window
+        self.metrics = metrics
+        self._pending: List[bytes] = []
+        self._handle: Optional[asyncio.Handle] = None
+
+    @property
+    def pending_bytes(self) -> int:
+        return sum(len(data) for data in self._pending)
+
+    def write(self, data):
+        if self.mode == 'latency':
+            self.target.write(data)
+            return
+        self._pending.append(data)
+        if self._handle is None:
+            loop = asyncio.get_running_loop()
+            if self.window > 0:
+                self._handle = loop.call_later(self.window, self.flush)
+            else:
+                self._handle = loop.call_soon(self.flush)
+
+    def flush(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        pending = self._pending
+        if not pending:
+            return
+        self._pending = []
+        if self.target.is_closing():
+            return
+        if len(pending) == 1:
+            self.target.write(pending[0])
+            return
+        self.target.writelines(pending)
+        if self.metrics is not None:
+            self.metrics.writes_coalesced += len(pending) - 1
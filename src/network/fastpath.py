@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Transport-level Fast Path
+Túnel RPCS3 ↔ EA sobre asyncio.BufferedProtocol (sin StreamReader/drain)
+y uvloop opcional
+"""
+
+import time
+import asyncio
+import logging
+from typing import TYPE_CHECKING, List, Optional
+
+from .blaze import HEADER_SIZE
+from .coalesce import CoalescingWriter, tune_socket
+
+if TYPE_CHECKING:
+    from .proxy import ProxyServer
+
+logger = logging.getLogger(__name__)
+
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
+# Buffer de lectura preasignado por conexión (crece si llega un frame mayor)
+BUFFER_SIZE = 64 * 1024
+# Espacio libre mínimo que se ofrece a cada lectura del kernel
+MIN_READ = 4096
+
+
+def install_uvloop() -> bool:
+    """Usa uvloop como event loop si está instalado"""
+    if not UVLOOP_AVAILABLE:
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.info("Usando uvloop")
+    return True
+
+
+class TunnelSide(asyncio.BufferedProtocol):
+    """
+    Un extremo del túnel. El kernel escribe directamente en un buffer
+    preasignado; buffer_updated corta los frames Blaze completos y los
+    entrega a la sesión como memoryviews sobre ese buffer.
+
+    Backpressure: si el transporte de este lado acumula demasiado para
+    escribir (pause_writing), se deja de leer del otro lado.
+    """
+
+    def __init__(self, session: 'FastPathSession', upstream: bool):
+        self.session = session
+        self.upstream = upstream
+        self.transport: Optional[asyncio.Transport] = None
+        self.out: Optional[CoalescingWriter] = None
+        self._buffer = bytearray(BUFFER_SIZE)
+        self._view = memoryview(self._buffer)
+        self._start = 0     # Inicio del frame incompleto pendiente
+        self._end = 0       # Fin de los datos recibidos
+
+    # --- Protocol ---------------------------------------------------------
+
+    def connection_made(self, transport: asyncio.Transport):
+        self.transport = transport
+        proxy = self.session.proxy
+        self.out = CoalescingWriter(transport, proxy.write_mode, proxy.coalesce_window, proxy.metrics)
+        tune_socket(transport.get_extra_info('socket'), proxy.write_mode)
+        self.session.side_connected(self)
+
+    def connection_lost(self, exc: Optional[Exception]):
+        self.session.close(exc)
+
+    def eof_received(self) -> bool:
+        # True: half-close, el transporte sigue abierto para escribir
+        return self.session.side_eof(self)
+
+    def pause_writing(self):
+        peer = self.session.peer_of(self)
+        if peer is not None and peer.transport is not None:
+            peer.transport.pause_reading()
+
+    def resume_writing(self):
+        peer = self.session.peer_of(self)
+        if peer is not None and peer.transport is not None:
+            peer.transport.resume_reading()
+
+    # --- BufferedProtocol -------------------------------------------------
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        if len(self._buffer) - self._end < MIN_READ:
+            self._make_room()
+        return self._view[self._end:]
+
+    def buffer_updated(self, nbytes: int):
+        self._end += nbytes
+        view = self._view
+        pos = self._start
+        end = self._end
+
+        frames: List[memoryview] = []
+        while end - pos >= HEADER_SIZE:
+            frame_end = pos + HEADER_SIZE + ((view[pos] << 8) | view[pos + 1])
+            if frame_end > end:
+                break
+            frames.append(view[pos:frame_end])
+            pos = frame_end
+        self._start = pos
+
+        # La sesión copia lo que reenvía antes de que el buffer se reutilice
+        self.session.forward(self, frames, nbytes)
+
+        if self._start == self._end:
+            self._start = self._end = 0
+
+    def _make_room(self):
+        """Mueve el frame parcial al inicio, o agranda el buffer si no cabe"""
+        pending = self._end - self._start
+        needed = pending
+        if pending >= HEADER_SIZE:
+            start = self._start
+            needed = HEADER_SIZE + ((self._buffer[start] << 8) | self._buffer[start + 1])
+        target = needed + MIN_READ
+
+        if self._start > 0 and target <= len(self._buffer):
+            self._buffer[:pending] = self._buffer[self._start:self._end]
+        else:
+            grown = bytearray(max(len(self._buffer) * 2, target))
+            grown[:pending] = self._buffer[self._start:self._end]
+            self._buffer = grown
+            self._view = memoryview(grown)
+        self._start = 0
+        self._end = pending
+
+
+class FastPathSession:
+    """
+    Sesión RPCS3 ↔ EA del fast path. Usa los mismos hooks que los túneles
+    de streams (tablas de fase, process_client_frame, process_ea_frame),
+    así que capturas, métricas y latencias funcionan igual.
+    """
+
+    def __init__(self, proxy: 'ProxyServer'):
+        self.proxy = proxy
+        self.client = TunnelSide(self, upstream=False)
+        self.ea: Optional[TunnelSide] = None
+        self.session_id = 0
+        self.stats = None
+        self.phase = None
+        self.addr = None
+        self.closed = False
+        self._half_close_timer: Optional[asyncio.TimerHandle] = None
+
+    def peer_of(self, side: TunnelSide) -> Optional[TunnelSide]:
+        return self.ea if side is self.client else self.client
+
+    def side_connected(self, side: TunnelSide):
+        if side is not self.client:
+            return
+        proxy = self.proxy
+        self.addr = side.transport.get_extra_info('peername')
+        self.session_id = next(proxy._session_ids)
+        logger.info(f"Proxy: Nueva conexión desde {self.addr} (sesión {self.session_id}, fast path)")
+
+        self.stats = proxy.metrics.open_session(self.session_id, self.addr)
+        self.stats.client_transport = side.transport
+        self.phase = proxy.session_phase(self.session_id, self.addr[0] if self.addr else None)
+        proxy.lifecycle.register(self.session_id, self.close)
+
+        # No leer del cliente hasta tener conexión con EA
+        side.transport.pause_reading()
+        asyncio.get_running_loop().create_task(self._connect_upstream())
+
+    async def _connect_upstream(self):
+        proxy = self.proxy
+        try:
+            self.ea = TunnelSide(self, upstream=True)
+            await asyncio.get_running_loop().create_connection(
+                lambda: self.ea, sock=await proxy.connect_upstream()
+            )
+        except Exception as e:
+            logger.error(f"Proxy: Error en túnel: {e}")
+            self.close(e)
+            return
+        if self.closed:
+            self.ea.transport.close()
+            return
+        logger.info("Proxy: Conectado a servidor EA")
+        self.stats.ea_transport = self.ea.transport
+        self.client.transport.resume_reading()
+
+    def forward(self, side: TunnelSide, frames: List[memoryview], nbytes: int):
+        proxy = self.proxy
+        if side is self.client:
+            self.stats.last_to_ea = time.monotonic()
+            self.stats.bytes_to_ea += nbytes
+            if not frames:
+                return
+            self.stats.packets_to_ea += len(frames)
+
+            out = []
+            auto_responses = []
+            phase = self.phase
+            for frame in frames:
+                frame = phase.client_frame(frame, auto_responses)
+                if frame is not None:
+                    out.append(proxy.process_client_frame(self.session_id, frame))
+
+            if out:
+                self.ea.out.write(b''.join(out))
+            if auto_responses:
+                self.client.out.write(b''.join(auto_responses))
+        else:
+            self.stats.last_from_ea = time.monotonic()
+            self.stats.bytes_from_ea += nbytes
+            if not frames:
+                return
+            self.stats.packets_from_ea += len(frames)
+            phase = self.phase
+            out = []
+            for frame in frames:
+                phase.ea_frame(frame)
+                out.append(proxy.process_ea_frame(self.session_id, frame))
+            self.client.out.write(b''.join(out))
+
+    def side_eof(self, side: TunnelSide) -> bool:
+        """
+        EOF limpio de un extremo: se propaga al otro con write_eof y se le
+        da half_close_timeout para terminar. Un segundo EOF cierra la sesión.
+        """
+        peer = self.peer_of(side)
+        if (self._half_close_timer is not None or peer is None or peer.transport is None
+                or not peer.transport.can_write_eof()):
+            return False
+        peer.out.flush()
+        peer.transport.write_eof()
+        self.proxy.metrics.sessions_half_closed += 1
+        self._half_close_timer = asyncio.get_running_loop().call_later(
+            self.proxy.lifecycle.half_close_timeout, self.close
+        )
+        return True
+
+    def close(self, exc: Optional[Exception] = None):
+        if self.closed:
+            return
+        self.closed = True
+        proxy = self.proxy
+        proxy.lifecycle.unregister(self.session_id)
+        if self._half_close_timer is not None:
+            self._half_close_timer.cancel()
+            proxy.metrics.sessions_half_closed -= 1
+
+        # close() vacía lo pendiente de escribir antes de cerrar el socket
+        for side in (self.client, self.ea):
+            if side is not None and side.transport is not None:
+                side.out.flush()
+                side.transport.close()
+
+        proxy.close_phase(self.session_id)
+        proxy.latency.end_session(self.session_id)
+        if proxy.response_cache is not None:
+            proxy.response_cache.end_session(self.session_id)
+        proxy.metrics.close_session(self.session_id)
+        if proxy.latency.histograms:
+            logger.info(f"Proxy: Latencia upstream por comando:\n{proxy.latency.report()}")
+        logger.info(f"Proxy: Conexión cerrada con {self.addr}")
+
+
+def client_protocol_factory(proxy: 'ProxyServer'):
+    """Factory para loop.create_server: una sesión por conexión de RPCS3"""
+    return lambda: FastPathSession(proxy).client
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Request/Response Latency Correlator
+Mide el RTT real contra EA por (component, command) dentro del proxy
+"""
+
+import time
+import logging
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from .blaze import MessageType
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyHistogram:
+    """
+    Histograma log-lineal estilo HDR en memoria fija.
+
+    Valores en microsegundos; 16 sub-buckets por potencia de 2 (error
+    relativo <= 6.25%) hasta 2^26 us (~67 s). Valores mayores se saturan
+    en el último bucket.
+    """
+
+    SUB_BITS = 4
+    SUB_BUCKETS = 1 << SUB_BITS
+    MAX_EXPONENT = 26
+    BUCKETS = SUB_BUCKETS + (MAX_EXPONENT - SUB_BITS + 1) * SUB_BUCKETS
+
+    __slots__ = ('counts', 'count', 'total_us', 'min_us', 'max_us')
+
+    def __init__(self):
+        self.counts = array('Q', bytes(8 * self.BUCKETS))
+        self.count = 0
+        self.total_us = 0
+        self.min_us = 0
+        self.max_us = 0
+
+    @classmethod
+    def bucket_index(cls, value_us: int) -> int:
+        if value_us < cls.SUB_BUCKETS:
+            return value_us
+        msb = value_us.bit_length() - 1
+        if msb > cls.MAX_EXPONENT:
+            return cls.BUCKETS - 1
+        shift = msb - cls.SUB_BITS
+        mantissa = (value_us >> shift) - cls.SUB_BUCKETS
+        return cls.SUB_BUCKETS + shift * cls.SUB_BUCKETS + mantissa
+
+    @classmethod
+    def bucket_upper(cls, index: int) -> int:
+        """Límite superior (inclusive) del bucket en microsegundos"""
+        if index < cls.SUB_BUCKETS:
+            return index
+        shift, mantissa = divmod(index - cls.SUB_BUCKETS, cls.SUB_BUCKETS)
+        return ((cls.SUB_BUCKETS + mantissa + 1) << shift) - 1
+
+    def record(self, value_ns: int):
+        value_us = max(value_ns, 0) // 1000
+        self.counts[self.bucket_index(value_us)] += 1
+        if self.count == 0 or value_us < self.min_us:
+            self.min_us = value_us
+        if value_us > self.max_us:
+            self.max_us = value_us
+        self.count += 1
+        self.total_us += value_us
+
+    def percentile(self, p: float) -> int:
+        """Percentil p (0-100) en microsegundos"""
+        if self.count == 0:
+            return 0
+        target = max(1, int(self.count * p / 100.0 + 0.5))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(self.bucket_upper(index), self.max_us)
+        return self.max_us
+
+    def export(self) -> tuple:
+        """Estado serializable (solo buckets no vacíos) para agregar entre procesos"""
+        counts = {index: n for index, n in enumerate(self.counts) if n}
+        return counts, self.count, self.total_us, self.min_us, self.max_us
+
+    def merge(self, exported: tuple):
+        """Suma un histograma exportado por export()"""
+        counts, count, total_us, min_us, max_us = exported
+        if not count:
+            return
+        for index, n in counts.items():
+            self.counts[index] += n
+        if self.count == 0 or min_us < self.min_us:
+            self.min_us = min_us
+        self.max_us = max(self.max_us, max_us)
+        self.count += count
+        self.total_us += total_us
+
+    @property
+    def mean_us(self) -> float:
+        return self.total_us / self.count if self.count else 0.0
+
+
+class LatencyCorrelator:
+    """
+    Empareja requests y respuestas por (session, msg_id) usando
+    perf_counter_ns, y acumula histogramas por (component, command).
+
+    Las requests pendientes se guardan en orden de llegada, así que la
+    expiración solo mira el principio de la cola.
+    """
+
+    def __init__(self, timeout: float = 30.0, max_pending: int = 4096):
+        self.timeout_ns = int(timeout * 1e9)
+        self.max_pending = max_pending
+        self.pending: 'OrderedDict[Tuple[int, int], Tuple[int, int, int]]' = OrderedDict()
+        self.histograms: Dict[Tuple[int, int], LatencyHistogram] = {}
+        self.timeouts: Dict[Tuple[int, int], int] = {}
+        self.unmatched = 0
+
+    def on_request(self, session: int, component: int, command: int, msg_id: int,
+                   now: Optional[int] = None):
+        """Registra una REQUEST RPCS3 → EA"""
+        now = time.perf_counter_ns() if now is None else now
+        key = (session, msg_id)
+        self.pending.pop(key, None)
+        self.pending[key] = (now, component, command)
+        if len(self.pending) > self.max_pending:
+            self._expire(self.pending.popitem(last=False)[1])
+        self.evict_expired(now)
+
+    def on_reply(self, session: int, msg_type: int, msg_id: int,
+                 now: Optional[int] = None, component: Optional[int] = None,
+                 command: Optional[int] = None) -> Optional[int]:
+        """
+        Registra una RESPONSE/ERROR_REPLY/NOTIFICATION EA → RPCS3.
+
+        Una NOTIFICATION solo cierra la request pendiente si además coincide
+        su (component, command): el msg_id de las notificaciones no tiene
+        relación con las requests.
+
+        Returns:
+            RTT en nanosegundos, o None si no había request pendiente
+        """
+        if msg_type == MessageType.REQUEST:
+            return None
+        key = (session, msg_id)
+        if msg_type == MessageType.NOTIFICATION:
+            entry = self.pending.get(key)
+            if entry is None or entry[1] != component or entry[2] != command:
+                return None
+        entry = self.pending.pop(key, None)
+        if entry is None:
+            self.unmatched += 1
+            return None
+        now = time.perf_counter_ns() if now is None else now
+        started, component, command = entry
+        rtt = now - started
+        key = (component, command)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = LatencyHistogram()
+        histogram.record(rtt)
+        return rtt
+
+    def evict_expired(self, now: Optional[int] = None) -> int:
+        """Descarta requests sin respuesta tras `timeout`"""
+        now = time.perf_counter_ns() if now is None else now
+        deadline = now - self.timeout_ns
+        evicted = 0
+        while self.pending:
+            key, entry = next(iter(self.pending.items()))
+            if entry[0] > deadline:
+                break
+            del self.pending[key]
+            self._expire(entry)
+            evicted += 1
+        return evicted
+
+    def end_session(self, session: int):
+        """Olvida las requests pendientes de una sesión cerrada"""
+        for key in [k for k in self.pending if k[0] == session]:
+            del self.pending[key]
+
+    def _expire(self, entry: Tuple[int, int, int]):
+        key = (entry[1], entry[2])
+        self.timeouts[key] = self.timeouts.get(key, 0) + 1
+
+    def snapshot(self) -> List[dict]:
+        """Resumen por comando, ordenado por p99 descendente"""
+        rows = []
+        for (component, command), h in self.histograms.items():
+            rows.append({
+                'component': component,
+                'command': command,
+                'count': h.count,
+                'timeouts': self.timeouts.get((component, command), 0),
+                'mean_us': h.mean_us,
+                'p50_us': h.percentile(50),
+                'p90_us': h.percentile(90),
+                'p99_us': h.percentile(99),
+                'max_us': h.max_us,
+            })
+        rows.sort(key=lambda r: r['p99_us'], reverse=True)
+        return rows
+
+    def report(self, limit: int = 10) -> str:
+        """Tabla de texto con los comandos más lentos"""
+        lines = [f"{'Comando':<12} {'n':>6} {'p50 ms':>9} {'p90 ms':>9} "
+                 f"{'p99 ms':>9} {'max ms':>9} {'timeouts':>8}"]
+        for row in self.snapshot()[:limit]:
+            lines.append(
+                f"0x{row['component']:02X}/0x{row['command']:02X}    {row['count']:>6} "
+                f"{row['p50_us'] / 1000:>9.1f} {row['p90_us'] / 1000:>9.1f} "
+                f"{row['p99_us'] / 1000:>9.1f} {row['max_us'] / 1000:>9.1f} "
+                f"{row['timeouts']:>8}"
+            )
+        return '\n'.join(lines)
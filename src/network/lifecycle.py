@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Session Lifecycle
+Cierre coordinado de las dos direcciones de una sesión, timeouts de
+inactividad/lectura y limpieza de sesiones huérfanas
+"""
+
+import time
+import asyncio
+import logging
+from typing import Callable, Dict, Optional
+
+from .metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+# Sin tráfico en ninguna dirección durante este tiempo → se cierra la sesión
+DEFAULT_IDLE_TIMEOUT = 300.0
+# Tras el EOF de una dirección, margen para que la otra termine sola
+DEFAULT_HALF_CLOSE_TIMEOUT = 5.0
+# Cada cuánto revisa el reaper
+DEFAULT_REAP_INTERVAL = 5.0
+
+
+class _Entry:
+    __slots__ = ('close', 'task')
+
+    def __init__(self, close: Callable[[], None], task: Optional[asyncio.Task]):
+        self.close = close
+        self.task = task
+
+
+class SessionManager:
+    """
+    Ciclo de vida de las sesiones del proxy.
+
+    - run_pair(): espera las dos direcciones de una sesión; cuando una
+      termina por EOF propaga el half-close y deja `half_close_timeout`
+      a la otra; si termina por error, cancela la otra de inmediato.
+    - Reaper: cierra sesiones sin tráfico durante `idle_timeout` (ambas
+      direcciones), con una dirección muda más de `read_timeout` (0 = sin
+      límite), o cuyo handler terminó sin darse de baja (huérfanas).
+
+    Los tiempos de última lectura los actualizan los túneles en
+    SessionMetrics (last_to_ea / last_from_ea).
+    """
+
+    def __init__(
+        self,
+        metrics: MetricsRegistry,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        read_timeout: float = 0.0,
+        half_close_timeout: float = DEFAULT_HALF_CLOSE_TIMEOUT,
+        reap_interval: float = DEFAULT_REAP_INTERVAL
+    ):
+        self.metrics = metrics
+        self.idle_timeout = idle_timeout
+        self.read_timeout = read_timeout
+        self.half_close_timeout = half_close_timeout
+        self.reap_interval = reap_interval
+        self._entries: Dict[int, _Entry] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ------------------------------------------------------------------
+    # Registro
+    # ------------------------------------------------------------------
+
+    def register(self, session_id: int, close: Callable[[], None],
+                 task: Optional[asyncio.Task] = None):
+        """
+        `close` debe cerrar la sesión (cancelar su handler o sus
+        transportes); `task`, si la hay, permite detectar handlers muertos.
+        """
+        self._entries[session_id] = _Entry(close, task)
+
+    def unregister(self, session_id: int):
+        self._entries.pop(session_id, None)
+
+    # ------------------------------------------------------------------
+    # Direcciones de una sesión
+    # ------------------------------------------------------------------
+
+    async def run_pair(self, to_ea: asyncio.Task, from_ea: asyncio.Task,
+                       half_close: Callable[[bool], None]) -> None:
+        """
+        Espera las dos direcciones. Cada una devuelve True si terminó por
+        EOF limpio. half_close(to_ea) se llama con la dirección que terminó
+        para que cierre la escritura hacia el otro extremo.
+        """
+        tasks = {to_ea, from_ea}
+        try:
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            if pending:
+                finished = done.pop()
+                if not finished.cancelled() and finished.result() is True:
+                    half_close(finished is to_ea)
+                    self.metrics.sessions_half_closed += 1
+                    try:
+                        _, pending = await asyncio.wait(pending, timeout=self.half_close_timeout)
+                    finally:
+                        self.metrics.sessions_half_closed -= 1
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    # ------------------------------------------------------------------
+    # Reaper
+    # ------------------------------------------------------------------
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._reap_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _reap_loop(self):
+        while True:
+            await asyncio.sleep(self.reap_interval)
+            self.reap()
+
+    def reap(self, now: Optional[float] = None) -> int:
+        """Una pasada del reaper. Devuelve cuántas sesiones cerró"""
+        now = time.monotonic() if now is None else now
+        reaped = 0
+        for session_id, entry in list(self._entries.items()):
+            stats = self.metrics.sessions.get(session_id)
+            if stats is None or (entry.task is not None and entry.task.done()):
+                reason = 'orphan'
+            elif self.idle_timeout and now - max(stats.last_to_ea, stats.last_from_ea) > self.idle_timeout:
+                reason = 'idle'
+            elif self.read_timeout and now - min(stats.last_to_ea, stats.last_from_ea) > self.read_timeout:
+                reason = 'read_timeout'
+            else:
+                continue
+
+            logger.warning(f"Sesiones: cerrando sesión {session_id} ({reason})")
+            self._entries.pop(session_id, None)
+            self.metrics.sessions_reaped[reason] += 1
+            reaped += 1
+            entry.close()
+            if reason == 'orphan':
+                # Nadie más va a limpiarla: retirar sus métricas aquí
+                self.metrics.close_session(session_id)
+        return reaped
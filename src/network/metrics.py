@@ -0,0 +1,604 @@
+#!/usr/bin/env python3
+"""
+Prometheus-style Metrics
+Contadores, gauges e histogramas del proxy/redirector y endpoint HTTP /metrics
+"""
+
+import time
+import asyncio
+import logging
+from array import array
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .latency import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# Buckets (segundos) para el lag del event loop
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+QUEUE_WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5)
+# Tiempo en cada fase de sesión: del login (ms) a una partida (horas)
+PHASE_TIME_BUCKETS = (0.01, 0.1, 0.5, 1.0, 5.0, 30.0, 60.0, 300.0, 1800.0, 3600.0)
+
+# Claves de snapshot() que son gauges (no se acumulan al retirar un worker)
+SNAPSHOT_GAUGES = ('sessions_active', 'sessions_half_closed', 'loop_lag_last')
+# Clave de export() con los histogramas (se fusionan bucket a bucket, no se suman)
+SNAPSHOT_HISTOGRAMS = 'histograms'
+
+# Motivos por los que SessionManager cierra una sesión
+REAP_REASONS = ('idle', 'read_timeout', 'orphan')
+
+# Fases de una sesión del proxy, en orden (ver phases.py)
+SESSION_PHASES = ('pre_auth', 'auth_pending', 'authenticated', 'in_game', 'closing')
+
+# Regla del pool de credenciales que eligió la cuenta de un login (ver accounts.py)
+LOGIN_ROUTES = ('psn_name', 'address', 'default', 'unrouted')
+
+
+class SessionMetrics:
+    """
+    Contadores de una sesión del proxy. El hot path solo hace sumas
+    sobre atributos con __slots__; nada se formatea hasta el scrape.
+    """
+
+    __slots__ = (
+        'session_id', 'peer',
+        'bytes_to_ea', 'packets_to_ea',
+        'bytes_from_ea', 'packets_from_ea',
+        'client_transport', 'ea_transport',
+        'opened_at', 'last_to_ea', 'last_from_ea', 'phase',
+    )
+
+    def __init__(self, session_id: int, peer: str):
+        self.session_id = session_id
+        self.peer = peer
+        self.bytes_to_ea = 0
+        self.packets_to_ea = 0
+        self.bytes_from_ea = 0
+        self.packets_from_ea = 0
+        self.client_transport = None
+        self.ea_transport = None
+        # Última lectura por dirección (time.monotonic), para los timeouts
+        self.opened_at = self.last_to_ea = self.last_from_ea = time.monotonic()
+        self.phase = SESSION_PHASES[0]
+
+
+class Histogram:
+    """Histograma acumulativo con buckets fijos (formato Prometheus)"""
+
+    __slots__ = ('bounds', 'counts', 'count', 'sum')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = array('Q', bytes(8 * (len(bounds) + 1)))
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        index = 0
+        for bound in self.bounds:
+            if value <= bound:
+                break
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def export(self) -> tuple:
+        """Estado serializable para agregar entre procesos"""
+        return list(self.counts), self.count, self.sum
+
+    def merge(self, exported: tuple):
+        """Suma un histograma exportado por export() (mismos buckets)"""
+        counts, count, total = exported
+        for index, n in enumerate(counts):
+            self.counts[index] += n
+        self.count += count
+        self.sum += total
+
+
+class MetricsRegistry:
+    """
+    Registro de métricas del proceso.
+
+    Todo se actualiza desde el event loop (un solo hilo), así que el
+    scrape lee atributos sin locks. Las sesiones cerradas se acumulan en
+    totales para no hacer crecer las series indefinidamente.
+    """
+
+    def __init__(self):
+        # Contadores globales
+        self.auto_responses = 0
+        self.credential_injections = 0
+        self.desync_patches = 0
+        self.redirects = 0
+        self.sessions_opened = 0
+        self.spliced_bytes = 0
+        self.writes_coalesced = 0
+        self.pings_local = 0
+        self.pings_upstream = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_evictions = 0
+        self.upstream_pool_hits = 0
+        self.upstream_pool_misses = 0
+        self.upstream_ejections = 0
+        self.upstream_reconnects = 0
+        self.upstream_reconnects_failed = 0
+        self.sessions_parked = 0
+        self.sessions_resumed = 0
+        self.sessions_reaped = dict.fromkeys(REAP_REASONS, 0)
+        self.sessions_half_closed = 0
+        # Entradas en cada fase de sesión
+        self.phase_entries = dict.fromkeys(SESSION_PHASES, 0)
+        self.logins_routed = dict.fromkeys(LOGIN_ROUTES, 0)
+
+        # Totales de sesiones ya cerradas
+        self.closed_bytes_to_ea = 0
+        self.closed_packets_to_ea = 0
+        self.closed_bytes_from_ea = 0
+        self.closed_packets_from_ea = 0
+
+        self.sessions: Dict[int, SessionMetrics] = {}
+        self.gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+
+        self.loop_lag = Histogram(LOOP_LAG_BUCKETS)
+        self.loop_lag_last = 0.0
+
+        # Espera en la cola de salida por (dirección, clase de prioridad)
+        self.queue_wait: Dict[Tuple[str, str], Histogram] = {}
+        # Tiempo pasado en cada fase al salir de ella
+        self.phase_time = {phase: Histogram(PHASE_TIME_BUCKETS) for phase in SESSION_PHASES}
+
+        # Correlador de latencia (opcional, lo asigna el proxy)
+        self.latency = None
+        # Endpoints de EA con su salud (opcional, lo asigna el proxy)
+        self.upstreams = None
+
+        # Snapshots de otros procesos (workers) y contadores de los ya retirados
+        self.remote: Dict[str, dict] = {}
+        self.retired: Dict[str, float] = {}
+        self.retired_histograms: Dict[str, object] = {}
+
+    # ------------------------------------------------------------------
+    # Sesiones
+    # ------------------------------------------------------------------
+
+    def open_session(self, session_id: int, peer) -> SessionMetrics:
+        if isinstance(peer, tuple):
+            peer = f"{peer[0]}:{peer[1]}"
+        stats = SessionMetrics(session_id, str(peer))
+        self.sessions[session_id] = stats
+        self.sessions_opened += 1
+        return stats
+
+    def close_session(self, session_id: int):
+        stats = self.sessions.pop(session_id, None)
+        if stats is None:
+            return
+        self.closed_bytes_to_ea += stats.bytes_to_ea
+        self.closed_packets_to_ea += stats.packets_to_ea
+        self.closed_bytes_from_ea += stats.bytes_from_ea
+        self.closed_packets_from_ea += stats.packets_from_ea
+
+    def totals(self) -> Dict[str, int]:
+        """Bytes/paquetes por dirección incluyendo sesiones abiertas"""
+        live = self.sessions.values()
+        return {
+            'bytes_to_ea': self.closed_bytes_to_ea + sum(s.bytes_to_ea for s in live),
+            'packets_to_ea': self.closed_packets_to_ea + sum(s.packets_to_ea for s in live),
+            'bytes_from_ea': self.closed_bytes_from_ea + sum(s.bytes_from_ea for s in live),
+            'packets_from_ea': self.closed_packets_from_ea + sum(s.packets_from_ea for s in live),
+        }
+
+    # ------------------------------------------------------------------
+    # Gauges y lag del event loop
+    # ------------------------------------------------------------------
+
+    def add_gauge(self, name: str, help_text: str, fn: Callable[[], float]):
+        """Gauge evaluado en el momento del scrape"""
+        self.gauges[name] = (help_text, fn)
+
+    def queue_wait_histogram(self, direction: str, priority: str) -> Histogram:
+        """Histograma compartido por todas las sesiones para esa dirección y clase"""
+        key = (direction, priority)
+        histogram = self.queue_wait.get(key)
+        if histogram is None:
+            histogram = self.queue_wait[key] = Histogram(QUEUE_WAIT_BUCKETS)
+        return histogram
+
+    def phase_changed(self, old: str, new: str, elapsed: float):
+        """Una sesión pasó de `old` a `new` tras `elapsed` segundos en `old`"""
+        self.phase_entries[new] += 1
+        self.phase_time[old].observe(elapsed)
+
+    async def monitor_loop_lag(self, interval: float = 0.5):
+        """Mide cuánto tarda el loop en despertar respecto a lo programado"""
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + interval
+            await asyncio.sleep(interval)
+            lag = max(0.0, loop.time() - expected)
+            self.loop_lag_last = lag
+            self.loop_lag.observe(lag)
+
+    # ------------------------------------------------------------------
+    # Exposición
+    # ------------------------------------------------------------------
+
+    def snapshot(self) -> dict:
+        """Valores planos (usado también para agregar entre procesos)"""
+        snap = {
+            'auto_responses': self.auto_responses,
+            'credential_injections': self.credential_injections,
+            'desync_patches': self.desync_patches,
+            'redirects': self.redirects,
+            'sessions_opened': self.sessions_opened,
+            'spliced_bytes': self.spliced_bytes,
+            'writes_coalesced': self.writes_coalesced,
+            'pings_local': self.pings_local,
+            'pings_upstream': self.pings_upstream,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'cache_evictions': self.cache_evictions,
+            'upstream_pool_hits': self.upstream_pool_hits,
+            'upstream_pool_misses': self.upstream_pool_misses,
+            'upstream_ejections': self.upstream_ejections,
+            'upstream_reconnects': self.upstream_reconnects,
+            'upstream_reconnects_failed': self.upstream_reconnects_failed,
+            'sessions_parked': self.sessions_parked,
+            'sessions_resumed': self.sessions_resumed,
+            'sessions_active': len(self.sessions),
+            'sessions_half_closed': self.sessions_half_closed,
+            'loop_lag_last': self.loop_lag_last,
+        }
+        for reason, count in self.sessions_reaped.items():
+            snap[f'sessions_reaped_{reason}'] = count
+        for phase, count in self.phase_entries.items():
+            snap[f'phase_entered_{phase}'] = count
+        for route, count in self.logins_routed.items():
+            snap[f'logins_routed_{route}'] = count
+        snap.update(self.totals())
+        return snap
+
+    # ------------------------------------------------------------------
+    # Agregación entre procesos
+    # ------------------------------------------------------------------
+
+    def export(self) -> dict:
+        """snapshot() con los histogramas: lo que cada worker envía al supervisor"""
+        snap = self.snapshot()
+        snap[SNAPSHOT_HISTOGRAMS] = {name: h.export() for name, h in self._histograms().items()}
+        return snap
+
+    def update_remote(self, source: str, snapshot: dict):
+        """Guarda el último snapshot (export()) recibido de un worker"""
+        self.remote[source] = snapshot
+
+    def retire_remote(self, source: str):
+        """Un worker terminó: sus contadores pasan a los totales retirados"""
+        snapshot = self.remote.pop(source, None)
+        if not snapshot:
+            return
+        self._merge_histograms(self.retired_histograms, snapshot.pop(SNAPSHOT_HISTOGRAMS, {}))
+        for key, value in snapshot.items():
+            if key not in SNAPSHOT_GAUGES:
+                self.retired[key] = self.retired.get(key, 0) + value
+
+    def aggregate(self) -> dict:
+        """snapshot() local + workers activos + workers retirados"""
+        agg = self.snapshot()
+        for key, value in self.retired.items():
+            agg[key] = agg.get(key, 0) + value
+        for snapshot in self.remote.values():
+            for key, value in snapshot.items():
+                if key == SNAPSHOT_HISTOGRAMS:
+                    continue
+                if key == 'loop_lag_last':
+                    agg[key] = max(agg[key], value)
+                else:
+                    agg[key] = agg.get(key, 0) + value
+        return agg
+
+    def _histograms(self) -> Dict[str, object]:
+        """Histogramas de este proceso por nombre de serie"""
+        histograms = {'loop_lag': self.loop_lag}
+        for (direction, priority), h in self.queue_wait.items():
+            histograms[f'queue_wait/{direction}/{priority}'] = h
+        for phase, h in self.phase_time.items():
+            if h.count:
+                histograms[f'phase_time/{phase}'] = h
+        if self.latency is not None:
+            for (component, command), h in self.latency.histograms.items():
+                histograms[f'rtt/{component}/{command}'] = h
+        return histograms
+
+    @staticmethod
+    def _merge_histograms(into: Dict[str, object], exported: dict):
+        for name, data in exported.items():
+            h = into.get(name)
+            if h is None:
+                kind = name.split('/', 1)[0]
+                if kind == 'rtt':
+                    h = LatencyHistogram()
+                else:
+                    h = Histogram({'loop_lag': LOOP_LAG_BUCKETS, 'queue_wait': QUEUE_WAIT_BUCKETS,
+                                   'phase_time': PHASE_TIME_BUCKETS}[kind])
+                into[name] = h
+            h.merge(data)
+
+    def histograms(self) -> Dict[str, object]:
+        """Histogramas locales + workers activos + workers retirados"""
+        local = self._histograms()
+        if not self.remote and not self.retired_histograms:
+            return local
+        merged: Dict[str, object] = {}
+        self._merge_histograms(merged, {name: h.export() for name, h in local.items()})
+        self._merge_histograms(merged, {name: h.export() for name, h in self.retired_histograms.items()})
+        for snapshot in self.remote.values():
+            self._merge_histograms(merged, snapshot.get(SNAPSHOT_HISTOGRAMS, {}))
+        return merged
+
+    def render(self) -> str:
+        """Formato de texto de Prometheus (exposition format 0.0.4)"""
+        lines: List[str] = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_str = ','.join(f'{k}="{v}"' for k, v in labels)
+                lines.append(f"{name}{{{label_str}}} {value}" if label_str else f"{name} {value}")
+
+        totals = self.aggregate()
+
+        metric('skate3_auto_responses_total', 'counter',
+               'Keep-alive responses synthesized locally', [((), totals['auto_responses'])])
+        metric('skate3_pings_total', 'counter',
+               'Pings answered locally with the learned EA clock, and resync probes answered by EA', [
+                   ((('answered', 'local'),), totals['pings_local']),
+                   ((('answered', 'upstream'),), totals['pings_upstream']),
+               ])
+        metric('skate3_response_cache_total', 'counter',
+               'Cacheable requests served from the response cache or sent to EA', [
+                   ((('result', 'hit'),), totals['cache_hits']),
+                   ((('result', 'miss'),), totals['cache_misses']),
+               ])
+        metric('skate3_response_cache_evictions_total', 'counter',
+               'Responses evicted from the response cache (LRU)',
+               [((), totals['cache_evictions'])])
+        metric('skate3_credential_injections_total', 'counter',
+               'Login packets rewritten with configured credentials',
+               [((), totals['credential_injections'])])
+        metric('skate3_logins_routed_total', 'counter',
+               'Logins by the credential pool rule that picked the account', [
+                   ((('rule', route),), totals[f'logins_routed_{route}'])
+                   for route in LOGIN_ROUTES
+               ])
+        metric('skate3_desync_patches_total', 'counter',
+               'Anti-desync patches applied to EA packets', [((), totals['desync_patches'])])
+        metric('skate3_redirects_total', 'counter',
+               'Redirector responses served', [((), totals['redirects'])])
+        metric('skate3_sessions_opened_total', 'counter',
+               'Proxy sessions accepted', [((), totals['sessions_opened'])])
+        metric('skate3_spliced_bytes_total', 'counter',
+               'Frame body bytes moved with os.splice (passthrough mode)',
+               [((), totals['spliced_bytes'])])
+        metric('skate3_writes_coalesced_total', 'counter',
+               'Socket writes merged into an earlier one (throughput write mode)',
+               [((), totals['writes_coalesced'])])
+        metric('skate3_upstream_pool_total', 'counter',
+               'Upstream connections by origin (warm pool hit or fresh connect)', [
+                   ((('result', 'hit'),), totals['upstream_pool_hits']),
+                   ((('result', 'miss'),), totals['upstream_pool_misses']),
+               ])
+        metric('skate3_upstream_ejections_total', 'counter',
+               'EA endpoints ejected after consecutive connect failures',
+               [((), totals['upstream_ejections'])])
+        metric('skate3_upstream_reconnects_total', 'counter',
+               'Mid-session EA reconnects with login replay', [
+                   ((('result', 'ok'),), totals['upstream_reconnects']),
+                   ((('result', 'failed'),), totals['upstream_reconnects_failed']),
+               ])
+        metric('skate3_sessions_parked_total', 'counter',
+               'EA sessions parked after the client left, and how many were resumed', [
+                   ((('result', 'parked'),), totals['sessions_parked']),
+                   ((('result', 'resumed'),), totals['sessions_resumed']),
+               ])
+        metric('skate3_sessions_active', 'gauge',
+               'Proxy sessions currently open', [((), totals['sessions_active'])])
+        metric('skate3_sessions_half_closed', 'gauge',
+               'Sessions with one direction closed, waiting for the other',
+               [((), totals['sessions_half_closed'])])
+        metric('skate3_sessions_reaped_total', 'counter',
+               'Sessions closed by the lifecycle manager', [
+                   ((('reason', reason),), totals[f'sessions_reaped_{reason}'])
+                   for reason in REAP_REASONS
+               ])
+        metric('skate3_session_phase_transitions_total', 'counter',
+               'Session phase transitions by phase entered', [
+                   ((('phase', phase),), totals[f'phase_entered_{phase}'])
+                   for phase in SESSION_PHASES
+               ])
+
+        metric('skate3_bytes_total', 'counter', 'Bytes forwarded by direction', [
+            ((('direction', 'to_ea'),), totals['bytes_to_ea']),
+            ((('direction', 'from_ea'),), totals['bytes_from_ea']),
+        ])
+        metric('skate3_packets_total', 'counter', 'Blaze frames forwarded by direction', [
+            ((('direction', 'to_ea'),), totals['packets_to_ea']),
+            ((('direction', 'from_ea'),), totals['packets_from_ea']),
+        ])
+
+        session_bytes = []
+        session_packets = []
+        queue_depth = []
+        by_phase = dict.fromkeys(SESSION_PHASES, 0)
+        for s in self.sessions.values():
+            by_phase[s.phase] += 1
+            base = (('session', s.session_id), ('peer', s.peer))
+            session_bytes.append((base + (('direction', 'to_ea'),), s.bytes_to_ea))
+            session_bytes.append((base + (('direction', 'from_ea'),), s.bytes_from_ea))
+            session_packets.append((base + (('direction', 'to_ea'),), s.packets_to_ea))
+            session_packets.append((base + (('direction', 'from_ea'),), s.packets_from_ea))
+            # Bytes pendientes de escribir en cada transporte
+            if s.ea_transport is not None:
+                queue_depth.append((base + (('direction', 'to_ea'),),
+                                    s.ea_transport.get_write_buffer_size()))
+            if s.client_transport is not None:
+                queue_depth.append((base + (('direction', 'from_ea'),),
+                                    s.client_transport.get_write_buffer_size()))
+        metric('skate3_session_bytes_total', 'counter', 'Bytes forwarded per session', session_bytes)
+        metric('skate3_session_packets_total', 'counter', 'Frames forwarded per session',
+               session_packets)
+        metric('skate3_write_queue_bytes', 'gauge', 'Bytes queued in the outgoing transport',
+               queue_depth)
+        metric('skate3_sessions_by_phase', 'gauge', 'Open sessions in each phase',
+               [((('phase', phase),), count) for phase, count in by_phase.items()])
+
+        for name, (help_text, fn) in self.gauges.items():
+            try:
+                value = fn()
+            except Exception as e:
+                logger.debug(f"Metrics: gauge {name} falló: {e}")
+                continue
+            metric(name, 'gauge', help_text, [((), value)])
+
+        if self.remote:
+            workers = sorted(self.remote.items())
+            metric('skate3_worker_sessions_active', 'gauge', 'Proxy sessions open per worker',
+                   [((('worker', w),), snap.get('sessions_active', 0)) for w, snap in workers])
+            metric('skate3_worker_event_loop_lag_seconds', 'gauge',
+                   'Most recent event loop lag sample per worker',
+                   [((('worker', w),), f"{snap.get('loop_lag_last', 0.0):.6f}") for w, snap in workers])
+
+        metric('skate3_event_loop_lag_seconds_last', 'gauge',
+               'Most recent event loop lag sample', [((), f"{self.loop_lag_last:.6f}")])
+        histograms = self.histograms()
+        self._render_histogram(lines, 'skate3_event_loop_lag_seconds',
+                               'Event loop wake-up lag', histograms['loop_lag'])
+        queue_wait = sorted((name.split('/')[1:], h) for name, h in histograms.items()
+                            if name.startswith('queue_wait/'))
+        if queue_wait:
+            self._render_histograms(
+                lines, 'skate3_write_queue_wait_seconds',
+                'Time frames spend in the outbound priority queue',
+                [((('direction', direction), ('class', priority)), h)
+                 for (direction, priority), h in queue_wait]
+            )
+        left = [((('phase', phase),), histograms[f'phase_time/{phase}'])
+                for phase in SESSION_PHASES if f'phase_time/{phase}' in histograms]
+        if left:
+            self._render_histograms(lines, 'skate3_session_phase_seconds',
+                                    'Time sessions spend in each phase before leaving it', left)
+
+        if self.upstreams is not None:
+            endpoints = self.upstreams.endpoints
+            metric('skate3_upstream_healthy', 'gauge', 'EA endpoint in rotation (1) or ejected (0)',
+                   [((('endpoint', e.label),), int(not e.ejected)) for e in endpoints])
+            metric('skate3_upstream_connect_seconds', 'gauge',
+                   'EWMA of TCP connect time per EA endpoint',
+                   [((('endpoint', e.label),), f"{e.ewma:.6f}") for e in endpoints
+                    if e.ewma is not None])
+
+        rtt = [(name, h) for name, h in histograms.items() if name.startswith('rtt/')]
+        if rtt or self.latency is not None:
+            samples = []
+            # Más lentos primero, como LatencyCorrelator.snapshot()
+            for name, h in sorted(rtt, key=lambda item: item[1].percentile(99), reverse=True):
+                component, command = (int(part) for part in name.split('/')[1:])
+                base = (('component', f"0x{component:02X}"), ('command', f"0x{command:02X}"))
+                for q in (50, 90, 99):
+                    samples.append((base + (('quantile', f"0.{q}"),),
+                                    f"{h.percentile(q) / 1e6:.6f}"))
+            metric('skate3_upstream_rtt_seconds', 'summary',
+                   'Upstream request/response RTT per Blaze command', samples)
+
+        lines.append('')
+        return '\n'.join(lines)
+
+    @staticmethod
+    def _render_histogram(lines: List[str], name: str, help_text: str, h: Histogram):
+        MetricsRegistry._render_histograms(lines, name, help_text, [((), h)])
+
+    @staticmethod
+    def _render_histograms(lines: List[str], name: str, help_text: str, series):
+        """Varios histogramas de la misma métrica, uno por combinación de labels"""
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for labels, h in series:
+            base = ''.join(f'{k}="{v}",' for k, v in labels)
+            suffix = f"{{{base[:-1]}}}" if base else ''
+            cumulative = 0
+            for bound, count in zip(h.bounds, h.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{base}le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{base}le="+Inf"}} {h.count}')
+            lines.append(f"{name}_sum{suffix} {h.sum:.6f}")
+            lines.append(f"{name}_count{suffix} {h.count}")
+
+
+class MetricsServer:
+    """
+    Endpoint HTTP mínimo (asyncio) que expone GET /metrics.
+    No requiere servicios externos.
+    """
+
+    def __init__(self, registry: MetricsRegistry, port: int = 9100, host: str = '127.0.0.1'):
+        self.registry = registry
+        self.port = port
+        self.host = host
+        self.server: Optional[asyncio.Server] = None
+        self._lag_task: Optional[asyncio.Task] = None
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            # Descartar headers de la petición
+            while True:
+                line = await asyncio.wait_for(reader.readline(), timeout=5)
+                if line in (b'\r\n', b'\n', b''):
+                    break
+
+            parts = request_line.decode('latin-1').split()
+            path = parts[1] if len(parts) > 1 else '/'
+
+            if parts and parts[0] == 'GET' and path.split('?')[0] == '/metrics':
+                body = self.registry.render().encode('utf-8')
+                status = '200 OK'
+                content_type = 'text/plain; version=0.0.4; charset=utf-8'
+            else:
+                body = b'Not Found\n'
+                status = '404 Not Found'
+                content_type = 'text/plain'
+
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n".encode('latin-1') + body
+            )
+            await writer.drain()
+        except Exception as e:
+            logger.debug(f"Metrics: Error atendiendo scrape: {e}")
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except:
+                pass
+
+    async def start(self):
+        """Inicia el endpoint y el monitor de lag del event loop"""
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        self._lag_task = asyncio.create_task(self.registry.monitor_loop_lag())
+        addrs = ', '.join(str(sock.getsockname()) for sock in self.server.sockets)
+        logger.info(f"Metrics endpoint listening on {addrs}/metrics")
+
+    async def stop(self):
+        if self._lag_task:
+            self._lag_task.cancel()
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+            logger.info("Metrics endpoint stopped")
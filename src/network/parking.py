@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Session Parking
+Mantiene viva la sesión de EA unos segundos cuando RPCS3 se desconecta
+(crash o reinicio del emulador) para que el siguiente arranque desde el
+mismo host la reutilice sin conectar ni hacer login de nuevo
+"""
+
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from .blaze import BlazeComponent, BlazeFramer, MessageType
+from .metrics import MetricsRegistry
+from .reconnect import UpstreamLink
+from .tdf import BlazeResponseBuilder
+
+logger = logging.getLogger(__name__)
+
+# Cada cuánto se envía un ping a EA mientras la sesión está aparcada
+DEFAULT_PARK_PING_INTERVAL = 15.0
+
+# Util/Ping sin payload (el msg_id lo pone UpstreamLink.send_hidden)
+PING_REQUEST = bytes.fromhex('000000090002000000000000')
+
+
+class _Parked:
+    __slots__ = ('link', 'task', 'claimed')
+
+    def __init__(self, link: UpstreamLink):
+        self.link = link
+        self.task: Optional[asyncio.Task] = None
+        self.claimed = False
+
+
+class ParkingLot:
+    """
+    Sesiones de EA sin cliente, una por host de RPCS3.
+
+    Mientras una sesión está aparcada se envía un ping a EA cada
+    `ping_interval` segundos, se responden los pings que lleguen de EA y el
+    resto del tráfico se descarta. Si en `grace` segundos no vuelve un
+    cliente del mismo host, se cierra la conexión con EA.
+    """
+
+    def __init__(
+        self,
+        metrics: MetricsRegistry,
+        grace: float,
+        ping_interval: float = DEFAULT_PARK_PING_INTERVAL
+    ):
+        self.metrics = metrics
+        self.grace = grace
+        self.ping_interval = ping_interval
+        self._parked: Dict[str, _Parked] = {}
+        metrics.add_gauge('skate3_sessions_parked',
+                          'EA sessions kept alive without a client', self.__len__)
+
+    def __len__(self) -> int:
+        return len(self._parked)
+
+    def park(self, host: str, link: UpstreamLink):
+        previous = self._parked.pop(host, None)
+        if previous is not None:
+            previous.task.cancel()
+        link.detach()
+        entry = _Parked(link)
+        entry.task = asyncio.get_running_loop().create_task(self._keep(host, entry))
+        self._parked[host] = entry
+        self.metrics.sessions_parked += 1
+        logger.info(f"Parking: sesión de EA aparcada para {host} ({self.grace:.0f}s)")
+
+    async def claim(self, host: str) -> Optional[UpstreamLink]:
+        """Sesión aparcada para este host, o None"""
+        entry = self._parked.pop(host, None)
+        if entry is None:
+            return None
+        entry.claimed = True
+        entry.task.cancel()
+        await asyncio.gather(entry.task, return_exceptions=True)
+        if entry.link.lost:
+            # _keep() no la cierra al estar reclamada
+            entry.link.writer.close()
+            return None
+        entry.link.attach()
+        self.metrics.sessions_resumed += 1
+        logger.info(f"Parking: sesión de EA reanudada para {host}")
+        return entry.link
+
+    async def close(self):
+        entries = list(self._parked.values())
+        self._parked.clear()
+        for entry in entries:
+            entry.task.cancel()
+        await asyncio.gather(*(entry.task for entry in entries), return_exceptions=True)
+
+    async def _keep(self, host: str, entry: _Parked):
+        link = entry.link
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.grace
+        next_ping = loop.time() + self.ping_interval
+        framer = BlazeFramer()
+        if link.carry:
+            framer.feed(link.carry)
+            link.carry = b''
+
+        try:
+            while True:
+                now = loop.time()
+                if now >= deadline:
+                    break
+                if now >= next_ping:
+                    link.send_hidden(PING_REQUEST)
+                    next_ping = now + self.ping_interval
+                try:
+                    data = await asyncio.wait_for(
+                        link.reader.read(4096), min(deadline, next_ping) - now
+                    )
+                except asyncio.TimeoutError:
+                    continue
+                if not data:
+                    link.lost = True
+                    break
+                for frame in framer.feed(data):
+                    frame = link.accept_reply(frame)
+                    if (frame is not None and frame[3] == BlazeComponent.Util and frame[5] == 0x02
+                            and ((frame[8] << 8) | frame[9]) == MessageType.REQUEST):
+                        link.writer.write(BlazeResponseBuilder.build_ping_response(
+                            (frame[10] << 8) | frame[11]
+                        ))
+        except (ConnectionError, OSError) as e:
+            logger.debug(f"Parking: sesión de {host} perdida: {e}")
+            link.lost = True
+        finally:
+            if entry.claimed:
+                # El frame partido lo continúa el túnel del nuevo cliente
+                link.carry = framer.take_pending()
+            else:
+                if self._parked.get(host) is entry:
+                    del self._parked[host]
+                link.writer.close()
+                logger.info(f"Parking: sesión aparcada de {host} cerrada")
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Declarative Frame Patches
+Reglas por (component, command) aplicadas in-place sobre los frames
+EA → RPCS3: por offset absoluto (PatchRule) o por ruta de campo TDF
+(FieldRule), cargadas de patches.json con recarga en caliente
+"""
+
+import json
+import struct
+import asyncio
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from .blaze import HEADER_SIZE
+from .tdf_walk import (
+    FIXED_WIDTH, TDF_FLOAT, TDF_INTEGER, encode_tag, encode_varint,
+    field_at, find_field, parse_path
+)
+
+logger = logging.getLogger(__name__)
+
+# Formas (layouts) recordadas por FieldRule antes de vaciar la caché
+SHAPE_CACHE_SIZE = 64
+
+# Intervalo (s) con el que PatchSet.watch() comprueba el archivo
+WATCH_INTERVAL = 2.0
+
+
+def _number(value) -> int:
+    """Entero o string hex ("0x37") de patches.json"""
+    return int(value, 0) if isinstance(value, str) else int(value)
+
+
+@dataclass(frozen=True)
+class PatchRule:
+    """
+    Escribe `value` en `offset` (desde el inicio del frame, header incluido)
+    en los frames de (component, command). Solo se aplica si el frame
+    contiene todos los offsets de la regla.
+    """
+    component: int
+    command: int
+    writes: Tuple[Tuple[int, int], ...]
+    name: str = ''
+    min_length: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if not self.writes:
+            raise ValueError(f"Regla {self.name or hex(self.key)} sin offsets")
+        for offset, value in self.writes:
+            if offset < HEADER_SIZE:
+                # Tocar el header rompería el framing (length, msg_id...)
+                raise ValueError(f"Offset {offset} dentro del header Blaze")
+            if not 0 <= value <= 0xFF:
+                raise ValueError(f"Valor {value} fuera de rango en offset {offset}")
+        object.__setattr__(self, 'min_length', max(offset for offset, _ in self.writes) + 1)
+
+    @property
+    def key(self) -> int:
+        return (self.component << 8) | self.command
+
+    @property
+    def label(self) -> str:
+        offsets = ','.join(str(offset) for offset, _ in self.writes)
+        return self.name or f"0x{self.component:02X}/0x{self.command:02X} @{offsets}"
+
+    def resolve(self, frame) -> Optional[Tuple[Tuple[int, int], ...]]:
+        """(offset, byte) a escribir en este frame, o None si no aplica"""
+        return self.writes if len(frame) >= self.min_length else None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'PatchRule':
+        """
+        Formato JSON (enteros o strings hex):
+        {"name": "...", "component": "0x02", "command": "0x14",
+         "patches": {"112": "0x00", "56": "0x37"}}
+        """
+        writes = tuple(sorted(
+            (_number(offset), _number(value)) for offset, value in data['patches'].items()
+        ))
+        return cls(_number(data['component']), _number(data['command']), writes,
+                   data.get('name', ''))
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'component': f"0x{self.component:02X}",
+            'command': f"0x{self.command:02X}",
+            'patches': {str(offset): f"0x{value:02X}" for offset, value in self.writes},
+        }
+
+
+@dataclass(eq=False)
+class FieldRule:
+    """
+    Escribe `value` en el campo TDF de ruta `path` (p.ej. NQOS.DBPS) de los
+    frames de (component, command), sea cual sea su offset.
+
+    La posición del campo se cachea por forma del paquete (longitud del
+    frame): si en el offset cacheado sigue estando el tag esperado, se
+    escribe directamente; si no, se recorre el payload con el walker TDF
+    (parando en cuanto aparece el campo) y se actualiza la caché.
+
+    El parche es in-place: si el valor codificado no ocupa lo mismo que el
+    actual (varint de otra longitud) el frame no se toca.
+    """
+    component: int
+    command: int
+    path: Tuple[str, ...]
+    value: Union[int, float]
+    name: str = ''
+    shape_hits: int = field(default=0, init=False, repr=False)
+    walks: int = field(default=0, init=False, repr=False)
+    _shapes: Dict[int, Tuple[int, int, int, int]] = field(
+        default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self):
+        if not self.path:
+            raise ValueError(f"Regla {self.name or hex(self.key)} sin ruta de campo")
+        self._tag = encode_tag(self.path[-1])
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, FieldRule):
+            return NotImplemented
+        return (self.component, self.command, self.path, self.value, self.name) == \
+            (other.component, other.command, other.path, other.value, other.name)
+
+    @property
+    def key(self) -> int:
+        return (self.component << 8) | self.command
+
+    @property
+    def dotted(self) -> str:
+        return '.'.join(self.path)
+
+    @property
+    def label(self) -> str:
+        return self.name or f"0x{self.component:02X}/0x{self.command:02X} {self.dotted}"
+
+    def encode(self, field_type: int) -> Optional[bytes]:
+        """Valor codificado para el tipo del campo (None si el tipo no admite escritura)"""
+        if field_type == TDF_INTEGER:
+            return encode_varint(int(self.value))
+        if field_type == TDF_FLOAT:
+            return struct.pack('>f', float(self.value))
+        if field_type in FIXED_WIDTH:
+            return int(self.value).to_bytes(FIXED_WIDTH[field_type], 'big')
+        return None
+
+    def locate(self, frame) -> Optional[Tuple[int, int, int, int]]:
+        """(header_offset, value_offset, value_end, tipo) del campo en este frame"""
+        length = len(frame)
+        shape = self._shapes.get(length)
+        if shape is not None:
+            header_offset = shape[0]
+            if (frame[header_offset:header_offset + 3] == self._tag and
+                    frame[header_offset + 3] == shape[3]):
+                self.shape_hits += 1
+                return shape
+
+        self.walks += 1
+        found = find_field(frame, self.path)
+        if found is None:
+            return None
+        shape = (found.header_offset, found.value_offset, found.value_end, found.type)
+        if len(self._shapes) >= SHAPE_CACHE_SIZE:
+            self._shapes.clear()
+        self._shapes[length] = shape
+        return shape
+
+    def resolve(self, frame) -> Optional[List[Tuple[int, int]]]:
+        """(offset, byte) a escribir en este frame, o None si no aplica"""
+        shape = self.locate(frame)
+        if shape is None:
+            return None
+        _, value_offset, value_end, field_type = shape
+        encoded = self.encode(field_type)
+        if encoded is None or len(encoded) != value_end - value_offset:
+            return None
+        return [(value_offset + i, byte) for i, byte in enumerate(encoded)]
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'FieldRule':
+        """
+        Formato JSON:
+        {"name": "...", "component": "0x02", "command": "0x14",
+         "field": "NQOS.DBPS", "value": 55}
+        """
+        value = data['value']
+        if isinstance(value, str):
+            value = int(value, 0)
+        elif not isinstance(value, (int, float)):
+            raise ValueError(f"Valor inválido para {data['field']}: {value!r}")
+        return cls(_number(data['component']), _number(data['command']),
+                   parse_path(data['field']), value, data.get('name', ''))
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'component': f"0x{self.component:02X}",
+            'command': f"0x{self.command:02X}",
+            'field': self.dotted,
+            'value': self.value,
+        }
+
+
+Rule = Union[PatchRule, FieldRule]
+
+
+def rule_from_dict(data: dict) -> Rule:
+    """Entrada de patches.json → PatchRule ("patches") o FieldRule ("field")"""
+    return FieldRule.from_dict(data) if 'field' in data else PatchRule.from_dict(data)
+
+
+@dataclass
+class RuleReport:
+    """Resultado de validar una regla contra frames grabados"""
+    label: str
+    frames: int = 0          # Frames con el (component, command) de la regla
+    applied: int = 0         # Frames en los que la regla escribiría
+    unresolved: int = 0      # Campo no encontrado / frame demasiado corto / tamaño distinto
+    offsets: Counter = field(default_factory=Counter)   # FieldRule: offset del valor
+    fields: Counter = field(default_factory=Counter)    # PatchRule: (offset, campo TDF)
+
+
+class PatchSet:
+    """
+    Conjunto de reglas indexado por (component << 8) | command.
+
+    matches() solo mira el header; apply() escribe sobre el propio frame si
+    es un memoryview escribible (buffer del fast path / passthrough) y solo
+    copia el frame cuando es de solo lectura y alguna regla coincide. Los
+    frames sin regla se devuelven tal cual, sin copias.
+
+    Con `source`, reload()/watch() releen el archivo cuando cambia; un
+    archivo inválido deja las reglas anteriores.
+    """
+
+    __slots__ = ('rules', '_index', 'source', 'mtime')
+
+    def __init__(self, rules: Iterable[Rule] = (), source: Optional[Path] = None):
+        self.source = Path(source) if source is not None else None
+        self.mtime: Optional[int] = None
+        self._set_rules(rules)
+
+    def _set_rules(self, rules: Iterable[Rule]):
+        rules = list(rules)
+        index: Dict[int, List[Rule]] = {}
+        for rule in rules:
+            index.setdefault(rule.key, []).append(rule)
+        # Una sola asignación: el hot path nunca ve un índice a medias
+        self.rules, self._index = rules, {key: tuple(group) for key, group in index.items()}
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def matches(self, header) -> bool:
+        """¿Hay alguna regla para el (component, command) de este header?"""
+        return ((header[3] << 8) | header[5]) in self._index
+
+    def apply(self, frame) -> Optional[object]:
+        """
+        Aplica las reglas del frame. Devuelve el frame parcheado (el mismo
+        objeto si se pudo escribir in-place) o None si ninguna regla aplicó.
+        """
+        rules = self._index.get((frame[3] << 8) | frame[5])
+        if rules is None:
+            return None
+
+        target = None
+        for rule in rules:
+            writes = rule.resolve(frame if target is None else target)
+            if not writes:
+                continue
+            if target is None:
+                writable = isinstance(frame, memoryview) and not frame.readonly
+                target = frame if writable or isinstance(frame, bytearray) else bytearray(frame)
+            for offset, value in writes:
+                target[offset] = value
+        return target
+
+    # ------------------------------------------------------------------
+    # Carga y recarga
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_config(cls, data: List[dict]) -> 'PatchSet':
+        return cls(rule_from_dict(item) for item in data)
+
+    def to_config(self) -> List[dict]:
+        return [rule.to_dict() for rule in self.rules]
+
+    @classmethod
+    def from_file(cls, path, fallback: Iterable[Rule] = ()) -> 'PatchSet':
+        """Reglas de `path`; `fallback` mientras el archivo no exista o sea inválido"""
+        patches = cls(fallback, source=path)
+        patches.reload()
+        return patches
+
+    def reload(self) -> bool:
+        """Relee `source` si su mtime cambió. Devuelve True si se cargaron reglas nuevas"""
+        if self.source is None:
+            return False
+        try:
+            mtime = self.source.stat().st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self.mtime:
+            return False
+        self.mtime = mtime
+
+        try:
+            rules = [rule_from_dict(item) for item in json.loads(self.source.read_text())]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"Error cargando {self.source.name}, se mantienen las reglas actuales: {e}")
+            return False
+        self._set_rules(rules)
+        logger.info(f"Reglas de parche cargadas de {self.source.name}: {len(rules)}")
+        return True
+
+    async def watch(self, interval: float = WATCH_INTERVAL):
+        """Recarga en caliente: comprueba el archivo cada `interval` segundos"""
+        while True:
+            await asyncio.sleep(interval)
+            self.reload()
+
+    # ------------------------------------------------------------------
+    # Validación contra sesiones grabadas
+    # ------------------------------------------------------------------
+
+    def validate(self, frames: Iterable) -> List[RuleReport]:
+        """
+        Pasa frames EA → RPCS3 grabados por las reglas sin modificarlos.
+        Para FieldRule registra en qué offsets estaba el campo; para
+        PatchRule, qué campo TDF cae bajo cada offset absoluto (si varía
+        entre frames, la regla por offset no es fiable).
+        """
+        reports = {id(rule): RuleReport(rule.label) for rule in self.rules}
+        for frame in frames:
+            for rule in self._index.get((frame[3] << 8) | frame[5], ()):
+                report = reports[id(rule)]
+                report.frames += 1
+                writes = rule.resolve(frame)
+                if not writes:
+                    report.unresolved += 1
+                    continue
+                report.applied += 1
+                if isinstance(rule, FieldRule):
+                    report.offsets[writes[0][0]] += 1
+                else:
+                    for offset, _ in writes:
+                        hit = field_at(frame, offset)
+                        report.fields[(offset, hit.dotted if hit else '?')] += 1
+        return [reports[id(rule)] for rule in self.rules]
+
+
+# Parche anti-desync del proxy original (Form1.cs líneas 368-373)
+DESYNC_PATCHES = PatchSet([
+    PatchRule(0x02, 0x14, ((37, 0x37), (56, 0x37), (112, 0x00)), name='anti-desync'),
+])
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Session Phases
+Máquina de estados por sesión (pre_auth → auth_pending → authenticated →
+in_game → closing). Cada fase tiene su tabla de handlers precalculada por
+(component, command): lo que no está en la tabla de la fase no se mira
+"""
+
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, FrozenSet, Optional
+
+from .metrics import SESSION_PHASES, MetricsRegistry, SessionMetrics
+
+logger = logging.getLogger(__name__)
+
+PRE_AUTH, AUTH_PENDING, AUTHENTICATED, IN_GAME, CLOSING = SESSION_PHASES
+
+
+def command_key(component: int, command: int) -> int:
+    """Clave de las tablas de handlers: (component, command) en un int"""
+    return (component << 8) | command
+
+
+def component_keys(component: int):
+    """Todas las claves de un componente (la tabla se precalcula entera)"""
+    return range(component << 8, (component + 1) << 8)
+
+
+# handler(fase, frame, respuestas) → frame a reenviar a EA, o None si se
+# contestó en local
+ClientHandler = Callable[['SessionPhase', object, list], Optional[bytes]]
+# handler(fase, frame) para frames EA → RPCS3; solo ve el header
+EAHandler = Callable[['SessionPhase', object], None]
+
+
+@dataclass
+class PhaseTable:
+    """Handlers de una fase"""
+    client: Dict[int, ClientHandler] = field(default_factory=dict)
+    ea: Dict[int, EAHandler] = field(default_factory=dict)
+    # Claves de `client` cuyo handler necesita el frame entero (passthrough)
+    inspect: FrozenSet[int] = frozenset()
+
+
+class SessionPhase:
+    """
+    Fase de una sesión del proxy y tablas de handlers asociadas.
+
+    client_frame() y ea_frame() son un solo dict.get por frame: el login
+    solo está en las tablas de pre_auth y auth_pending, así que una vez
+    autenticada la sesión ya no se comprueba. Cada transición queda en el
+    log y en las métricas con el tiempo pasado en la fase anterior.
+    """
+
+    __slots__ = ('session_id', 'client_host', 'account', 'phase', 'entered_at', 'login_msg_id',
+                 'client', 'ea', 'inspect', '_tables', '_metrics', '_stats', '_clock')
+
+    def __init__(
+        self,
+        session_id: int,
+        tables: Dict[str, PhaseTable],
+        metrics: Optional[MetricsRegistry] = None,
+        stats: Optional[SessionMetrics] = None,
+        clock=time.monotonic,
+        client_host: Optional[str] = None
+    ):
+        self.session_id = session_id
+        self.client_host = client_host
+        self.account: Optional[str] = None     # Cuenta del pool usada en el login
+        self.login_msg_id: Optional[int] = None
+        self._tables = tables
+        self._metrics = metrics
+        self._stats = stats
+        self._clock = clock
+        self.phase = PRE_AUTH
+        self.entered_at = clock()
+        self._bind(PRE_AUTH)
+        if metrics is not None:
+            metrics.phase_entries[PRE_AUTH] += 1
+
+    def _bind(self, phase: str):
+        table = self._tables[phase]
+        self.client = table.client
+        self.ea = table.ea
+        self.inspect = table.inspect
+        if self._stats is not None:
+            self._stats.phase = phase
+
+    def enter(self, phase: str):
+        """Transición a `phase` (sin efecto si ya está en ella)"""
+        if phase == self.phase:
+            return
+        now = self._clock()
+        elapsed = now - self.entered_at
+        logger.info(f"Proxy: Sesión {self.session_id}: {self.phase} → {phase} "
+                    f"({elapsed:.3f}s en {self.phase})")
+        if self._metrics is not None:
+            self._metrics.phase_changed(self.phase, phase, elapsed)
+        self.phase = phase
+        self.entered_at = now
+        self._bind(phase)
+
+    @property
+    def authenticated(self) -> bool:
+        return self.phase in (AUTHENTICATED, IN_GAME)
+
+    def client_frame(self, frame, replies: list):
+        """Frame RPCS3 → EA por la tabla de la fase; None si no va a EA"""
+        handler = self.client.get((frame[3] << 8) | frame[5])
+        if handler is None:
+            return frame
+        return handler(self, frame, replies)
+
+    def ea_frame(self, header):
+        """Frame (o solo header) EA → RPCS3 por la tabla de la fase"""
+        handler = self.ea.get((header[3] << 8) | header[5])
+        if handler is not None:
+            handler(self, header)
+
+    def needs_inspection(self, header) -> bool:
+        """¿El handler de este frame RPCS3 → EA necesita verlo entero?"""
+        return ((header[3] << 8) | header[5]) in self.inspect
@@ -6,11 +6,29 @@ Based on Form1.cs lines 324-396
 """
 
 import asyncio
+import itertools
 import logging
-from typing import Optional
+import time
+from typing import Dict, Optional, Sequence, Tuple
 from dataclasses import dataclass
 
-from .blaze import BlazePacket, BlazeComponent, AuthenticationCommand
+from .blaze import BlazePacket, BlazeComponent, AuthenticationCommand, BlazeFramer, MessageType
+from .clock import DEFAULT_RESYNC_INTERVAL, ServerClock, is_ping, is_ping_request, read_stim
+from .accounts import Account, CredentialPool
+from .coalesce import DEFAULT_COALESCE_WINDOW, DEFAULT_WRITE_MODE, WRITE_MODES, CoalescingWriter, tune_socket
+from .fastpath import client_protocol_factory
+from .latency import LatencyCorrelator
+from .lifecycle import DEFAULT_IDLE_TIMEOUT, SessionManager
+from .metrics import MetricsRegistry, SessionMetrics
+from .patches import DESYNC_PATCHES, PatchSet
+from .parking import ParkingLot
+from .phases import (AUTH_PENDING, AUTHENTICATED, CLOSING, IN_GAME, PRE_AUTH, PhaseTable,
+                     SessionPhase, command_key, component_keys)
+from .reconnect import DEFAULT_RECONNECT_ATTEMPTS, UpstreamLink
+from .response_cache import DEFAULT_CACHE_SIZE, ResponseCache
+from .scheduler import StreamSink, WriteScheduler
+from .splice import SpliceAcceptor
+from .upstream import UpstreamPool, UpstreamSet
 from .tdf import inject_credentials_into_packet
 
 logger = logging.getLogger(__name__)
@@ -35,21 +53,133 @@ class ProxyServer:
         port: int = 9999,
         ea_server: str = '159.153.70.49',
         ea_port: int = 10010,
-        credentials: Optional[EACredentials] = None
+        credentials: Optional[EACredentials] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        reuse_port: bool = False,
+        fast_path: bool = False,
+        passthrough: bool = False,
+        patches: Optional[PatchSet] = None,
+        upstream_pool: int = 0,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        read_timeout: float = 0.0,
+        upstreams: Optional[Sequence[Tuple[str, int]]] = None,
+        reconnect_attempts: int = DEFAULT_RECONNECT_ATTEMPTS,
+        park_timeout: float = 0.0,
+        write_mode: str = DEFAULT_WRITE_MODE,
+        coalesce_window: float = DEFAULT_COALESCE_WINDOW,
+        ping_resync: float = DEFAULT_RESYNC_INTERVAL,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        cache_ttls: Optional[Dict[Tuple[int, int], float]] = None,
+        accounts: Optional[CredentialPool] = None
     ):
+        if fast_path and passthrough:
+            raise ValueError("fast_path y passthrough son excluyentes")
+        if write_mode not in WRITE_MODES:
+            raise ValueError(f"write_mode debe ser uno de {WRITE_MODES}")
         self.port = port
+        self.fast_path = fast_path    # Túneles sobre BufferedProtocol (ver fastpath.py)
+        # Solo se inspeccionan los frames que pueden reescribirse; el resto
+        # solo pasa su header por Python (ver splice.py)
+        self.passthrough = passthrough
+        self.reuse_port = reuse_port  # SO_REUSEPORT: varios workers en el mismo puerto
         self.ea_server = ea_server
         self.ea_port = ea_port
         self.credentials = credentials
+        # Cuentas de EA por cliente (accounts.json); sin pool, la única de
+        # `credentials` para todos
+        self.accounts = accounts if accounts is not None else CredentialPool.from_credentials(credentials)
         self.server: Optional[asyncio.Server] = None
-        self.authenticated = False
+        self.listening = asyncio.Event()
+        
+        # Fase de cada sesión abierta (ver phases.py)
+        self.phases: Dict[int, SessionPhase] = {}
+        
+        # Reglas offset → valor para frames EA → RPCS3 (patches.json)
+        self.patches = patches if patches is not None else DESYNC_PATCHES
+        self._patch_watch: Optional[asyncio.Task] = None
+        
+        # RTT real contra EA por (component, command)
+        self.latency = LatencyCorrelator()
+        self._session_ids = itertools.count(1)
+        
+        # Métricas (se exponen vía MetricsServer)
+        self.metrics = metrics or MetricsRegistry()
+        self.metrics.latency = self.latency
+        
+        # Reloj de EA aprendido de las respuestas a ping: con él los pings se
+        # contestan en local y solo uno cada ping_resync segundos va a EA
+        self.server_clock = ServerClock(self.metrics, ping_resync)
+        
+        # Respuestas a requests idempotentes del arranque servidas en local
+        # (TTL por (component, command); ver response_cache.py)
+        self.response_cache: Optional[ResponseCache] = None
+        if cache_size > 0:
+            self.response_cache = ResponseCache(cache_ttls, cache_size, self.metrics)
+        
+        # Endpoints de EA (el primero es el principal); con varios, cada
+        # sesión va al sano que antes conecte
+        self.upstreams = UpstreamSet(list(upstreams or [(ea_server, ea_port)]),
+                                     metrics=self.metrics)
+        self.metrics.upstreams = self.upstreams
+        
+        # Conexiones a EA precalentadas (0 = conectar al llegar cada cliente)
+        self.upstream: Optional[UpstreamPool] = None
+        if upstream_pool > 0:
+            self.upstream = UpstreamPool(ea_server, ea_port, size=upstream_pool,
+                                         metrics=self.metrics, connect=self.upstreams.connect)
+        
+        # Si EA corta a mitad de sesión (modo streams): reintentos antes de
+        # cerrar también a RPCS3 (0 = cerrar directamente)
+        self.reconnect_attempts = reconnect_attempts
+        
+        # Sesiones de EA que sobreviven a un reinicio de RPCS3 (modo
+        # streams; 0 = cerrar EA en cuanto se va el cliente)
+        self.parking: Optional[ParkingLot] = None
+        if park_timeout > 0:
+            self.parking = ParkingLot(self.metrics, park_timeout)
+            if self.accounts.routes_by_psn_name:
+                # El aparcamiento va por IP: sin esto otra cuenta del mismo
+                # host podría reanudar la sesión de EA
+                logger.warning("Proxy: parkTimeout con reglas por PSN name: las instancias de un "
+                               "mismo host comparten sesión aparcada")
+        
+        if fast_path or passthrough:
+            # Aparcamiento, reconexión a EA y cola de prioridades de salida
+            # solo existen en los túneles streams
+            mode = 'fast path' if fast_path else 'passthrough'
+            ignored = [name for name, value in (('parkTimeout', park_timeout),
+                                                ('reconnectAttempts', reconnect_attempts))
+                       if value > 0]
+            if ignored:
+                logger.warning(f"Proxy: modo {mode}: {', '.join(ignored)} sin efecto "
+                               f"(solo en modo streams)")
+            logger.info(f"Proxy: modo {mode}: sin cola de prioridades de salida")
+        
+        # latency: cada escritura sale al momento (TCP_NODELAY/QUICKACK);
+        # throughput: se juntan durante coalesce_window (ver coalesce.py)
+        self.write_mode = write_mode
+        self.coalesce_window = coalesce_window
+        
+        # Half-close coordinado, timeouts y reaper de sesiones huérfanas
+        self.lifecycle = SessionManager(self.metrics, idle_timeout, read_timeout)
+        
+        # Tablas de handlers por fase, precalculadas una vez por proxy
+        self.phase_tables = self.build_phase_tables()
         
         # Field names from decrypted strings (MAIL, PASS, PNAM)
         self.field_names = ['MAIL', 'PASS', 'PNAM']
     
+    async def connect_upstream(self):
+        """Socket conectado a EA: del pool si está activo, si no uno nuevo"""
+        logger.info(f"Proxy: Conectando a EA {self.upstreams}")
+        if self.upstream is not None:
+            return await self.upstream.acquire()
+        return await self.upstreams.connect()
+    
     def set_credentials(self, credentials: EACredentials):
-        """Actualiza credenciales de EA"""
+        """Actualiza credenciales de EA (sustituye el pool por esa única cuenta)"""
         self.credentials = credentials
+        self.accounts = CredentialPool.from_credentials(credentials)
     
     def parse_blaze_header(self, data: bytes) -> dict:
         """
@@ -79,6 +209,114 @@ class ProxyServer:
             'msg_id': struct.unpack('>H', data[10:12])[0]
         }
     
+    @property
+    def authenticated(self) -> bool:
+        """¿Alguna sesión abierta ha completado el login?"""
+        return any(phase.authenticated for phase in self.phases.values())
+    
+    def build_phase_tables(self) -> Dict[str, PhaseTable]:
+        """
+        Handlers de cada fase por (component, command):
+        - pre_auth / auth_pending: login (inyección de credenciales) y caché
+        - authenticated: caché, keep-alive y el primer frame de partida
+        - in_game: caché y keep-alive
+        La respuesta de EA al login solo se busca en auth_pending.
+        """
+        login = command_key(BlazeComponent.Authentication, AuthenticationCommand.Login)
+        cached = {}
+        if self.response_cache is not None:
+            cached = {command_key(*key): self._on_cacheable for key in self.response_cache.ttls}
+        keepalive = {command_key(component, command): self._on_keepalive
+                     for component, command in ((BlazeComponent.Util, 0x02), (0x0B, 0x8C), (0x0B, 0x40))}
+        
+        pre_auth = PhaseTable(client={**cached, login: self._on_login},
+                              inspect=frozenset((*cached, login)))
+        auth_pending = PhaseTable(
+            client=pre_auth.client, inspect=pre_auth.inspect,
+            ea={key: self._on_login_reply for key in component_keys(BlazeComponent.Authentication)}
+        )
+        in_game = PhaseTable(client={**cached, **keepalive}, inspect=frozenset(cached))
+        # Estado de partida (componente 0x02) en cualquier dirección → in_game
+        game = dict.fromkeys(component_keys(0x02), self._on_game_frame)
+        authenticated = PhaseTable(client={**game, **in_game.client}, inspect=in_game.inspect,
+                                   ea=game)
+        return {
+            PRE_AUTH: pre_auth,
+            AUTH_PENDING: auth_pending,
+            AUTHENTICATED: authenticated,
+            IN_GAME: in_game,
+            CLOSING: PhaseTable(),
+        }
+    
+    def session_phase(self, session_id: int, client_host: Optional[str] = None) -> SessionPhase:
+        """Fase de la sesión (se crea en pre_auth al pedirla por primera vez)"""
+        phase = self.phases.get(session_id)
+        if phase is None:
+            phase = self.phases[session_id] = SessionPhase(
+                session_id, self.phase_tables, self.metrics, self.metrics.sessions.get(session_id),
+                client_host=client_host
+            )
+        return phase
+    
+    def close_phase(self, session_id: int):
+        """La sesión se está cerrando: fase closing y fuera del registro"""
+        phase = self.phases.pop(session_id, None)
+        if phase is not None:
+            phase.enter(CLOSING)
+    
+    def _on_login(self, phase: SessionPhase, frame, replies: list):
+        """Login de RPCS3: credenciales de su cuenta y a esperar la respuesta de EA"""
+        logger.info("Proxy: Interceptado paquete de autenticación")
+        account, rule = self.accounts.route(phase.client_host, frame)
+        self.metrics.logins_routed[rule] += 1
+        if account is not None:
+            # Inyectar credenciales reales
+            frame = self.inject_credentials(frame, account)
+            phase.account = account.name
+            logger.info(f"Proxy: Credenciales inyectadas (cuenta {account.name!r}, regla {rule})")
+        elif self.accounts:
+            logger.warning(f"Proxy: Ninguna cuenta para el cliente {phase.client_host}; login sin tocar")
+        else:
+            logger.warning("Proxy: Sin credenciales configuradas!")
+        phase.login_msg_id = (frame[10] << 8) | frame[11]
+        phase.enter(AUTH_PENDING)
+        return frame
+    
+    def _on_login_reply(self, phase: SessionPhase, header):
+        """Respuesta de EA al login: authenticated, o de vuelta a pre_auth si es un error"""
+        msg_type = (header[8] << 8) | header[9]
+        if (msg_type not in (MessageType.RESPONSE, MessageType.ERROR_REPLY)
+                or ((header[10] << 8) | header[11]) != phase.login_msg_id):
+            return
+        if msg_type == MessageType.ERROR_REPLY or header[6] or header[7]:
+            logger.warning(f"Proxy: EA rechazó el login (error 0x{(header[6] << 8) | header[7]:04X})")
+            phase.enter(PRE_AUTH)
+        else:
+            phase.enter(AUTHENTICATED)
+    
+    def _on_cacheable(self, phase: SessionPhase, frame, replies: list):
+        """Request cacheable: respuesta de la caché si la hay"""
+        cached = self.response_cache.lookup(phase.session_id, frame)
+        if cached is None:
+            return frame
+        replies.append(self.apply_desync_patches(cached))
+        return None
+    
+    def _on_keepalive(self, phase: SessionPhase, frame, replies: list):
+        """AUTO-RESPONDER: mantiene el keep-alive activo"""
+        auto_response = self.build_auto_response(frame)
+        if not auto_response:
+            return frame
+        self.metrics.auto_responses += 1
+        replies.append(auto_response)
+        # Los pings contestados en local no van a EA (ver ServerClock)
+        return None if is_ping_request(frame) else frame
+    
+    def _on_game_frame(self, phase: SessionPhase, frame, replies: Optional[list] = None):
+        """Primer frame de estado de partida (en cualquier dirección)"""
+        phase.enter(IN_GAME)
+        return frame
+    
     def build_auto_response(self, data: bytes) -> bytes:
         """
         Construye respuesta automática para comandos keep-alive críticos.
@@ -106,9 +344,13 @@ class ProxyServer:
         command = header['command']
         msg_id = header['msg_id']
         
-        # Ping keep-alive
+        # Ping keep-alive: solo con el reloj de EA sincronizado; si no, o si
+        # toca re-sincronizar, el ping va a EA y su respuesta alimenta el reloj
         if component == 0x09 and command == 0x02:
-            response = builder.build_ping_response(msg_id)
+            server_time = self.server_clock.local_stim()
+            if server_time is None:
+                return None
+            response = builder.build_ping_response(msg_id, server_time)
             logger.debug(f"📡 Auto-responded to ping (msg_id={msg_id})")
             return response
         
@@ -130,35 +372,85 @@ class ProxyServer:
         Basado en Form1.cs líneas 324-349
         """
         addr = client_writer.get_extra_info('peername')
-        logger.info(f"Proxy: Nueva conexión desde {addr}")
+        session_id = next(self._session_ids)
+        logger.info(f"Proxy: Nueva conexión desde {addr} (sesión {session_id})")
         
-        # Guardar client_writer para auto-responder
-        self._client_writer = client_writer
+        stats = self.metrics.open_session(session_id, addr)
+        stats.client_transport = client_writer.transport
+        self.session_phase(session_id, addr[0] if addr else None)
         
-        ea_reader: Optional[asyncio.StreamReader] = None
-        ea_writer: Optional[asyncio.StreamWriter] = None
+        link: Optional[UpstreamLink] = None
+        client_out: Optional[CoalescingWriter] = None
+        queues = []
+        to_ea: Optional[asyncio.Task] = None
+        reaped = False
+        handler = asyncio.current_task()
+        self.lifecycle.register(session_id, handler.cancel, handler)
         
         try:
-            # Conectar al servidor EA
-            logger.info(f"Proxy: Conectando a EA {self.ea_server}:{self.ea_port}")
-            ea_reader, ea_writer = await asyncio.open_connection(
-                self.ea_server,
-                self.ea_port
-            )
-            logger.info("Proxy: Conectado a servidor EA")
+            # Sesión de EA aparcada por un RPCS3 anterior del mismo host
+            if self.parking is not None:
+                link = await self.parking.claim(addr[0])
+            if link is not None:
+                logger.info("Proxy: Reanudando sesión de EA aparcada")
+                link.session_id = session_id
+            else:
+                # Conectar al servidor EA
+                ea_reader, ea_writer = await asyncio.open_connection(
+                    sock=await self.connect_upstream()
+                )
+                logger.info("Proxy: Conectado a servidor EA")
+                link = UpstreamLink(self, session_id, ea_reader, ea_writer, self.reconnect_attempts)
+            stats.ea_transport = link.writer.transport
+            tune_socket(client_writer.get_extra_info('socket'), self.write_mode)
+            tune_socket(link.writer.get_extra_info('socket'), self.write_mode)
             
-            # Crear tareas bidireccionales
-            await asyncio.gather(
-                self.tunnel_to_ea(client_reader, ea_writer),
-                self.tunnel_from_ea(ea_reader, client_writer),
-                return_exceptions=True
+            # Respuestas de EA, auto-respuestas y respuestas locales comparten
+            # una sola escritura por iteración en modo throughput
+            client_out = CoalescingWriter(client_writer, self.write_mode, self.coalesce_window,
+                                          self.metrics)
+            
+            # Colas de salida con prioridad por dirección (ver scheduler.py)
+            to_ea_queue = WriteScheduler(link, 'to_ea', self.metrics)
+            from_ea_queue = WriteScheduler(StreamSink(client_writer, client_out), 'from_ea', self.metrics)
+            queues = [to_ea_queue, from_ea_queue]
+            
+            # Crear tareas bidireccionales; el EOF de una se propaga a la otra
+            to_ea = asyncio.create_task(
+                self.tunnel_to_ea(client_reader, link, to_ea_queue, session_id, client_out)
             )
+            from_ea = asyncio.create_task(self.tunnel_from_ea(link, from_ea_queue, session_id))
+            
+            def half_close(to_ea_done: bool):
+                if not to_ea_done:
+                    if client_writer.can_write_eof() and not client_writer.is_closing():
+                        client_out.flush()
+                        client_writer.write_eof()
+                elif self.parking is not None and link.parkable:
+                    from_ea.cancel()    # EA sigue abierto: se aparca abajo
+                else:
+                    link.close_write()
+            
+            await self.lifecycle.run_pair(to_ea, from_ea, half_close)
             
+        except asyncio.CancelledError:
+            reaped = True
+            logger.info(f"Proxy: Sesión {session_id} cerrada por el reaper")
         except Exception as e:
             logger.error(f"Proxy: Error en túnel: {e}", exc_info=True)
         finally:
-            self.authenticated = False
-            self._client_writer = None
+            for queue in queues:
+                await queue.close()
+            if client_out is not None:
+                client_out.flush()
+            self.lifecycle.unregister(session_id)
+            self.close_phase(session_id)
+            self.latency.end_session(session_id)
+            if self.response_cache is not None:
+                self.response_cache.end_session(session_id)
+            self.metrics.close_session(session_id)
+            if self.latency.histograms:
+                logger.info(f"Proxy: Latencia upstream por comando:\n{self.latency.report()}")
             
             # Cerrar conexiones
             try:
@@ -167,10 +459,13 @@ class ProxyServer:
             except:
                 pass
             
-            if ea_writer:
+            if (self.parking is not None and link is not None and link.parkable
+                    and to_ea is not None and to_ea.done() and not to_ea.cancelled() and not reaped):
+                self.parking.park(addr[0], link)
+            elif link:
                 try:
-                    ea_writer.close()
-                    await ea_writer.wait_closed()
+                    link.writer.close()
+                    await link.writer.wait_closed()
                 except:
                     pass
             
@@ -179,143 +474,259 @@ class ProxyServer:
     async def tunnel_to_ea(
         self,
         reader: asyncio.StreamReader,
-        writer: asyncio.StreamWriter
+        link: UpstreamLink,
+        queue: WriteScheduler,
+        session_id: int = 0,
+        client_out: Optional[CoalescingWriter] = None
     ):
         """
         RPCS3 → EA (con intercepción de autenticación y auto-responder)
         Basado en Form1.cs líneas 362-396
+        Devuelve True si RPCS3 cerró limpiamente (EOF)
         """
+        framer = BlazeFramer()
+        stats = self.metrics.sessions.get(session_id) or SessionMetrics(session_id, '?')
+        phase = self.session_phase(session_id)
         try:
             while True:
                 data = await reader.read(4096)
                 if not data:
-                    break
+                    await queue.flush()
+                    return True
                 
-                # Verificar si es paquete de autenticación
-                # Component 1 (0x01), Command 200 (0xC8)
-                if (len(data) > 5 and 
-                    data[3] == BlazeComponent.Authentication and 
-                    data[5] == AuthenticationCommand.Login):
-                    
-                    logger.info("Proxy: Interceptado paquete de autenticación")
-                    
-                    if self.credentials:
-                        # Inyectar credenciales reales
-                        data = self.inject_credentials(data)
-                        logger.info("Proxy: Credenciales inyectadas")
-                        self.authenticated = True
-                    else:
-                        logger.warning("Proxy: Sin credenciales configuradas!")
+                frames = framer.feed(data)
+                stats.last_to_ea = time.monotonic()
+                stats.bytes_to_ea += len(data)
+                stats.packets_to_ea += len(frames)
                 
-                # Reenviar data a EA
-                writer.write(data)
-                await writer.drain()
+                auto_responses = []
+                out = []
+                for frame in frames:
+                    # Tabla de la fase: login, caché y auto-respuestas (lo
+                    # contestado en local no va a EA)
+                    frame = phase.client_frame(frame, auto_responses)
+                    if frame is not None:
+                        out.append(self.process_client_frame(session_id, frame))
                 
-                # AUTO-RESPONDER: Verificar si necesita respuesta inmediata
-                # Esto mantiene el keep-alive activo
-                if self.authenticated:
-                    auto_response = self.build_auto_response(data)
-                    if auto_response:
-                        # Obtener writer del cliente para enviar response directa
-                        # NOTA: Necesitamos acceso al client_writer aquí
-                        # Lo guardaremos como atributo de instancia
-                        if hasattr(self, '_client_writer') and self._client_writer:
-                            self._client_writer.write(auto_response)
-                            await self._client_writer.drain()
+                if not out and not auto_responses:
+                    continue
+                
+                # Tras reanudar una sesión aparcada, PreAuth/login se responden en local
+                if link.resuming and client_out is not None:
+                    resumed = [link.resume_reply(frame) for frame in out]
+                    out = [frame for frame, reply in zip(out, resumed) if reply is None]
+                    for reply in resumed:
+                        if reply is not None:
+                            phase.ea_frame(reply)
+                    client_out.write(b''.join(r for r in resumed if r is not None))
+                
+                # Reenviar frames completos a EA por prioridad (la cola espera
+                # si se está reconectando)
+                if out:
+                    await queue.put(out)
+                
+                # Enviar auto-respuestas directamente al cliente (client_out
+                # escribe en el transporte de esta sesión)
+                if auto_responses and client_out is not None:
+                    client_out.write(b''.join(auto_responses))
                 
         except Exception as e:
             logger.error(f"Proxy: Error en tunnel_to_ea: {e}")
+            return False
     
     async def tunnel_from_ea(
         self,
-        reader: asyncio.StreamReader,
-        writer: asyncio.StreamWriter
+        link: UpstreamLink,
+        queue: WriteScheduler,
+        session_id: int = 0
     ):
         """
         EA → RPCS3 (con modificaciones anti-desync)
         Basado en Form1.cs líneas 362-396
+        Si EA corta, reconecta (ver reconnect.py) sin cerrar a RPCS3.
+        Devuelve True si EA cerró limpiamente (EOF)
         """
+        framer = BlazeFramer()
+        if link.carry:
+            framer.feed(link.carry)
+            link.carry = b''
+        stats = self.metrics.sessions.get(session_id) or SessionMetrics(session_id, '?')
+        phase = self.session_phase(session_id)
         try:
             while True:
-                data = await reader.read(4096)
+                try:
+                    data = await link.reader.read(4096)
+                except ConnectionError as e:
+                    logger.warning(f"Proxy: Conexión con EA perdida: {e}")
+                    if not await link.reconnect():
+                        link.lost = True
+                        return False
+                    data = None
                 if not data:
-                    break
+                    if data is not None and not await link.reconnect():
+                        link.lost = True
+                        await queue.flush()
+                        return True
+                    framer = BlazeFramer()
+                    stats.ea_transport = link.writer.transport
+                    continue
+                
+                frames = framer.feed(data)
+                stats.last_from_ea = time.monotonic()
+                stats.bytes_from_ea += len(data)
+                stats.packets_from_ea += len(frames)
                 
-                # Aplicar parches anti-desync
-                # Basado en Form1.cs líneas 368-373
-                data = self.apply_desync_patches(data)
+                out = []
+                for frame in frames:
+                    frame = link.accept_reply(frame)
+                    if frame is not None:
+                        phase.ea_frame(frame)
+                        out.append(self.process_ea_frame(session_id, frame))
+                if not out:
+                    continue
                 
-                writer.write(data)
-                await writer.drain()
+                await queue.put(out)
                 
+        except asyncio.CancelledError:
+            # Sesión aparcada: el frame partido lo continúa el siguiente lector
+            link.carry = framer.take_pending()
+            raise
         except Exception as e:
             logger.error(f"Proxy: Error en tunnel_from_ea: {e}")
+            return False
+    
+    def process_client_frame(self, session_id: int, frame) -> bytes:
+        """
+        Procesa un frame Blaze completo RPCS3 → EA que sigue hacia EA (ya
+        pasó por la tabla de su fase): registra la request en el correlador.
+        """
+        self.observe_client_header(session_id, frame)
+        return frame
+    
+    def process_ea_frame(self, session_id: int, frame) -> bytes:
+        """
+        Procesa un frame Blaze completo EA → RPCS3.
+        Cierra la medición de latencia, sincroniza el reloj de EA con las
+        respuestas a ping y aplica parches anti-desync.
+        """
+        rtt = self.observe_ea_header(session_id, frame)
+        if self.response_cache is not None:
+            self.response_cache.store(session_id, frame)
+        if rtt is not None and is_ping(frame):
+            stim = read_stim(frame)
+            if stim is not None:
+                self.server_clock.observe(stim, rtt / 1e9)
+        
+        # Aplicar parches anti-desync
+        # Basado en Form1.cs líneas 368-373
+        return self.apply_desync_patches(frame)
+    
+    def ea_frame_needs_inspection(self, header) -> bool:
+        """
+        ¿process_ea_frame necesita el frame entero? Reglas de self.patches,
+        respuestas a ping (su STIM sincroniza el reloj de EA) y respuestas
+        que pueden ir a la caché
+        """
+        return (self.patches.matches(header) or is_ping(header)
+                or (self.response_cache is not None and self.response_cache.covers(header)))
     
-    def inject_credentials(self, data: bytes) -> bytes:
+    def observe_client_header(self, session_id: int, header):
+        """Parte de RPCS3 → EA que solo necesita los 12 bytes del header"""
+        if ((header[8] << 8) | header[9]) == MessageType.REQUEST:
+            self.latency.on_request(session_id, header[3], header[5], (header[10] << 8) | header[11])
+    
+    def observe_ea_header(self, session_id: int, header) -> Optional[int]:
+        """Parte de EA → RPCS3 que solo necesita los 12 bytes del header (devuelve el RTT)"""
+        return self.latency.on_reply(session_id, (header[8] << 8) | header[9], (header[10] << 8) | header[11],
+                                     component=header[3], command=header[5])
+    
+    def inject_credentials(self, data: bytes, account: Optional[Account] = None) -> bytes:
         """
         Inyecta credenciales ESTILO WINDOWS: Reemplaza paquete 0xC8 con nuestro 0x3C.
-        No modifica el paquete del juego, sino que construye uno nuevo.
+        No modifica el paquete del juego: el 0x3C de cada cuenta está ya
+        construido en el pool y solo se le pone el msg_id del original.
+        Sin `account`, la cuenta por defecto del pool.
         """
-        if not self.credentials:
+        account = account or self.accounts.default
+        if account is None:
             logger.warning("Proxy: Sin credenciales para inyectar")
             return data
         
-        try:
-            # Importar builder TDF
-            from .tdf import BlazeAuthPacket
-            import struct
-            
-            # Extraer msg_id del paquete original para mantener sincronización
-            msg_id = struct.unpack('>H', data[10:12])[0] if len(data) >= 12 else 2
-            
-            # Construir NUESTRO paquete 0x3C estilo Windows
-            our_packet = BlazeAuthPacket(msg_id=msg_id)
-            our_packet.add_email(self.credentials.email)
-            our_packet.add_password(self.credentials.password)
-            our_packet.add_psn_name(self.credentials.psn_name)
-            
-            new_data = our_packet.build()
-            
-            logger.info(f"✅ Paquete 0x3C construido ({len(new_data)} bytes)")
-            logger.debug(f"  Original 0xC8: {len(data)} bytes")
-            logger.debug(f"  Nuevo 0x3C: {len(new_data)} bytes")
-            
-            return new_data
-            
-        except Exception as e:
-            logger.error(f"Error construyendo paquete 0x3C: {e}", exc_info=True)
-            return data
+        # msg_id del paquete original para mantener sincronización
+        msg_id = ((data[10] << 8) | data[11]) if len(data) >= 12 else 2
+        new_data = account.login_packet(msg_id)
+        
+        self.metrics.credential_injections += 1
+        logger.info(f"✅ Paquete 0x3C de {account.name!r} ({len(new_data)} bytes)")
+        logger.debug(f"  Original 0xC8: {len(data)} bytes")
+        logger.debug(f"  Nuevo 0x3C: {len(new_data)} bytes")
+        
+        return new_data
     
     def apply_desync_patches(self, data: bytes) -> bytes:
         """
         Aplica parches para prevenir desincronización.
-        Basado en Form1.cs líneas 368-373
+        Basado en Form1.cs líneas 368-373; las reglas vienen de self.patches.
+        Los frames sin regla se devuelven sin copiar.
         """
-        data = bytearray(data)
-        
-        # Patch específico para Component 2, Command 20
-        if len(data) > 112 and data[3] == 0x02 and data[5] == 0x14:
-            data[112] = 0x00
-            data[56] = 0x37   # 55 decimal
-            data[37] = 0x37
-            logger.debug("Proxy: Aplicado patch anti-desync")
+        patched = self.patches.apply(data)
+        if patched is None:
+            return data
         
-        return bytes(data)
+        self.metrics.desync_patches += 1
+        logger.debug("Proxy: Aplicado patch anti-desync")
+        return patched
     
     async def start(self):
         """Inicia el servidor proxy"""
         try:
-            self.server = await asyncio.start_server(
-                self.handle_client,
-                '0.0.0.0',
-                self.port
-            )
+            if self.fast_path:
+                self.server = await asyncio.get_running_loop().create_server(
+                    client_protocol_factory(self),
+                    '0.0.0.0',
+                    self.port,
+                    reuse_port=self.reuse_port
+                )
+            elif self.passthrough:
+                self.server = await asyncio.get_running_loop().create_server(
+                    lambda: SpliceAcceptor(self),
+                    '0.0.0.0',
+                    self.port,
+                    reuse_port=self.reuse_port
+                )
+            else:
+                self.server = await asyncio.start_server(
+                    self.handle_client,
+                    '0.0.0.0',
+                    self.port,
+                    reuse_port=self.reuse_port
+                )
             
             addrs = ', '.join(str(sock.getsockname()) for sock in self.server.sockets)
             logger.info(f"Proxy Server listening on {addrs}")
+            self.listening.set()
             
-            async with self.server:
-                await self.server.serve_forever()
+            # Recarga en caliente de patches.json (cada worker vigila el suyo)
+            if self.patches.source is not None:
+                self._patch_watch = asyncio.create_task(self.patches.watch())
+            if self.upstream is not None:
+                self.upstream.start()
+            self.lifecycle.start()
+            if len(self.upstreams) > 1:
+                self.upstreams.start()
+            
+            try:
+                async with self.server:
+                    await self.server.serve_forever()
+            finally:
+                if self._patch_watch:
+                    self._patch_watch.cancel()
+                if self.upstream is not None:
+                    await self.upstream.close()
+                await self.lifecycle.stop()
+                await self.upstreams.stop()
+                if self.parking is not None:
+                    await self.parking.close()
                 
         except Exception as e:
             logger.error(f"Proxy: Error iniciando servidor: {e}", exc_info=True)
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Upstream Reconnect
+Conexión a EA de una sesión que se puede reemplazar en caliente: si EA
+corta, se reconecta, se repite el login y las requests que establecen la
+sesión, y se reenvían las requests sin respuesta, sin cerrar a RPCS3
+"""
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+from .blaze import BlazeComponent, AuthenticationCommand, MessageType
+from .scheduler import transport_writable
+
+if TYPE_CHECKING:
+    from .proxy import ProxyServer
+
+logger = logging.getLogger(__name__)
+
+# Requests que dejan la sesión de EA en el estado en que la tenía el juego;
+# se repiten (la última de cada tipo) tras reconectar
+REPLAY_COMMANDS = (
+    (BlazeComponent.Util, 0x07),                                         # PreAuth
+    (BlazeComponent.Authentication, AuthenticationCommand.Login),
+    (BlazeComponent.Authentication, 0x3C),                               # Login de inject_credentials
+    (BlazeComponent.Authentication, AuthenticationCommand.SilentLogin),
+    (BlazeComponent.Util, 0x08),                                         # PostAuth
+)
+_REPLAY_KEYS = frozenset(REPLAY_COMMANDS)
+
+DEFAULT_RECONNECT_ATTEMPTS = 3
+RECONNECT_BACKOFF = 0.25
+
+_REPLIES = (MessageType.RESPONSE, MessageType.ERROR_REPLY)
+
+
+def _msg_id(frame) -> int:
+    return (frame[10] << 8) | frame[11]
+
+
+def _with_msg_id(frame, msg_id: int) -> bytes:
+    out = bytearray(frame)
+    out[10] = msg_id >> 8
+    out[11] = msg_id & 0xFF
+    return bytes(out)
+
+
+class UpstreamLink:
+    """
+    Lado EA de una sesión de streams.
+
+    send() registra las requests en vuelo (msg_id → frame) y las de
+    REPLAY_COMMANDS; accept_reply() las da por respondidas. Cuando la
+    lectura de EA termina sin que RPCS3 se haya ido, reconnect() abre otra
+    conexión y envía:
+
+    1. Las requests de establecimiento, con msg_ids propios (empezando por
+       0xFFFF hacia abajo); sus respuestas no llegan a RPCS3.
+    2. Las requests que quedaron sin respuesta, con su msg_id original,
+       para que RPCS3 reciba la respuesta que espera.
+
+    Sin ninguna request de establecimiento registrada (antes del login) no
+    se reconecta: el juego repite la conexión por su cuenta.
+
+    Mientras quede alguna respuesta de replay pendiente, una request de
+    RPCS3 con el mismo msg_id se reenvía con otro libre y su respuesta se
+    devuelve con el original.
+    """
+
+    def __init__(
+        self,
+        proxy: 'ProxyServer',
+        session_id: int,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        attempts: int = DEFAULT_RECONNECT_ATTEMPTS
+    ):
+        self.proxy = proxy
+        self.session_id = session_id
+        self.reader = reader
+        self.writer = writer
+        self.attempts = attempts
+        self.closing = False
+        self.lost = False       # La lectura de EA terminó (no se puede aparcar)
+        self.reconnects = 0
+        self.carry = b''        # Frame parcial de EA leído por otro lector (parking)
+        self._ready = asyncio.Event()
+        self._ready.set()
+
+        self._inflight: Dict[int, bytes] = {}
+        self._replay: Dict[Tuple[int, int], bytes] = {}
+        self._hidden: Set[int] = set()          # msg_ids de requests de replay
+        self._remap: Dict[int, int] = {}        # msg_id hacia EA → msg_id de RPCS3
+        self._replies: Dict[Tuple[int, int], bytes] = {}   # Última respuesta a cada REPLAY_COMMANDS
+        self._resume: Dict[Tuple[int, int], bytes] = {}    # Respuestas servidas en local al reanudar
+
+    # ------------------------------------------------------------------
+    # RPCS3 → EA
+    # ------------------------------------------------------------------
+
+    def can_write(self) -> bool:
+        """¿Se puede escribir ya hacia EA sin esperar (ver WriteScheduler)?"""
+        return self._ready.is_set() and transport_writable(self.writer.transport)
+
+    def write(self, frames: List[bytes]):
+        """Escribe frames hacia EA anotando las requests en vuelo y de replay"""
+        out = []
+        for frame in frames:
+            if ((frame[8] << 8) | frame[9]) == MessageType.REQUEST:
+                frame = bytes(frame)
+                key = (frame[3], frame[5])
+                if key in _REPLAY_KEYS:
+                    self._replay[key] = frame
+                msg_id = _msg_id(frame)
+                if msg_id in self._hidden or msg_id in self._remap:
+                    upstream_id = self._free_msg_id()
+                    self._remap[upstream_id] = msg_id
+                    frame = _with_msg_id(frame, upstream_id)
+                    msg_id = upstream_id
+                self._inflight[msg_id] = frame
+            out.append(frame)
+        self.writer.write(b''.join(out))
+
+    async def drain(self):
+        """Espera sitio en el transporte; durante una reconexión, a la nueva"""
+        await self._ready.wait()
+        try:
+            await self.writer.drain()
+        except (ConnectionError, OSError) as e:
+            # Las requests quedan en vuelo; la lectura de EA verá el corte
+            logger.debug(f"Proxy: Escritura a EA fallida (sesión {self.session_id}): {e}")
+
+    def send_hidden(self, frame):
+        """Request propia del proxy (p.ej. ping); su respuesta no llega a RPCS3"""
+        msg_id = self._free_msg_id()
+        self._hidden.add(msg_id)
+        self.writer.write(_with_msg_id(frame, msg_id))
+
+    @property
+    def parkable(self) -> bool:
+        """¿Hay una sesión de EA establecida que merezca conservar?"""
+        return bool(self._replay) and not self.closing and not self.lost
+
+    def detach(self):
+        """RPCS3 se fue: las respuestas que aún le debía EA se descartarán"""
+        self._hidden.update(self._inflight)
+        self._inflight.clear()
+        self._remap.clear()
+
+    def attach(self):
+        """
+        Un RPCS3 nuevo toma la sesión aparcada: su PreAuth/login se
+        responden con las respuestas guardadas, sin llegar a EA.
+        """
+        self._resume = dict(self._replies)
+
+    @property
+    def resuming(self) -> bool:
+        return bool(self._resume)
+
+    def resume_reply(self, frame) -> Optional[bytes]:
+        """Respuesta local a una request de establecimiento tras attach()"""
+        if not self._resume or ((frame[8] << 8) | frame[9]) != MessageType.REQUEST:
+            return None
+        reply = self._resume.pop((frame[3], frame[5]), None)
+        if reply is None:
+            return None
+        return _with_msg_id(reply, _msg_id(frame))
+
+    def close_write(self):
+        """RPCS3 terminó: no reconectar y propagar el half-close"""
+        self.closing = True
+        if self.writer.can_write_eof() and not self.writer.is_closing():
+            self.writer.write_eof()
+
+    # ------------------------------------------------------------------
+    # EA → RPCS3
+    # ------------------------------------------------------------------
+
+    def accept_reply(self, frame):
+        """
+        Frame de EA → frame para RPCS3, o None si es respuesta a una request
+        de replay.
+        """
+        if ((frame[8] << 8) | frame[9]) not in _REPLIES:
+            return frame
+        msg_id = _msg_id(frame)
+        request = self._inflight.pop(msg_id, None)
+        if request is not None and (request[3], request[5]) in _REPLAY_KEYS:
+            self._replies[(request[3], request[5])] = bytes(frame)
+        if msg_id in self._remap:
+            return _with_msg_id(frame, self._remap.pop(msg_id))
+        if msg_id in self._hidden:
+            self._hidden.discard(msg_id)
+            return None
+        return frame
+
+    # ------------------------------------------------------------------
+    # Reconexión
+    # ------------------------------------------------------------------
+
+    def _free_msg_id(self) -> int:
+        msg_id = 0xFFFF
+        while msg_id in self._inflight or msg_id in self._hidden or msg_id in self._remap:
+            msg_id -= 1
+        return msg_id
+
+    async def reconnect(self) -> bool:
+        """Reemplaza la conexión con EA. False si no hay que (o no se pudo) seguir"""
+        if self.closing or self.attempts <= 0 or not self._replay:
+            return False
+        self._ready.clear()
+        self.writer.close()
+        metrics = self.proxy.metrics
+        logger.warning(f"Proxy: EA cerró la sesión {self.session_id}; reconectando")
+
+        try:
+            for attempt in range(self.attempts):
+                if attempt:
+                    await asyncio.sleep(RECONNECT_BACKOFF * 2 ** (attempt - 1))
+                try:
+                    reader, writer = await asyncio.open_connection(
+                        sock=await self.proxy.connect_upstream()
+                    )
+                except OSError as e:
+                    logger.warning(f"Proxy: Reconexión {attempt + 1}/{self.attempts} fallida: {e}")
+                    continue
+
+                # Las respuestas de replay pendientes ya no llegarán; las
+                # remapeadas siguen en vuelo y se reenvían con su id de EA
+                self._hidden.clear()
+                pending = list(self._inflight.values())
+                replay = []
+                for key in REPLAY_COMMANDS:
+                    frame = self._replay.get(key)
+                    # Si seguía en vuelo va abajo con su msg_id: RPCS3 espera la respuesta
+                    if frame is None or frame in pending:
+                        continue
+                    replay_id = self._free_msg_id()
+                    self._hidden.add(replay_id)
+                    replay.append(_with_msg_id(frame, replay_id))
+                replay.extend(pending)
+
+                writer.write(b''.join(replay))
+                self.reader, self.writer = reader, writer
+                self.reconnects += 1
+                metrics.upstream_reconnects += 1
+                logger.info(f"Proxy: Sesión {self.session_id} reconectada "
+                            f"({len(self._hidden)} requests de sesión, "
+                            f"{len(self._inflight)} pendientes reenviadas)")
+                return True
+
+            metrics.upstream_reconnects_failed += 1
+            return False
+        finally:
+            self._ready.set()
@@ -6,24 +6,137 @@ Based on Form1.cs lines 252-322
 """
 
 import asyncio
+import itertools
 import logging
-from typing import Optional
+import zlib
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .metrics import MetricsRegistry
 
 logger = logging.getLogger(__name__)
 
+# Políticas de reparto entre backends
+ROUTING_ROUND_ROBIN = 'round_robin'
+ROUTING_LEAST_CONNECTIONS = 'least_connections'
+ROUTING_STICKY = 'sticky'
+ROUTING_POLICIES = (ROUTING_ROUND_ROBIN, ROUTING_LEAST_CONNECTIONS, ROUTING_STICKY)
+
+# Respuesta de redirección: replica el array de bytes de Form1.cs líneas 292-302
+REDIRECT_RESPONSE = bytes([
+    0x00, 0x46, 0x00, 0x05, 0x00, 0x01, 0x00, 0x00, 0x10, 0x00,
+    0x00, 0x00, 0x86, 0x49, 0x32, 0xD0, 0x00, 0xDA, 0x1B, 0x35,
+    0x00, 0xA2, 0xFC, 0xF4, 0x1F, 0x1C, 0x00, 0x00, 0x00, 0x00,
+    0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,
+    0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,
+    0x00, 0x00, 0x00, 0x00, 0xA7, 0x00, 0x00, 0x74, 0x9F, 0x99,
+    0x46, 0x31, 0xC2, 0xFC, 0xB4, 0x52, 0x27, 0x1B, 0x00, 0xCE,
+    0x58, 0xF5, 0x21, 0x00, 0xE2, 0x4B, 0xB3, 0x74, 0x00, 0x00,
+    0x00, 0x00
+])
+
+
+def build_redirect_template(host: str, port: int) -> bytes:
+    """
+    Respuesta de redirección para un backend concreto. Solo falta copiar
+    el sequence number (bytes 10-11) de cada petición.
+    """
+    response = bytearray(REDIRECT_RESPONSE)
+    
+    # Insertar hostname del proxy (Form1.cs líneas 304-308)
+    hostname_bytes = host.encode('ascii')
+    for i, byte in enumerate(hostname_bytes):
+        if 26 + i < len(response):
+            response[26 + i] = byte
+    
+    # Insertar puerto en big-endian (Form1.cs líneas 309-314)
+    response[66:68] = port.to_bytes(2, 'big')
+    return bytes(response)
+
+
+@dataclass
+class RedirectBackend:
+    """Proxy al que se puede redirigir RPCS3"""
+    host: str
+    port: int
+    # Carga reportada por el backend; least_connections solo la usa si
+    # todos los backends tienen una (si no, compara `clients` en todos)
+    load: Optional[Callable[[], int]] = None
+    # Clientes cuya última redirección fue a este backend (baja al reconectar a otro)
+    clients: int = 0
+    template: bytes = field(init=False, repr=False)
+    
+    def __post_init__(self):
+        self.template = build_redirect_template(self.host, self.port)
+
 
 class RedirectorServer:
     """
     Servidor que escucha en puerto 42100 y redirige RPCS3 al proxy local.
     Replica la funcionalidad del método _00A0() del código original.
+    
+    Con varios backends reparte los clientes según `routing`:
+    round_robin, least_connections o sticky (por IP del cliente).
     """
     
-    def __init__(self, port: int = 42100, proxy_host: str = '127.0.0.1', proxy_port: int = 9999):
+    def __init__(
+        self,
+        port: int = 42100,
+        proxy_host: str = '127.0.0.1',
+        proxy_port: int = 9999,
+        metrics: Optional[MetricsRegistry] = None,
+        backends: Optional[Sequence[Tuple[str, int]]] = None,
+        routing: str = ROUTING_ROUND_ROBIN
+    ):
+        if routing not in ROUTING_POLICIES:
+            raise ValueError(f"Política de routing desconocida: {routing}")
+        
         self.port = port
         self.proxy_host = proxy_host
         self.proxy_port = proxy_port
         self.server: Optional[asyncio.Server] = None
+        self.listening = asyncio.Event()
+        self.metrics = metrics or MetricsRegistry()
         
+        # Plantillas de respuesta precalculadas por (host, port)
+        self.backends: List[RedirectBackend] = [
+            RedirectBackend(host, backend_port)
+            for host, backend_port in (backends or [(proxy_host, proxy_port)])
+        ]
+        self.routing = routing
+        self._round_robin = itertools.cycle(range(len(self.backends)))
+        # IP del cliente → backend al que se le mandó la última vez
+        self._assigned: Dict[str, RedirectBackend] = {}
+    
+    def select_backend(self, client_host: Optional[str]) -> RedirectBackend:
+        """Elige el backend para un cliente según la política configurada"""
+        if len(self.backends) == 1:
+            return self.backends[0]
+        if self.routing == ROUTING_LEAST_CONNECTIONS:
+            # Una sola medida para todos: mezclar sesiones vivas con
+            # clientes redirigidos sesgaría el reparto
+            if all(backend.load is not None for backend in self.backends):
+                return min(self.backends, key=lambda backend: backend.load())
+            return min(self.backends, key=lambda backend: backend.clients)
+        if self.routing == ROUTING_STICKY and client_host:
+            # Hash estable: el mismo emulador vuelve al mismo worker tras reiniciar
+            return self.backends[zlib.crc32(client_host.encode()) % len(self.backends)]
+        return self.backends[next(self._round_robin)]
+    
+    def assign(self, client_host: Optional[str], backend: RedirectBackend):
+        """
+        Cuenta al cliente en `backend`. RPCS3 pasa por el redirector en cada
+        conexión a EA, así que una nueva redirección de la misma IP sustituye
+        a la anterior: el backend previo deja de contarlo.
+        """
+        if not client_host:
+            return
+        previous = self._assigned.get(client_host)
+        if previous is not None:
+            previous.clients -= 1
+        self._assigned[client_host] = backend
+        backend.clients += 1
+    
     async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
         """
         Maneja conexión de RPCS3.
@@ -41,41 +154,21 @@ class RedirectorServer:
             
             logger.debug(f"Redirector: Recibidos {len(data)} bytes")
             
-            # Construir respuesta de redirección
-            # Replica el array de bytes de Form1.cs líneas 292-302
-            response = bytearray([
-                0x00, 0x46, 0x00, 0x05, 0x00, 0x01, 0x00, 0x00, 0x10, 0x00,
-                0x00, 0x00, 0x86, 0x49, 0x32, 0xD0, 0x00, 0xDA, 0x1B, 0x35,
-                0x00, 0xA2, 0xFC, 0xF4, 0x1F, 0x1C, 0x00, 0x00, 0x00, 0x00,
-                0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,
-                0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,
-                0x00, 0x00, 0x00, 0x00, 0xA7, 0x00, 0x00, 0x74, 0x9F, 0x99,
-                0x46, 0x31, 0xC2, 0xFC, 0xB4, 0x52, 0x27, 0x1B, 0x00, 0xCE,
-                0x58, 0xF5, 0x21, 0x00, 0xE2, 0x4B, 0xB3, 0x74, 0x00, 0x00,
-                0x00, 0x00
-            ])
-            
-            # Insertar hostname del proxy (Form1.cs líneas 304-308)
-            hostname_bytes = self.proxy_host.encode('ascii')
-            for i, byte in enumerate(hostname_bytes):
-                if 26 + i < len(response):
-                    response[26 + i] = byte
-            
-            # Insertar puerto en big-endian (Form1.cs líneas 309-314)
-            port_bytes = self.proxy_port.to_bytes(2, 'big')
-            response[66] = port_bytes[0]
-            response[67] = port_bytes[1]
+            client_host = addr[0] if addr else None
+            backend = self.select_backend(client_host)
+            response = bytearray(backend.template)
             
             # Copiar sequence number de la petición (Form1.cs líneas 315-316)
             if len(data) >= 12:
-                response[10] = data[10]
-                response[11] = data[11]
+                response[10:12] = data[10:12]
             
             # Enviar respuesta
-            writer.write(bytes(response))
+            writer.write(response)
             await writer.drain()
+            self.assign(client_host, backend)
+            self.metrics.redirects += 1
             
-            logger.info(f"Redirector: Enviada redirección a {self.proxy_host}:{self.proxy_port}")
+            logger.info(f"Redirector: Enviada redirección a {backend.host}:{backend.port}")
             
         except Exception as e:
             logger.error(f"Redirector: Error manejando cliente: {e}", exc_info=True)
@@ -97,6 +190,7 @@ class RedirectorServer:
             
             addrs = ', '.join(str(sock.getsockname()) for sock in self.server.sockets)
             logger.info(f"Redirector Server listening on {addrs}")
+            self.listening.set()
             
             async with self.server:
                 await self.server.serve_forever()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Response Cache
+Respuestas de EA a requests idempotentes (configuración del arranque)
+servidas en local a las sesiones siguientes, con el msg_id de cada request
+"""
+
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from .blaze import HEADER_SIZE, MessageType
+from .metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+# (component, command) → TTL en segundos. Solo lecturas sin estado en EA:
+# una request servida de caché no llega a EA
+DEFAULT_CACHE_TTLS: Dict[Tuple[int, int], float] = {
+    (0x09, 0x01): 3600.0,       # Util/FetchClientConfig
+}
+# Respuestas en memoria (LRU); 0 = caché deshabilitada
+DEFAULT_CACHE_SIZE = 256
+
+
+def parse_command_key(text: str) -> Tuple[int, int]:
+    """'0x09/0x01' → (0x09, 0x01)"""
+    component, sep, command = text.partition('/')
+    if not sep:
+        raise ValueError(f"Comando inválido (se espera componente/comando): {text}")
+    return int(component, 0), int(command, 0)
+
+
+class ResponseCache:
+    """
+    Caché LRU de respuestas por (component, command, hash del payload).
+
+    lookup() se llama con cada request de RPCS3: si hay una respuesta
+    vigente la devuelve con el msg_id de la request; si no, anota la
+    request para que store() guarde la respuesta de EA cuando llegue. Solo
+    se guardan respuestas sin error de los comandos de `ttls`.
+    """
+
+    def __init__(
+        self,
+        ttls: Optional[Dict[Tuple[int, int], float]] = None,
+        max_entries: int = DEFAULT_CACHE_SIZE,
+        metrics: Optional[MetricsRegistry] = None,
+        clock=time.monotonic
+    ):
+        self.ttls = dict(DEFAULT_CACHE_TTLS if ttls is None else ttls)
+        self.max_entries = max_entries
+        self.metrics = metrics
+        self.clock = clock
+        # (component, command, hash) → (respuesta, caduca)
+        self._entries: 'OrderedDict[Tuple[int, int, bytes], Tuple[bytes, float]]' = OrderedDict()
+        # (sesión, msg_id) → clave de la request enviada a EA
+        self._pending: Dict[Tuple[int, int], Tuple[int, int, bytes]] = {}
+        if metrics is not None:
+            metrics.add_gauge('skate3_response_cache_entries',
+                              'EA responses held by the response cache', self.__len__)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def covers(self, header) -> bool:
+        """¿Es un comando cacheable? (el frame debe verse entero)"""
+        return (header[3], header[5]) in self.ttls
+
+    def lookup(self, session_id: int, frame) -> Optional[bytes]:
+        """Respuesta en caché para esta request, ya con su msg_id, o None"""
+        if ((frame[3], frame[5]) not in self.ttls
+                or ((frame[8] << 8) | frame[9]) != MessageType.REQUEST
+                or len(frame) != HEADER_SIZE + ((frame[0] << 8) | frame[1])):
+            return None
+        key = (frame[3], frame[5], hashlib.blake2b(frame[HEADER_SIZE:], digest_size=16).digest())
+        entry = self._entries.get(key)
+        if entry is not None:
+            response, expires = entry
+            if self.clock() < expires:
+                self._entries.move_to_end(key)
+                if self.metrics is not None:
+                    self.metrics.cache_hits += 1
+                restamped = bytearray(response)
+                restamped[10:12] = frame[10:12]
+                return bytes(restamped)
+            del self._entries[key]
+        self._pending[(session_id, (frame[10] << 8) | frame[11])] = key
+        if self.metrics is not None:
+            self.metrics.cache_misses += 1
+        return None
+
+    def store(self, session_id: int, frame):
+        """Respuesta de EA: se guarda si contesta a una request anotada en lookup()"""
+        if not self._pending:
+            return
+        msg_type = (frame[8] << 8) | frame[9]
+        if msg_type not in (MessageType.RESPONSE, MessageType.ERROR_REPLY):
+            return
+        key = self._pending.pop((session_id, (frame[10] << 8) | frame[11]), None)
+        if key is None or msg_type != MessageType.RESPONSE or frame[6] or frame[7]:
+            return
+        self._entries[key] = (bytes(frame), self.clock() + self.ttls[key[:2]])
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            if self.metrics is not None:
+                self.metrics.cache_evictions += 1
+
+    def end_session(self, session_id: int):
+        """Olvida las requests pendientes de una sesión cerrada"""
+        for key in [k for k in self._pending if k[0] == session_id]:
+            del self._pending[key]
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Outbound Write Scheduler
+Cola de salida por dirección con clases de prioridad: el estado de juego y
+los keep-alive salen antes que el tráfico masivo (stats, mensajería)
+"""
+
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+from .blaze import BlazeComponent
+from .metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+# Clases de prioridad, de mayor a menor
+PRIORITY_CLASSES = ('realtime', 'normal', 'bulk')
+REALTIME, NORMAL, BULK = range(len(PRIORITY_CLASSES))
+
+# Clase por componente; (componente, comando) concretos tienen preferencia
+COMPONENT_CLASSES = {
+    0x02: REALTIME,                     # Estado de partida (reglas anti-desync)
+    0x07: BULK,                         # Stats
+    BlazeComponent.Messaging: BULK,
+}
+COMMAND_CLASSES = {
+    (BlazeComponent.Util, 0x02): REALTIME,     # Ping
+    (0x0B, 0x8C): REALTIME,                    # Keep-alive (ver build_auto_response)
+    (0x0B, 0x40): REALTIME,
+}
+
+# Bytes encolados a partir de los que se deja de leer del origen, y nivel
+# al que se reanuda
+DEFAULT_HIGH_WATER = 256 * 1024
+DEFAULT_LOW_WATER = 64 * 1024
+# Máximo por escritura: entre una y otra pueden adelantarse frames urgentes
+BATCH_BYTES = 64 * 1024
+
+
+def transport_writable(transport: asyncio.BaseTransport) -> bool:
+    """¿Admite el transporte más datos sin superar su límite de escritura?"""
+    return (not transport.is_closing()
+            and transport.get_write_buffer_size() < transport.get_write_buffer_limits()[1])
+
+
+class StreamSink:
+    """
+    Destino de un WriteScheduler sobre un StreamWriter. `out` permite
+    escribir a través de otro escritor del mismo socket (CoalescingWriter).
+    """
+
+    __slots__ = ('writer', 'out')
+
+    def __init__(self, writer: asyncio.StreamWriter, out=None):
+        self.writer = writer
+        self.out = out if out is not None else writer
+
+    def can_write(self) -> bool:
+        return transport_writable(self.writer.transport)
+
+    def write(self, frames):
+        self.out.write(b''.join(frames))
+
+    async def drain(self):
+        await self.writer.drain()
+
+
+def classify(frame) -> int:
+    """Clase de prioridad de un frame según su header"""
+    cls = COMMAND_CLASSES.get((frame[3], frame[5]))
+    if cls is None:
+        cls = COMPONENT_CLASSES.get(frame[3], NORMAL)
+    return cls
+
+
+class WriteScheduler:
+    """
+    Escritor de una dirección de la sesión.
+
+    Mientras el destino admite datos (`sink.can_write()`) y no hay nada en
+    cola, put() escribe directamente: el orden de llegada no retrasa nada.
+    Cuando el transporte se llena, los frames se reparten en una cola por
+    clase y una tarea los escribe por orden de prioridad, en lotes de
+    hasta BATCH_BYTES, cada vez que `sink.drain()` deja sitio; así el túnel
+    sigue leyendo y un frame urgente adelanta a la ráfaga ya encolada.
+
+    Si lo encolado supera `high_water`, put() espera a que baje de
+    `low_water`, y como el túnel no vuelve a leer hasta que put() termina,
+    el origen queda frenado (backpressure de TCP).
+
+    El tiempo en cola de los frames que tuvieron que esperar se registra
+    por clase en MetricsRegistry.queue_wait.
+
+    `sink` ofrece can_write() -> bool, write(frames) y drain() (async).
+    """
+
+    def __init__(
+        self,
+        sink,
+        direction: str,
+        metrics: Optional[MetricsRegistry] = None,
+        high_water: int = DEFAULT_HIGH_WATER,
+        low_water: int = DEFAULT_LOW_WATER
+    ):
+        self.sink = sink
+        self.direction = direction
+        self.high_water = high_water
+        self.low_water = low_water
+        self.queued_bytes = 0
+        self.error: Optional[BaseException] = None
+
+        self._queues: List[Deque[Tuple[bytes, float]]] = [deque() for _ in PRIORITY_CLASSES]
+        self._waits = [
+            metrics.queue_wait_histogram(direction, name) if metrics is not None else None
+            for name in PRIORITY_CLASSES
+        ]
+        self._wake = asyncio.Event()
+        self._room = asyncio.Event()
+        self._room.set()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def put(self, frames):
+        """Escribe o encola frames; espera si la cola está por encima de high_water"""
+        if self.error is not None:
+            raise self.error
+        if not self.queued_bytes and self.sink.can_write():
+            self.sink.write(frames)
+            return
+        now = time.monotonic()
+        for frame in frames:
+            self._queues[classify(frame)].append((frame, now))
+            self.queued_bytes += len(frame)
+        self._idle.clear()
+        self._wake.set()
+        if self.queued_bytes > self.high_water:
+            self._room.clear()
+            await self._room.wait()
+            if self.error is not None:
+                raise self.error
+
+    async def flush(self):
+        """Espera a que todo lo encolado se haya escrito"""
+        await self._idle.wait()
+        if self.error is not None:
+            raise self.error
+
+    async def close(self):
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+    def _next_batch(self) -> List[bytes]:
+        batch = []
+        size = 0
+        now = time.monotonic()
+        for queue, waits in zip(self._queues, self._waits):
+            while queue and size < BATCH_BYTES:
+                frame, queued_at = queue.popleft()
+                batch.append(frame)
+                size += len(frame)
+                if waits is not None:
+                    waits.observe(now - queued_at)
+        self.queued_bytes -= size
+        return batch
+
+    async def _run(self):
+        try:
+            while True:
+                await self._wake.wait()
+                self._wake.clear()
+                while self.queued_bytes:
+                    await self.sink.drain()
+                    self.sink.write(self._next_batch())
+                    if self.queued_bytes <= self.low_water:
+                        self._room.set()
+                self._room.set()
+                self._idle.set()
+        except Exception as e:
+            logger.debug(f"Scheduler {self.direction}: escritura fallida: {e}")
+            self.error = e
+            self._room.set()
+            self._idle.set()
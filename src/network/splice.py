@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Splice Passthrough
+Túnel RPCS3 ↔ EA que decide por el header de cada frame si hay que
+inspeccionarlo; los cuerpos que no, se mueven socket → pipe → socket con
+os.splice sin pasar por Python
+"""
+
+import os
+import time
+import socket
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Optional
+
+from .blaze import HEADER_SIZE
+from .coalesce import tune_socket
+
+if TYPE_CHECKING:
+    from .proxy import ProxyServer
+
+logger = logging.getLogger(__name__)
+
+SPLICE_AVAILABLE = hasattr(os, 'splice')
+SPLICE_FLAGS = (os.SPLICE_F_MOVE | os.SPLICE_F_NONBLOCK) if SPLICE_AVAILABLE else 0
+
+# Buffer de lectura por dirección
+BUFFER_SIZE = 64 * 1024
+# Cuerpos pendientes por debajo de este tamaño se leen normalmente:
+# para pocos bytes el splice cuesta más syscalls de las que ahorra
+SPLICE_MIN = 4096
+# Capacidad por defecto de un pipe en Linux
+PIPE_CHUNK = 64 * 1024
+
+
+async def _wait_fd(loop: asyncio.AbstractEventLoop, fd: int, write: bool = False):
+    """Espera a que el fd sea legible (o escribible)"""
+    future = loop.create_future()
+
+    def ready():
+        if not future.done():
+            future.set_result(None)
+
+    if write:
+        loop.add_writer(fd, ready)
+    else:
+        loop.add_reader(fd, ready)
+    try:
+        await future
+    finally:
+        if write:
+            loop.remove_writer(fd)
+        else:
+            loop.remove_reader(fd)
+
+
+class SpliceSession:
+    """
+    Sesión del modo passthrough sobre sockets no bloqueantes.
+
+    Por cada dirección se lee en bloques y se cortan frames Blaze. Solo los
+    frames que el proxy necesita ver enteros (login, caché, reglas de parche)
+    pasan por process_client_frame / process_ea_frame; del resto solo se
+    miran los 12 bytes del header (latencia, auto-respuestas, fase). Si un frame no
+    inspeccionado está a medias con más de SPLICE_MIN bytes pendientes, lo
+    que falta del cuerpo se mueve con os.splice directamente al destino.
+    """
+
+    def __init__(self, proxy: 'ProxyServer', client: socket.socket, addr):
+        self.proxy = proxy
+        self.client = client
+        self.ea: Optional[socket.socket] = None
+        self.addr = addr
+        self.session_id = 0
+        self.stats = None
+        self.phase = None
+        self.spliced_bytes = 0
+        # Escrituras de las dos direcciones + auto-respuestas al mismo socket
+        self._write_locks = {}
+
+    async def run(self):
+        proxy = self.proxy
+        self.session_id = next(proxy._session_ids)
+        logger.info(f"Proxy: Nueva conexión desde {self.addr} (sesión {self.session_id}, passthrough)")
+
+        self.stats = proxy.metrics.open_session(self.session_id, self.addr)
+        self.phase = proxy.session_phase(self.session_id, self.addr[0] if self.addr else None)
+
+        handler = asyncio.current_task()
+        proxy.lifecycle.register(self.session_id, handler.cancel, handler)
+
+        try:
+            self.ea = await proxy.connect_upstream()
+            logger.info("Proxy: Conectado a servidor EA")
+            tune_socket(self.client, proxy.write_mode)
+            tune_socket(self.ea, proxy.write_mode)
+
+            self._write_locks = {self.client: asyncio.Lock(), self.ea: asyncio.Lock()}
+            await proxy.lifecycle.run_pair(
+                asyncio.create_task(self._pump(self.client, self.ea, to_ea=True)),
+                asyncio.create_task(self._pump(self.ea, self.client, to_ea=False)),
+                lambda to_ea: self._shutdown(self.ea if to_ea else self.client)
+            )
+        except asyncio.CancelledError:
+            logger.info(f"Proxy: Sesión {self.session_id} cerrada por el reaper")
+        except Exception as e:
+            logger.error(f"Proxy: Error en túnel: {e}")
+        finally:
+            proxy.lifecycle.unregister(self.session_id)
+            proxy.close_phase(self.session_id)
+            proxy.latency.end_session(self.session_id)
+            if proxy.response_cache is not None:
+                proxy.response_cache.end_session(self.session_id)
+            proxy.metrics.close_session(self.session_id)
+            for sock in (self.client, self.ea):
+                if sock is not None:
+                    sock.close()
+            logger.info(f"Proxy: Conexión cerrada con {self.addr} "
+                        f"({self.spliced_bytes} bytes vía splice)")
+
+    async def _send(self, sock: socket.socket, data):
+        async with self._write_locks[sock]:
+            await asyncio.get_running_loop().sock_sendall(sock, data)
+
+    @staticmethod
+    def _shutdown(sock: socket.socket):
+        """Half-close hacia el otro extremo"""
+        try:
+            sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+
+    async def _pump(self, src: socket.socket, dst: socket.socket, to_ea: bool) -> bool:
+        """Una dirección del túnel. Devuelve True si src cerró limpiamente (EOF)"""
+        proxy = self.proxy
+        loop = asyncio.get_running_loop()
+        stats = self.stats
+        buffer = bytearray(BUFFER_SIZE)
+        view = memoryview(buffer)
+        start = end = 0
+        pipe_r, pipe_w = os.pipe() if SPLICE_AVAILABLE else (-1, -1)
+
+        try:
+            while True:
+                if end == len(buffer):
+                    # Compactar (o agrandar si el frame no cabe)
+                    pending = end - start
+                    if start == 0:
+                        grown = bytearray(len(buffer) * 2)
+                        grown[:pending] = buffer
+                        buffer, view = grown, memoryview(grown)
+                    else:
+                        buffer[:pending] = buffer[start:end]
+                        start, end = 0, pending
+
+                n = await loop.sock_recv_into(src, view[end:])
+                if n == 0:
+                    return True
+                end += n
+                if to_ea:
+                    stats.last_to_ea = time.monotonic()
+                    stats.bytes_to_ea += n
+                else:
+                    stats.last_from_ea = time.monotonic()
+                    stats.bytes_from_ea += n
+
+                out = []
+                auto_responses = []
+                pos = start
+                while end - pos >= HEADER_SIZE:
+                    header = view[pos:pos + HEADER_SIZE]
+                    frame_end = pos + HEADER_SIZE + ((header[0] << 8) | header[1])
+                    inspect = (self.phase.needs_inspection(header) if to_ea
+                               else proxy.ea_frame_needs_inspection(header))
+
+                    if frame_end > end:
+                        missing = frame_end - end
+                        if inspect or not SPLICE_AVAILABLE or missing < SPLICE_MIN:
+                            break
+                        # Frame grande sin inspeccionar: lo recibido sale ya y
+                        # el resto del cuerpo va por splice
+                        self._observe(header, to_ea, auto_responses)
+                        out.append(view[pos:end])
+                        await self._flush(dst, out, auto_responses)
+                        out, auto_responses = [], []
+                        await self._splice(src, dst, missing, pipe_r, pipe_w)
+                        if to_ea:
+                            stats.bytes_to_ea += missing
+                        else:
+                            stats.bytes_from_ea += missing
+                        pos = end
+                        break
+
+                    frame = view[pos:frame_end]
+                    pos = frame_end
+                    if inspect:
+                        if to_ea:
+                            stats.packets_to_ea += 1
+                            frame = self.phase.client_frame(frame, auto_responses)
+                            if frame is None:
+                                continue
+                            frame = proxy.process_client_frame(self.session_id, frame)
+                        else:
+                            stats.packets_from_ea += 1
+                            self.phase.ea_frame(frame)
+                            frame = proxy.process_ea_frame(self.session_id, frame)
+                    elif not self._observe(header, to_ea, auto_responses):
+                        continue
+                    out.append(frame)
+
+                start = pos
+                await self._flush(dst, out, auto_responses)
+                if start == end:
+                    start = end = 0
+        except (ConnectionError, OSError) as e:
+            logger.debug(f"Proxy: Passthrough {'→EA' if to_ea else '←EA'} terminado: {e}")
+            return False
+        finally:
+            if pipe_r >= 0:
+                os.close(pipe_r)
+                os.close(pipe_w)
+
+    def _observe(self, header, to_ea: bool, auto_responses: list) -> bool:
+        """
+        Frame no inspeccionado: solo el header pasa por Python.
+        Devuelve False si se contestó en local y no hay que reenviarlo.
+        """
+        if to_ea:
+            self.stats.packets_to_ea += 1
+            if self.phase.client_frame(header, auto_responses) is None:
+                return False
+            self.proxy.observe_client_header(self.session_id, header)
+        else:
+            self.stats.packets_from_ea += 1
+            self.phase.ea_frame(header)
+            self.proxy.observe_ea_header(self.session_id, header)
+        return True
+
+    async def _flush(self, dst: socket.socket, out: list, auto_responses: list):
+        if out:
+            await self._send(dst, b''.join(out))
+        if auto_responses:
+            await self._send(self.client, b''.join(auto_responses))
+
+    async def _splice(self, src: socket.socket, dst: socket.socket, count: int,
+                      pipe_r: int, pipe_w: int):
+        """Mueve `count` bytes de src a dst a través de un pipe (sin copias a Python)"""
+        loop = asyncio.get_running_loop()
+        src_fd, dst_fd = src.fileno(), dst.fileno()
+        async with self._write_locks[dst]:
+            while count > 0:
+                try:
+                    moved = os.splice(src_fd, pipe_w, min(count, PIPE_CHUNK), flags=SPLICE_FLAGS)
+                except BlockingIOError:
+                    await _wait_fd(loop, src_fd)
+                    continue
+                if moved == 0:
+                    raise ConnectionError("EOF en mitad de un frame")
+                count -= moved
+                self.spliced_bytes += moved
+                self.proxy.metrics.spliced_bytes += moved
+
+                while moved > 0:
+                    try:
+                        moved -= os.splice(pipe_r, dst_fd, moved, flags=SPLICE_FLAGS)
+                    except BlockingIOError:
+                        await _wait_fd(loop, dst_fd, write=True)
+
+
+class SpliceAcceptor(asyncio.Protocol):
+    """
+    Acepta la conexión vía loop.create_server y se queda con un dup del
+    socket: el transporte se descarta antes de leer nada, y la sesión
+    trabaja sobre el fd directamente (necesario para os.splice).
+    """
+
+    def __init__(self, proxy: 'ProxyServer'):
+        self.proxy = proxy
+
+    def connection_made(self, transport: asyncio.Transport):
+        transport.pause_reading()
+        sock = transport.get_extra_info('socket').dup()
+        sock.setblocking(False)
+        addr = transport.get_extra_info('peername')
+        transport.abort()
+        asyncio.get_running_loop().create_task(SpliceSession(self.proxy, sock, addr).run())
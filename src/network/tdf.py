@@ -6,7 +6,7 @@ Based on analysis of real captured packets from Windows proxy
 
 import struct
 import logging
-from typing import Dict, Any, List, Union
+from typing import Dict, Any, List, Optional, Union
 from enum import IntEnum
 
 logger = logging.getLogger(__name__)
@@ -268,15 +268,19 @@ class BlazeResponseBuilder:
         self.ping_counter = 0  # Counter para timestamp incremental
     
     @staticmethod
-    def build_ping_response(msg_id: int) -> bytes:
+    def build_ping_response(msg_id: int, server_time: Optional[int] = None) -> bytes:
         """
         Construye respuesta para ping 0x09/0x02.
         
         Formato observado en capturas Windows:
         Header: 00 08 00 09 00 02 00 00 10 00 [msg_id] 
-        Payload: CF 4A 6D 74 69 64 28 [timestamp_byte]
+        Payload: CF 4A 6D 74 [STIM: UINT32 big-endian, segundos Unix]
         
         Total: 20 bytes (12 header + 8 payload)
+        
+        Args:
+            server_time: Hora de EA (ver ServerClock). Sin ella se usa el
+                valor de las capturas más un poco según msg_id.
         """
         # Header (12 bytes)
         header = bytearray(12)
@@ -300,15 +304,11 @@ class BlazeResponseBuilder:
         struct.pack_into('>H', header, 10, msg_id)
         
         # Payload TDF (8 bytes)
-        # Tag CF 4A 6D = "tid" (timestamp id)
+        # Tag CF 4A 6D = "STIM" (hora del servidor)
         # Type 0x74 = UINT32
-        # Value: timestamp incremental (último byte cambia)
-        payload = bytes([
-            0xCF, 0x4A, 0x6D,  # Tag "tid"
-            0x74,              # Type UINT32
-            0x69, 0x64, 0x28,  # Primeros 3 bytes del valor
-            (0xD6 + (msg_id % 50))  # Último byte varía ligeramente
-        ])
+        if server_time is None:
+            server_time = 0x696428D6 + (msg_id % 50)
+        payload = bytes([0xCF, 0x4A, 0x6D, 0x74]) + struct.pack('>I', server_time & 0xFFFFFFFF)
         
         return bytes(header) + payload
     
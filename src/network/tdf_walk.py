@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+EA Blaze Protocol - Lazy TDF Walker
+Recorre los campos TDF de un frame sin decodificar valores, para
+localizar campos por ruta de tags (p.ej. "NQOS.DBPS")
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Generator, Iterator, Optional, Tuple
+
+from .blaze import HEADER_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Tipos TDF de Blaze 3 (byte de tipo tras el tag)
+TDF_INTEGER = 0x00
+TDF_STRING = 0x01
+TDF_BLOB = 0x02
+TDF_STRUCT = 0x03
+TDF_LIST = 0x04
+TDF_MAP = 0x05
+TDF_UNION = 0x06
+TDF_INT_LIST = 0x07
+TDF_OBJECT_TYPE = 0x08
+TDF_OBJECT_ID = 0x09
+TDF_FLOAT = 0x0A
+
+# Tipos observados en las capturas del proxy Windows (ver TDFType en tdf.py)
+TDF_STRING_1D = 0x1D
+TDF_STRING_1F = 0x1F
+TDF_UINT32 = 0x74
+TDF_UINT64 = 0x64
+
+# Union sin miembro activo
+UNION_UNSET = 0x7F
+
+# Anchura de los tipos de tamaño fijo
+FIXED_WIDTH = {TDF_FLOAT: 4, TDF_UINT32: 4, TDF_UINT64: 8}
+
+
+class TDFWalkError(ValueError):
+    """El payload no se puede recorrer (tipo desconocido o truncado)"""
+
+
+@dataclass(frozen=True)
+class TDFField:
+    """Campo escalar localizado en un frame (offsets absolutos)"""
+    path: Tuple[str, ...]
+    type: int
+    header_offset: int    # Inicio del tag (3 bytes) + tipo (1 byte)
+    value_offset: int
+    value_end: int
+
+    @property
+    def dotted(self) -> str:
+        return '.'.join(self.path)
+
+
+def encode_tag(name: str) -> bytes:
+    """
+    Tag de 4 caracteres → 3 bytes (6 bits por carácter, c - 0x20).
+    Es la codificación de EA: encode_tag('MAIL') == TDFTag.EMAIL.
+    """
+    value = 0
+    for char in name.upper().ljust(4)[:4]:
+        value = (value << 6) | ((ord(char) - 0x20) & 0x3F)
+    return value.to_bytes(3, 'big')
+
+
+def decode_tag(raw) -> str:
+    """3 bytes → nombre del tag (inverso de encode_tag)"""
+    value = (raw[0] << 16) | (raw[1] << 8) | raw[2]
+    chars = [chr(((value >> shift) & 0x3F) + 0x20) for shift in (18, 12, 6, 0)]
+    return ''.join(chars).rstrip()
+
+
+def read_varint(data, offset: int) -> Tuple[int, int]:
+    """
+    Entero variable de Blaze: el primer byte lleva continuación (0x80),
+    signo (0x40) y 6 bits; los siguientes, continuación y 7 bits.
+    Devuelve (valor, offset siguiente).
+    """
+    try:
+        byte = data[offset]
+        value = byte & 0x3F
+        negative = byte & 0x40
+        shift = 6
+        offset += 1
+        while byte & 0x80:
+            byte = data[offset]
+            value |= (byte & 0x7F) << shift
+            shift += 7
+            offset += 1
+    except IndexError:
+        raise TDFWalkError(f"Varint truncado en offset {offset}") from None
+    return (-value if negative else value), offset
+
+
+def encode_varint(value: int) -> bytes:
+    """Inverso de read_varint"""
+    magnitude = -value if value < 0 else value
+    first = (0x40 if value < 0 else 0) | (magnitude & 0x3F)
+    magnitude >>= 6
+    out = bytearray()
+    if magnitude:
+        first |= 0x80
+    out.append(first)
+    while magnitude:
+        byte = magnitude & 0x7F
+        magnitude >>= 7
+        out.append(byte | (0x80 if magnitude else 0))
+    return bytes(out)
+
+
+def _skip_value(data, offset: int, field_type: int) -> int:
+    """Offset donde termina un valor del tipo dado"""
+    if field_type == TDF_INTEGER:
+        return read_varint(data, offset)[1]
+    if field_type in (TDF_STRING, TDF_BLOB):
+        length, offset = read_varint(data, offset)
+        return offset + length
+    if field_type in (TDF_STRING_1D, TDF_STRING_1F):
+        return offset + 1 + data[offset]
+    if field_type in FIXED_WIDTH:
+        return offset + FIXED_WIDTH[field_type]
+    if field_type == TDF_STRUCT:
+        return _struct_end(data, offset)
+    if field_type == TDF_LIST:
+        element_type = data[offset]
+        count, offset = read_varint(data, offset + 1)
+        for _ in range(count):
+            offset = _skip_value(data, offset, element_type)
+        return offset
+    if field_type == TDF_MAP:
+        key_type, value_type = data[offset], data[offset + 1]
+        count, offset = read_varint(data, offset + 2)
+        for _ in range(count):
+            offset = _skip_value(data, offset, key_type)
+            offset = _skip_value(data, offset, value_type)
+        return offset
+    if field_type == TDF_UNION:
+        if data[offset] == UNION_UNSET:
+            return offset + 1
+        return _skip_value(data, offset + 5, data[offset + 4])
+    if field_type == TDF_INT_LIST:
+        count, offset = read_varint(data, offset)
+        for _ in range(count):
+            offset = read_varint(data, offset)[1]
+        return offset
+    if field_type in (TDF_OBJECT_TYPE, TDF_OBJECT_ID):
+        for _ in range(2 if field_type == TDF_OBJECT_TYPE else 3):
+            offset = read_varint(data, offset)[1]
+        return offset
+    raise TDFWalkError(f"Tipo TDF 0x{field_type:02X} desconocido en offset {offset}")
+
+
+def _struct_end(data, offset: int) -> int:
+    """Fin de un struct anidado (tras su terminador 0x00)"""
+    walker = _walk_struct(data, offset, len(data), ('',))
+    try:
+        while True:
+            next(walker)
+    except StopIteration as stop:
+        return stop.value
+
+
+def _walk_struct(data, offset: int, end: int,
+                 prefix: Tuple[str, ...]) -> Generator[TDFField, None, int]:
+    """
+    Campos escalares a partir de `offset`. Un struct anidado (prefix no
+    vacío) termina en 0x00; el payload raíz, en `end`. Entra en los structs
+    anidados; listas, maps y unions se saltan enteros. Devuelve (como valor
+    de retorno del generador) el offset donde termina.
+    """
+    while True:
+        if prefix:
+            if offset >= end:
+                raise TDFWalkError("Struct sin terminador")
+            if data[offset] == 0x00:
+                return offset + 1
+        elif offset + 4 > end:
+            return offset
+
+        header_offset = offset
+        path = prefix + (decode_tag(data[offset:offset + 3]),)
+        field_type = data[offset + 3]
+        offset += 4
+
+        if field_type == TDF_STRUCT:
+            offset = yield from _walk_struct(data, offset, end, path)
+            continue
+
+        value_end = _skip_value(data, offset, field_type)
+        if value_end > end:
+            raise TDFWalkError(f"Campo {'.'.join(path)} truncado")
+        yield TDFField(path, field_type, header_offset, offset, value_end)
+        offset = value_end
+
+
+def iter_fields(frame, start: int = HEADER_SIZE) -> Iterator[TDFField]:
+    """
+    Recorre de forma perezosa los campos escalares del payload de un frame.
+    Quien busca un campo concreto puede cortar la iteración en cuanto lo
+    encuentra: no se recorre el resto del payload.
+    """
+    return _walk_struct(frame, start, len(frame), ())
+
+
+def find_field(frame, path: Tuple[str, ...]) -> Optional[TDFField]:
+    """Primer campo con la ruta dada, o None (también si el payload no se puede recorrer)"""
+    try:
+        for field in iter_fields(frame):
+            if field.path == path:
+                return field
+    except (TDFWalkError, IndexError):
+        return None
+    return None
+
+
+def field_at(frame, offset: int) -> Optional[TDFField]:
+    """Campo cuyo valor contiene el offset absoluto dado"""
+    try:
+        for field in iter_fields(frame):
+            if field.value_offset <= offset < field.value_end:
+                return field
+            if field.header_offset > offset:
+                return None
+    except (TDFWalkError, IndexError):
+        return None
+    return None
+
+
+def parse_path(dotted: str) -> Tuple[str, ...]:
+    """'NQOS.DBPS' → ('NQOS', 'DBPS')"""
+    path = tuple(part.strip().upper() for part in dotted.split('.') if part.strip())
+    if not path or any(len(part) > 4 for part in path):
+        raise ValueError(f"Ruta TDF inválida: {dotted!r}")
+    return path
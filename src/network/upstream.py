@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Upstream Connections
+Varios endpoints de EA con health checks y selección por latencia, y
+conexiones TCP abiertas de antemano para que el login de RPCS3 no espere
+el handshake
+"""
+
+import time
+import socket
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Deque, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Una conexión en reposo más antigua que esto se descarta (EA cierra las inactivas)
+DEFAULT_MAX_IDLE = 60.0
+# Cada cuánto se revisan las conexiones en reposo
+DEFAULT_HEALTH_INTERVAL = 10.0
+DEFAULT_CONNECT_TIMEOUT = 5.0
+# Espera tras un fallo al rellenar el pool
+REFILL_RETRY_DELAY = 2.0
+
+# Endpoints: cada cuánto se sondean, cuántos fallos seguidos los expulsan,
+# cuánto tiempo quedan fuera antes de volver a probarlos y con qué retraso
+# se lanza el intento contra el siguiente endpoint (happy eyeballs)
+DEFAULT_PROBE_INTERVAL = 10.0
+DEFAULT_EJECT_AFTER = 3
+DEFAULT_EJECT_TIME = 30.0
+DEFAULT_STAGGER = 0.25
+# Peso de la última medida en la media móvil exponencial de latencia
+EWMA_ALPHA = 0.3
+
+
+async def open_socket(host: str, port: int,
+                      timeout: float = DEFAULT_CONNECT_TIMEOUT) -> socket.socket:
+    """Socket TCP no bloqueante ya conectado (prueba cada dirección de getaddrinfo)"""
+    loop = asyncio.get_running_loop()
+    infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    last_error: Optional[BaseException] = None
+    for family, type_, proto, _, addr in infos:
+        sock = socket.socket(family, type_, proto)
+        sock.setblocking(False)
+        try:
+            await asyncio.wait_for(loop.sock_connect(sock, addr), timeout)
+            return sock
+        except (OSError, asyncio.TimeoutError) as e:
+            sock.close()
+            last_error = e
+        except BaseException:
+            sock.close()
+            raise
+    raise OSError(f"No se pudo conectar a {host}:{port}: {last_error}")
+
+
+def parse_endpoint(text: str, default_port: int = 10010) -> Tuple[str, int]:
+    """'host:puerto' (o solo 'host') → (host, puerto)"""
+    host, sep, port = text.strip().rpartition(':')
+    if not sep:
+        return port, default_port
+    return host, int(port)
+
+
+def socket_alive(sock: socket.socket) -> bool:
+    """
+    ¿Sigue abierta la conexión en reposo? EA no envía nada antes de la
+    primera request, así que cualquier dato pendiente (o EOF) la invalida.
+    """
+    try:
+        sock.recv(1, socket.MSG_PEEK)
+        return False
+    except BlockingIOError:
+        return True
+    except OSError:
+        return False
+
+
+class Endpoint:
+    """Estado de salud de un servidor EA"""
+
+    __slots__ = ('host', 'port', 'ewma', 'failures', 'ejected', 'ejected_at', 'ejections')
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.ewma: Optional[float] = None   # Segundos de connect (None = sin medir)
+        self.failures = 0                   # Fallos consecutivos
+        self.ejected = False
+        self.ejected_at = 0.0
+        self.ejections = 0
+
+    @property
+    def label(self) -> str:
+        return f"{self.host}:{self.port}"
+
+
+class UpstreamSet:
+    """
+    Endpoints de EA entre los que elegir al abrir una sesión.
+
+    connect() prueba los endpoints sanos ordenados por latencia (EWMA del
+    tiempo de connect): lanza el primero y, si no ha conectado en `stagger`
+    segundos o falla, lanza el siguiente sin cancelar el anterior; gana la
+    primera conexión y el resto se cierra (happy eyeballs, RFC 8305).
+
+    Un endpoint con `eject_after` fallos seguidos queda expulsado; el
+    sondeo en segundo plano lo vuelve a probar pasados `eject_time`
+    segundos y lo readmite con el primer connect correcto. Si todos están
+    expulsados se prueban igualmente, por orden de configuración.
+    """
+
+    def __init__(
+        self,
+        endpoints: Sequence[Tuple[str, int]],
+        probe_interval: float = DEFAULT_PROBE_INTERVAL,
+        eject_after: int = DEFAULT_EJECT_AFTER,
+        eject_time: float = DEFAULT_EJECT_TIME,
+        stagger: float = DEFAULT_STAGGER,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        metrics=None
+    ):
+        if not endpoints:
+            raise ValueError("Se necesita al menos un endpoint de EA")
+        self.endpoints = [Endpoint(host, port) for host, port in endpoints]
+        self.probe_interval = probe_interval
+        self.eject_after = eject_after
+        self.eject_time = eject_time
+        self.stagger = stagger
+        self.connect_timeout = connect_timeout
+        self.metrics = metrics
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    def __str__(self) -> str:
+        return ', '.join(endpoint.label for endpoint in self.endpoints)
+
+    def ranked(self) -> List[Endpoint]:
+        """Endpoints sanos, los medidos primero y de menor a mayor latencia"""
+        healthy = [e for e in self.endpoints if not e.ejected]
+        if not healthy:
+            return list(self.endpoints)
+        return sorted(healthy, key=lambda e: (e.ewma is None, e.ewma or 0.0))
+
+    # ------------------------------------------------------------------
+    # Conexión
+    # ------------------------------------------------------------------
+
+    async def connect(self) -> socket.socket:
+        """Socket conectado al endpoint que antes responda"""
+        loop = asyncio.get_running_loop()
+        remaining = self.ranked()
+        if len(remaining) == 1:
+            return (await self._attempt(remaining[0]))[0]
+        pending = set()
+        errors = []
+        try:
+            while remaining or pending:
+                if remaining:
+                    pending.add(loop.create_task(self._attempt(remaining.pop(0))))
+                done, pending = await asyncio.wait(
+                    pending, timeout=self.stagger if remaining else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                winner = None
+                for task in done:
+                    if task.exception() is not None:
+                        errors.append(task.exception())
+                    elif winner is None:
+                        winner = task.result()
+                    else:
+                        task.result()[0].close()
+                if winner is not None:
+                    sock, endpoint = winner
+                    logger.debug(f"Upstream: sesión hacia {endpoint.label}")
+                    return sock
+        finally:
+            for task in pending:
+                task.cancel()
+            for result in await asyncio.gather(*pending, return_exceptions=True):
+                if isinstance(result, tuple):
+                    result[0].close()
+        raise OSError(f"Ningún endpoint de EA disponible ({self}): {errors[-1] if errors else '-'}")
+
+    async def _attempt(self, endpoint: Endpoint) -> Tuple[socket.socket, Endpoint]:
+        start = time.monotonic()
+        try:
+            sock = await open_socket(endpoint.host, endpoint.port, self.connect_timeout)
+        except OSError:
+            self.record_failure(endpoint)
+            raise
+        self.record_success(endpoint, time.monotonic() - start)
+        return sock, endpoint
+
+    def record_success(self, endpoint: Endpoint, elapsed: float):
+        if endpoint.ewma is None:
+            endpoint.ewma = elapsed
+        else:
+            endpoint.ewma += EWMA_ALPHA * (elapsed - endpoint.ewma)
+        endpoint.failures = 0
+        if endpoint.ejected:
+            endpoint.ejected = False
+            logger.info(f"Upstream: {endpoint.label} readmitido ({elapsed * 1000:.1f} ms)")
+
+    def record_failure(self, endpoint: Endpoint):
+        endpoint.failures += 1
+        if endpoint.ejected:
+            endpoint.ejected_at = time.monotonic()
+            return
+        if endpoint.failures >= self.eject_after:
+            endpoint.ejected = True
+            endpoint.ejected_at = time.monotonic()
+            endpoint.ejections += 1
+            if self.metrics is not None:
+                self.metrics.upstream_ejections += 1
+            logger.warning(f"Upstream: {endpoint.label} expulsado tras {endpoint.failures} fallos")
+
+    # ------------------------------------------------------------------
+    # Sondeo
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Lanza el sondeo periódico de los endpoints"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._probe_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def probe(self):
+        """Una ronda de sondeo: sanos siempre, expulsados pasado eject_time"""
+        now = time.monotonic()
+        due = [e for e in self.endpoints
+               if not e.ejected or now - e.ejected_at >= self.eject_time]
+        await asyncio.gather(*(self._probe_one(e) for e in due))
+
+    async def _probe_one(self, endpoint: Endpoint):
+        try:
+            sock, _ = await self._attempt(endpoint)
+        except OSError as e:
+            logger.debug(f"Upstream: sondeo a {endpoint.label} falló: {e}")
+            return
+        sock.close()
+
+    async def _probe_loop(self):
+        while True:
+            await self.probe()
+            await asyncio.sleep(self.probe_interval)
+
+
+class UpstreamPool:
+    """
+    Pool pequeño de conexiones precalentadas a EA.
+
+    acquire() entrega una conexión en reposo sana (o abre una nueva si no
+    hay) y despierta al rellenador, que mantiene `size` conexiones en
+    segundo plano. Las conexiones que superan `max_idle` o que EA cerró se
+    descartan en cada revisión y antes de entregarlas.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        size: int = 2,
+        max_idle: float = DEFAULT_MAX_IDLE,
+        health_interval: float = DEFAULT_HEALTH_INTERVAL,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        metrics=None,
+        connect: Optional[Callable[[], Awaitable[socket.socket]]] = None
+    ):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.max_idle = max_idle
+        self.health_interval = health_interval
+        self.connect_timeout = connect_timeout
+        self.metrics = metrics
+        # Cómo abrir una conexión nueva (UpstreamSet.connect con varios endpoints)
+        self._connect = connect or (lambda: open_socket(host, port, connect_timeout))
+
+        self._idle: Deque[Tuple[socket.socket, float]] = deque()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+
+        if metrics is not None:
+            metrics.add_gauge('skate3_upstream_pool_idle',
+                              'Warm upstream connections waiting in the pool', self.__len__)
+
+    def __len__(self) -> int:
+        return len(self._idle)
+
+    def start(self):
+        """Lanza el rellenador en segundo plano"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._refill_loop())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        while self._idle:
+            self._idle.popleft()[0].close()
+
+    async def acquire(self) -> socket.socket:
+        """Conexión lista para usar; el llamador pasa a ser su dueño"""
+        now = time.monotonic()
+        while self._idle:
+            sock, created = self._idle.popleft()
+            if now - created <= self.max_idle and socket_alive(sock):
+                self._count(hit=True)
+                self._wake.set()
+                return sock
+            self._discard(sock)
+
+        self._count(hit=False)
+        self._wake.set()
+        return await self._connect()
+
+    def _count(self, hit: bool):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        if self.metrics is not None:
+            if hit:
+                self.metrics.upstream_pool_hits += 1
+            else:
+                self.metrics.upstream_pool_misses += 1
+
+    def _discard(self, sock: socket.socket):
+        sock.close()
+        self.discarded += 1
+
+    def _prune(self):
+        """Descarta conexiones caducadas o cerradas por EA"""
+        now = time.monotonic()
+        keep = deque()
+        for sock, created in self._idle:
+            if now - created <= self.max_idle and socket_alive(sock):
+                keep.append((sock, created))
+            else:
+                self._discard(sock)
+        self._idle = keep
+
+    async def _refill_loop(self):
+        while True:
+            self._prune()
+            while len(self._idle) < self.size:
+                try:
+                    sock = await self._connect()
+                except OSError as e:
+                    logger.warning(f"Pool upstream: {e}; reintentando en {REFILL_RETRY_DELAY}s")
+                    await asyncio.sleep(REFILL_RETRY_DELAY)
+                    continue
+                self._idle.append((sock, time.monotonic()))
+                logger.debug(f"Pool upstream: {len(self._idle)}/{self.size} conexiones listas")
+
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.health_interval)
+            except asyncio.TimeoutError:
+                pass
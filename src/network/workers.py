@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Multi-process Proxy Workers
+Supervisor que reparte el puerto del proxy entre N procesos con SO_REUSEPORT
+"""
+
+import os
+import asyncio
+import itertools
+import logging
+import multiprocessing
+from multiprocessing.connection import Connection
+from typing import Dict, Optional
+
+from .fastpath import install_uvloop
+from .metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+# Mensajes del canal supervisor <-> worker (tuplas enviadas por el Pipe)
+MSG_READY = 'ready'        # worker → supervisor: (MSG_READY, worker_id, pid)
+MSG_METRICS = 'metrics'    # worker → supervisor: (MSG_METRICS, worker_id, export())
+MSG_ERROR = 'error'        # worker → supervisor: (MSG_ERROR, worker_id, mensaje)
+MSG_STOP = 'stop'          # supervisor → worker: (MSG_STOP,)
+
+
+def worker_main(worker_id: int, conn: Connection, proxy_kwargs: dict,
+                report_interval: float, drain_timeout: float, log_level: int):
+    """Punto de entrada del proceso worker"""
+    logging.basicConfig(
+        level=log_level,
+        format=f'%(asctime)s - worker-{worker_id} - %(name)s - %(levelname)s - %(message)s'
+    )
+    install_uvloop()
+    try:
+        asyncio.run(_worker_loop(worker_id, conn, proxy_kwargs, report_interval, drain_timeout))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _worker_loop(worker_id: int, conn: Connection, proxy_kwargs: dict,
+                       report_interval: float, drain_timeout: float):
+    from .proxy import ProxyServer
+
+    loop = asyncio.get_running_loop()
+    stopping = asyncio.Event()
+
+    def on_command():
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            # El supervisor murió: detenerse igual que con MSG_STOP
+            loop.remove_reader(conn.fileno())
+            stopping.set()
+            return
+        if message[0] == MSG_STOP:
+            stopping.set()
+
+    loop.add_reader(conn.fileno(), on_command)
+
+    proxy = ProxyServer(reuse_port=True, **proxy_kwargs)
+    lag_task = asyncio.create_task(proxy.metrics.monitor_loop_lag())
+    serve_task = asyncio.create_task(proxy.start())
+
+    ready = asyncio.create_task(proxy.listening.wait())
+    await asyncio.wait({ready, serve_task}, return_when=asyncio.FIRST_COMPLETED)
+    if not proxy.listening.is_set():
+        error = serve_task.exception() if not serve_task.cancelled() else None
+        conn.send((MSG_ERROR, worker_id, str(error)))
+        return
+
+    conn.send((MSG_READY, worker_id, os.getpid()))
+
+    while not stopping.is_set():
+        try:
+            await asyncio.wait_for(stopping.wait(), timeout=report_interval)
+        except asyncio.TimeoutError:
+            pass
+        conn.send((MSG_METRICS, worker_id, proxy.metrics.export()))
+
+    # Parada ordenada: dejar de aceptar y esperar a que terminen las sesiones
+    logger.info(f"Worker {worker_id}: drenando {len(proxy.metrics.sessions)} sesiones")
+    proxy.server.close()
+    deadline = loop.time() + drain_timeout
+    while proxy.metrics.sessions and loop.time() < deadline:
+        await asyncio.sleep(0.1)
+
+    conn.send((MSG_METRICS, worker_id, proxy.metrics.export()))
+    lag_task.cancel()
+    serve_task.cancel()
+    await asyncio.gather(lag_task, serve_task, return_exceptions=True)
+
+
+class _Worker:
+    """Proceso worker visto desde el supervisor"""
+
+    __slots__ = ('worker_id', 'process', 'conn', 'ready', 'retiring')
+
+    def __init__(self, worker_id: int, process, conn: Connection):
+        self.worker_id = worker_id
+        self.process = process
+        self.conn = conn
+        self.ready = asyncio.Event()
+        self.retiring = False
+
+
+class ProxySupervisor:
+    """
+    Lanza N procesos ProxyServer escuchando en el mismo puerto con
+    SO_REUSEPORT (el kernel reparte las conexiones entre ellos).
+
+    - Métricas: cada worker envía su export() (contadores e histogramas)
+      por un Pipe; el supervisor las agrega en su MetricsRegistry
+      (expuesto por MetricsServer).
+    - Un worker que muere se relanza automáticamente.
+    - restart_workers(): reinicio gradual; el worker nuevo hace bind antes
+      de que el viejo deje de aceptar y drene sus sesiones.
+
+    Expone la misma interfaz que ProxyServer (start/stop/listening/metrics).
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        port: int = 9999,
+        metrics: Optional[MetricsRegistry] = None,
+        report_interval: float = 1.0,
+        drain_timeout: float = 30.0,
+        **proxy_kwargs
+    ):
+        self.num_workers = workers or os.cpu_count() or 1
+        self.port = port
+        self.metrics = metrics or MetricsRegistry()
+        self.report_interval = report_interval
+        self.drain_timeout = drain_timeout
+        self.proxy_kwargs = dict(proxy_kwargs, port=port)
+
+        self.listening = asyncio.Event()
+        self.workers: Dict[int, _Worker] = {}
+        self._ids = itertools.count(1)
+        self._stopping = False
+        self._failure: Optional[str] = None
+
+        # spawn y no fork: hacer fork con un event loop en marcha deja al
+        # hijo con el estado del loop del padre
+        self._ctx = multiprocessing.get_context('spawn')
+
+    def _spawn(self) -> _Worker:
+        worker_id = next(self._ids)
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=worker_main,
+            args=(worker_id, child_conn, self.proxy_kwargs, self.report_interval,
+                  self.drain_timeout, logging.getLogger().getEffectiveLevel()),
+            name=f'skate3-proxy-worker-{worker_id}',
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+
+        worker = _Worker(worker_id, process, parent_conn)
+        self.workers[worker_id] = worker
+        asyncio.get_running_loop().add_reader(parent_conn.fileno(), self._on_message, worker)
+        logger.info(f"Supervisor: worker {worker_id} lanzado (PID {process.pid})")
+        return worker
+
+    def _on_message(self, worker: _Worker):
+        try:
+            message = worker.conn.recv()
+        except (EOFError, OSError):
+            self._forget(worker)
+            return
+
+        kind = message[0]
+        if kind == MSG_METRICS:
+            self.metrics.update_remote(str(worker.worker_id), message[2])
+        elif kind == MSG_READY:
+            worker.ready.set()
+            logger.info(f"Supervisor: worker {worker.worker_id} escuchando (PID {message[2]})")
+        elif kind == MSG_ERROR:
+            self._failure = message[2]
+            logger.error(f"Supervisor: worker {worker.worker_id} no pudo iniciar: {message[2]}")
+
+    def _forget(self, worker: _Worker):
+        """El canal del worker se cerró: dejar de leerlo y retirar sus métricas"""
+        try:
+            asyncio.get_running_loop().remove_reader(worker.conn.fileno())
+        except (ValueError, OSError):
+            pass
+        worker.conn.close()
+        self.workers.pop(worker.worker_id, None)
+        self.metrics.retire_remote(str(worker.worker_id))
+
+    async def _wait_ready(self, worker: _Worker):
+        while not worker.ready.is_set():
+            if self._failure is not None:
+                raise RuntimeError(f"Worker no pudo iniciar: {self._failure}")
+            if not worker.process.is_alive() and worker.worker_id not in self.workers:
+                raise RuntimeError(f"Worker {worker.worker_id} terminó antes de escuchar")
+            try:
+                await asyncio.wait_for(worker.ready.wait(), timeout=0.1)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self):
+        """Lanza los workers y los supervisa hasta stop()"""
+        new_workers = [self._spawn() for _ in range(self.num_workers)]
+        for worker in new_workers:
+            await self._wait_ready(worker)
+
+        logger.info(f"Proxy Supervisor: {self.num_workers} workers en puerto {self.port} (SO_REUSEPORT)")
+        self.listening.set()
+
+        while not self._stopping:
+            await asyncio.sleep(1.0)
+            for worker in list(self.workers.values()):
+                if worker.process.is_alive() or worker.retiring or self._stopping:
+                    continue
+                logger.warning(f"Supervisor: worker {worker.worker_id} murió "
+                               f"(exit {worker.process.exitcode}), relanzando")
+                self._forget(worker)
+                self._spawn()
+
+    async def _retire(self, worker: _Worker):
+        """Pide al worker que drene y espera a que termine"""
+        worker.retiring = True
+        try:
+            worker.conn.send((MSG_STOP,))
+        except OSError:
+            pass
+        deadline = asyncio.get_running_loop().time() + self.drain_timeout + 5
+        while worker.process.is_alive() and asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(0.1)
+        if worker.process.is_alive():
+            logger.warning(f"Supervisor: worker {worker.worker_id} no terminó, forzando")
+            worker.process.terminate()
+        worker.process.join(timeout=1)
+        # Procesar el último snapshot pendiente antes de retirar sus métricas
+        while worker.worker_id in self.workers and worker.conn.poll():
+            self._on_message(worker)
+        if worker.worker_id in self.workers:
+            self._forget(worker)
+
+    async def restart_workers(self):
+        """Reinicio gradual: un worker nuevo por cada viejo, sin cortar el puerto"""
+        old_workers = [w for w in self.workers.values() if not w.retiring]
+        logger.info(f"Supervisor: reiniciando {len(old_workers)} workers")
+        for old in old_workers:
+            await self._wait_ready(self._spawn())
+            await self._retire(old)
+
+    async def stop(self):
+        """Detiene todos los workers drenando sus sesiones"""
+        self._stopping = True
+        workers = list(self.workers.values())
+        await asyncio.gather(*(self._retire(w) for w in workers))
+        logger.info("Proxy Supervisor stopped")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Startup Profiler / Dependency Graph
+Desglose por fases del arranque (imports, config, bind...) y time-to-listen,
+y ejecución concurrente de las fases según sus dependencias
+"""
+
+import time
+import asyncio
+import logging
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfiler:
+    """
+    Registra fases del arranque relativas a un origen común.
+
+    Las fases pueden solaparse (p.ej. la verificación de actualizaciones
+    corre en segundo plano mientras se hace bind), así que el informe
+    muestra inicio y fin de cada una, no solo la duración.
+    """
+
+    def __init__(self, origin: Optional[float] = None):
+        self.origin = time.perf_counter() if origin is None else origin
+        self.phases: List[Tuple[str, float, float]] = []
+        self.listening_at: Optional[float] = None
+
+    def record(self, name: str, start: float, end: Optional[float] = None):
+        """Añade una fase medida externamente (valores de perf_counter)"""
+        end = time.perf_counter() if end is None else end
+        self.phases.append((name, start - self.origin, end - self.origin))
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start)
+
+    def mark_listening(self):
+        """Marca el instante en que todos los servidores aceptan conexiones"""
+        if self.listening_at is None:
+            self.listening_at = time.perf_counter() - self.origin
+
+    def report(self) -> str:
+        lines = [f"{'Fase':<28} {'inicio ms':>10} {'fin ms':>10} {'duración ms':>12}"]
+        for name, start, end in self.phases:
+            lines.append(f"{name:<28} {start * 1000:>10.1f} {end * 1000:>10.1f} "
+                         f"{(end - start) * 1000:>12.1f}")
+        if self.listening_at is not None:
+            lines.append(f"{'time-to-listen':<28} {'':>10} {'':>10} "
+                         f"{self.listening_at * 1000:>12.1f}")
+        return '\n'.join(lines)
+
+
+class StartupGraph:
+    """
+    Grafo de dependencias de las fases del arranque.
+
+    Cada fase es una corrutina sin argumentos que arranca en cuanto
+    terminan las fases de las que depende; las independientes corren en
+    paralelo. Las dependencias deben registrarse antes (no hay ciclos).
+    """
+
+    def __init__(self, profiler: Optional[StartupProfiler] = None):
+        self.profiler = profiler
+        self._phases: Dict[str, Tuple[Callable[[], Awaitable], Tuple[str, ...]]] = {}
+        self.tasks: Dict[str, asyncio.Task] = {}
+
+    def add(self, name: str, fn: Callable[[], Awaitable], after: Iterable[str] = ()):
+        after = tuple(after)
+        for dep in after:
+            if dep not in self._phases:
+                raise ValueError(f"Fase '{name}' depende de una fase desconocida: {dep}")
+        self._phases[name] = (fn, after)
+
+    async def _run_phase(self, name: str):
+        fn, after = self._phases[name]
+        if after:
+            await asyncio.gather(*(self.tasks[dep] for dep in after))
+        start = time.perf_counter()
+        try:
+            return await fn()
+        finally:
+            if self.profiler:
+                self.profiler.record(name, start)
+            logger.debug(f"Startup: fase '{name}' terminada")
+
+    def start(self) -> Dict[str, asyncio.Task]:
+        """Lanza todas las fases; cada una espera a sus dependencias"""
+        for name in self._phases:
+            self.tasks[name] = asyncio.create_task(self._run_phase(name), name=f"startup:{name}")
+        return self.tasks
+
+    def background(self, *names: str):
+        """
+        Fases que nadie espera: su resultado solo se registra en el log, un
+        fallo no detiene el arranque.
+        """
+        for name in names:
+            self.tasks[name].add_done_callback(self._log_outcome)
+
+    @staticmethod
+    def _log_outcome(task: asyncio.Task):
+        name = task.get_name().partition(':')[2]
+        if task.cancelled():
+            logger.debug(f"Startup: fase '{name}' cancelada")
+        elif task.exception() is not None:
+            logger.error(f"Startup: fase '{name}' falló: {task.exception()}",
+                         exc_info=task.exception())
+        else:
+            logger.info(f"Startup: fase '{name}' completada")
+
+    async def wait(self, *names: str):
+        """Espera a las fases indicadas (o a todas); propaga sus errores"""
+        await asyncio.gather(*(self.tasks[n] for n in (names or self.tasks)))
+
+    def cancel(self):
+        for task in self.tasks.values():
+            task.cancel()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Test del pool de credenciales
+Valida la lectura del PSN name del 0xC8, el orden de las reglas (PSN name,
+IP, cuenta por defecto), el login 0x3C precalculado, la carga de
+accounts.json y dos emuladores autenticando cuentas distintas a la vez
+"""
+
+import asyncio
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.config import ConfigManager
+from src.network.accounts import CredentialPool, read_psn_name
+from src.network.blaze import BlazeFramer
+from src.network.proxy import EACredentials, ProxyServer
+from src.network.tdf import BlazeAuthPacket, TDFBuilder, TDFTag
+from src.network.tdf_walk import TDF_STRUCT, encode_tag
+from testkit import RecordingEA, start_ea, wait_for
+
+MAIN = EACredentials('main@example.com', 'secret', 'MainPlayer')
+ALT = EACredentials('alt@example.com', 'hunter2', 'AltPlayer')
+
+
+def login_frame(psn_name: str, msg_id: int = 1, nested: bool = False) -> bytes:
+    """0xC8 de RPCS3 con su PSN name (opcionalmente dentro de un struct)"""
+    payload = TDFBuilder.build_string(TDFTag.EMAIL, 'console@ps3') + \
+        TDFBuilder.build_string(TDFTag.PSN_NAME, psn_name)
+    if nested:
+        payload = encode_tag('TICK') + bytes([TDF_STRUCT]) + payload + b'\x00'
+    header = bytearray(12)
+    header[0:2] = len(payload).to_bytes(2, 'big')
+    header[3], header[5] = 0x01, 0xC8
+    header[10:12] = msg_id.to_bytes(2, 'big')
+    return bytes(header) + payload
+
+
+def test_read_psn_name():
+    assert read_psn_name(login_frame('Player2')) == 'Player2'
+    assert read_psn_name(login_frame('Player3', nested=True)) == 'Player3'
+    assert read_psn_name(login_frame('x')[:12]) is None
+    print("✅ Accounts: PSN name leído del 0xC8")
+
+
+def test_routing():
+    pool = CredentialPool({'main': MAIN, 'alt': ALT},
+                          by_address={'10.0.0.2': 'alt'},
+                          by_psn_name={'PlayerTwo': 'alt', 'Boss': 'main'},
+                          default='main')
+    assert pool.route('10.0.0.9', login_frame('playertwo')) == (pool.accounts['alt'], 'psn_name')
+    assert pool.route('10.0.0.2', login_frame('Boss')) == (pool.accounts['main'], 'psn_name'), \
+        "El PSN name va antes que la IP"
+    assert pool.route('10.0.0.2', login_frame('Nobody')) == (pool.accounts['alt'], 'address')
+    assert pool.route('10.0.0.9', login_frame('Nobody')) == (pool.accounts['main'], 'default')
+
+    assert CredentialPool({'main': MAIN}).default is not None, "Una sola cuenta = por defecto"
+    assert CredentialPool().route('10.0.0.9', login_frame('x')) == (None, 'unrouted')
+    try:
+        CredentialPool({'main': MAIN}, by_address={'10.0.0.2': 'missing'})
+        assert False, "Regla hacia una cuenta inexistente aceptada"
+    except ValueError:
+        pass
+    print("✅ Accounts: reglas por PSN name, IP y cuenta por defecto")
+
+
+def test_prebuilt_login():
+    account = CredentialPool({'alt': ALT}).accounts['alt']
+    packet = BlazeAuthPacket(msg_id=0x1234)
+    packet.add_email(ALT.email)
+    packet.add_password(ALT.password)
+    packet.add_psn_name(ALT.psn_name)
+    assert account.login_packet(0x1234) == packet.build()
+
+    proxy = ProxyServer(credentials=MAIN)
+    injected = proxy.inject_credentials(login_frame('x', msg_id=7))
+    assert injected[5] == 0x3C and injected[11] == 7 and b'main@example.com' in injected
+    print("✅ Accounts: login 0x3C precalculado por cuenta")
+
+
+def test_load_accounts():
+    with tempfile.TemporaryDirectory() as tmp:
+        config = ConfigManager(Path(tmp))
+        assert config.load_accounts() is None
+        data = {
+            'accounts': {
+                'main': {'email': MAIN.email, 'password': MAIN.password, 'psnName': MAIN.psn_name},
+                'alt': {'email': ALT.email, 'password': ALT.password, 'psnName': ALT.psn_name},
+            },
+            'routes': {'address': {'10.0.0.2': 'alt'}, 'psnName': {'PlayerTwo': 'alt'}},
+            'default': 'main',
+        }
+        config.accounts_file.write_text(json.dumps(data))
+        loaded = config.load_accounts()
+        assert loaded.accounts['alt'].psn_name == 'AltPlayer' and loaded.default == 'main'
+        assert loaded.by_psn_name == {'PlayerTwo': 'alt'}
+
+        data['routes']['address']['10.0.0.3'] = 'ghost'
+        config.accounts_file.write_text(json.dumps(data))
+        assert config.load_accounts() is None, "Regla hacia una cuenta inexistente aceptada"
+    print("✅ Accounts: accounts.json")
+
+
+async def run_two_emulators():
+    ea = RecordingEA()
+    ea_server, ea_port = await start_ea(ea.handle)
+    pool = CredentialPool({'main': MAIN, 'alt': ALT}, by_psn_name={'PlayerTwo': 'alt'},
+                          default='main')
+    proxy = ProxyServer(port=0, ea_server='127.0.0.1', ea_port=ea_port, accounts=pool)
+    proxy_task = asyncio.create_task(proxy.start())
+    await proxy.listening.wait()
+    proxy_port = proxy.server.sockets[0].getsockname()[1]
+
+    clients = [await asyncio.open_connection('127.0.0.1', proxy_port) for _ in range(2)]
+    for (_, writer), psn_name in zip(clients, ('PlayerOne', 'PlayerTwo')):
+        writer.write(login_frame(psn_name))
+    for reader, _ in clients:
+        framer = BlazeFramer()
+        while not framer.feed(await asyncio.wait_for(reader.read(4096), timeout=5)):
+            pass
+    accounts = sorted(phase.account for phase in proxy.phases.values())
+    authenticated = all(phase.authenticated for phase in proxy.phases.values())
+    for _, writer in clients:
+        writer.close()
+    await wait_for(lambda: not proxy.metrics.sessions)
+
+    logins = [read_psn_name(f) for f in ea.frames if f[3] == 0x01]
+    routed = dict(proxy.metrics.logins_routed)
+    await proxy.stop()
+    proxy_task.cancel()
+    await asyncio.gather(proxy_task, return_exceptions=True)
+    ea_server.close()
+    return sorted(logins), accounts, authenticated, routed
+
+
+def test_two_emulators():
+    logins, accounts, authenticated, routed = asyncio.run(run_two_emulators())
+    assert logins == ['AltPlayer', 'MainPlayer'], logins
+    assert accounts == ['alt', 'main'] and authenticated
+    assert routed['psn_name'] == 1 and routed['default'] == 1, routed
+    print("✅ Accounts: dos emuladores con cuentas distintas en el mismo proxy")
+
+
+if __name__ == '__main__':
+    test_read_psn_name()
+    test_routing()
+    test_prebuilt_login()
+    test_load_accounts()
+    test_two_emulators()
+    print("\n✅ TODOS LOS TESTS PASARON")
@@ -10,6 +10,7 @@ sys.path.insert(0, '/home/rexx/.gemini/antigravity/scratch/skate3-proxy-linux')
 from src.network.tdf import BlazeResponseBuilder
 from src.network.proxy import ProxyServer
 import struct
+import time
 
 
 def test_ping_response():
@@ -166,10 +167,13 @@ def test_auto_responder_logic():
     print("="*70)
     
     proxy = ProxyServer()
-    proxy.authenticated = True
     
-    # Test con ping request
+    # Test con ping request: sin reloj de EA sincronizado el ping va a EA
     ping_request = bytes.fromhex('00000009000200000000000d')
+    unsynced_response = proxy.build_auto_response(ping_request)
+    
+    # Una respuesta real de EA a un ping (50 ms de RTT) sincroniza el reloj
+    proxy.server_clock.observe(int(time.time()), 0.05)
     ping_response = proxy.build_auto_response(ping_request)
     
     print(f"\n🔔 Ping request procesado:")
@@ -191,13 +195,32 @@ def test_auto_responder_logic():
     print(f"\n❓ Request no-crítico (0x01/0x3C - auth):")
     print(f"   Response generado: {'Sí' if response_none else 'No (correcto)'}")
     
+    # Por la tabla de fases: el keep-alive solo se auto-responde tras el login
+    phase = proxy.session_phase(1)
+    before_login = []
+    phase.client_frame(request_8c, before_login)
+    login = bytes.fromhex('0000000100c8000000000007')
+    phase.client_frame(login, [])
+    login_reply = bytes.fromhex('00000001003c000010000007')
+    phase.ea_frame(login_reply)
+    after_login = []
+    forwarded = phase.client_frame(request_8c, after_login)
+    
+    print(f"\n🔐 Keep-alive por la tabla de fases:")
+    print(f"   Antes del login: {len(before_login)} respuestas, tras el login: {len(after_login)}")
+    
     # Validaciones
     checks = {
+        'Ping sin reloj sincronizado va a EA': unsynced_response is None,
         'Ping genera response': ping_response is not None,
         'Ping response tiene 20 bytes': ping_response and len(ping_response) == 20,
         '0x0B/0x8C genera response': response_8c is not None,
         '0x0B/0x8C response tiene 12 bytes': response_8c and len(response_8c) == 12,
-        'Comando no-crítico NO genera response': response_none is None
+        'Comando no-crítico NO genera response': response_none is None,
+        'Sin login el keep-alive va a EA sin auto-respuesta': not before_login,
+        'Login + respuesta de EA autentican la sesión': proxy.authenticated,
+        'Autenticada, el keep-alive se auto-responde y sigue a EA':
+            len(after_login) == 1 and forwarded is not None,
     }
     
     print("\n🔍 Validaciones:")
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Test del modelo de reloj de EA
+Valida que el offset se aprende de las respuestas reales a ping con error
+muy por debajo del segundo, la deriva, los saltos de reloj, las sondas de
+re-sincronización y que, sincronizado, el proxy contesta los pings en local
+"""
+
+import asyncio
+import random
+import struct
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.network.blaze import BlazeFramer
+from src.network.clock import PROBE_TIMEOUT, ServerClock, read_stim
+from src.network.proxy import ProxyServer
+from src.network.tdf import BlazeResponseBuilder
+from testkit import FakeClock
+
+EPOCH = 1_768_000_000.0
+
+
+def feed(clock: ServerClock, fake: FakeClock, offset: float, count: int, every: float,
+         drift: float = 0.0, rng: random.Random = None):
+    """Pings reales cada `every` segundos con RTT aleatorio contra un EA con ese offset"""
+    rng = rng or random.Random(1)
+    start = fake.now
+    for _ in range(count):
+        rtt = rng.uniform(0.02, 0.2)
+        sent = fake.now
+        server = sent + rng.uniform(0, rtt) + offset + drift * (sent - start)
+        fake.now = sent + rtt
+        clock.observe(int(server), rtt)
+        fake.now += every
+
+
+def test_ping_response_stim():
+    # msg_id % 50 >= 42 desbordaba el último byte
+    for msg_id in (13, 42, 49, 0xFFFF):
+        response = BlazeResponseBuilder.build_ping_response(msg_id)
+        assert len(response) == 20 and struct.unpack('>H', response[10:12])[0] == msg_id
+    response = BlazeResponseBuilder.build_ping_response(7, server_time=1_768_171_734)
+    assert read_stim(response) == 1_768_171_734
+    print("✅ Clock: build_ping_response con STIM UINT32 para cualquier msg_id")
+
+
+def test_offset_converges():
+    fake = FakeClock(1000.0)
+    clock = ServerClock(clock=fake)
+    offset = EPOCH + 0.37 - fake.now
+    feed(clock, fake, offset, count=1, every=0.7)
+    assert clock.synced and clock.error <= 0.6
+    feed(clock, fake, offset, count=30, every=0.7)
+    assert clock.error < 0.1, f"Error del offset: {clock.error}"
+    assert abs(clock.offset - offset) <= clock.error + 1e-9
+    assert abs(clock.now() - (fake.now + offset)) < 0.1
+    print(f"✅ Clock: offset aprendido (±{clock.error * 1e3:.0f} ms)")
+
+
+def test_resync_probes():
+    fake = FakeClock(1000.0)
+    clock = ServerClock(resync_interval=60, clock=fake)
+    assert clock.local_stim() is None, "Sin sincronizar el ping debe ir a EA"
+    offset = EPOCH - fake.now
+    feed(clock, fake, offset, count=1, every=0)
+
+    fake.now += 30
+    assert clock.local_stim() == int(fake.now + clock.offset)
+    fake.now += 31
+    assert clock.local_stim() is None, "Pasado el intervalo toca sonda"
+    assert clock.local_stim() is not None, "Con la sonda en vuelo se sigue en local"
+    fake.now += PROBE_TIMEOUT
+    assert clock.local_stim() is None, "Sonda sin respuesta: otra sonda"
+    feed(clock, fake, offset, count=1, every=0)
+    assert clock.local_stim() is not None
+
+    disabled = ServerClock(resync_interval=0, clock=fake)
+    feed(disabled, fake, offset, count=1, every=0)
+    assert disabled.local_stim() is None
+    print("✅ Clock: sondas de re-sincronización")
+
+
+def test_clock_jump():
+    fake = FakeClock(1000.0)
+    clock = ServerClock(clock=fake)
+    offset = EPOCH - fake.now
+    feed(clock, fake, offset, count=10, every=1)
+    feed(clock, fake, offset + 100, count=1, every=1)
+    assert abs(clock.offset - (offset + 100)) < 1, "No se re-sincronizó tras el salto"
+    print("✅ Clock: salto del reloj de EA")
+
+
+def test_drift():
+    fake = FakeClock(1000.0)
+    clock = ServerClock(clock=fake)
+    feed(clock, fake, EPOCH - fake.now, count=150, every=60, drift=100e-6)
+    assert abs(clock.drift - 100e-6) < 30e-6, f"Deriva estimada: {clock.drift * 1e6:.0f} ppm"
+    print(f"✅ Clock: deriva estimada ({clock.drift * 1e6:.0f} ppm)")
+
+
+async def run_local_pings():
+    ea_pings = []
+
+    async def fake_ea(reader, writer):
+        framer = BlazeFramer()
+        while True:
+            data = await reader.read(4096)
+            if not data:
+                break
+            for frame in framer.feed(data):
+                msg_id = (frame[10] << 8) | frame[11]
+                if frame[3] == 0x01:
+                    writer.write(BlazeResponseBuilder.build_empty_response(0x01, frame[5], msg_id))
+                    continue
+                ea_pings.append(msg_id)
+                writer.write(BlazeResponseBuilder.build_ping_response(msg_id, int(time.time())))
+        writer.close()
+
+    ea_server = await asyncio.start_server(fake_ea, '127.0.0.1', 0)
+    ea_port = ea_server.sockets[0].getsockname()[1]
+    proxy = ProxyServer(port=0, ea_server='127.0.0.1', ea_port=ea_port)
+    proxy_task = asyncio.create_task(proxy.start())
+    await proxy.listening.wait()
+    proxy_port = proxy.server.sockets[0].getsockname()[1]
+
+    reader, writer = await asyncio.open_connection('127.0.0.1', proxy_port)
+    framer = BlazeFramer()
+    # Login: los pings solo se contestan en local con la sesión autenticada
+    login = bytearray(12)
+    login[3], login[5] = 0x01, 0xC8
+    writer.write(bytes(login))
+    while not framer.feed(await asyncio.wait_for(reader.read(4096), timeout=5)):
+        pass
+    stims = []
+    for msg_id in range(1, 21):
+        header = bytearray(12)
+        header[3], header[5] = 0x09, 0x02
+        header[10:12] = msg_id.to_bytes(2, 'big')
+        writer.write(bytes(header))
+        frames = []
+        while not frames:
+            frames = framer.feed(await asyncio.wait_for(reader.read(4096), timeout=5))
+        assert len(frames) == 1, "Respuesta duplicada"
+        stims.append(read_stim(frames[0]))
+    writer.close()
+
+    snapshot = proxy.metrics.snapshot()
+    await proxy.stop()
+    proxy_task.cancel()
+    await asyncio.gather(proxy_task, return_exceptions=True)
+    ea_server.close()
+    return ea_pings, stims, snapshot
+
+
+def test_local_pings():
+    ea_pings, stims, snapshot = asyncio.run(run_local_pings())
+    assert ea_pings == [1], f"Pings que llegaron a EA: {ea_pings}"
+    now = time.time()
+    assert all(abs(stim - now) <= 2 for stim in stims), stims
+    assert snapshot['pings_local'] == 19 and snapshot['pings_upstream'] == 1, snapshot
+    print("✅ Clock: pings contestados en local tras sincronizar")
+
+
+if __name__ == '__main__':
+    test_ping_response_stim()
+    test_offset_converges()
+    test_resync_probes()
+    test_clock_jump()
+    test_drift()
+    test_local_pings()
+    print("\n✅ TODOS LOS TESTS PASARON")
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Test de la agrupación de escrituras
+Valida que en modo throughput los bloques de una iteración (o de la
+ventana) salen en una sola escritura, que latency escribe al momento con
+TCP_NODELAY/TCP_QUICKACK y que el fast path entrega todo en ambos modos
+"""
+
+import asyncio
+import socket
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.network.blaze import BlazeFramer
+from src.network.coalesce import CoalescingWriter, tune_socket
+from src.network.metrics import MetricsRegistry
+from src.network.proxy import ProxyServer
+from src.network.tdf import BlazeResponseBuilder
+from testkit import RecordingEA, frame, start_ea
+
+
+class RecordingTransport:
+    """Transporte mínimo que anota cada llamada de escritura"""
+
+    def __init__(self):
+        self.calls = []
+
+    def write(self, data):
+        self.calls.append([data])
+
+    def writelines(self, chunks):
+        self.calls.append(list(chunks))
+
+    def is_closing(self) -> bool:
+        return False
+
+
+async def run_writer(mode: str, window: float = 0.0):
+    transport = RecordingTransport()
+    metrics = MetricsRegistry()
+    out = CoalescingWriter(transport, mode, window, metrics)
+    out.write(b'a')
+    out.write(b'b')
+    out.write(b'c')
+    before = len(transport.calls)
+    await asyncio.sleep(window + 0.01)
+    out.write(b'd')
+    out.flush()
+    return before, transport.calls, metrics.writes_coalesced
+
+
+def test_throughput_coalesces():
+    before, calls, coalesced = asyncio.run(run_writer('throughput'))
+    assert before == 0, "throughput escribió antes del final de la iteración"
+    assert calls == [[b'a', b'b', b'c'], [b'd']], calls
+    assert coalesced == 2
+    print("✅ Coalesce: throughput junta las escrituras de una iteración")
+
+
+def test_throughput_window():
+    before, calls, _ = asyncio.run(run_writer('throughput', window=0.05))
+    assert before == 0
+    assert calls == [[b'a', b'b', b'c'], [b'd']], calls
+    print("✅ Coalesce: micro-ventana configurable")
+
+
+def test_latency_writes_immediately():
+    before, calls, coalesced = asyncio.run(run_writer('latency'))
+    assert before == 3 and coalesced == 0
+    assert calls == [[b'a'], [b'b'], [b'c'], [b'd']]
+    print("✅ Coalesce: latency escribe cada bloque al momento")
+
+
+def test_tune_socket():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 0)
+        tune_socket(sock, 'throughput')
+        assert sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY) == 0
+        tune_socket(sock, 'latency')
+        assert sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY) != 0
+    finally:
+        sock.close()
+    print("✅ Coalesce: TCP_NODELAY en modo latency")
+
+
+async def run_fast_path(mode: str):
+    async def fake_ea(reader, writer):
+        framer = BlazeFramer()
+        while True:
+            data = await reader.read(4096)
+            if not data:
+                break
+            for frame in framer.feed(data):
+                writer.write(BlazeResponseBuilder.build_empty_response(
+                    frame[3], frame[5], (frame[10] << 8) | frame[11]
+                ))
+                await asyncio.sleep(0)
+        writer.close()
+
+    ea_server = await asyncio.start_server(fake_ea, '127.0.0.1', 0)
+    ea_port = ea_server.sockets[0].getsockname()[1]
+    proxy = ProxyServer(port=0, ea_server='127.0.0.1', ea_port=ea_port, fast_path=True,
+                        write_mode=mode, coalesce_window=0.002)
+    proxy_task = asyncio.create_task(proxy.start())
+    await proxy.listening.wait()
+    proxy_port = proxy.server.sockets[0].getsockname()[1]
+
+    reader, writer = await asyncio.open_connection('127.0.0.1', proxy_port)
+    for i in range(20):
+        header = bytearray(12)
+        header[3], header[5], header[11] = 0x04, 0x10, i
+        writer.write(bytes(header))
+        await asyncio.sleep(0)
+    data = await asyncio.wait_for(reader.readexactly(20 * 12), timeout=5)
+    writer.close()
+    await writer.wait_closed()
+
+    coalesced = proxy.metrics.writes_coalesced
+    await proxy.stop()
+    proxy_task.cancel()
+    await asyncio.gather(proxy_task, return_exceptions=True)
+    ea_server.close()
+    return [data[i * 12 + 11] for i in range(20)], coalesced
+
+
+def test_fast_path_modes():
+    for mode in ('latency', 'throughput'):
+        ids, coalesced = asyncio.run(run_fast_path(mode))
+        assert ids == list(range(20)), f"{mode}: respuestas fuera de orden: {ids}"
+        if mode == 'latency':
+            assert coalesced == 0
+        else:
+            assert coalesced > 0, "throughput no agrupó ninguna escritura"
+    print("✅ Coalesce: fast path en latency y throughput")
+
+
+async def run_concurrent_sessions():
+    """Dos sesiones a la vez; la segunda se cierra y la primera sigue con keep-alives"""
+    ea_server, ea_port = await start_ea(RecordingEA().handle)
+    proxy = ProxyServer(port=0, ea_server='127.0.0.1', ea_port=ea_port)
+    proxy_task = asyncio.create_task(proxy.start())
+    await proxy.listening.wait()
+    proxy_port = proxy.server.sockets[0].getsockname()[1]
+
+    first, second = await asyncio.gather(
+        asyncio.open_connection('127.0.0.1', proxy_port),
+        asyncio.open_connection('127.0.0.1', proxy_port),
+    )
+    for reader, writer in (first, second):
+        writer.write(frame(0x01, 0xC8, 1))       # Login: activa las auto-respuestas
+        await asyncio.wait_for(reader.readexactly(12), timeout=5)
+    second[1].close()
+    await second[1].wait_closed()
+    while len(proxy.metrics.sessions) > 1:
+        await asyncio.sleep(0.01)
+
+    reader, writer = first
+    writer.write(frame(0x0B, 0x8C, 2))
+    # Auto-respuesta + respuesta de EA
+    data = await asyncio.wait_for(reader.readexactly(24), timeout=5)
+    writer.close()
+    await writer.wait_closed()
+
+    await proxy.stop()
+    proxy_task.cancel()
+    await asyncio.gather(proxy_task, return_exceptions=True)
+    ea_server.close()
+    return data
+
+
+def test_concurrent_sessions():
+    data = asyncio.run(run_concurrent_sessions())
+    assert data[11] == data[23] == 2
+    print("✅ Coalesce: las auto-respuestas van al cliente de su sesión")
+
+
+if __name__ == '__main__':
+    test_throughput_coalesces()
+    test_throughput_window()
+    test_latency_writes_immediately()
+    test_tune_socket()
+    test_fast_path_modes()
+    test_concurrent_sessions()
+    print("\n✅ TODOS LOS TESTS PASARON")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test del fast path (BufferedProtocol)
+Valida framing en buffer preasignado, frames mayores que el buffer y cierre de sesión
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.network.fastpath import BUFFER_SIZE
+from src.network.proxy import ProxyServer
+from testkit import PING, ping_once_ea, start_ea, wait_for
+
+
+def big_notification(payload_size: int) -> bytes:
+    """Notificación EA → RPCS3 con payload mayor que el buffer del fast path"""
+    header = bytearray(12)
+    header[0:2] = payload_size.to_bytes(2, 'big')
+    header[3] = 0x04
+    header[5] = 0x50
+    header[8:10] = (0x2000).to_bytes(2, 'big')
+    return bytes(header) + bytes(range(256)) * (payload_size // 256) + bytes(payload_size % 256)
+
+
+async def run_fast_path_roundtrip():
+    big = big_notification(0xFFFF)
+
+    ea_server, ea_port = await start_ea(ping_once_ea(extra=big + big))
+
+    proxy = ProxyServer(port=0, ea_server='127.0.0.1', ea_port=ea_port, fast_path=True)
+    proxy_task = asyncio.create_task(proxy.start())
+    await proxy.listening.wait()
+    proxy_port = proxy.server.sockets[0].getsockname()[1]
+
+    reader, writer = await asyncio.open_connection('127.0.0.1', proxy_port)
+    # Ping partido en dos escrituras: el buffer debe recomponerlo
+    writer.write(PING[:5])
+    await writer.drain()
+    await asyncio.sleep(0.01)
+    writer.write(PING[5:])
+    await writer.drain()
+
+    response = await asyncio.wait_for(reader.readexactly(20 + 2 * len(big)), timeout=5)
+    eof = await asyncio.wait_for(reader.read(), timeout=2)
+    writer.close()
+
+    await wait_for(lambda: not proxy.metrics.sessions)
+
+    await proxy.stop()
+    proxy_task.cancel()
+    ea_server.close()
+    return proxy, response, big, eof
+
+
+def test_fast_path_roundtrip():
+    proxy, response, big, eof = asyncio.run(run_fast_path_roundtrip())
+    assert len(big) > BUFFER_SIZE, "El frame de prueba no supera el buffer"
+    assert (response[10] << 8 | response[11]) == 7, "msg_id de la respuesta incorrecto"
+    assert response[20:] == big + big, "Frames grandes corrompidos al crecer el buffer"
+    assert eof == b'', "El cliente no recibió EOF al cerrar EA"
+
+    totals = proxy.metrics.snapshot()
+    assert totals['packets_to_ea'] == 1 and totals['packets_from_ea'] == 3, f"Contadores: {totals}"
+    assert proxy.latency.histograms[(0x09, 0x02)].count == 1, "RTT no medido en el fast path"
+    assert not proxy.phases and not proxy.authenticated, "Estado de sesión no limpiado"
+    print("✅ Fast path: framing, buffer creciente, métricas y cierre OK")
+
+
+if __name__ == '__main__':
+    test_fast_path_roundtrip()
+    print("\n✅ TODOS LOS TESTS PASARON")
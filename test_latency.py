@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test del correlador de latencia request/response
+Valida histogramas, expiración y medición real a través del proxy
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.network.latency import LatencyCorrelator, LatencyHistogram
+from src.network.proxy import ProxyServer
+from testkit import PING, ping_once_ea, start_ea
+
+MS = 1_000_000
+
+
+def test_histogram_percentiles():
+    histogram = LatencyHistogram()
+    for value_ms in range(1, 101):
+        histogram.record(value_ms * MS)
+
+    p50 = histogram.percentile(50) / 1000
+    p99 = histogram.percentile(99) / 1000
+    assert histogram.count == 100, "Cantidad incorrecta"
+    assert 47 <= p50 <= 54, f"p50 fuera de rango: {p50}"
+    assert 93 <= p99 <= 100, f"p99 fuera de rango: {p99}"
+    assert histogram.max_us == 100_000, "Máximo incorrecto"
+    print(f"✅ Histograma: p50={p50:.1f} ms, p99={p99:.1f} ms")
+
+
+def test_correlator_matching_and_eviction():
+    correlator = LatencyCorrelator(timeout=1.0)
+
+    correlator.on_request(1, 0x09, 0x02, msg_id=5, now=0)
+    correlator.on_request(2, 0x09, 0x02, msg_id=5, now=0)   # Mismo msg_id, otra sesión
+    correlator.on_request(1, 0x04, 0x01, msg_id=6, now=0)
+
+    rtt = correlator.on_reply(1, 0x1000, 5, now=20 * MS)
+    assert rtt == 20 * MS, "RTT incorrecto"
+    assert correlator.on_reply(1, 0x1000, 5, now=21 * MS) is None, "Respuesta duplicada emparejada"
+    assert correlator.on_reply(2, 0x0000, 5, now=21 * MS) is None, "Una REQUEST no cierra mediciones"
+
+    # NOTIFICATION: solo cierra la request si es del mismo comando
+    assert correlator.on_reply(2, 0x2000, 5, now=22 * MS, component=0x02, command=0x14) is None, \
+        "Notificación de otro comando emparejada"
+    assert correlator.on_reply(2, 0x2000, 5, now=22 * MS, component=0x09, command=0x02) == 22 * MS
+    correlator.on_request(2, 0x09, 0x02, msg_id=7, now=0)
+    assert correlator.on_reply(2, 0x2000, 7, now=23 * MS) is None
+    assert correlator.on_reply(2, 0x3000, 7, now=24 * MS) == 24 * MS, "ERROR_REPLY no emparejado"
+    assert correlator.unmatched == 1, "Notificaciones sin request contadas como huérfanas"
+
+    evicted = correlator.evict_expired(now=2_000 * MS)
+    assert evicted == 1, "Requests expiradas no eliminadas"
+    assert correlator.timeouts[(0x04, 0x01)] == 1, "Timeout no contabilizado"
+    assert not correlator.pending, "Quedan requests pendientes"
+    print("✅ Correlador: emparejado por (sesión, msg_id) y expiración OK")
+
+
+async def run_proxy_roundtrip():
+    """RPCS3 simulado → proxy → EA simulado que responde tras 20 ms"""
+
+    ea_server, ea_port = await start_ea(ping_once_ea(delay=0.02))
+
+    proxy = ProxyServer(port=0, ea_server='127.0.0.1', ea_port=ea_port)
+    proxy_task = asyncio.create_task(proxy.start())
+    while proxy.server is None:
+        await asyncio.sleep(0.01)
+    proxy_port = proxy.server.sockets[0].getsockname()[1]
+
+    reader, writer = await asyncio.open_connection('127.0.0.1', proxy_port)
+    # Ping partido en dos escrituras: el framer debe recomponerlo
+    writer.write(PING[:5])
+    await writer.drain()
+    await asyncio.sleep(0.01)
+    writer.write(PING[5:])
+    await writer.drain()
+
+    response = await asyncio.wait_for(reader.readexactly(20), timeout=2)
+    writer.close()
+    await writer.wait_closed()
+
+    # Esperar a que el proxy cierre la sesión
+    while proxy.latency.pending or proxy.metrics.sessions or proxy.phases:
+        await asyncio.sleep(0.01)
+
+    proxy_task.cancel()
+    ea_server.close()
+    return proxy, response
+
+
+def test_proxy_measures_upstream_rtt():
+    proxy, response = asyncio.run(run_proxy_roundtrip())
+    assert (response[10] << 8 | response[11]) == 7, "msg_id de la respuesta incorrecto"
+
+    histogram = proxy.latency.histograms.get((0x09, 0x02))
+    assert histogram is not None and histogram.count == 1, "RTT no medido"
+    assert histogram.max_us >= 20_000, f"RTT demasiado bajo: {histogram.max_us} us"
+    print(f"✅ Proxy: RTT upstream 0x09/0x02 = {histogram.max_us / 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    test_histogram_percentiles()
+    test_correlator_matching_and_eviction()
+    test_proxy_measures_upstream_rtt()
+    print("\n✅ TODOS LOS TESTS PASARON")
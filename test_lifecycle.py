@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Test del ciclo de vida de sesiones
+Valida el half-close coordinado, el cierre por inactividad y la limpieza
+de sesiones huérfanas en los tres modos de túnel
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.network.blaze import BlazeFramer
+from src.network.lifecycle import SessionManager
+from src.network.metrics import MetricsRegistry
+from src.network.proxy import ProxyServer
+from src.network.tdf import BlazeResponseBuilder
+from testkit import PING, start_ea, wait_for
+
+MODES = ({}, {'fast_path': True}, {'passthrough': True})
+
+
+class StubbornEA:
+    """Servidor EA que responde pings y nunca cierra su lado"""
+
+    def __init__(self):
+        self.eof_seen = 0
+        self.release = asyncio.Event()
+        self.handlers = 0
+
+    async def handle(self, reader, writer):
+        self.handlers += 1
+        framer = BlazeFramer()
+        while True:
+            data = await reader.read(4096)
+            if not data:
+                self.eof_seen += 1
+                break
+            for frame in framer.feed(data):
+                msg_id = (frame[10] << 8) | frame[11]
+                writer.write(BlazeResponseBuilder.build_ping_response(msg_id % 40))
+        # No cierra hasta el final del test: solo el proxy puede terminar la sesión
+        await self.release.wait()
+        writer.close()
+        self.handlers -= 1
+
+
+async def start_proxy(ea: StubbornEA, **proxy_kwargs):
+    ea_server, ea_port = await start_ea(ea.handle)
+    proxy = ProxyServer(port=0, ea_server='127.0.0.1', ea_port=ea_port, **proxy_kwargs)
+    proxy.lifecycle.half_close_timeout = 0.2
+    proxy.lifecycle.reap_interval = 0.05
+    proxy_task = asyncio.create_task(proxy.start())
+    await proxy.listening.wait()
+    return ea_server, proxy, proxy_task
+
+
+async def stop_proxy(ea, ea_server, proxy, proxy_task):
+    await proxy.stop()
+    proxy_task.cancel()
+    await asyncio.gather(proxy_task, return_exceptions=True)
+    ea.release.set()
+    await wait_for(lambda: ea.handlers == 0)
+    ea_server.close()
+
+
+async def run_half_close(**mode):
+    ea = StubbornEA()
+    ea_server, proxy, proxy_task = await start_proxy(ea, **mode)
+    proxy_port = proxy.server.sockets[0].getsockname()[1]
+
+    reader, writer = await asyncio.open_connection('127.0.0.1', proxy_port)
+    writer.write(PING)
+    await writer.drain()
+    response = await asyncio.wait_for(reader.readexactly(20), timeout=5)
+
+    # El cliente se va; EA no cierra nunca
+    writer.write_eof()
+    await wait_for(lambda: ea.eof_seen == 1)
+    half_closed = proxy.metrics.sessions_half_closed
+    await wait_for(lambda: not proxy.metrics.sessions)
+    leftover = await asyncio.wait_for(reader.read(), timeout=5)
+    writer.close()
+
+    snapshot = proxy.metrics.snapshot()
+    await stop_proxy(ea, ea_server, proxy, proxy_task)
+    return response, half_closed, leftover, snapshot, len(proxy.lifecycle)
+
+
+def test_half_close_ends_session():
+    for mode in MODES:
+        response, half_closed, leftover, snapshot, registered = asyncio.run(run_half_close(**mode))
+        assert (response[10] << 8 | response[11]) == 7, f"Respuesta incorrecta ({mode})"
+        assert half_closed == 1, f"Half-close no contabilizado ({mode}): {half_closed}"
+        assert leftover == b'', f"Datos inesperados tras el cierre ({mode})"
+        assert snapshot['sessions_half_closed'] == 0 and snapshot['sessions_active'] == 0, \
+            f"Gauges sin restaurar ({mode}): {snapshot}"
+        assert registered == 0, f"Sesión sin dar de baja ({mode})"
+    print("✅ Lifecycle: EOF del cliente propagado a EA y sesión cerrada (3 modos)")
+
+
+async def run_idle_timeout(**mode):
+    ea = StubbornEA()
+    ea_server, proxy, proxy_task = await start_proxy(ea, idle_timeout=0.2, **mode)
+    proxy_port = proxy.server.sockets[0].getsockname()[1]
+
+    reader, writer = await asyncio.open_connection('127.0.0.1', proxy_port)
+    await wait_for(lambda: proxy.metrics.sessions)
+    # Ni cliente ni EA envían nada: el reaper debe cerrarla
+    eof = await asyncio.wait_for(reader.read(), timeout=5)
+    await wait_for(lambda: not proxy.metrics.sessions)
+    writer.close()
+
+    snapshot = proxy.metrics.snapshot()
+    await stop_proxy(ea, ea_server, proxy, proxy_task)
+    return eof, snapshot
+
+
+def test_idle_timeout_reaps_session():
+    for mode in MODES:
+        eof, snapshot = asyncio.run(run_idle_timeout(**mode))
+        assert eof == b'', f"El cliente no recibió EOF ({mode})"
+        assert snapshot['sessions_reaped_idle'] == 1, f"Cierre por inactividad ({mode}): {snapshot}"
+    print("✅ Lifecycle: sesiones inactivas cerradas por el reaper (3 modos)")
+
+
+async def run_reaper_reasons():
+    metrics = MetricsRegistry()
+    manager = SessionManager(metrics, idle_timeout=60, read_timeout=5)
+    closed = []
+
+    # Handler terminado sin darse de baja
+    dead = asyncio.create_task(asyncio.sleep(0))
+    await dead
+    metrics.open_session(1, 'orphan')
+    manager.register(1, lambda: closed.append(1), dead)
+
+    # Una dirección muda más de read_timeout
+    stats = metrics.open_session(2, 'mute')
+    manager.register(2, lambda: closed.append(2))
+    now = stats.last_from_ea + 10
+    stats.last_to_ea = now
+
+    # Sesión activa: no se toca
+    stats = metrics.open_session(3, 'busy')
+    manager.register(3, lambda: closed.append(3))
+    stats.last_to_ea = stats.last_from_ea = now
+
+    reaped = manager.reap(now)
+    return reaped, closed, metrics, len(manager)
+
+
+def test_reaper_reasons():
+    reaped, closed, metrics, registered = asyncio.run(run_reaper_reasons())
+    assert reaped == 2 and sorted(closed) == [1, 2], f"Sesiones cerradas: {closed}"
+    assert 1 not in metrics.sessions, "Métricas de la sesión huérfana sin retirar"
+    assert metrics.sessions_reaped == {'idle': 0, 'read_timeout': 1, 'orphan': 1}
+    assert registered == 1
+    rendered = metrics.render()
+    assert 'skate3_sessions_reaped_total{reason="orphan"} 1' in rendered
+    print("✅ Lifecycle: reaper distingue huérfanas, read timeout y sesiones activas")
+
+
+if __name__ == '__main__':
+    test_half_close_ends_session()
+    test_idle_timeout_reaps_session()
+    test_reaper_reasons()
+    print("\n✅ TODOS LOS TESTS PASARON")
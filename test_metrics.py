@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Test del endpoint de métricas
+Valida el formato Prometheus y los contadores tras una sesión real por el proxy
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.network.metrics import MetricsRegistry, MetricsServer
+from src.network.proxy import ProxyServer
+from testkit import PING, ping_once_ea, start_ea
+
+
+def test_render_format():
+    registry = MetricsRegistry()
+    stats = registry.open_session(1, ('127.0.0.1', 5000))
+    stats.bytes_to_ea = 24
+    stats.packets_to_ea = 2
+    registry.redirects = 3
+    registry.loop_lag.observe(0.003)
+    registry.add_gauge('skate3_test_gauge', 'Test gauge', lambda: 42)
+
+    text = registry.render()
+    assert 'skate3_redirects_total 3' in text, "Contador de redirects ausente"
+    assert 'skate3_bytes_total{direction="to_ea"} 24' in text, "Bytes por dirección ausentes"
+    assert ('skate3_session_packets_total{session="1",peer="127.0.0.1:5000",direction="to_ea"} 2'
+            in text), "Serie por sesión ausente"
+    assert 'skate3_event_loop_lag_seconds_bucket{le="0.005"} 1' in text, "Histograma de lag incorrecto"
+    assert 'skate3_test_gauge 42' in text, "Gauge registrado ausente"
+
+    registry.close_session(1)
+    assert registry.snapshot()['bytes_to_ea'] == 24, "Totales perdidos al cerrar la sesión"
+    assert 'session="1"' not in registry.render(), "La sesión cerrada sigue exportada"
+    print("✅ Render: formato Prometheus y totales OK")
+
+
+def test_merge_workers():
+    workers = [MetricsRegistry() for _ in range(2)]
+    for worker, wait in zip(workers, (0.0002, 0.02)):
+        worker.queue_wait_histogram('to_ea', 'control').observe(wait)
+        worker.phase_changed('pre_auth', 'auth_pending', 0.05)
+    supervisor = MetricsRegistry()
+    for worker_id, worker in enumerate(workers, 1):
+        supervisor.update_remote(str(worker_id), worker.export())
+    assert 'histograms' not in supervisor.aggregate(), "Histogramas sumados como contadores"
+
+    text = supervisor.render()
+    assert 'skate3_write_queue_wait_seconds_count{direction="to_ea",class="control"} 2' in text, \
+        "Espera en cola no agregada entre workers"
+    assert 'skate3_session_phase_seconds_count{phase="pre_auth"} 2' in text, \
+        "Tiempo por fase no agregado entre workers"
+
+    supervisor.retire_remote('1')
+    text = supervisor.render()
+    assert 'skate3_session_phase_seconds_count{phase="pre_auth"} 2' in text, \
+        "Histograma perdido al retirar un worker"
+    print("✅ Workers: histogramas fusionados en el supervisor")
+
+
+async def scrape(port: int, path: str = '/metrics') -> str:
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return response.decode()
+
+
+async def run_scrape_after_session():
+    ea_server, ea_port = await start_ea(ping_once_ea())
+
+    registry = MetricsRegistry()
+    proxy = ProxyServer(port=0, ea_server='127.0.0.1', ea_port=ea_port, metrics=registry)
+    proxy_task = asyncio.create_task(proxy.start())
+    metrics_server = MetricsServer(registry, port=0)
+    await metrics_server.start()
+    metrics_port = metrics_server.server.sockets[0].getsockname()[1]
+    while proxy.server is None:
+        await asyncio.sleep(0.01)
+    proxy_port = proxy.server.sockets[0].getsockname()[1]
+
+    reader, writer = await asyncio.open_connection('127.0.0.1', proxy_port)
+    writer.write(PING)
+    await writer.drain()
+    await asyncio.wait_for(reader.readexactly(20), timeout=2)
+    writer.close()
+    await writer.wait_closed()
+
+    while registry.sessions:
+        await asyncio.sleep(0.01)
+
+    body = await scrape(metrics_port)
+    not_found = await scrape(metrics_port, '/')
+
+    await metrics_server.stop()
+    proxy_task.cancel()
+    ea_server.close()
+    return body, not_found
+
+
+def test_scrape_after_session():
+    body, not_found = asyncio.run(run_scrape_after_session())
+    assert body.startswith('HTTP/1.1 200 OK'), "Scrape fallido"
+    assert 'skate3_sessions_opened_total 1' in body, "Sesión no contabilizada"
+    assert 'skate3_packets_total{direction="to_ea"} 1' in body, "Paquete a EA no contabilizado"
+    assert 'skate3_bytes_total{direction="from_ea"} 20' in body, "Bytes desde EA incorrectos"
+    assert 'skate3_upstream_rtt_seconds{component="0x09",command="0x02",quantile="0.99"}' in body, \
+        "RTT upstream no exportado"
+    assert not_found.startswith('HTTP/1.1 404'), "Ruta desconocida no devuelve 404"
+    print("✅ Scrape: /metrics refleja la sesión del proxy")
+
+
+if __name__ == '__main__':
+    test_render_format()
+    test_merge_workers()
+    test_scrape_after_session()
+    print("\n✅ TODOS LOS TESTS PASARON")
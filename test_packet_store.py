@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Test del almacén indexado de paquetes (SQLite)
+Valida ingesta desde JSON y consultas post-auth / request-response
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.analysis.store import PacketStore, DIRECTION_TO_EA, DIRECTION_FROM_EA
+from src.network.tdf import BlazeAuthPacket, BlazeResponseBuilder
+
+GAME = '10.0.0.2:50000'
+EA = '159.153.70.49:10010'
+
+
+def build_export(path: Path):
+    """Export estilo analyze_pcap.py: ping antes de auth, login, 0x02/0x14"""
+    login = BlazeAuthPacket(msg_id=2)
+    login.add_email("test@example.com")
+    login.add_password("pass")
+    login.add_psn_name("Player")
+
+    ping = bytes.fromhex('000000090002000000000001')
+    desync = bytes.fromhex('00040002001400002000000a') + b'\x00' * 4
+    ping_after = bytes.fromhex('00000009000200000000000b')
+
+    entries = [
+        {'src': GAME, 'dst': EA, 'hex': ping.hex()},
+        {'src': EA, 'dst': GAME, 'hex': BlazeResponseBuilder.build_ping_response(1).hex()},
+        {'src': GAME, 'dst': EA, 'hex': login.build().hex()},
+        # Dos frames agrupados en un mismo segmento TCP
+        {'src': EA, 'dst': GAME, 'hex': (desync + desync).hex()},
+        {'src': GAME, 'dst': EA, 'hex': ping_after.hex()},
+    ]
+    path.write_text(json.dumps(entries))
+
+
+def test_ingest_and_queries():
+    with tempfile.TemporaryDirectory() as tmp:
+        export = Path(tmp) / 'session.json'
+        build_export(export)
+
+        with PacketStore(Path(tmp) / 'packets.db') as store:
+            count = store.ingest_json(export)
+            assert count == 6, f"Se esperaban 6 frames, hay {count}"
+            assert store.sessions() == ['session'], "Sesión incorrecta"
+
+            auth = store.auth_packet('session')
+            assert auth is not None and auth['command'] == 0x3C, "Login no encontrado"
+            assert auth['direction'] == DIRECTION_TO_EA, "Dirección incorrecta"
+
+            desync = store.after_auth('session', component=0x02, command=0x14)
+            assert len(desync) == 2, "0x02/0x14 post-auth no separados"
+            assert desync[0]['direction'] == DIRECTION_FROM_EA, "Dirección incorrecta"
+
+            pairs = store.request_response_pairs('session')
+            assert [(p['msg_id'], p['resp_command']) for p in pairs] == [(1, 0x02)], \
+                "Emparejado request/response incorrecto"
+
+            unanswered = store.unanswered_requests('session')
+            assert [p['msg_id'] for p in unanswered] == [2, 11], "Requests sin respuesta incorrectas"
+
+            counts = dict(((c, m), n) for c, m, n in store.command_counts('session'))
+            assert counts[(0x09, 0x02)] == 3, "Frecuencia de pings incorrecta"
+
+    print("✅ Ingesta y consultas indexadas OK")
+
+
+def test_pairs_ignore_notifications():
+    """Una NOTIFICATION con el mismo msg_id no responde; un ERROR_REPLY sí"""
+    request_5 = bytes.fromhex('000000040010000000000005')
+    request_6 = bytes.fromhex('000000040011000000000006')
+    notification_5 = bytes.fromhex('000000020014000020000005')
+    error_6 = bytes.fromhex('000000040011000b30000006')
+    entries = [
+        {'src': GAME, 'dst': EA, 'hex': request_5.hex()},
+        {'src': GAME, 'dst': EA, 'hex': request_6.hex()},
+        {'src': EA, 'dst': GAME, 'hex': notification_5.hex()},
+        {'src': EA, 'dst': GAME, 'hex': error_6.hex()},
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        export = Path(tmp) / 'session.json'
+        export.write_text(json.dumps(entries))
+        with PacketStore(Path(tmp) / 'packets.db') as store:
+            store.ingest_json(export)
+            pairs = store.request_response_pairs('session')
+            assert [(p['msg_id'], p['resp_type'], p['error']) for p in pairs] == [(6, 0x3000, 0x0B)], \
+                "NOTIFICATION emparejada o ERROR_REPLY ignorado"
+            assert [p['msg_id'] for p in store.unanswered_requests('session')] == [5]
+    print("✅ Request/response: ERROR_REPLY empareja, NOTIFICATION no")
+
+
+def test_bulk_decode():
+    """Decodificación vectorizada (NumPy) con las mismas estadísticas"""
+    from src.analysis.bulk import NUMPY_AVAILABLE, load_batch, post_auth_summary
+
+    if not NUMPY_AVAILABLE:
+        print("⚠️  numpy no instalado, test omitido")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        export = Path(tmp) / 'session.json'
+        build_export(export)
+        batch = load_batch(export)
+
+    headers = batch.decode_headers()
+    assert len(headers) == 6, "Cantidad de frames incorrecta"
+    assert list(headers['msg_id']) == [1, 1, 2, 10, 10, 11], "msg_id mal decodificado"
+
+    summary = post_auth_summary(headers)
+    assert summary['auth_index'] == 2, "Login no encontrado"
+    assert summary['desync_targets'] == 2, "0x02/0x14 post-auth incorrectos"
+    assert summary['pings'] == 1, "Pings post-auth incorrectos"
+
+    print("✅ Decodificación vectorizada OK")
+
+
+def test_bulk_sessions():
+    """Un .db con varias sesiones: el post-auth no mezcla sesiones"""
+    from src.analysis.bulk import NUMPY_AVAILABLE, load_batch, post_auth_summary
+
+    if not NUMPY_AVAILABLE:
+        print("⚠️  numpy no instalado, test omitido")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        first, second = Path(tmp) / 'a.json', Path(tmp) / 'b.json'
+        build_export(first)
+        build_export(second)
+        db = Path(tmp) / 'packets.db'
+        with PacketStore(db) as store:
+            store.ingest_json(first)
+            store.ingest_json(second)
+        default = post_auth_summary(load_batch(db).decode_headers())
+        chosen = post_auth_summary(load_batch(db, 'b').decode_headers())
+
+    for summary in (default, chosen):
+        assert summary['total'] == 6 and summary['post_auth'] == 3, summary
+        assert summary['pings'] == 1, "Pings pre-auth de otra sesión contados como post-auth"
+    print("✅ Decodificación vectorizada por sesión")
+
+
+if __name__ == '__main__':
+    test_ingest_and_queries()
+    test_pairs_ignore_notifications()
+    test_bulk_decode()
+    test_bulk_sessions()
+    print("\n✅ TODOS LOS TESTS PASARON")
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Test del aparcamiento de sesiones
+Valida que la sesión de EA sobrevive a la desconexión de RPCS3 con pings
+periódicos, que un cliente nuevo del mismo host la reutiliza sin repetir
+PreAuth/login contra EA y que caduca pasado el margen
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.network.blaze import BlazeFramer
+from src.network.metrics import MetricsRegistry
+from src.network.parking import ParkingLot
+from src.network.proxy import ProxyServer, EACredentials
+from testkit import RecordingEA, captured_logs, frame, msg_id, start_ea, wait_for
+
+
+async def start(park_timeout: float):
+    ea = RecordingEA()
+    ea_server, ea_port = await start_ea(ea.handle)
+    proxy = ProxyServer(port=0, ea_server='127.0.0.1', ea_port=ea_port, park_timeout=park_timeout,
+                        credentials=EACredentials('player@example.com', 'secret', 'Player'))
+    proxy.parking.ping_interval = 0.05
+    proxy_task = asyncio.create_task(proxy.start())
+    await proxy.listening.wait()
+    return ea, ea_server, proxy, proxy_task
+
+
+async def stop(ea_server, proxy, proxy_task):
+    await proxy.stop()
+    proxy_task.cancel()
+    await asyncio.gather(proxy_task, return_exceptions=True)
+    ea_server.close()
+
+
+async def game_session(proxy_port: int, frames) -> list:
+    """Un arranque del juego: envía cada request, espera su respuesta y se va"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', proxy_port)
+    framer = BlazeFramer()
+    replies = []
+    for request in frames:
+        writer.write(request)
+        await writer.drain()
+        got = []
+        while not got:
+            data = await asyncio.wait_for(reader.read(4096), timeout=5)
+            assert data, "El proxy cerró la conexión"
+            got = framer.feed(data)
+        replies += [msg_id(f) for f in got]
+    writer.close()
+    await writer.wait_closed()
+    return replies
+
+
+LOGIN_SEQUENCE = [
+    frame(0x09, 0x07, 1),               # PreAuth
+    frame(0x01, 0xC8, 2, b'login'),     # Login → 0x3C
+    frame(0x04, 0x10, 3),
+]
+
+
+async def run_park_and_resume():
+    ea, ea_server, proxy, proxy_task = await start(park_timeout=5)
+    proxy_port = proxy.server.sockets[0].getsockname()[1]
+
+    first = await game_session(proxy_port, LOGIN_SEQUENCE)
+    await wait_for(lambda: len(proxy.parking) == 1)
+    # Pings del proxy mientras no hay cliente
+    await wait_for(lambda: ea.received.count((0x09, 0x02)) >= 2)
+
+    second = await game_session(proxy_port, LOGIN_SEQUENCE)
+    await wait_for(lambda: len(proxy.parking) == 1)
+
+    snapshot = proxy.metrics.snapshot()
+    await stop(ea_server, proxy, proxy_task)
+    return first, second, ea, snapshot
+
+
+def test_park_and_resume():
+    first, second, ea, snapshot = asyncio.run(run_park_and_resume())
+    assert first == [1, 2, 3] and second == [1, 2, 3], f"Respuestas: {first} / {second}"
+    assert ea.connections == 1, f"El segundo arranque abrió otra conexión a EA: {ea.connections}"
+    assert ea.received.count((0x09, 0x07)) == 1, "PreAuth repetido contra EA"
+    assert ea.received.count((0x01, 0x3C)) == 1, "Login repetido contra EA"
+    assert ea.received.count((0x04, 0x10)) == 2
+    assert snapshot['sessions_parked'] == 2 and snapshot['sessions_resumed'] == 1, snapshot
+    print("✅ Parking: sesión de EA reutilizada por el siguiente arranque sin login")
+
+
+async def run_park_expiry():
+    ea, ea_server, proxy, proxy_task = await start(park_timeout=0.2)
+    proxy_port = proxy.server.sockets[0].getsockname()[1]
+
+    await game_session(proxy_port, LOGIN_SEQUENCE)
+    await wait_for(lambda: len(proxy.parking) == 1)
+    await wait_for(lambda: ea.closed == 1)
+    parked_after = len(proxy.parking)
+
+    # Sin login no hay nada que aparcar
+    await game_session(proxy_port, [frame(0x09, 0x02, 1)])
+    await wait_for(lambda: ea.closed == 2)
+    parked_without_login = len(proxy.parking)
+
+    await stop(ea_server, proxy, proxy_task)
+    return parked_after, parked_without_login
+
+
+def test_park_expiry():
+    parked_after, parked_without_login = asyncio.run(run_park_expiry())
+    assert parked_after == 0, "Sesión aparcada sin caducar"
+    assert parked_without_login == 0, "Sesión sin login aparcada"
+    print("✅ Parking: caducidad del margen y sesiones sin login no se aparcan")
+
+
+class LostLink:
+    """UpstreamLink mínimo cuya conexión con EA se perdió al reclamarla"""
+
+    class Writer:
+        closed = False
+
+        def close(self):
+            self.closed = True
+
+    def __init__(self):
+        self.reader = asyncio.StreamReader()   # Nunca llega nada
+        self.writer = self.Writer()
+        self.carry = b''
+        self.lost = False
+
+    def detach(self):
+        pass
+
+    def attach(self):
+        raise AssertionError("Sesión perdida reanudada")
+
+
+async def run_claim_lost():
+    lot = ParkingLot(MetricsRegistry(), grace=5)
+    link = LostLink()
+    lot.park('10.0.0.2', link)
+    await asyncio.sleep(0)
+    link.lost = True
+    claimed = await lot.claim('10.0.0.2')
+    return claimed, link.writer.closed, len(lot)
+
+
+def test_claim_lost():
+    claimed, closed, parked = asyncio.run(run_claim_lost())
+    assert claimed is None and parked == 0
+    assert closed, "La conexión perdida con EA no se cerró"
+    print("✅ Parking: una sesión perdida al reclamarla se cierra")
+
+
+def test_streams_only_warning():
+    import logging
+
+    with captured_logs('src.network.proxy') as records:
+        ProxyServer(fast_path=True, park_timeout=5, reconnect_attempts=0)
+        ProxyServer(passthrough=True, park_timeout=0, reconnect_attempts=3)
+        ProxyServer(fast_path=True, park_timeout=0, reconnect_attempts=0)
+        ProxyServer(park_timeout=5)
+    warnings = [r.getMessage() for r in records if r.levelno == logging.WARNING]
+    assert warnings == [
+        "Proxy: modo fast path: parkTimeout sin efecto (solo en modo streams)",
+        "Proxy: modo passthrough: reconnectAttempts sin efecto (solo en modo streams)",
+    ], warnings
+    print("✅ Parking: aviso si parkTimeout/reconnectAttempts se ignoran fuera de streams")
+
+
+if __name__ == '__main__':
+    test_park_and_resume()
+    test_park_expiry()
+    test_claim_lost()
+    test_streams_only_warning()
+    print("\n✅ TODOS LOS TESTS PASARON")
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Test de las reglas de parche declarativas
+Valida parcheo in-place sobre memoryview, cero copias sin regla, reglas por
+campo TDF con caché de forma, recarga en caliente y validación contra capturas
+"""
+
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.analysis.pcap import CapturedFrame
+from src.analysis.store import PacketStore, DIRECTION_FROM_EA
+from src.config.manager import ConfigManager
+from src.network.patches import DESYNC_PATCHES, FieldRule, PatchRule, PatchSet
+from src.network.proxy import ProxyServer
+from src.network.tdf_walk import encode_tag, encode_varint, find_field, read_varint
+from testkit import frame
+
+GAME = '10.0.0.2:50000'
+EA = '159.153.70.49:10010'
+
+
+def notification(component: int, command: int, payload_size: int) -> bytes:
+    payload = bytes(range(payload_size % 256)) + bytes(payload_size - payload_size % 256)
+    return frame(component, command, msg_type=0x2000, payload=payload)
+
+
+def test_in_place_on_writable_view():
+    buffer = bytearray(notification(0x04, 0x50, 20) + notification(0x02, 0x14, 200))
+    view = memoryview(buffer)
+    desync = view[32:]
+
+    patched = DESYNC_PATCHES.apply(desync)
+    assert patched is desync, "Frame escribible copiado en vez de parcheado in-place"
+    assert buffer[32 + 112] == 0x00 and buffer[32 + 56] == 0x37 and buffer[32 + 37] == 0x37
+    assert DESYNC_PATCHES.apply(view[:32]) is None, "Frame sin regla no debería tocarse"
+    print("✅ Parcheo in-place sobre el buffer del framer")
+
+
+def test_proxy_zero_copy_for_unmatched():
+    proxy = ProxyServer()
+    other = memoryview(notification(0x04, 0x50, 200))
+    assert proxy.apply_desync_patches(other) is other, "Frame sin regla copiado"
+
+    # Frame de solo lectura (streams): se copia solo si hay regla
+    readonly = notification(0x02, 0x14, 200)
+    patched = proxy.apply_desync_patches(memoryview(readonly))
+    assert patched[112] == 0x00 and readonly[112] != 0x00, "bytes originales modificados"
+
+    # Igual que el original: solo si el frame llega al offset 112
+    short = memoryview(notification(0x02, 0x14, 50))
+    assert proxy.apply_desync_patches(short) is short
+    assert proxy.metrics.desync_patches == 1
+    assert proxy.ea_frame_needs_inspection(readonly[:12])
+    assert not proxy.ea_frame_needs_inspection(other[:12])
+    print("✅ Cero copias para frames sin regla; solo lectura copiado solo si coincide")
+
+
+def test_config_roundtrip_and_validation():
+    rules = [{'name': 'test', 'component': '0x04', 'command': 80, 'patches': {'20': '0xFF'}}]
+    with tempfile.TemporaryDirectory() as tmp:
+        config = ConfigManager(Path(tmp))
+        assert config.load_patches().rules == DESYNC_PATCHES.rules, \
+            "Sin patches.json debe usar el default"
+
+        config.patches_file.write_text(json.dumps(rules))
+        patches = config.load_patches()
+        assert len(patches) == 1 and patches.rules[0].writes == ((20, 0xFF),)
+        assert PatchSet.from_config(patches.to_config()).rules == patches.rules
+
+        config.patches_file.write_text(json.dumps([{'component': 2, 'command': 20,
+                                                     'patches': {'3': 0}}]))
+        assert config.load_patches().rules == DESYNC_PATCHES.rules, "Offset en el header aceptado"
+
+    for writes in ((), ((20, 0x100),)):
+        try:
+            PatchRule(0x02, 0x14, writes)
+        except ValueError:
+            continue
+        raise AssertionError(f"Regla inválida aceptada: {writes}")
+    print("✅ patches.json: carga, ida y vuelta y validación")
+
+
+def qos_frame(name: str, bandwidth: int, tail: str = '') -> bytes:
+    """
+    0x02/0x14 con un string de longitud variable antes del struct NQOS:
+    el offset de NQOS.DBPS depende de `name`
+    """
+    name_bytes = name.encode() + b'\x00'
+    payload = (
+        encode_tag('NAME') + b'\x01' + encode_varint(len(name_bytes)) + name_bytes +
+        encode_tag('LIST') + b'\x04\x00' + encode_varint(2) + encode_varint(7) + encode_varint(300) +
+        encode_tag('NQOS') + b'\x03' +
+        encode_tag('BWHR') + b'\x00' + encode_varint(1000) +
+        encode_tag('DBPS') + b'\x00' + encode_varint(bandwidth) +
+        b'\x00' +
+        encode_tag('UBPS') + b'\x74' + (5).to_bytes(4, 'big') +
+        encode_tag('TAIL') + b'\x01' + encode_varint(len(tail) + 1) + tail.encode() + b'\x00'
+    )
+    return frame(0x02, 0x14, msg_type=0x2000, payload=payload)
+
+
+def test_field_rule_follows_layout():
+    rule = FieldRule(0x02, 0x14, ('NQOS', 'DBPS'), 55)
+    patches = PatchSet([rule, FieldRule(0x02, 0x14, ('UBPS',), 9)])
+
+    short, long = qos_frame('ab', 20, tail='xy'), qos_frame('a much longer name', 20)
+    offsets = set()
+    for raw in (short, long, short):
+        buffer = bytearray(raw)
+        assert patches.apply(memoryview(buffer)) is not None
+        field = find_field(buffer, ('NQOS', 'DBPS'))
+        offsets.add(field.value_offset)
+        assert read_varint(buffer, field.value_offset)[0] == 55, "NQOS.DBPS no parcheado"
+        assert read_varint(buffer, find_field(buffer, ('NQOS', 'BWHR')).value_offset)[0] == 1000
+        ubps = find_field(buffer, ('UBPS',))
+        assert buffer[ubps.value_offset:ubps.value_end] == (9).to_bytes(4, 'big')
+    assert len(offsets) == 2, "El campo debería cambiar de offset entre formas"
+    assert rule.walks == 2 and rule.shape_hits == 1, \
+        f"Caché de forma: {rule.walks} recorridos, {rule.shape_hits} aciertos"
+
+    # Mismo tamaño de frame pero otro layout: la verificación del tag obliga a recorrer
+    shifted = bytearray(qos_frame('abc', 20, tail='x'))
+    assert len(shifted) == len(short)
+    assert patches.apply(memoryview(shifted)) is not None
+    assert read_varint(shifted, find_field(shifted, ('NQOS', 'DBPS')).value_offset)[0] == 55
+    assert rule.walks == 3, "Forma cacheada usada con otro layout"
+
+    # In-place: un varint de otra longitud no se escribe
+    assert PatchSet([FieldRule(0x02, 0x14, ('NQOS', 'DBPS'), 5000)]).apply(short) is None
+    print("✅ FieldRule: offsets por forma, fallback al walker y escritura in-place")
+
+
+def test_hot_reload():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'patches.json'
+        patches = PatchSet.from_file(path, fallback=DESYNC_PATCHES.rules)
+        assert patches.rules == DESYNC_PATCHES.rules and not patches.reload()
+
+        path.write_text(json.dumps([
+            {'name': 'qos', 'component': 2, 'command': '0x14', 'field': 'nqos.dbps', 'value': 55}
+        ]))
+        assert patches.reload(), "Archivo nuevo no recargado"
+        assert patches.rules == [FieldRule(2, 0x14, ('NQOS', 'DBPS'), 55, 'qos')]
+        assert PatchSet.from_config(patches.to_config()).rules == patches.rules
+
+        path.write_text('[{"component": 2')
+        os.utime(path, ns=(0, patches.mtime + 1))
+        assert not patches.reload() and len(patches) == 1, "JSON inválido debe mantener reglas"
+    print("✅ patches.json: recarga en caliente, reglas previas si es inválido")
+
+
+def test_validate_against_recording():
+    frames = [qos_frame('ab', 20), qos_frame('a much longer name', 20), qos_frame('ab', 9000),
+              notification(0x04, 0x50, 20)]
+    with tempfile.TemporaryDirectory() as tmp:
+        with PacketStore(Path(tmp) / 'capture.db') as store:
+            store.ingest_frames('s', (CapturedFrame(float(i), EA, GAME, f)
+                                      for i, f in enumerate(frames)))
+            recorded = [bytes(row['header']) + bytes(row['payload'])
+                        for row in store.iter_packets('s') if row['direction'] == DIRECTION_FROM_EA]
+
+    patches = PatchSet([FieldRule(0x02, 0x14, ('NQOS', 'DBPS'), 55, 'qos'),
+                        PatchRule(0x02, 0x14, ((40, 0x37),), 'legacy')])
+    field_report, offset_report = patches.validate(recorded)
+    assert recorded == frames, "validate() no debe modificar los frames"
+    assert (field_report.frames, field_report.applied, field_report.unresolved) == (3, 2, 1)
+    assert len(field_report.offsets) == 2, f"Offsets: {field_report.offsets}"
+    assert len(offset_report.fields) == 2, "El offset 40 cae en campos distintos según la forma"
+    print("✅ Validación contra sesión grabada: offsets por campo y campos por offset")
+
+
+if __name__ == '__main__':
+    test_in_place_on_writable_view()
+    test_proxy_zero_copy_for_unmatched()
+    test_config_roundtrip_and_validation()
+    test_field_rule_follows_layout()
+    test_hot_reload()
+    test_validate_against_recording()
+    print("\n✅ TODOS LOS TESTS PASARON")
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test del lector pcap/pcapng en streaming
+Genera capturas sintéticas y valida el reensamblado TCP → frames Blaze
+"""
+
+import struct
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.analysis.pcap import TCPReassembler, TCPSegment, iter_blaze_frames
+from src.network.tdf import BlazeResponseBuilder
+
+
+def blaze_frame(component: int, command: int, msg_id: int, payload: bytes = b'') -> bytes:
+    """Frame Blaze mínimo: header de 12 bytes + payload"""
+    header = bytearray(12)
+    struct.pack_into('>H', header, 0, len(payload))
+    header[3] = component
+    header[5] = command
+    struct.pack_into('>H', header, 10, msg_id)
+    return bytes(header) + payload
+
+
+def tcp_packet(seq: int, payload: bytes, flags: int = 0x18,
+               sport: int = 50000, dport: int = 10010) -> bytes:
+    """Ethernet + IPv4 + TCP"""
+    tcp = struct.pack('>HHIIBBHHH', sport, dport, seq, 0, 5 << 4, flags, 65535, 0, 0)
+    total = 20 + len(tcp) + len(payload)
+    ip = struct.pack('>BBHHHBBH4s4s', 0x45, 0, total, 0, 0, 64, 6, 0,
+                     bytes([10, 0, 0, 2]), bytes([159, 153, 70, 49]))
+    eth = b'\x00' * 12 + b'\x08\x00'
+    return eth + ip + tcp + payload
+
+
+def write_pcap(path: Path, packets):
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<IHHiIII', 0xA1B2C3D4, 2, 4, 0, 0, 65535, 1))
+        for i, pkt in enumerate(packets):
+            f.write(struct.pack('<IIII', 1000 + i, 0, len(pkt), len(pkt)))
+            f.write(pkt)
+
+
+def write_pcapng(path: Path, packets):
+    def block(block_type: int, body: bytes) -> bytes:
+        body += b'\x00' * (-len(body) % 4)
+        total = 12 + len(body)
+        return struct.pack('<II', block_type, total) + body + struct.pack('<I', total)
+
+    with open(path, 'wb') as f:
+        f.write(block(0x0A0D0D0A, struct.pack('<IHHq', 0x1A2B3C4D, 1, 0, -1)))
+        f.write(block(0x00000001, struct.pack('<HHI', 1, 0, 65535)))
+        for i, pkt in enumerate(packets):
+            ts = (1000 + i) * 1_000_000
+            f.write(block(0x00000006, struct.pack('<IIIII', 0, ts >> 32, ts & 0xFFFFFFFF,
+                                                  len(pkt), len(pkt)) + pkt))
+
+
+def build_session():
+    """Tres frames, partidos y desordenados en varios segmentos TCP"""
+    login = blaze_frame(0x01, 0xC8, 2, b'A' * 40)
+    ping = blaze_frame(0x09, 0x02, 3)
+    pong = BlazeResponseBuilder.build_ping_response(3)
+    stream = login + ping + pong
+
+    isn = 0xFFFFFFF0  # Fuerza wrap-around del número de secuencia
+    base = (isn + 1) & 0xFFFFFFFF
+    cut1, cut2 = 30, 60
+    seg = lambda start, end: tcp_packet((base + start) & 0xFFFFFFFF, stream[start:end])
+
+    packets = [
+        tcp_packet(isn, b'', flags=0x02),  # SYN
+        seg(0, cut1),
+        seg(cut2, len(stream)),            # Llega adelantado
+        seg(cut1, cut2),
+        seg(0, cut1),                      # Retransmisión
+    ]
+    return packets, [login, ping, pong]
+
+
+def check_frames(capture: Path, expected):
+    frames = list(iter_blaze_frames(capture))
+    assert [f.data for f in frames] == expected, "Frames reensamblados incorrectos"
+    assert frames[0].src == '10.0.0.2:50000', "Origen incorrecto"
+    assert frames[0].dst == '159.153.70.49:10010', "Destino incorrecto"
+    return frames
+
+
+def test_pcap_reassembly():
+    """pcap clásico con segmentos desordenados y retransmitidos"""
+    packets, expected = build_session()
+    with tempfile.TemporaryDirectory() as tmp:
+        capture = Path(tmp) / 'session.pcap'
+        write_pcap(capture, packets)
+        frames = check_frames(capture, expected)
+    print(f"✅ pcap: {len(frames)} frames reensamblados")
+
+
+def test_pcapng_reassembly():
+    """pcapng (SHB/IDB/EPB) con el mismo stream"""
+    packets, expected = build_session()
+    with tempfile.TemporaryDirectory() as tmp:
+        capture = Path(tmp) / 'session.pcapng'
+        write_pcapng(capture, packets)
+        frames = check_frames(capture, expected)
+        assert frames[0].timestamp >= 1000, "Timestamp no leído"
+    print(f"✅ pcapng: {len(frames)} frames reensamblados")
+
+
+def test_fast_open_and_close():
+    """Payload en el SYN (TFO), huecos pendientes al FIN/RST y retransmisiones tardías"""
+    login = blaze_frame(0x01, 0xC8, 2, b'A' * 40)
+    ping = blaze_frame(0x09, 0x02, 3, b'B' * 30)
+    stream = login + ping
+    isn = 1000
+
+    def segment(offset: int, data: bytes, flags: int = 0x18, sport: int = 50000) -> TCPSegment:
+        return TCPSegment(0.0, '10.0.0.2', sport, '159.153.70.49', 10010,
+                          isn + 1 + offset, flags, data)
+
+    def feed(reassembler, *segments):
+        return [bytes(f.data) for s in segments for f in reassembler.feed(s)]
+
+    # FIN con un hueco pendiente: la retransmisión lo llena, la siguiente se ignora
+    reassembler = TCPReassembler()
+    syn = TCPSegment(0.0, '10.0.0.2', 50000, '159.153.70.49', 10010, isn, 0x02, login)
+    assert feed(reassembler, syn) == [login], "Payload del SYN (TFO) perdido"
+    fin = segment(len(login) + 20, stream[len(login) + 20:], flags=0x19)
+    assert feed(reassembler, fin) == [], "Frame entregado con un hueco delante"
+    assert reassembler.streams, "Stream eliminado con segmentos retenidos"
+    late = segment(len(login), stream[len(login):len(login) + 20])
+    assert feed(reassembler, late) == [ping], "La retransmisión tras el FIN no llenó el hueco"
+    assert not reassembler.streams, "Stream no eliminado tras drenar"
+    assert feed(reassembler, segment(len(login) + 5, stream[len(login) + 5:])) == [], \
+        "Retransmisión de un flujo cerrado resincronizada a mitad de frame"
+
+    # RST con lo retenido empezando en frame: se entrega saltando el hueco
+    reassembler = TCPReassembler()
+    frames = feed(reassembler, segment(-1, b'', flags=0x02, sport=50001),
+                  segment(len(login), ping, sport=50001),
+                  segment(0, b'', flags=0x04, sport=50001))
+    assert frames == [ping] and reassembler.gaps == 1, f"RST: {frames}"
+    assert not reassembler.streams, "Stream no eliminado tras RST"
+
+    # FIN cuyo hueco nunca se llena: se vacía al terminar la captura
+    reassembler = TCPReassembler()
+    frames = feed(reassembler, segment(-1, b'', flags=0x02, sport=50002),
+                  segment(len(login), ping, flags=0x19, sport=50002))
+    frames += [bytes(f.data) for f in reassembler.flush()]
+    assert frames == [ping], f"Fin de captura: {frames}"
+    print("✅ TCP: TFO, cierre con huecos y retransmisiones tardías")
+
+
+if __name__ == '__main__':
+    test_pcap_reassembly()
+    test_pcapng_reassembly()
+    test_fast_open_and_close()
+    print("\n✅ TODOS LOS TESTS PASARON")
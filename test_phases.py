@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Test de las fases de sesión
+Valida las transiciones pre_auth → auth_pending → authenticated → in_game
+→ closing, que tras el login su handler desaparece de la tabla, que un
+login rechazado vuelve a pre_auth y que los tres modos de túnel exponen
+las transiciones en métricas
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.network.blaze import BlazeFramer
+from src.network.metrics import MetricsRegistry
+from src.network.phases import (AUTH_PENDING, AUTHENTICATED, CLOSING, IN_GAME, PRE_AUTH,
+                                SessionPhase, command_key)
+from src.network.proxy import EACredentials, ProxyServer
+from testkit import FakeClock, RecordingEA, frame, start_ea, wait_for
+
+LOGIN = (0x01, 0xC8)
+KEEPALIVE = (0x0B, 0x8C)
+GAME = (0x02, 0x14)
+
+
+def test_transitions():
+    proxy = ProxyServer(credentials=EACredentials('a@b.c', 'pw', 'Skater'))
+    fake = FakeClock(50.0)
+    phase = SessionPhase(1, proxy.phase_tables, proxy.metrics, clock=fake)
+    replies = []
+
+    assert phase.client_frame(frame(*KEEPALIVE, 1), replies) is not None and not replies, \
+        "Keep-alive auto-respondido sin login"
+    assert phase.needs_inspection(frame(*LOGIN, 2))
+
+    fake.now += 1.5
+    injected = phase.client_frame(frame(*LOGIN, 2), replies)
+    assert injected[5] == 0x3C and phase.phase == AUTH_PENDING and phase.login_msg_id == 2
+    phase.ea_frame(frame(0x01, 0x3C, 9, msg_type=0x1000))
+    assert phase.phase == AUTH_PENDING, "Respuesta con otro msg_id aceptada como login"
+    fake.now += 0.25
+    phase.ea_frame(frame(0x01, 0x3C, 2, msg_type=0x1000))
+    assert phase.phase == AUTHENTICATED and phase.authenticated
+
+    # Autenticada: el login ya no está en la tabla de la fase
+    assert command_key(*LOGIN) not in phase.client and not phase.needs_inspection(frame(*LOGIN, 3))
+    assert phase.client_frame(frame(*KEEPALIVE, 4), replies) is not None and len(replies) == 1
+
+    phase.client_frame(frame(*GAME, 5), replies)
+    assert phase.phase == IN_GAME
+    assert command_key(*GAME) not in phase.client and phase.ea == {}
+    phase.enter(CLOSING)
+    assert phase.client == {}
+
+    metrics = proxy.metrics
+    assert [metrics.phase_entries[p] for p in (PRE_AUTH, AUTH_PENDING, AUTHENTICATED, IN_GAME, CLOSING)] \
+        == [1, 1, 1, 1, 1]
+    assert metrics.phase_time[PRE_AUTH].sum == 1.5 and metrics.phase_time[AUTH_PENDING].sum == 0.25
+    print("✅ Phases: pre_auth → auth_pending → authenticated → in_game → closing")
+
+
+def test_login_rejected():
+    proxy = ProxyServer()
+    phase = SessionPhase(1, proxy.phase_tables)
+    phase.client_frame(frame(*LOGIN, 7), [])
+    assert phase.phase == AUTH_PENDING, "El login sin credenciales también espera a EA"
+    phase.ea_frame(frame(0x01, 0xC8, 7, msg_type=0x3000, error=0x0B))
+    assert phase.phase == PRE_AUTH and command_key(*LOGIN) in phase.client
+    print("✅ Phases: login rechazado vuelve a pre_auth")
+
+
+def test_metrics_render():
+    metrics = MetricsRegistry()
+    stats = metrics.open_session(1, ('127.0.0.1', 5000))
+    proxy = ProxyServer(metrics=metrics)
+    proxy.session_phase(1).enter(AUTH_PENDING)
+    assert stats.phase == AUTH_PENDING
+    text = metrics.render()
+    assert 'skate3_sessions_by_phase{phase="auth_pending"} 1' in text
+    assert 'skate3_session_phase_transitions_total{phase="auth_pending"} 1' in text
+    assert 'skate3_session_phase_seconds_count{phase="pre_auth"} 1' in text
+    proxy.close_phase(1)
+    assert not proxy.phases
+    print("✅ Phases: transiciones en /metrics")
+
+
+async def run_session(mode: str):
+    ea_server, ea_port = await start_ea(RecordingEA().handle)
+    proxy = ProxyServer(port=0, ea_server='127.0.0.1', ea_port=ea_port,
+                        credentials=EACredentials('a@b.c', 'pw', 'Skater'),
+                        fast_path=mode == 'fast path', passthrough=mode == 'passthrough')
+    proxy_task = asyncio.create_task(proxy.start())
+    await proxy.listening.wait()
+    proxy_port = proxy.server.sockets[0].getsockname()[1]
+
+    reader, writer = await asyncio.open_connection('127.0.0.1', proxy_port)
+    framer = BlazeFramer()
+    phases = []
+    for request, expected in ((frame(*LOGIN, 1), 1), (frame(*KEEPALIVE, 2), 2), (frame(*GAME, 3), 1)):
+        writer.write(request)
+        got = []
+        while len(got) < expected:
+            got += framer.feed(await asyncio.wait_for(reader.read(4096), timeout=5))
+        phases.append(next(iter(proxy.phases.values())).phase)
+    writer.close()
+    await writer.wait_closed()
+    await wait_for(lambda: not proxy.metrics.sessions)
+
+    entries = dict(proxy.metrics.phase_entries)
+    authenticated = proxy.authenticated
+    await proxy.stop()
+    proxy_task.cancel()
+    await asyncio.gather(proxy_task, return_exceptions=True)
+    ea_server.close()
+    return phases, entries, authenticated
+
+
+def test_tunnel_modes():
+    for mode in ('streams', 'fast path', 'passthrough'):
+        phases, entries, authenticated = asyncio.run(run_session(mode))
+        assert phases == [AUTHENTICATED, AUTHENTICATED, IN_GAME], f"{mode}: {phases}"
+        assert all(count == 1 for count in entries.values()), f"{mode}: {entries}"
+        assert not authenticated, f"{mode}: fase no cerrada"
+    print("✅ Phases: login, keep-alive y partida en los tres modos de túnel")
+
+
+if __name__ == '__main__':
+    test_transitions()
+    test_login_rejected()
+    test_metrics_render()
+    test_tunnel_modes()
+    print("\n✅ TODOS LOS TESTS PASARON")
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Test de reconexión transparente con EA
+Valida que un corte de EA a mitad de sesión no cierra a RPCS3: se
+reconecta, se repiten PreAuth y el login inyectado, se reenvía la request
+pendiente y las respuestas de replay no llegan al juego
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.network.blaze import BlazeFramer
+from src.network.proxy import ProxyServer, EACredentials
+from src.network.reconnect import UpstreamLink
+from src.network.tdf import BlazeResponseBuilder
+from testkit import frame, msg_id, start_ea
+
+
+class FlakyEA:
+    """
+    EA que responde cada request con una respuesta vacía, salvo en la
+    primera conexión: al recibir `drop_on` la corta sin responder.
+    """
+
+    def __init__(self, drop_on: int):
+        self.drop_on = drop_on
+        self.connections = []   # Frames (component, command, msg_id) por conexión
+
+    async def handle(self, reader, writer):
+        received = []
+        self.connections.append(received)
+        first = len(self.connections) == 1
+        framer = BlazeFramer()
+        while True:
+            data = await reader.read(4096)
+            if not data:
+                break
+            for f in framer.feed(data):
+                received.append((f[3], f[5], msg_id(f)))
+                if first and msg_id(f) == self.drop_on:
+                    writer.transport.abort()
+                    return
+                writer.write(BlazeResponseBuilder.build_empty_response(f[3], f[5], msg_id(f)))
+        writer.close()
+
+
+async def run_reconnect():
+    ea = FlakyEA(drop_on=3)
+    ea_server, ea_port = await start_ea(ea.handle)
+
+    proxy = ProxyServer(port=0, ea_server='127.0.0.1', ea_port=ea_port,
+                        credentials=EACredentials('player@example.com', 'secret', 'Player'))
+    proxy_task = asyncio.create_task(proxy.start())
+    await proxy.listening.wait()
+    proxy_port = proxy.server.sockets[0].getsockname()[1]
+
+    reader, writer = await asyncio.open_connection('127.0.0.1', proxy_port)
+    framer = BlazeFramer()
+
+    async def roundtrip(request):
+        writer.write(request)
+        await writer.drain()
+        frames = []
+        while not frames:
+            data = await asyncio.wait_for(reader.read(4096), timeout=5)
+            assert data, "El proxy cerró la conexión con RPCS3"
+            frames = framer.feed(data)
+        return [msg_id(f) for f in frames]
+
+    replies = []
+    replies += await roundtrip(frame(0x09, 0x07, 1))              # PreAuth
+    replies += await roundtrip(frame(0x01, 0xC8, 2, b'login'))    # Login → 0x3C
+    replies += await roundtrip(frame(0x04, 0x10, 3))              # EA corta aquí
+    replies += await roundtrip(frame(0x04, 0x11, 4))              # Sesión ya reanudada
+
+    writer.close()
+    snapshot = proxy.metrics.snapshot()
+    await proxy.stop()
+    proxy_task.cancel()
+    await asyncio.gather(proxy_task, return_exceptions=True)
+    ea_server.close()
+    return replies, ea.connections, snapshot
+
+
+def test_reconnect_replays_session():
+    replies, connections, snapshot = asyncio.run(run_reconnect())
+    assert replies == [1, 2, 3, 4], f"Respuestas vistas por RPCS3: {replies}"
+    assert len(connections) == 2, f"Conexiones a EA: {len(connections)}"
+
+    replayed = connections[1]
+    assert replayed[0] == (0x09, 0x07, 0xFFFF), f"PreAuth no repetido: {replayed}"
+    assert replayed[1] == (0x01, 0x3C, 0xFFFE), f"Login 0x3C no repetido: {replayed}"
+    assert replayed[2] == (0x04, 0x10, 3), f"Request pendiente no reenviada: {replayed}"
+    assert replayed[3] == (0x04, 0x11, 4)
+    assert snapshot['upstream_reconnects'] == 1 and snapshot['upstream_reconnects_failed'] == 0
+    print("✅ Reconnect: corte de EA invisible para RPCS3 (replay de PreAuth + login 0x3C)")
+
+
+class BufferWriter:
+    """Writer mínimo que acumula lo escrito"""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+
+async def run_msg_id_remap():
+    writer = BufferWriter()
+    link = UpstreamLink(None, 1, None, writer)
+    link._hidden.add(0xFFFF)   # Respuesta de replay aún pendiente
+
+    # RPCS3 usa justo el msg_id de la request de replay
+    link.write([frame(0x04, 0x20, 0xFFFF)])
+    sent_id = msg_id(writer.data)
+
+    replay_reply = link.accept_reply(BlazeResponseBuilder.build_empty_response(0x09, 0x07, 0xFFFF))
+    game_reply = link.accept_reply(BlazeResponseBuilder.build_empty_response(0x04, 0x20, sent_id))
+    return sent_id, replay_reply, game_reply
+
+
+def test_msg_id_remap():
+    sent_id, replay_reply, game_reply = asyncio.run(run_msg_id_remap())
+    assert sent_id == 0xFFFE, f"msg_id en conflicto no remapeado: {sent_id:#x}"
+    assert replay_reply is None, "Respuesta de replay reenviada a RPCS3"
+    assert msg_id(game_reply) == 0xFFFF, "Respuesta sin devolver al msg_id original"
+    print("✅ Reconnect: remapeo de msg_id en conflicto con el replay")
+
+
+async def run_reconnect_disabled():
+    ea = FlakyEA(drop_on=1)
+    ea_server, ea_port = await start_ea(ea.handle)
+
+    proxy = ProxyServer(port=0, ea_server='127.0.0.1', ea_port=ea_port, reconnect_attempts=0)
+    proxy_task = asyncio.create_task(proxy.start())
+    await proxy.listening.wait()
+    proxy_port = proxy.server.sockets[0].getsockname()[1]
+
+    reader, writer = await asyncio.open_connection('127.0.0.1', proxy_port)
+    writer.write(frame(0x04, 0x10, 1))
+    await writer.drain()
+    data = await asyncio.wait_for(reader.read(), timeout=5)
+    writer.close()
+
+    await proxy.stop()
+    proxy_task.cancel()
+    await asyncio.gather(proxy_task, return_exceptions=True)
+    ea_server.close()
+    return data, len(ea.connections)
+
+
+def test_reconnect_disabled():
+    data, connections = asyncio.run(run_reconnect_disabled())
+    assert data == b'' and connections == 1, "Con reconnect_attempts=0 la sesión debe cerrarse"
+    print("✅ Reconnect: deshabilitado, el corte de EA cierra la sesión")
+
+
+if __name__ == '__main__':
+    test_reconnect_replays_session()
+    test_msg_id_remap()
+    test_reconnect_disabled()
+    print("\n✅ TODOS LOS TESTS PASARON")
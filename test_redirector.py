@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test del redirector
+Valida la plantilla precalculada y el reparto entre varios backends
+"""
+
+import asyncio
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.config import ConfigManager
+from src.network.redirector import (
+    RedirectorServer, RedirectBackend, REDIRECT_RESPONSE,
+    ROUTING_LEAST_CONNECTIONS, ROUTING_ROUND_ROBIN, ROUTING_STICKY,
+)
+
+REQUEST = bytes.fromhex('000000050001000000001234')
+
+
+def test_template_layout():
+    backend = RedirectBackend('127.0.0.1', 9999)
+    template = backend.template
+    assert len(template) == len(REDIRECT_RESPONSE) == 82, "Tamaño de respuesta incorrecto"
+    assert template[26:35] == b'127.0.0.1', "Hostname mal insertado"
+    assert template[66:68] == (9999).to_bytes(2, 'big'), "Puerto mal insertado"
+    assert template[:26] == REDIRECT_RESPONSE[:26], "Cabecera alterada"
+    print("✅ Plantilla: hostname y puerto precalculados")
+
+
+def test_routing_policies():
+    backends = [('127.0.0.1', 9999), ('127.0.0.1', 10000), ('127.0.0.1', 10001)]
+
+    rr = RedirectorServer(backends=backends)
+    ports = [rr.select_backend('10.0.0.1').port for _ in range(6)]
+    assert ports == [9999, 10000, 10001, 9999, 10000, 10001], f"Round-robin incorrecto: {ports}"
+
+    sticky = RedirectorServer(backends=backends, routing=ROUTING_STICKY)
+    first = sticky.select_backend('192.168.1.20')
+    assert all(sticky.select_backend('192.168.1.20') is first for _ in range(5)), "Sticky no es estable"
+
+    least = RedirectorServer(backends=backends, routing=ROUTING_LEAST_CONNECTIONS)
+    loads = {9999: 4, 10000: 1, 10001: 2}
+    for backend in least.backends:
+        backend.load = lambda port=backend.port: loads[port]
+    assert least.select_backend(None).port == 10000, "Least-connections no eligió el menos cargado"
+
+    try:
+        RedirectorServer(routing='random')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Política desconocida aceptada")
+    print("✅ Routing: round-robin, sticky y least-connections")
+
+
+def test_least_connections_live():
+    backends = [('127.0.0.1', 9999), ('10.0.0.5', 9999)]
+    redirector = RedirectorServer(backends=backends, routing=ROUTING_LEAST_CONNECTIONS)
+    local, remote = redirector.backends
+
+    # Sin callback de carga: clientes vivos, no redirecciones acumuladas
+    for host in ('192.168.1.2', '192.168.1.3'):
+        redirector.assign(host, redirector.select_backend(host))
+    assert [local.clients, remote.clients] == [1, 1]
+    redirector.assign('192.168.1.2', remote)
+    assert [local.clients, remote.clients] == [0, 2], "El backend anterior no se liberó"
+    assert redirector.select_backend('192.168.1.4') is local
+
+    # Carga solo en un backend: no se mezclan medidas, siguen los clientes
+    local.load = lambda: 5
+    assert redirector.select_backend('192.168.1.4') is local, "Sesiones comparadas con clientes"
+    remote.load = lambda: 7
+    assert redirector.select_backend('192.168.1.4') is local
+    remote.load = lambda: 3
+    assert redirector.select_backend('192.168.1.4') is remote, "Carga de todos los backends ignorada"
+    print("✅ Routing: least-connections con carga viva")
+
+
+def test_settings():
+    with tempfile.TemporaryDirectory() as tmp:
+        config = ConfigManager(Path(tmp))
+        settings = config.load_settings()
+        assert settings.redirect_backends == [] and settings.redirect_routing == ROUTING_ROUND_ROBIN
+        settings.redirect_backends = ['127.0.0.1:9999', '127.0.0.1:10000']
+        settings.redirect_routing = ROUTING_STICKY
+        config.save_settings(settings)
+        loaded = config.load_settings()
+        assert loaded.redirect_backends == settings.redirect_backends
+        assert loaded.redirect_routing == ROUTING_STICKY
+    print("✅ Settings: redirectBackends y redirectRouting")
+
+
+async def run_redirect():
+    redirector = RedirectorServer(port=0, backends=[('127.0.0.1', 9999), ('127.0.0.1', 10000)])
+    task = asyncio.create_task(redirector.start())
+    await redirector.listening.wait()
+    port = redirector.server.sockets[0].getsockname()[1]
+
+    responses = []
+    for _ in range(2):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(REQUEST)
+        await writer.drain()
+        responses.append(await asyncio.wait_for(reader.read(), timeout=2))
+        writer.close()
+
+    await redirector.stop()
+    task.cancel()
+    return redirector, responses
+
+
+def test_redirect_roundtrip():
+    redirector, responses = asyncio.run(run_redirect())
+    for response, backend in zip(responses, redirector.backends):
+        assert response[10:12] == REQUEST[10:12], "Sequence number no copiado"
+        assert response[:10] == backend.template[:10] and response[12:] == backend.template[12:], \
+            "Respuesta distinta de la plantilla"
+    # Mismo cliente (127.0.0.1) dos veces: solo cuenta en el último backend
+    assert [b.clients for b in redirector.backends] == [0, 1], "Reconexión contada dos veces"
+    assert redirector.metrics.redirects == 2, "Redirecciones no contabilizadas"
+    print("✅ Redirector: respuestas desde plantilla repartidas entre backends")
+
+
+if __name__ == '__main__':
+    test_template_layout()
+    test_routing_policies()
+    test_least_connections_live()
+    test_settings()
+    test_redirect_roundtrip()
+    print("\n✅ TODOS LOS TESTS PASARON")
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Test de la caché de respuestas
+Valida el re-sellado de msg_id, el TTL por comando, que las respuestas de
+error no se guardan, la expulsión LRU y que una segunda sesión recibe la
+configuración del arranque sin ir a EA en los tres modos de túnel
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.network.blaze import BlazeFramer
+from src.network.metrics import MetricsRegistry
+from src.network.proxy import ProxyServer
+from src.network.response_cache import ResponseCache, parse_command_key
+from testkit import FakeClock, frame, msg_id
+
+
+CONFIG = (0x09, 0x01)
+
+
+def test_hit_restamps_msg_id():
+    metrics = MetricsRegistry()
+    cache = ResponseCache({CONFIG: 60}, metrics=metrics)
+    assert cache.lookup(1, frame(*CONFIG, 5, b'CFID')) is None
+    # Una notificación con el mismo msg_id no cuenta como respuesta
+    cache.store(1, frame(*CONFIG, 5, b'other', msg_type=0x2000))
+    cache.store(1, frame(*CONFIG, 5, b'config-data', msg_type=0x1000))
+
+    hit = cache.lookup(2, frame(*CONFIG, 77, b'CFID'))
+    assert hit is not None and msg_id(hit) == 77 and hit.endswith(b'config-data')
+    assert cache.lookup(2, frame(*CONFIG, 78, b'OTHER')) is None, "Otro payload, otra entrada"
+    assert cache.lookup(2, frame(0x04, 0x10, 79)) is None, "Comando no cacheable"
+    assert metrics.cache_hits == 1 and metrics.cache_misses == 2
+    print("✅ Cache: respuesta servida con el msg_id de la request")
+
+
+def test_ttl_and_errors():
+    fake = FakeClock(100.0)
+    cache = ResponseCache({CONFIG: 10}, clock=fake)
+    cache.lookup(1, frame(*CONFIG, 1))
+    cache.store(1, frame(*CONFIG, 1, b'x', msg_type=0x1000))
+    fake.now += 9
+    assert cache.lookup(1, frame(*CONFIG, 2)) is not None
+    fake.now += 2
+    assert cache.lookup(1, frame(*CONFIG, 3)) is None, "Entrada caducada servida"
+
+    cache.store(1, frame(*CONFIG, 3, msg_type=0x3000, error=0x10))
+    assert cache.lookup(1, frame(*CONFIG, 4)) is None, "Respuesta de error guardada"
+    cache.end_session(1)
+    assert not cache._pending
+    print("✅ Cache: TTL por comando y errores sin cachear")
+
+
+def test_lru_eviction():
+    metrics = MetricsRegistry()
+    cache = ResponseCache({CONFIG: 60}, max_entries=2, metrics=metrics)
+    for i, payload in enumerate((b'a', b'b')):
+        cache.lookup(1, frame(*CONFIG, i, payload))
+        cache.store(1, frame(*CONFIG, i, payload, msg_type=0x1000))
+    cache.lookup(1, frame(*CONFIG, 10, b'a'))       # 'a' pasa a ser la más reciente
+    cache.lookup(1, frame(*CONFIG, 11, b'c'))
+    cache.store(1, frame(*CONFIG, 11, b'c', msg_type=0x1000))
+
+    assert len(cache) == 2 and metrics.cache_evictions == 1
+    assert cache.lookup(1, frame(*CONFIG, 12, b'a')) is not None
+    assert cache.lookup(1, frame(*CONFIG, 13, b'b')) is None, "Se expulsó la entrada equivocada"
+    assert parse_command_key('0x09/0x01') == CONFIG
+    print("✅ Cache: expulsión LRU")
+
+
+async def run_repeated_startup(mode: str):
+    ea_received = []
+
+    async def slow_ea(reader, writer):
+        framer = BlazeFramer()
+        while True:
+            data = await reader.read(4096)
+            if not data:
+                break
+            for f in framer.feed(data):
+                ea_received.append((f[3], f[5]))
+                await asyncio.sleep(0.05)
+                writer.write(frame(f[3], f[5], msg_id(f), b'config-' + bytes([f[5]]), msg_type=0x1000))
+        writer.close()
+
+    ea_server = await asyncio.start_server(slow_ea, '127.0.0.1', 0)
+    ea_port = ea_server.sockets[0].getsockname()[1]
+    proxy = ProxyServer(port=0, ea_server='127.0.0.1', ea_port=ea_port,
+                        fast_path=mode == 'fast path', passthrough=mode == 'passthrough')
+    proxy_task = asyncio.create_task(proxy.start())
+    await proxy.listening.wait()
+    proxy_port = proxy.server.sockets[0].getsockname()[1]
+
+    async def startup():
+        """Configuración + una request normal, como el arranque del juego"""
+        started = time.perf_counter()
+        reader, writer = await asyncio.open_connection('127.0.0.1', proxy_port)
+        framer = BlazeFramer()
+        replies = []
+        for request in (frame(*CONFIG, 1, b'CFID'), frame(0x04, 0x10, 2)):
+            writer.write(request)
+            got = []
+            while not got:
+                got = framer.feed(await asyncio.wait_for(reader.read(4096), timeout=5))
+            replies += [(msg_id(f), bytes(f[12:])) for f in got]
+        writer.close()
+        await writer.wait_closed()
+        return replies, time.perf_counter() - started
+
+    first, first_time = await startup()
+    second, second_time = await startup()
+
+    snapshot = proxy.metrics.snapshot()
+    await proxy.stop()
+    proxy_task.cancel()
+    await asyncio.gather(proxy_task, return_exceptions=True)
+    ea_server.close()
+    return first, second, first_time, second_time, ea_received, snapshot
+
+
+def test_repeated_startup():
+    for mode in ('streams', 'fast path', 'passthrough'):
+        first, second, first_time, second_time, ea_received, snapshot = \
+            asyncio.run(run_repeated_startup(mode))
+        assert first == second == [(1, b'config-\x01'), (2, b'config-\x10')], f"{mode}: {second}"
+        assert ea_received.count(CONFIG) == 1, f"{mode}: la configuración volvió a EA"
+        assert snapshot['cache_hits'] == 1 and snapshot['cache_misses'] == 1, snapshot
+        assert second_time < first_time, f"{mode}: {second_time:.3f}s >= {first_time:.3f}s"
+    print("✅ Cache: la segunda sesión arranca sin esperar a EA por la configuración")
+
+
+if __name__ == '__main__':
+    test_hit_restamps_msg_id()
+    test_ttl_and_errors()
+    test_lru_eviction()
+    test_repeated_startup()
+    print("\n✅ TODOS LOS TESTS PASARON")
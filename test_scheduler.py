@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test del scheduler de escritura con prioridades
+Valida que con el transporte lleno los frames de estado de juego y
+keep-alive adelantan al tráfico masivo encolado, el backpressure por high/low water, las métricas de
+espera por clase y la propagación de errores de escritura
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.network.metrics import MetricsRegistry
+from src.network.scheduler import BULK, NORMAL, REALTIME, WriteScheduler, classify
+from testkit import frame
+
+
+def test_classify():
+    assert classify(frame(0x02, 0x14)) == REALTIME, "Estado de partida"
+    assert classify(frame(0x09, 0x02)) == REALTIME, "Ping"
+    assert classify(frame(0x0B, 0x8C)) == REALTIME, "Keep-alive 0x0B"
+    assert classify(frame(0x19, 0x01)) == BULK, "Mensajería"
+    assert classify(frame(0x07, 0x05)) == BULK, "Stats"
+    assert classify(frame(0x09, 0x07)) == NORMAL
+    assert classify(frame(0x04, 0x10)) == NORMAL
+    print("✅ Scheduler: clasificación por componente/comando")
+
+
+class SlowSink:
+    """Destino con transporte lleno hasta que se libera `release`"""
+
+    def __init__(self, fail: bool = False):
+        self.written = []
+        self.release = asyncio.Event()
+        self.fail = fail
+
+    def can_write(self) -> bool:
+        return self.release.is_set()
+
+    def write(self, frames):
+        self.written.extend((f[3], f[11]) for f in frames)
+
+    async def drain(self):
+        if self.fail:
+            raise ConnectionResetError("cliente desconectado")
+        await self.release.wait()
+
+
+async def run_priority():
+    sink = SlowSink()
+    metrics = MetricsRegistry()
+    scheduler = WriteScheduler(sink, 'from_ea', metrics)
+
+    # Ráfaga de mensajería con el transporte lleno: queda en cola
+    await scheduler.put([frame(0x19, 0x01, msg_id=i, payload=bytes(16 * 1024)) for i in range(8)])
+    await asyncio.sleep(0)
+    # Llega estado de juego mientras la ráfaga sigue en cola
+    await scheduler.put([frame(0x02, 0x14, msg_id=99, payload=bytes(100))])
+    sink.release.set()
+    await scheduler.flush()
+    # Con sitio en el transporte se escribe directamente
+    await scheduler.put([frame(0x04, 0x10, msg_id=100)])
+    await scheduler.close()
+    return sink.written, metrics
+
+
+def test_realtime_overtakes_bulk():
+    written, metrics = asyncio.run(run_priority())
+    assert written[0] == (0x02, 99), f"El frame de juego no adelantó a la ráfaga: {written}"
+    assert written[-1] == (0x04, 100)
+    assert len(written) == 10
+
+    waits = metrics.queue_wait
+    assert waits[('from_ea', 'bulk')].count == 8 and waits[('from_ea', 'realtime')].count == 1
+    rendered = metrics.render()
+    assert 'skate3_write_queue_wait_seconds_count{direction="from_ea",class="realtime"} 1' in rendered
+    assert 'skate3_write_queue_wait_seconds_bucket{direction="from_ea",class="bulk",le="+Inf"} 8' in rendered
+    print("✅ Scheduler: estado de juego adelanta a la mensajería encolada")
+
+
+async def run_backpressure():
+    sink = SlowSink()
+    scheduler = WriteScheduler(sink, 'to_ea', high_water=32 * 1024, low_water=8 * 1024)
+    await scheduler.put([frame(0x04, 0x10, payload=bytes(1000))])
+    await asyncio.sleep(0)
+
+    # Por encima de high_water put() no vuelve hasta que la cola baja
+    put = asyncio.create_task(scheduler.put([frame(0x19, 0x01, payload=bytes(8000)) for _ in range(6)]))
+    await asyncio.sleep(0.05)
+    blocked = not put.done()
+    queued = scheduler.queued_bytes
+    sink.release.set()
+    await asyncio.wait_for(put, timeout=2)
+    await scheduler.flush()
+    await scheduler.close()
+    return blocked, queued, scheduler.queued_bytes
+
+
+def test_backpressure():
+    blocked, queued, final = asyncio.run(run_backpressure())
+    assert blocked, "put() no esperó con la cola por encima de high_water"
+    assert queued > 32 * 1024
+    assert final == 0
+    print("✅ Scheduler: backpressure con high/low water")
+
+
+async def run_sink_error():
+    scheduler = WriteScheduler(SlowSink(fail=True), 'from_ea')
+    await scheduler.put([frame(0x04, 0x10)])
+    try:
+        await scheduler.flush()
+    except ConnectionResetError:
+        pass
+    try:
+        await scheduler.put([frame(0x04, 0x10)])
+        raised = False
+    except ConnectionResetError:
+        raised = True
+    await scheduler.close()
+    return raised
+
+
+def test_sink_error_propagates():
+    assert asyncio.run(run_sink_error()), "El error de escritura no llegó al túnel"
+    print("✅ Scheduler: los errores de escritura terminan el túnel")
+
+
+if __name__ == '__main__':
+    test_classify()
+    test_realtime_overtakes_bulk()
+    test_backpressure()
+    test_sink_error_propagates()
+    print("\n✅ TODOS LOS TESTS PASARON")
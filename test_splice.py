@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test del modo passthrough (splice)
+Valida que los cuerpos grandes se reenvían intactos por splice, que el
+parche anti-desync se sigue aplicando y que el RTT se mide con el header
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.network.blaze import BlazeFramer
+from src.network.proxy import ProxyServer
+from src.network.splice import SPLICE_AVAILABLE
+from src.network.tdf import BlazeResponseBuilder
+from testkit import PING, frame, msg_id, start_ea, wait_for
+
+def pattern(size: int) -> bytes:
+    return bytes(range(256)) * (size // 256) + bytes(size % 256)
+
+
+async def run_passthrough_roundtrip():
+    big_up = frame(0x04, 0x10, payload=pattern(50_000))
+    big_down = frame(0x04, 0x50, msg_type=0x2000, payload=pattern(0xFFFF))
+    desync = frame(0x02, 0x14, msg_type=0x2000, payload=bytes(range(200)))
+    received_by_ea = bytearray()
+
+    async def fake_ea(reader, writer):
+        framer = BlazeFramer()
+        frames = []
+        while len(frames) < 2:
+            data = await reader.read(65536)
+            received_by_ea.extend(data)
+            frames += framer.feed(data)
+        writer.write(BlazeResponseBuilder.build_ping_response(msg_id(frames[0]) % 40) + big_down + desync)
+        await writer.drain()
+        writer.close()
+
+    ea_server, ea_port = await start_ea(fake_ea)
+
+    proxy = ProxyServer(port=0, ea_server='127.0.0.1', ea_port=ea_port, passthrough=True)
+    proxy_task = asyncio.create_task(proxy.start())
+    await proxy.listening.wait()
+    proxy_port = proxy.server.sockets[0].getsockname()[1]
+
+    reader, writer = await asyncio.open_connection('127.0.0.1', proxy_port)
+    writer.write(PING)
+    # Frame grande en dos escrituras: el resto del cuerpo debe ir por splice
+    writer.write(big_up[:1000])
+    await writer.drain()
+    # Esperar a que el proxy haya reenviado el principio (EA ya conectado)
+    while len(received_by_ea) < len(PING) + 1000:
+        await asyncio.sleep(0.005)
+    writer.write(big_up[1000:])
+    await writer.drain()
+
+    response = await asyncio.wait_for(
+        reader.readexactly(20 + len(big_down) + len(desync)), timeout=5
+    )
+    eof = await asyncio.wait_for(reader.read(), timeout=2)
+    writer.close()
+
+    await wait_for(lambda: not proxy.metrics.sessions)
+
+    await proxy.stop()
+    proxy_task.cancel()
+    ea_server.close()
+    return proxy, response, bytes(received_by_ea), big_up, big_down, desync, eof
+
+
+def test_passthrough_roundtrip():
+    proxy, response, received_by_ea, big_up, big_down, desync, eof = \
+        asyncio.run(run_passthrough_roundtrip())
+
+    assert received_by_ea == PING + big_up, "Frames RPCS3 → EA alterados en passthrough"
+    assert msg_id(response) == 7, "msg_id de la respuesta incorrecto"
+    assert response[20:20 + len(big_down)] == big_down, "Frame grande EA → RPCS3 corrompido"
+
+    patched = response[20 + len(big_down):]
+    assert patched[112] == 0x00 and patched[56] == 0x37 and patched[37] == 0x37, \
+        "Parche anti-desync no aplicado en passthrough"
+    assert proxy.metrics.desync_patches == 1
+    assert eof == b'', "El cliente no recibió EOF al cerrar EA"
+
+    totals = proxy.metrics.snapshot()
+    assert totals['packets_to_ea'] == 2 and totals['packets_from_ea'] == 3, f"Contadores: {totals}"
+    assert totals['bytes_to_ea'] == len(PING) + len(big_up), f"Bytes: {totals}"
+    if SPLICE_AVAILABLE:
+        assert totals['spliced_bytes'] > 0, "Ningún cuerpo pasó por splice"
+    assert proxy.latency.histograms[(0x09, 0x02)].count == 1, "RTT no medido en passthrough"
+    assert not proxy.phases and not proxy.authenticated, "Estado de sesión no limpiado"
+    print(f"✅ Passthrough: {totals['spliced_bytes']} bytes por splice, parches y RTT OK")
+
+
+def test_passthrough_excludes_fast_path():
+    try:
+        ProxyServer(fast_path=True, passthrough=True)
+    except ValueError:
+        print("✅ fast_path y passthrough son excluyentes")
+        return
+    raise AssertionError("fast_path + passthrough debería fallar")
+
+
+if __name__ == '__main__':
+    test_passthrough_roundtrip()
+    test_passthrough_excludes_fast_path()
+    print("\n✅ TODOS LOS TESTS PASARON")
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test del arranque concurrente
+Valida el grafo de fases, el profiler y la cancelación del escaneo de memoria
+"""
+
+import asyncio
+import os
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.memory.scanner import RPCS3MemoryScanner, ScanCancelled
+from src.startup import StartupGraph, StartupProfiler
+from testkit import captured_logs
+
+
+async def run_graph_accepts_during_scan():
+    """Un 'escaneo' bloqueante en executor no impide aceptar conexiones"""
+    profiler = StartupProfiler()
+    graph = StartupGraph(profiler)
+    cancel = threading.Event()
+    order = []
+    state = {}
+
+    async def config():
+        order.append('config')
+
+    async def bind():
+        order.append('bind')
+        state['server'] = await asyncio.start_server(lambda r, w: w.close(), '127.0.0.1', 0)
+
+    async def scan():
+        order.append('scan')
+        # Simula verify_eboot + patches: bloquea hasta que se cancela
+        await asyncio.get_running_loop().run_in_executor(None, cancel.wait, 10)
+
+    graph.add('config load', config)
+    graph.add('bind', bind, after=['config load'])
+    graph.add('memory patching', scan, after=['bind'])
+    graph.start()
+
+    await graph.wait('bind')
+    profiler.mark_listening()
+
+    # Con el escaneo todavía en curso, el servidor ya acepta conexiones
+    port = state['server'].sockets[0].getsockname()[1]
+    reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout=1)
+    writer.close()
+    assert not graph.tasks['memory patching'].done(), "El escaneo terminó antes de tiempo"
+
+    cancel.set()
+    await asyncio.wait_for(graph.wait(), timeout=2)
+    state['server'].close()
+    return order, profiler
+
+
+def test_graph_binds_before_scan():
+    order, profiler = asyncio.run(run_graph_accepts_during_scan())
+    assert order == ['config', 'bind', 'scan'], f"Orden de fases incorrecto: {order}"
+
+    phases = {name: (start, end) for name, start, end in profiler.phases}
+    assert phases['bind'][1] <= phases['memory patching'][0], "El escaneo empezó antes del bind"
+    assert profiler.listening_at is not None and 'time-to-listen' in profiler.report()
+    print("✅ Grafo: bind antes del escaneo, conexiones aceptadas durante el escaneo")
+
+
+def test_graph_rejects_unknown_dependency():
+    graph = StartupGraph()
+    try:
+        graph.add('bind', lambda: None, after=['config load'])
+    except ValueError:
+        print("✅ Grafo: dependencia desconocida rechazada")
+        return
+    raise AssertionError("Dependencia desconocida aceptada")
+
+
+async def run_background_failure():
+    graph = StartupGraph()
+    served = asyncio.Event()
+
+    async def bind():
+        pass
+
+    async def update_check():
+        raise RuntimeError("sin red")
+
+    async def serve():
+        await graph.wait('bind')
+        await asyncio.sleep(0.05)
+        served.set()
+
+    graph.add('bind', bind)
+    graph.add('update check', update_check, after=['bind'])
+    graph.start()
+    graph.background('update check')
+    await serve()
+    await asyncio.sleep(0)
+    return served.is_set(), graph.tasks['update check']
+
+
+def test_background_failure_logged():
+    with captured_logs('src.startup') as records:
+        served, task = asyncio.run(run_background_failure())
+    assert served and task.done(), "El fallo en segundo plano detuvo el servicio"
+    assert any("'update check' falló: sin red" in r.getMessage() for r in records), \
+        "Fallo de la fase no registrado"
+    print("✅ Grafo: fallo de una fase en segundo plano registrado sin detener el servicio")
+
+
+def test_scan_cancellation():
+    scanner = RPCS3MemoryScanner(pid=os.getpid())
+    cancel = threading.Event()
+    cancel.set()
+    try:
+        scanner.find_pattern(b'\x90' * 7, cancel=cancel)
+    except ScanCancelled:
+        print("✅ Scanner: búsqueda cancelada")
+        return
+    raise AssertionError("La búsqueda no se canceló")
+
+
+if __name__ == '__main__':
+    test_graph_binds_before_scan()
+    test_graph_rejects_unknown_dependency()
+    test_background_failure_logged()
+    test_scan_cancellation()
+    print("\n✅ TODOS LOS TESTS PASARON")
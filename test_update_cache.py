@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test de la caché del UpdateManager
+Valida TTL, revalidación con ETag (304) y arranque sin red
+"""
+
+import json
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.config.update import UpdateManager
+
+USERNAMES = {'skater1': 'Skater One', 'skater2': 'Skater Two'}
+ETAG = '"v1"'
+
+
+class FakeGitHub(BaseHTTPRequestHandler):
+    """Sirve usernames.json con ETag y responde 304 si no cambió"""
+
+    requests_seen = []
+
+    def do_GET(self):
+        FakeGitHub.requests_seen.append(dict(self.headers))
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = json.dumps(USERNAMES).encode()
+        self.send_response(200)
+        self.send_header('ETag', ETAG)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_usernames_cache_revalidation():
+    server = HTTPServer(('127.0.0.1', 0), FakeGitHub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/usernames.json"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        updater = UpdateManager(cache_dir=Path(tmp), cache_ttl=3600, timeout=2)
+        updater.USERNAMES_URL = url
+        assert updater.load_cached_usernames() == {}, "Caché inicial no vacía"
+
+        # 1) Primera descarga: 200 + ETag guardado
+        assert updater.download_usernames() == USERNAMES, "Descarga inicial incorrecta"
+        assert len(FakeGitHub.requests_seen) == 1
+
+        # 2) Caché fresca: no toca la red
+        assert updater.download_usernames() == USERNAMES
+        assert len(FakeGitHub.requests_seen) == 1, "Caché fresca hizo petición"
+
+        # 3) TTL vencido: GET condicional → 304
+        updater.cache_ttl = 0
+        assert updater.download_usernames() == USERNAMES, "304 no devolvió la caché"
+        assert FakeGitHub.requests_seen[-1].get('If-None-Match') == ETAG, "Falta If-None-Match"
+
+        # 4) Sin red: se sirve la caché vieja
+        server.shutdown()
+        server.server_close()
+        assert updater.download_usernames() == USERNAMES, "Sin red no se usó la caché"
+        assert updater.load_cached_usernames() == USERNAMES, "Caché no disponible al arrancar"
+
+    print("✅ Caché: TTL, revalidación 304 y modo offline OK")
+
+
+if __name__ == '__main__':
+    test_usernames_cache_revalidation()
+    print("\n✅ TODOS LOS TESTS PASARON")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test del pool de conexiones precalentadas a EA
+Valida el precalentado, la adopción por el túnel, el descarte de conexiones
+cerradas por EA y la caducidad por inactividad
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.network.blaze import BlazeFramer
+from src.network.proxy import ProxyServer
+from src.network.tdf import BlazeResponseBuilder
+from src.network.upstream import UpstreamPool
+from testkit import PING, start_ea, wait_for
+
+
+class FakeEA:
+    """Servidor EA que cuenta conexiones y responde un ping por conexión"""
+
+    def __init__(self):
+        self.accepted = 0
+        self.writers = []
+
+    async def handle(self, reader, writer):
+        self.accepted += 1
+        self.writers.append(writer)
+        framer = BlazeFramer()
+        frames = []
+        while not frames:
+            data = await reader.read(4096)
+            if not data:
+                writer.close()
+                return
+            frames = framer.feed(data)
+        msg_id = (frames[0][10] << 8) | frames[0][11]
+        writer.write(BlazeResponseBuilder.build_ping_response(msg_id % 40))
+        await writer.drain()
+        writer.close()
+
+
+async def run_proxy_with_pool(**proxy_kwargs):
+    ea = FakeEA()
+    ea_server, ea_port = await start_ea(ea.handle)
+
+    proxy = ProxyServer(port=0, ea_server='127.0.0.1', ea_port=ea_port, upstream_pool=2,
+                        **proxy_kwargs)
+    proxy_task = asyncio.create_task(proxy.start())
+    await proxy.listening.wait()
+    proxy_port = proxy.server.sockets[0].getsockname()[1]
+
+    # Conexiones abiertas antes de que llegue ningún cliente
+    await wait_for(lambda: len(proxy.upstream) == 2)
+    warm_before_client = ea.accepted
+
+    reader, writer = await asyncio.open_connection('127.0.0.1', proxy_port)
+    writer.write(PING)
+    await writer.drain()
+    response = await asyncio.wait_for(reader.readexactly(20), timeout=5)
+    writer.close()
+    await wait_for(lambda: not proxy.metrics.sessions)
+
+    # El pool se rellena tras la adopción
+    await wait_for(lambda: len(proxy.upstream) == 2)
+    snapshot = proxy.metrics.snapshot()
+
+    await proxy.stop()
+    proxy_task.cancel()
+    await asyncio.gather(proxy_task, return_exceptions=True)
+    await wait_for(lambda: all(w.is_closing() for w in ea.writers))
+    ea_server.close()
+    return warm_before_client, response, snapshot, ea.accepted
+
+
+def test_login_adopts_warm_connection():
+    for mode in ({}, {'fast_path': True}, {'passthrough': True}):
+        warm, response, snapshot, accepted = asyncio.run(run_proxy_with_pool(**mode))
+        assert warm == 2, f"Pool no precalentado ({mode}): {warm}"
+        assert (response[10] << 8 | response[11]) == 7, "Respuesta incorrecta por conexión del pool"
+        assert snapshot['upstream_pool_hits'] == 1 and snapshot['upstream_pool_misses'] == 0, \
+            f"Hits/misses ({mode}): {snapshot}"
+        assert accepted == 3, f"El pool no se rellenó ({mode}): {accepted} conexiones"
+    print("✅ Pool upstream: precalentado, adopción y relleno (streams, fast path, passthrough)")
+
+
+async def run_pool_health():
+    ea = FakeEA()
+    ea_server, ea_port = await start_ea(ea.handle)
+
+    pool = UpstreamPool('127.0.0.1', ea_port, size=2, health_interval=0.05)
+    pool.start()
+    await wait_for(lambda: len(pool) == 2 and len(ea.writers) == 2)
+
+    # EA cierra una conexión en reposo: no debe entregarse
+    ea.writers[0].close()
+    await asyncio.sleep(0.05)
+    sock = await pool.acquire()
+    alive = sock.fileno() >= 0
+    sock.close()
+    discarded_closed = pool.discarded
+
+    # Caducidad por inactividad
+    await wait_for(lambda: len(pool) == 2)
+    pool.max_idle = 0.01
+    await asyncio.sleep(0.1)
+    expired = pool.discarded - discarded_closed
+
+    await pool.close()
+    await wait_for(lambda: all(w.is_closing() for w in ea.writers))
+    ea_server.close()
+    return alive, discarded_closed, expired, pool.hits, pool.misses
+
+
+def test_pool_health_and_expiry():
+    alive, discarded_closed, expired, hits, misses = asyncio.run(run_pool_health())
+    assert alive and hits == 1 and misses == 0, "No se entregó la conexión sana"
+    assert discarded_closed >= 1, "Conexión cerrada por EA entregada"
+    assert expired >= 2, f"Conexiones inactivas no caducadas: {expired}"
+    print("✅ Pool upstream: health check y caducidad por inactividad")
+
+
+if __name__ == '__main__':
+    test_login_adopts_warm_connection()
+    test_pool_health_and_expiry()
+    print("\n✅ TODOS LOS TESTS PASARON")
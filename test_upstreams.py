@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Test de failover entre endpoints de EA
+Valida la carrera escalonada (happy eyeballs) hacia el endpoint sano más
+rápido, la expulsión por fallos, la readmisión por sondeo y el proxy con
+varios upstreams contra servidores locales
+"""
+
+import asyncio
+import socket
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.network import upstream as upstream_module
+from src.network.blaze import BlazeFramer
+from src.network.metrics import MetricsRegistry
+from src.network.proxy import ProxyServer
+from src.network.tdf import BlazeResponseBuilder
+from src.network.upstream import UpstreamSet, parse_endpoint
+from testkit import PING
+
+
+class FakeEA:
+    """Servidor EA local que cuenta conexiones y responde pings"""
+
+    def __init__(self):
+        self.accepted = 0
+        self.server = None
+        self.port = None
+
+    async def start(self, port: int = 0):
+        self.server = await asyncio.start_server(self.handle, '127.0.0.1', port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def handle(self, reader, writer):
+        self.accepted += 1
+        framer = BlazeFramer()
+        while True:
+            data = await reader.read(4096)
+            if not data:
+                break
+            for frame in framer.feed(data):
+                msg_id = (frame[10] << 8) | frame[11]
+                writer.write(BlazeResponseBuilder.build_ping_response(msg_id % 40))
+        writer.close()
+
+    def close(self):
+        self.server.close()
+
+
+def free_port() -> int:
+    """Puerto en el que no escucha nadie (connect → refused)"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def run_race():
+    fast, slow = await FakeEA().start(), await FakeEA().start()
+    down = free_port()
+
+    # El endpoint lento tarda 0.5 s en conectar
+    real_open = upstream_module.open_socket
+
+    async def open_with_delay(host, port, timeout=5.0):
+        if port == slow.port:
+            await asyncio.sleep(0.5)
+        return await real_open(host, port, timeout)
+
+    upstream_module.open_socket = open_with_delay
+    try:
+        upstreams = UpstreamSet([('127.0.0.1', down), ('127.0.0.1', slow.port), ('127.0.0.1', fast.port)],
+                                stagger=0.05, eject_after=1)
+        start = time.perf_counter()
+        sock = await upstreams.connect()
+        elapsed = time.perf_counter() - start
+        peer = sock.getpeername()[1]
+        sock.close()
+
+        # Tras la primera carrera el más rápido va primero
+        order = [e.port for e in upstreams.ranked()]
+        sock = await upstreams.connect()
+        second_peer = sock.getpeername()[1]
+        sock.close()
+    finally:
+        upstream_module.open_socket = real_open
+
+    await asyncio.sleep(0.6)   # Dejar que cierre el intento lento cancelado
+    ejected = upstreams.endpoints[0].ejected
+    fast.close()
+    slow.close()
+    return peer, elapsed, order, second_peer, ejected, fast.port
+
+
+def test_race_picks_fastest_healthy():
+    peer, elapsed, order, second_peer, ejected, fast_port = asyncio.run(run_race())
+    assert peer == fast_port, f"La carrera no eligió el endpoint rápido: {peer}"
+    assert elapsed < 0.4, f"La carrera esperó al endpoint lento: {elapsed:.3f}s"
+    assert ejected, "Endpoint caído sin expulsar"
+    assert order[0] == fast_port, f"Orden por latencia incorrecto: {order}"
+    assert second_peer == fast_port
+    print(f"✅ Upstreams: happy eyeballs elige el endpoint sano más rápido ({elapsed * 1000:.0f} ms)")
+
+
+async def run_eject_readmit():
+    port = free_port()
+    metrics = MetricsRegistry()
+    upstreams = UpstreamSet([('127.0.0.1', port)], eject_after=3, eject_time=60, metrics=metrics)
+    endpoint = upstreams.endpoints[0]
+
+    for _ in range(3):
+        await upstreams.probe()
+    ejected = endpoint.ejected
+
+    # Expulsado y dentro de eject_time: no se sondea
+    ea = await FakeEA().start(port)
+    await upstreams.probe()
+    still_ejected = endpoint.ejected and ea.accepted == 0
+
+    # Pasado eject_time: un sondeo correcto lo readmite
+    upstreams.eject_time = 0
+    await upstreams.probe()
+    await asyncio.sleep(0.05)
+    readmitted = not endpoint.ejected
+    ea.close()
+    return ejected, still_ejected, readmitted, metrics.snapshot()['upstream_ejections']
+
+
+def test_eject_and_readmit():
+    ejected, still_ejected, readmitted, ejections = asyncio.run(run_eject_readmit())
+    assert ejected, "Endpoint sin expulsar tras 3 fallos"
+    assert still_ejected, "Endpoint readmitido antes de eject_time"
+    assert readmitted, "Endpoint sin readmitir tras sondeo correcto"
+    assert ejections == 1
+    print("✅ Upstreams: expulsión por fallos y readmisión por sondeo")
+
+
+async def run_proxy_failover(**mode):
+    ea = await FakeEA().start()
+    down = free_port()
+    proxy = ProxyServer(port=0, upstreams=[('127.0.0.1', down), ('127.0.0.1', ea.port)], **mode)
+    proxy.upstreams.eject_after = 1
+    proxy_task = asyncio.create_task(proxy.start())
+    await proxy.listening.wait()
+    proxy_port = proxy.server.sockets[0].getsockname()[1]
+
+    responses = []
+    for _ in range(2):
+        reader, writer = await asyncio.open_connection('127.0.0.1', proxy_port)
+        writer.write(PING)
+        await writer.drain()
+        responses.append(await asyncio.wait_for(reader.readexactly(20), timeout=5))
+        writer.close()
+
+    rendered = proxy.metrics.render()
+    await proxy.stop()
+    proxy_task.cancel()
+    await asyncio.gather(proxy_task, return_exceptions=True)
+    ea.close()
+    return responses, rendered, down
+
+
+def test_proxy_failover():
+    for mode in ({}, {'fast_path': True}, {'passthrough': True}, {'upstream_pool': 1}):
+        responses, rendered, down = asyncio.run(run_proxy_failover(**mode))
+        assert all((r[10] << 8 | r[11]) == 7 for r in responses), f"Respuestas incorrectas ({mode})"
+        assert f'skate3_upstream_healthy{{endpoint="127.0.0.1:{down}"}} 0' in rendered, \
+            f"Endpoint caído sin expulsar en /metrics ({mode})"
+    print("✅ Upstreams: el proxy sigue funcionando con el endpoint principal caído")
+
+
+def test_parse_endpoint():
+    assert parse_endpoint('gosredirector.ea.com:42127') == ('gosredirector.ea.com', 42127)
+    assert parse_endpoint('159.153.70.49') == ('159.153.70.49', 10010)
+    print("✅ Upstreams: parseo de host:puerto")
+
+
+if __name__ == '__main__':
+    test_race_picks_fastest_healthy()
+    test_eject_and_readmit()
+    test_proxy_failover()
+    test_parse_endpoint()
+    print("\n✅ TODOS LOS TESTS PASARON")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test del supervisor multi-proceso
+Valida SO_REUSEPORT, agregación de métricas (e histogramas) por Pipe y
+reinicio gradual
+"""
+
+import asyncio
+import socket
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.network.workers import ProxySupervisor
+from testkit import PING, ping_once_ea, start_ea, wait_for
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def ping_through(port: int) -> bytes:
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(PING)
+    await writer.drain()
+    response = await asyncio.wait_for(reader.readexactly(20), timeout=5)
+    writer.close()
+    await writer.wait_closed()
+    return response
+
+
+async def run_supervisor():
+    ea_server, ea_port = await start_ea(ping_once_ea())
+    port = free_port()
+
+    supervisor = ProxySupervisor(
+        workers=2, port=port, report_interval=0.2, drain_timeout=2,
+        ea_server='127.0.0.1', ea_port=ea_port
+    )
+    task = asyncio.create_task(supervisor.start())
+    await asyncio.wait_for(supervisor.listening.wait(), timeout=30)
+
+    results = {}
+    for _ in range(4):
+        await ping_through(port)
+    await wait_for(lambda: supervisor.metrics.aggregate()['sessions_opened'] == 4, timeout=10)
+    results['workers'] = sorted(supervisor.metrics.remote)
+    results['packets'] = supervisor.metrics.aggregate()['packets_to_ea']
+    results['rtt'] = supervisor.metrics.render()
+
+    # Reinicio gradual: el puerto sigue atendiendo
+    old_ids = set(supervisor.workers)
+    await asyncio.wait_for(supervisor.restart_workers(), timeout=60)
+    results['replaced'] = not (old_ids & set(supervisor.workers))
+    await ping_through(port)
+    await wait_for(lambda: supervisor.metrics.aggregate()['sessions_opened'] == 5, timeout=10)
+
+    await supervisor.stop()
+    await asyncio.wait_for(task, timeout=5)
+    results['final'] = supervisor.metrics.aggregate()
+    results['final_rtt'] = supervisor.metrics.histograms()['rtt/9/2'].count
+    ea_server.close()
+    return results
+
+
+def test_supervisor_workers():
+    results = asyncio.run(run_supervisor())
+    assert results['workers'] == ['1', '2'], f"Workers sin métricas: {results['workers']}"
+    assert results['packets'] == 4, "Paquetes no agregados entre workers"
+    assert results['replaced'], "restart_workers no reemplazó los workers"
+    assert results['final']['sessions_opened'] == 5, "Contadores perdidos al retirar workers"
+    assert results['final']['sessions_active'] == 0, "Sesiones activas tras stop()"
+    assert 'skate3_upstream_rtt_seconds{component="0x09",command="0x02",quantile="0.99"}' \
+        in results['rtt'], "RTT de los workers ausente en el supervisor"
+    assert results['final_rtt'] == 5, "Histogramas perdidos al retirar workers"
+    print("✅ Supervisor: 2 workers, métricas agregadas y reinicio gradual")
+
+
+if __name__ == '__main__':
+    test_supervisor_workers()
+    print("\n✅ TODOS LOS TESTS PASARON")
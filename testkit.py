@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Utilidades compartidas por los tests
+Constructores de frames Blaze, espera activa, reloj falso y servidores EA
+simulados contra los que levantar un ProxyServer
+"""
+
+import asyncio
+import logging
+from contextlib import contextmanager
+from typing import Callable, List, Tuple
+
+from src.network.blaze import BlazeFramer
+from src.network.tdf import BlazeResponseBuilder
+
+# Ping 0x09/0x02 de RPCS3 con msg_id 7
+PING = bytes.fromhex('000000090002000000000007')
+
+
+def frame(component: int, command: int, msg_id: int = 0, payload: bytes = b'',
+          msg_type: int = 0, error: int = 0) -> bytes:
+    """Frame Blaze con header de 12 bytes (REQUEST por defecto)"""
+    header = bytearray(12)
+    header[0:2] = len(payload).to_bytes(2, 'big')
+    header[3] = component
+    header[5] = command
+    header[6:8] = error.to_bytes(2, 'big')
+    header[8:10] = msg_type.to_bytes(2, 'big')
+    header[10:12] = msg_id.to_bytes(2, 'big')
+    return bytes(header) + payload
+
+
+def msg_id(data) -> int:
+    return (data[10] << 8) | data[11]
+
+
+class FakeClock:
+    """Reloj monotónico controlado por el test (se avanza sumando a `now`)"""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@contextmanager
+def captured_logs(name: str):
+    """Captura los registros emitidos por el logger `name` mientras dura el bloque"""
+    records: List[logging.LogRecord] = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger = logging.getLogger(name)
+    logger.addHandler(handler)
+    try:
+        yield records
+    finally:
+        logger.removeHandler(handler)
+
+
+async def wait_for(condition: Callable[[], bool], timeout: float = 5.0, interval: float = 0.01):
+    """Espera activa hasta que `condition()` se cumpla"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        if loop.time() > deadline:
+            raise AssertionError("Timeout esperando condición")
+        await asyncio.sleep(interval)
+
+
+class RecordingEA:
+    """EA que responde todo con respuestas vacías y anota lo recibido"""
+
+    def __init__(self):
+        self.connections = 0
+        self.closed = 0
+        self.frames = []
+
+    @property
+    def received(self):
+        """(component, command) de cada frame recibido"""
+        return [(f[3], f[5]) for f in self.frames]
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        framer = BlazeFramer()
+        while True:
+            data = await reader.read(4096)
+            if not data:
+                break
+            for f in framer.feed(data):
+                self.frames.append(f)
+                writer.write(BlazeResponseBuilder.build_empty_response(f[3], f[5], msg_id(f)))
+        self.closed += 1
+        writer.close()
+
+
+def ping_once_ea(delay: float = 0.0, extra: bytes = b''):
+    """
+    Handler de EA que responde con un ping (más `extra`) a la primera
+    request, tras `delay` segundos, y cierra: la sesión del proxy termina.
+    """
+
+    async def handle(reader, writer):
+        framer = BlazeFramer()
+        frames = []
+        while not frames:
+            data = await reader.read(4096)
+            if not data:
+                writer.close()
+                return
+            frames = framer.feed(data)
+        if delay:
+            await asyncio.sleep(delay)
+        writer.write(BlazeResponseBuilder.build_ping_response(msg_id(frames[0]) % 40) + extra)
+        await writer.drain()
+        writer.close()
+
+    return handle
+
+
+async def start_ea(handler) -> Tuple[asyncio.Server, int]:
+    """Servidor EA simulado en un puerto libre de 127.0.0.1"""
+    server = await asyncio.start_server(handler, '127.0.0.1', 0)
+    return server, server.sockets[0].getsockname()[1]
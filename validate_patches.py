@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Validación de reglas de parche contra sesiones grabadas
+Pasa los frames EA → RPCS3 de una captura por las reglas de patches.json
+(sin modificarlos) y muestra dónde aplicaría cada una
+
+Uso: python validate_patches.py <captura.json|.pcap|.db> [patches.json] [sesión]
+"""
+
+import sys
+from pathlib import Path
+
+from src.analysis.store import DIRECTION_FROM_EA, open_store
+from src.network.patches import DESYNC_PATCHES, PatchSet
+
+
+def validate_patches(source, patches: PatchSet, session=None):
+    store = open_store(source)
+    frames = (
+        bytes(row['header']) + bytes(row['payload'])
+        for row in store.iter_packets(session)
+        if row['direction'] == DIRECTION_FROM_EA
+    )
+    reports = patches.validate(frames)
+    store.close()
+
+    for report in reports:
+        print(f"{'='*80}")
+        print(f"{report.label}")
+        print(f"{'='*80}")
+        print(f"  Frames candidatos: {report.frames}")
+        print(f"  Aplicaría:         {report.applied}")
+        print(f"  Sin resolver:      {report.unresolved}")
+
+        if report.offsets:
+            print("  Offsets del campo:")
+            for offset, count in sorted(report.offsets.items()):
+                print(f"    {offset:5d}: {count} frames")
+            if len(report.offsets) > 1:
+                print("  ⚠️  El campo cambia de offset: una regla por offset absoluto fallaría")
+
+        if report.fields:
+            print("  Campo TDF bajo cada offset:")
+            for (offset, path), count in sorted(report.fields.items()):
+                print(f"    {offset:5d} → {path}: {count} frames")
+            offsets = [offset for offset, _ in report.fields]
+            if len(offsets) != len(set(offsets)):
+                print("  ⚠️  Un mismo offset cae en campos distintos: conviene una regla por campo")
+        print()
+    return reports
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    source = sys.argv[1]
+    patches = PatchSet.from_file(Path(sys.argv[2])) if len(sys.argv) > 2 else DESYNC_PATCHES
+    session = sys.argv[3] if len(sys.argv) > 3 else None
+
+    print(f"\n🔬 Validando {len(patches)} reglas contra: {source}\n")
+    validate_patches(source, patches, session)